@@ -0,0 +1,394 @@
+## File Name: bench_framework.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: Measure the overhead of the framework and the throughput of modules run through it.
+##          A synthetic evidence tree of user homes, files and chat logs is created, and the framework
+##          is run on it as a separate process with synthetic no-op, logging, I/O-bound and CPU-bound
+##          modules. Every scenario is timed end to end and through the run report the framework writes,
+##          and the results are saved as JSON so runs can be compared across versions.
+##
+## Usage: python bench_framework.py [users] [files_per_user] [chat_kilobytes] [json_path]
+
+## Standard imports (Static)
+import glob, json, os, platform, random, shutil, subprocess, sys, tempfile, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_framework_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "Framework", "bitCollector_framework.py")
+_modules_path   = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "Modules")
+
+## The synthetic modules. They are written to the temporary directory and reached through additional_paths.
+_bench_modules = {
+	"BenchNoop" : """
+_module_version = "BenchNoop"
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	return 0
+""",
+
+	"BenchLog" : """
+import logging
+
+_module_version    = "BenchLog"
+_module_parameters = {"record_count" : {"type" : "int", "default" : 10000, "min" : 1}}
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	logger = logging.getLogger("BenchLog")
+
+	for count in xrange(module_dict["settings"].record_count):
+		logger.info("Synthetic record %d of the logging benchmark with some text to format", count)
+
+	return 0
+""",
+
+	"BenchRead" : """
+_module_version    = "BenchRead"
+_module_parameters = {"root" : {"type" : "string", "required" : 1}}
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	for entry in framework_settings.file_walker.walk([module_dict["settings"].root], stop_token=module_dict["stop_token"]):
+		read_file = open(entry.path, 'rb')
+
+		while (read_file.read(1048576) != ""):
+			pass
+
+		read_file.close()
+		module_dict["account"].addFiles()
+
+	return 0
+""",
+
+	"BenchHash" : """
+_module_version    = "BenchHash"
+_module_parameters = {"root" : {"type" : "string", "required" : 1}}
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	paths = (entry.path for entry in framework_settings.file_walker.walk([module_dict["settings"].root], stop_token=module_dict["stop_token"]))
+
+	for path, digests in framework_settings.hash_service.hashFiles(paths):
+		module_dict["account"].addFiles()
+
+	return 0
+""",
+
+	"BenchCpu" : """
+_module_version    = "BenchCpu"
+_module_parameters = {"iterations" : {"type" : "int", "default" : 2000000, "min" : 1}}
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	total = 0
+
+	for count in xrange(module_dict["settings"].iterations):
+		total += count * count % 7
+
+	return 0
+""",
+
+	"BenchChat" : """
+import logging, ChatHarvest
+
+_module_version    = "BenchChat"
+_module_parameters = {"root" : {"type" : "string", "required" : 1}}
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	message_count = 0
+
+	for entry in framework_settings.file_walker.walk([module_dict["settings"].root], include=["*.txt", "*.xml"], stop_token=module_dict["stop_token"]):
+		if (entry.path.endswith(".xml")):
+			records = ChatHarvest.parseMsnHistory(entry.path, framework_settings.openFile)
+
+		else:
+			records = ChatHarvest.parseAimLog(entry.path, framework_settings.openFile)
+
+		for record in records:
+			message_count += 1
+
+		module_dict["account"].addFiles()
+
+	logging.getLogger("BenchChat").info("Parsed %d chat messages" % message_count)
+	return 0
+"""
+}
+
+## Classless Method Declarations
+
+## Method Name: makeEvidenceTree
+##
+## Purpose: Create user homes holding files of random sizes and AIM and MSN Messenger chat logs.
+##
+## Parameters
+## 1. root           - The directory to create the homes in.
+## 2. users          - The number of users.
+## 3. files_per_user - The number of files in each home.
+## 4. chat_kilobytes - The size of each chat log in kilobytes.
+##
+## Returns
+## The number of files and bytes created.
+def makeEvidenceTree(root, users, files_per_user, chat_kilobytes):
+	words      = ["hello", "meeting", "transfer", "account", "tomorrow", "password", "file", "sent", "ok", "lol"]
+	file_count = 0
+	byte_count = 0
+
+	for user_number in range(users):
+		user      = "user%03d" % user_number
+		documents = os.path.join(root, user, "Documents")
+
+		## Spread the files over a few directories so that the walker has subtrees to work on.
+		for file_number in range(files_per_user):
+			directory = os.path.join(documents, "folder%02d" % (file_number % 16))
+
+			if (os.path.isdir(directory) == 0):
+				os.makedirs(directory)
+
+			size = random.choice([512, 4096, 16384, 65536, 262144])
+			data_file = open(os.path.join(directory, "file%05d.bin" % file_number), 'wb')
+			data_file.write(os.urandom(size))
+			data_file.close()
+
+			file_count += 1
+			byte_count += size
+
+		## An AIM log and an MSN Messenger history of about chat_kilobytes each.
+		aim_dir = os.path.join(documents, "AIM Logs", user)
+		msn_dir = os.path.join(documents, "My Received Files", user + "1234", "History")
+		os.makedirs(aim_dir)
+		os.makedirs(msn_dir)
+
+		aim_file = open(os.path.join(aim_dir, "buddy.txt"), 'w')
+		aim_file.write("Session Start (" + user + ":buddy): Mon Mar 09 17:41:05 2015\n")
+
+		msn_file = open(os.path.join(msn_dir, "buddy1234.xml"), 'w')
+		msn_file.write("<?xml version=\"1.0\"?>\n<Log FirstSessionID=\"1\" LastSessionID=\"1\">\n")
+
+		written = 0
+		while (written < chat_kilobytes * 1024):
+			text = " ".join(random.choice(words) for word in range(8))
+
+			aim_line = "[17:41:%02d] %s: %s\n" % (written % 60, random.choice([user, "buddy"]), text)
+			msn_line = "<Message Date=\"3/9/2015\" Time=\"5:41:05 PM\" DateTime=\"2015-03-09T17:41:05.000Z\" SessionID=\"1\"><From><User FriendlyName=\"%s\"/></From><To><User FriendlyName=\"buddy\"/></To><Text>%s</Text></Message>\n" % (user, text)
+
+			aim_file.write(aim_line)
+			msn_file.write(msn_line)
+			written += len(msn_line)
+
+		aim_file.write("Session Close (buddy): Mon Mar 09 18:41:05 2015\n")
+		aim_file.close()
+
+		msn_file.write("</Log>\n")
+		msn_file.close()
+
+		file_count += 2
+		byte_count += os.path.getsize(os.path.join(aim_dir, "buddy.txt")) + os.path.getsize(os.path.join(msn_dir, "buddy1234.xml"))
+
+	return file_count, byte_count
+
+## Method Name: writeModules
+##
+## Purpose: Write the synthetic modules to a directory.
+##
+## Parameters
+## 1. module_dir - The directory to write the modules to.
+def writeModules(module_dir):
+	os.makedirs(module_dir)
+
+	for name in _bench_modules:
+		module_file = open(os.path.join(module_dir, name + ".py"), 'w')
+		module_file.write(_bench_modules[name].lstrip("\n"))
+		module_file.close()
+
+## Method Name: runFramework
+##
+## Purpose: Run the framework once as a separate process and read its run report.
+##
+## Parameters
+## 1. work_dir    - The temporary directory of the benchmark.
+## 2. name        - The name of the scenario. The logs of every scenario are kept apart.
+## 3. module_list - The module_list setting to run.
+## 4. settings    - (Optional) A dictionary of additional framework settings.
+##
+## Returns
+## The number of seconds the framework process took and its run report.
+def runFramework(work_dir, name, module_list, settings={}):
+	log_dir = os.path.join(work_dir, "logs", name)
+	config  = {"log_file": os.path.join(log_dir, name), "logging_format": "csv", "logging_level": "info", "log_to_file": 1, "log_to_stdout": 0, "max_workers": 4, "additional_paths": [{"path": os.path.join(work_dir, "modules")}, {"path": os.path.abspath(_modules_path)}], "module_list": module_list}
+	config.update(settings)
+
+	config_path = os.path.join(work_dir, name + ".json")
+	config_file = open(config_path, 'w')
+	json.dump(config, config_file)
+	config_file.close()
+
+	start_time = time.time()
+	framework  = subprocess.Popen([sys.executable, os.path.abspath(_framework_path), config_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+	output     = framework.communicate()[0]
+	total_time = time.time() - start_time
+
+	if (framework.returncode != 0):
+		raise RuntimeError("The framework failed in scenario " + name + ":\n" + output)
+
+	## Warm runs share the log directory, so read the newest report.
+	report_paths = sorted(glob.glob(os.path.join(log_dir, "*_report.json")), key=os.path.getmtime)
+
+	if (len(report_paths) == 0):
+		raise RuntimeError("The framework wrote no run report in scenario " + name + ":\n" + output)
+
+	report_file = open(report_paths[-1], 'r')
+	report      = json.load(report_file)
+	report_file.close()
+
+	for module in report["modules"]:
+		if (module["status"] != "completed"):
+			raise RuntimeError("Module " + module["name"] + " " + module["status"] + " in scenario " + name + ":\n" + output)
+
+	return total_time, report
+
+## Method Name: benchStartup
+##
+## Purpose: Time a run of a single no-op module, once cold and once with the module catalog and platform cache in place.
+##
+## Parameters
+## 1. work_dir - The temporary directory of the benchmark.
+def benchStartup(work_dir):
+	results = []
+
+	for state in ("cold", "warm"):
+		total_time, report = runFramework(work_dir, "startup", [{"name": "BenchNoop", "parameters": []}])
+		results.append({"scenario": "startup_" + state, "total_seconds": total_time, "scheduler_seconds": report["wall_seconds"]})
+
+	return results
+
+## Method Name: benchScheduling
+##
+## Purpose: Time many no-op modules to find the cost of scheduling a single module.
+##
+## Parameters
+## 1. work_dir     - The temporary directory of the benchmark.
+## 2. execution    - The execution mode of the modules. ("thread" or "process")
+## 3. module_count - The number of modules to run.
+def benchScheduling(work_dir, execution, module_count):
+	module_list        = [{"name": "BenchNoop", "parameters": [], "execution": execution}] * module_count
+	total_time, report = runFramework(work_dir, "scheduling_" + execution, module_list)
+
+	return {"scenario": "scheduling_" + execution, "modules": module_count, "total_seconds": total_time, "scheduler_seconds": report["wall_seconds"], "seconds_per_module": report["wall_seconds"] / module_count}
+
+## Method Name: benchLogging
+##
+## Purpose: Time a module writing many log records in a logging format and mode.
+##
+## Parameters
+## 1. work_dir       - The temporary directory of the benchmark.
+## 2. logging_format - The logging format. ("csv", "html" or "jsonl")
+## 3. logging_mode   - The logging mode. ("direct" or "queue")
+## 4. record_count   - The number of records to log.
+def benchLogging(work_dir, logging_format, logging_mode, record_count):
+	name               = "logging_" + logging_format + "_" + logging_mode
+	total_time, report = runFramework(work_dir, name, [{"name": "BenchLog", "parameters": [{"record_count": record_count}]}], {"logging_format": logging_format, "logging_mode": logging_mode})
+	module_time        = report["modules"][0]["usage"]["wall_seconds"]
+
+	## In queue mode the module only enqueues. The records are written by the end of the run, so the end-to-end rate covers both.
+	return {"scenario": name, "records": record_count, "total_seconds": total_time, "module_seconds": module_time, "records_per_second": record_count / module_time, "records_per_second_end_to_end": record_count / total_time}
+
+## Method Name: benchFiles
+##
+## Purpose: Time a module reading, hashing or parsing every file of the evidence tree.
+##
+## Parameters
+## 1. work_dir  - The temporary directory of the benchmark.
+## 2. name      - The name of the synthetic module. (BenchRead, BenchHash or BenchChat)
+## 3. root      - The root of the evidence tree.
+## 4. execution - The execution mode of the module.
+def benchFiles(work_dir, name, root, execution):
+	scenario           = "files_" + name[len("Bench"):].lower() + "_" + execution
+	total_time, report = runFramework(work_dir, scenario, [{"name": name, "parameters": [{"root": root}], "execution": execution}])
+	usage              = report["modules"][0]["usage"]
+	result             = {"scenario": scenario, "files": usage["file_count"], "total_seconds": total_time, "module_seconds": usage["wall_seconds"], "cpu_seconds": usage["cpu_seconds"], "cpu_scope": usage["cpu_scope"], "bytes_read": usage["bytes_read"], "io_scope": usage["io_scope"], "files_per_second": usage["file_count"] / usage["wall_seconds"], "megabytes_per_second": None}
+
+	## Thread-scoped byte counts leave out the walker and hashing threads reading for the module. The only module
+	## of the run is measured through the run usage of the whole framework process instead, which is approximate.
+	if (usage["io_scope"] == "thread"):
+		result["bytes_read"] = report["usage"]["bytes_read"]
+		result["io_scope"]   = "framework process"
+
+	## The byte counts are unavailable off Linux.
+	if (result["bytes_read"] != None):
+		result["megabytes_per_second"] = result["bytes_read"] / 1048576.0 / usage["wall_seconds"]
+
+	return result
+
+## Method Name: benchCpu
+##
+## Purpose: Time several CPU-bound modules side by side to compare thread and process execution.
+##
+## Parameters
+## 1. work_dir     - The temporary directory of the benchmark.
+## 2. execution    - The execution mode of the modules.
+## 3. module_count - The number of modules to run side by side.
+def benchCpu(work_dir, execution, module_count):
+	module_list        = [{"name": "BenchCpu", "parameters": [], "execution": execution}] * module_count
+	total_time, report = runFramework(work_dir, "cpu_" + execution, module_list)
+
+	return {"scenario": "cpu_" + execution, "modules": module_count, "total_seconds": total_time, "scheduler_seconds": report["wall_seconds"], "module_cpu_seconds": sum([module["usage"]["cpu_seconds"] for module in report["modules"]])}
+
+## Method Name: main
+##
+## Purpose: Serves as the entry point into the script.
+def main():
+	users          = 4
+	files_per_user = 250
+	chat_kilobytes = 512
+	json_path      = None
+
+	if (len(sys.argv) > 1):
+		users = int(sys.argv[1])
+
+	if (len(sys.argv) > 2):
+		files_per_user = int(sys.argv[2])
+
+	if (len(sys.argv) > 3):
+		chat_kilobytes = int(sys.argv[3])
+
+	if (len(sys.argv) > 4):
+		json_path = sys.argv[4]
+
+	random.seed(4752151)
+	work_dir = tempfile.mkdtemp(prefix="bc_bench_framework_")
+	results  = []
+
+	try:
+		root = os.path.join(work_dir, "evidence")
+		file_count, byte_count = makeEvidenceTree(root, users, files_per_user, chat_kilobytes)
+		writeModules(os.path.join(work_dir, "modules"))
+
+		print "Evidence tree - %d users - %d files - %.1f MB" % (users, file_count, byte_count / 1048576.0)
+
+		results.extend(benchStartup(work_dir))
+		results.append(benchScheduling(work_dir, "thread", 200))
+		results.append(benchScheduling(work_dir, "process", 20))
+
+		for logging_format in ("csv", "html", "jsonl"):
+			for logging_mode in ("direct", "queue"):
+				results.append(benchLogging(work_dir, logging_format, logging_mode, 50000))
+
+		for name in ("BenchRead", "BenchHash", "BenchChat"):
+			for execution in ("thread", "process"):
+				results.append(benchFiles(work_dir, name, root, execution))
+
+		for execution in ("thread", "process"):
+			results.append(benchCpu(work_dir, execution, 4))
+
+	finally:
+		shutil.rmtree(work_dir)
+
+	for result in results:
+		print "%-29s - %s" % (result["scenario"], " - ".join(["%s %s" % (key, ("%.4f" % value) if isinstance(value, float) else value) for key, value in sorted(result.items()) if key != "scenario"]))
+
+	if (json_path != None):
+		version = subprocess.Popen([sys.executable, os.path.abspath(_framework_path), "-v"], stdout=subprocess.PIPE).communicate()[0].strip()
+
+		json_file = open(json_path, 'w')
+		json.dump({"benchmark": "framework", "framework_version": version, "python_version": platform.python_version(), "host": platform.node(), "parameters": {"users": users, "files_per_user": files_per_user, "chat_kilobytes": chat_kilobytes, "files": file_count, "bytes": byte_count}, "results": results}, json_file, indent=4, sort_keys=True)
+		json_file.close()
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
@@ -0,0 +1,131 @@
+## File Name: bench_logging.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: Measure logging throughput with many module threads writing DEBUG records
+##          in the direct logging mode and in the queue-backed logging mode.
+##
+## Usage: python bench_logging.py [thread_count] [records_per_thread] [json_path]
+
+## Standard imports (Static)
+import json, logging, os, shutil, sys, tempfile, threading, time
+
+## Framework imports (Static)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "Framework"))
+import bitCollector_logging
+
+## Classless Method Declarations
+
+## Method Name: logRecords
+##
+## Purpose: Log a number of DEBUG records the way a chatty module would.
+##
+## Parameters
+## 1. logger       - The logger to write the records with.
+## 2. record_count - The number of records to write.
+def logRecords(logger, record_count):
+	for count in range(record_count):
+		logger.debug("Processed artifact %d of %d: %s", count, record_count, "C:\\Users\\example\\AppData\\Roaming\\artifact.dat")
+
+## Method Name: runBenchmark
+##
+## Purpose: Log from many threads through the root logger and time how long it takes.
+##
+## Parameters
+## 1. logging_mode       - "direct" or "queue"
+## 2. thread_count       - The number of threads logging at the same time.
+## 3. records_per_thread - The number of records each thread logs.
+## 4. temp_dir           - The directory to write the log file to.
+##
+## Returns
+## A dictionary with the timings of the run.
+def runBenchmark(logging_mode, thread_count, records_per_thread, temp_dir):
+	root_logger = logging.getLogger("")
+	root_logger.setLevel(logging.DEBUG)
+
+	## Use the same handlers and formats as the framework. The console is replaced by the null device.
+	file_handler = bitCollector_logging.BatchRotatingFileHandler(os.path.join(temp_dir, logging_mode + ".html"), mode='a', maxBytes=1073741824, backupCount=99)
+	file_handler.setFormatter(logging.Formatter("<tr><td>%(asctime)s</td><td>%(module)s.%(name)s.%(funcName)s</td><td>%(levelname)s</td><td>%(message)s</td></tr>", '%Y-%m-%dT%H:%M:%S'))
+
+	null_stream     = open(os.devnull, 'w')
+	console_handler = bitCollector_logging.BatchStreamHandler(null_stream)
+	console_handler.setFormatter(logging.Formatter('%(asctime)s - %(module)s.%(name)s.%(funcName)s - [%(levelname)s] - %(message)s', '%Y-%m-%d %H:%M:%S'))
+
+	log_writer = None
+
+	if (logging_mode == "queue"):
+		log_writer = bitCollector_logging.BatchingLogWriter([file_handler, console_handler])
+		handlers   = [log_writer.getHandler()]
+
+	else:
+		handlers = [file_handler, console_handler]
+
+	for handler in handlers:
+		root_logger.addHandler(handler)
+
+	threads    = []
+	start_time = time.time()
+
+	for thread_number in range(thread_count):
+		thread = threading.Thread(target=logRecords, args=(logging.getLogger("module_" + str(thread_number)), records_per_thread))
+		thread.start()
+		threads.append(thread)
+
+	for thread in threads:
+		thread.join()
+
+	producer_time = time.time() - start_time
+
+	if (log_writer != None):
+		log_writer.stop()
+
+	total_time = time.time() - start_time
+
+	for handler in handlers:
+		root_logger.removeHandler(handler)
+
+	file_handler.close()
+	null_stream.close()
+
+	record_count = thread_count * records_per_thread
+
+	return {"logging_mode": logging_mode, "threads": thread_count, "records": record_count, "producer_seconds": producer_time, "total_seconds": total_time, "records_per_second": record_count / total_time, "producer_records_per_second": record_count / producer_time}
+
+## Method Name: main
+##
+## Purpose: Serves as the entry point into the script.
+def main():
+	thread_count       = 16
+	records_per_thread = 5000
+	json_path          = None
+
+	if (len(sys.argv) > 1):
+		thread_count = int(sys.argv[1])
+
+	if (len(sys.argv) > 2):
+		records_per_thread = int(sys.argv[2])
+
+	if (len(sys.argv) > 3):
+		json_path = sys.argv[3]
+
+	temp_dir = tempfile.mkdtemp(prefix="bc_bench_logging_")
+	results  = []
+
+	try:
+		for logging_mode in ("direct", "queue"):
+			result = runBenchmark(logging_mode, thread_count, records_per_thread, temp_dir)
+			results.append(result)
+
+			print "%-6s - %d threads x %d records - producers done in %.2fs (%.0f records/s) - written in %.2fs (%.0f records/s)" % (logging_mode, thread_count, records_per_thread, result["producer_seconds"], result["producer_records_per_second"], result["total_seconds"], result["records_per_second"])
+
+	finally:
+		shutil.rmtree(temp_dir)
+
+	if (json_path != None):
+		json_file = open(json_path, 'w')
+		json.dump({"benchmark": "logging", "results": results}, json_file, indent=4)
+		json_file.close()
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
@@ -0,0 +1,153 @@
+## File Name: bench_search.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: Measure keyword search throughput with the single-pass KeywordSearcher against
+##          the naive approach of running one regular expression per keyword over the data.
+##
+## Usage: python bench_search.py [keyword_count] [data_megabytes] [json_path]
+
+## Standard imports (Static)
+import json, os, random, re, shutil, string, sys, tempfile, time
+
+## Framework imports (Static)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "Framework"))
+import bitCollector_search
+
+## Classless Method Declarations
+
+## Method Name: makeKeywords
+##
+## Purpose: Make a keyword list like the ones analysts hand over: names, account numbers and hashes.
+##
+## Parameters
+## 1. keyword_count - The number of keywords to make.
+def makeKeywords(keyword_count):
+	keywords = []
+
+	for count in range(keyword_count):
+		kind = count % 3
+
+		if (kind == 0):
+			keywords.append("".join(random.choice(string.ascii_lowercase) for letter in range(random.randint(5, 12))))
+
+		elif (kind == 1):
+			keywords.append("".join(random.choice(string.digits) for digit in range(random.randint(8, 16))))
+
+		else:
+			keywords.append("".join(random.choice("0123456789abcdef") for digit in range(32)))
+
+	return keywords
+
+## Method Name: makeData
+##
+## Purpose: Write a file of log-like text with some keywords planted in it.
+##
+## Parameters
+## 1. path           - The path to the file to write.
+## 2. data_megabytes - The size of the file in megabytes.
+## 3. keywords       - The keywords to plant.
+def makeData(path, data_megabytes, keywords):
+	words     = ["user", "login", "session", "file", "opened", "closed", "C:\\Users\\example", "account", "transfer", "12345"]
+	data_file = open(path, 'wb')
+	written   = 0
+
+	while (written < data_megabytes * 1048576):
+		line = " ".join(random.choice(words) for word in range(12))
+
+		if (random.random() < 0.01):
+			line += " " + random.choice(keywords)
+
+		data_file.write(line + "\n")
+		written += len(line) + 1
+
+	data_file.close()
+
+## Method Name: searchNaive
+##
+## Purpose: Search the file the naive way, with one compiled regular expression per keyword.
+##
+## Parameters
+## 1. path     - The path to the file to search.
+## 2. keywords - The keywords to search for.
+##
+## Returns
+## The number of hits.
+def searchNaive(path, keywords):
+	patterns  = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in keywords]
+	data_file = open(path, 'rb')
+	data      = data_file.read()
+	data_file.close()
+
+	hit_count = 0
+	for pattern in patterns:
+		for match in pattern.finditer(data):
+			hit_count += 1
+
+	return hit_count
+
+## Method Name: searchSinglePass
+##
+## Purpose: Search the file with the framework's KeywordSearcher.
+##
+## Parameters
+## 1. path     - The path to the file to search.
+## 2. keywords - The keywords to search for.
+##
+## Returns
+## The number of hits.
+def searchSinglePass(path, keywords):
+	keyword_searcher = bitCollector_search.KeywordSearcher(keywords)
+
+	hit_count = 0
+	for hit in keyword_searcher.searchFile(path):
+		hit_count += 1
+
+	return hit_count
+
+## Method Name: main
+##
+## Purpose: Serves as the entry point into the script.
+def main():
+	keyword_count  = 300
+	data_megabytes = 16
+	json_path      = None
+
+	if (len(sys.argv) > 1):
+		keyword_count = int(sys.argv[1])
+
+	if (len(sys.argv) > 2):
+		data_megabytes = int(sys.argv[2])
+
+	if (len(sys.argv) > 3):
+		json_path = sys.argv[3]
+
+	random.seed(4752151)
+	keywords = makeKeywords(keyword_count)
+	temp_dir = tempfile.mkdtemp(prefix="bc_bench_search_")
+	results  = []
+
+	try:
+		data_path = os.path.join(temp_dir, "data.txt")
+		makeData(data_path, data_megabytes, keywords)
+
+		for method, search in (("naive", searchNaive), ("single_pass", searchSinglePass)):
+			start_time = time.time()
+			hit_count  = search(data_path, keywords)
+			total_time = time.time() - start_time
+
+			results.append({"method": method, "keywords": keyword_count, "megabytes": data_megabytes, "hits": hit_count, "total_seconds": total_time, "megabytes_per_second": data_megabytes / total_time})
+
+			print "%-11s - %d keywords over %d MB - %d hits in %.2fs (%.1f MB/s)" % (method, keyword_count, data_megabytes, hit_count, total_time, data_megabytes / total_time)
+
+	finally:
+		shutil.rmtree(temp_dir)
+
+	if (json_path != None):
+		json_file = open(json_path, 'w')
+		json.dump({"benchmark": "search", "results": results}, json_file, indent=4)
+		json_file.close()
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
@@ -0,0 +1,283 @@
+## File Name: bitCollector_accounting.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script measures the resources each BitCollector module uses and writes the run report.
+##          A module is sampled before and after its main method: wall time, CPU time, the growth of the
+##          peak RSS, the bytes read and written and the number of files the module reports handling.
+##          Modules run in a thread are measured on that thread where the OS offers per-thread counters
+##          (/proc/thread-self on Linux), and modules run in a worker process are measured on the process.
+##          Threads a module starts itself, and the hashing, search, walker and pipeline threads reading for
+##          it, are only covered in process mode. For a module run in a thread their reads and CPU time only
+##          show in the run usage. The peak RSS is only kept per process, so for a module run in a thread it
+##          is the growth of the whole framework while the module ran, allocations of the other modules
+##          included. The usage names the scope of each, and the module summary labels every row with it.
+##
+## Usage: Modules count the files they handle through module_dict["account"].addFiles(count).
+
+## Standard imports (Static)
+import json, logging, os, sys, threading, time
+
+## Third-party imports (Optional)
+## The resource module does not exist on Windows. The peak RSS is not measured there.
+try:
+	import resource
+
+except ImportError:
+	resource = None
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_report_suffix = "_report.json"
+
+## The fields of /proc/<id>/io kept in a sample, and the names they are reported under.
+_io_fields = {"rchar": "bytes_read", "wchar": "bytes_written", "read_bytes": "disk_bytes_read", "write_bytes": "disk_bytes_written"}
+
+## Class Declarations
+
+## Class Name: ModuleAccount
+##
+## Purpose: Measure the resources used by one BitCollector module.
+class ModuleAccount():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the account.
+	##
+	## Parameters
+	## 1. name - The name of the module.
+	def __init__(self, name):
+		self.name         = name
+		self.scope        = None
+		self.file_count   = 0
+		self.start_time   = None
+		self.start_sample = None
+		self.usage        = None
+
+		self.lock = threading.Lock()
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Leave the lock out when the account is pickled for, or returned from, a worker process.
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		del state["lock"]
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the account in a worker process or in the framework.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = threading.Lock()
+
+	## Method Name: addFiles
+	##
+	## Purpose: Count files handled by the module. Safe to call from any of the module's threads.
+	##
+	## Parameters
+	## 1. count - (Optional) The number of files to add.
+	def addFiles(self, count=1):
+		with self.lock:
+			self.file_count += count
+
+	## Method Name: start
+	##
+	## Purpose: Take the first sample. Must be called on the thread running the module.
+	##
+	## Parameters
+	## 1. scope - "thread" to measure the calling thread or "process" to measure the whole process.
+	##            Thread scope falls back to process scope where per-thread counters are unavailable.
+	def start(self, scope):
+		if (scope == "thread" and os.path.exists("/proc/thread-self/stat") == 0):
+			scope = "process"
+
+		self.scope        = scope
+		self.start_time   = time.time()
+		self.start_sample = sampleResources(scope)
+
+	## Method Name: stop
+	##
+	## Purpose: Take the second sample on the same thread and work out what the module used in between.
+	##
+	## Returns
+	## The usage dictionary.
+	def stop(self):
+		end_sample = sampleResources(self.scope)
+
+		self.usage = {"wall_seconds": time.time() - self.start_time, "cpu_scope": self.scope, "io_scope": self.scope, "peak_rss_scope": "process", "file_count": self.file_count}
+
+		for field in end_sample:
+			if (end_sample[field] == None or self.start_sample[field] == None):
+				self.usage[field] = None
+
+			else:
+				self.usage[field] = end_sample[field] - self.start_sample[field]
+
+		## The peak RSS only grows, so the difference is how far the module raised the high-water mark.
+		self.usage["peak_rss_delta_bytes"] = self.usage.pop("peak_rss_bytes")
+
+		return self.usage
+
+## Classless Method Declarations
+
+## Method Name: formatBytes
+##
+## Purpose: Format a number of bytes for the log.
+##
+## Parameters
+## 1. count - The number of bytes, or None if it was not measured.
+def formatBytes(count):
+	if (count == None):
+		return "n/a"
+
+	for unit in ("B", "KB", "MB", "GB"):
+		if (abs(count) < 1024 or unit == "GB"):
+			break
+
+		count /= 1024.0
+
+	if (unit == "B"):
+		return str(count) + " B"
+
+	return "%.1f %s" % (count, unit)
+
+## Method Name: getReportPath
+##
+## Purpose: Work out the path of the run report kept next to a log file.
+##
+## Parameters
+## 1. log_file - The path to the log file of the run.
+def getReportPath(log_file):
+	return os.path.splitext(log_file)[0] + _report_suffix
+
+## Method Name: readCpuTime
+##
+## Purpose: Read the CPU time used so far.
+##
+## Parameters
+## 1. scope - "thread" for the calling thread or "process" for the whole process.
+##
+## Returns
+## The user and system CPU time in seconds.
+def readCpuTime(scope):
+	if (scope == "thread"):
+		try:
+			stat_file = open("/proc/thread-self/stat", 'r')
+
+			try:
+				## The command name may contain spaces, so split after its closing parenthesis. utime and stime are fields 14 and 15.
+				fields = stat_file.read().rsplit(")", 1)[1].split()
+
+			finally:
+				stat_file.close()
+
+			return (int(fields[11]) + int(fields[12])) / float(os.sysconf("SC_CLK_TCK"))
+
+		except (IOError, IndexError, ValueError):
+			pass
+
+	times = os.times()
+
+	return times[0] + times[1]
+
+## Method Name: readIoCounters
+##
+## Purpose: Read the I/O counters Linux keeps per thread and per process.
+##
+## Parameters
+## 1. scope - "thread" for the calling thread or "process" for the whole process.
+##
+## Returns
+## A dictionary of the counters named as in _io_fields, or None values where they are unavailable.
+def readIoCounters(scope):
+	counters = dict.fromkeys(_io_fields.values())
+
+	if (scope == "thread"):
+		io_path = "/proc/thread-self/io"
+
+	else:
+		io_path = "/proc/self/io"
+
+	try:
+		io_file = open(io_path, 'r')
+
+		try:
+			for line in io_file:
+				field, separator, value = line.partition(":")
+
+				if (field in _io_fields):
+					counters[_io_fields[field]] = int(value)
+
+		finally:
+			io_file.close()
+
+	except (IOError, ValueError):
+		pass
+
+	return counters
+
+## Method Name: readPeakRss
+##
+## Purpose: Read the peak resident set size of the process.
+##
+## Returns
+## The peak RSS in bytes, or None where it is unavailable.
+def readPeakRss():
+	if (resource == None):
+		return None
+
+	peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	## Mac OS X reports bytes and the other systems kilobytes.
+	if (sys.platform == "darwin"):
+		return peak_rss
+
+	return peak_rss * 1024
+
+## Method Name: sampleResources
+##
+## Purpose: Take a sample of the counters of the calling thread or process.
+##
+## Parameters
+## 1. scope - "thread" for the calling thread or "process" for the whole process.
+def sampleResources(scope):
+	sample = readIoCounters(scope)
+
+	sample["cpu_seconds"]    = readCpuTime(scope)
+	sample["peak_rss_bytes"] = readPeakRss()
+
+	return sample
+
+## Method Name: writeRunReport
+##
+## Purpose: Write the run report as JSON next to the log file. It is renamed into place so that readers never see half of it.
+##
+## Parameters
+## 1. log_file - The path to the log file of the run.
+## 2. report   - The dictionary to write.
+##
+## Returns
+## The path to the report, or None if it could not be written.
+def writeRunReport(log_file, report):
+	report_path = getReportPath(log_file)
+	temp_path   = report_path + ".tmp"
+
+	try:
+		report_file = open(temp_path, 'w')
+		json.dump(report, report_file, indent=1, sort_keys=True)
+		report_file.close()
+
+		## os.rename does not replace an existing file on Windows.
+		if (os.name == "nt" and os.path.exists(report_path)):
+			os.remove(report_path)
+
+		os.rename(temp_path, report_path)
+
+	except (IOError, OSError), error:
+		logging.getLogger("ModuleAccount").warning("Unable to write the run report: " + report_path + ". " + str(error))
+		return None
+
+	return report_path
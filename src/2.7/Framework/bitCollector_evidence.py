@@ -0,0 +1,337 @@
+## File Name: bitCollector_evidence.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the evidence database the framework writes the results of a run to.
+##          The records every module emits through its record pipeline and the log entries of the run are
+##          loaded into a SQLite database, so that they can be queried by the web app instead of read out of
+##          the log files. A single writer thread owns the connection and loads the rows in large
+##          executemany transactions with WAL journaling. The indexes are created with the tables, so the
+##          web app can use them while a run loads. Every run after the first loads into indexed tables
+##          anyway, so deferring them would only speed up the load of the first run.
+##
+## Usage: The framework owns the store. It is None unless the "evidence" setting is present in the configuration file.
+##        sqlite3 <log_dir>/bitCollector_evidence.sqlite "SELECT module, COUNT(*) FROM records GROUP BY module"
+
+## Standard imports (Static)
+import logging, os, Queue, sqlite3, threading, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_file_name       = "bitCollector_evidence.sqlite"
+_default_batch_size      = 50000
+_default_capacity        = 10000
+_default_commit_interval = 2.0
+_default_timeout         = 30.0
+
+## The tables of the database. Rows are only ever appended, so the rowid doubles as the cursor the web app pages by.
+_schema = (
+	"CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, host TEXT, log_file TEXT, framework_version TEXT, start_time REAL, end_time REAL, record_count INTEGER DEFAULT 0, log_entry_count INTEGER DEFAULT 0)",
+	"CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL, module TEXT, type TEXT, record_id TEXT, created REAL, data TEXT)",
+	"CREATE TABLE IF NOT EXISTS log_entries (id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL, created REAL, level INTEGER, level_name TEXT, module TEXT, traceback TEXT, message TEXT)"
+)
+
+## The indexes the web app filters and pages by. Each filter index ends in id so a filtered page is read in cursor order.
+## The (run_id, created) index turns a time range into the range of ids to page through.
+_indexes = (
+	"CREATE INDEX IF NOT EXISTS runs_host ON runs (host, id)",
+	"CREATE INDEX IF NOT EXISTS records_run_module ON records (run_id, module, id)",
+	"CREATE INDEX IF NOT EXISTS records_run_type ON records (run_id, type, id)",
+	"CREATE INDEX IF NOT EXISTS log_entries_run_level ON log_entries (run_id, level, id)",
+	"CREATE INDEX IF NOT EXISTS log_entries_run_module_level ON log_entries (run_id, module, level, id)",
+	"CREATE INDEX IF NOT EXISTS log_entries_run_created ON log_entries (run_id, created)"
+)
+
+_insert_statements = {
+	"records"     : "INSERT INTO records (run_id, module, type, record_id, created, data) VALUES (?, ?, ?, ?, ?, ?)",
+	"log_entries" : "INSERT INTO log_entries (run_id, created, level, level_name, module, traceback, message) VALUES (?, ?, ?, ?, ?, ?, ?)"
+}
+
+## Class Declarations
+
+## Class Name: EvidenceStore
+##
+## Purpose: Load the records and log entries of a run into the evidence database from a single writer thread.
+class EvidenceStore():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the store. The database is opened by the writer thread once the store is started.
+	##
+	## Parameters
+	## 1. db_path         - The path to the SQLite database.
+	## 2. batch_size      - (Optional) The number of rows loaded in a single transaction.
+	## 3. capacity        - (Optional) The number of batches and log entries which may wait for the writer before adding blocks.
+	## 4. store_logs      - (Optional) 1 to load the log entries of the run as well as the records, otherwise 0.
+	## 5. commit_interval - (Optional) The number of seconds after which a partial batch is committed.
+	def __init__(self, db_path, batch_size=_default_batch_size, capacity=_default_capacity, store_logs=1, commit_interval=_default_commit_interval):
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+		self.db_path         = db_path
+		self.batch_size      = batch_size
+		self.store_logs      = store_logs
+		self.commit_interval = commit_interval
+
+		self.row_queue  = Queue.Queue(capacity)
+		self.end_marker = object()
+		self.thread     = None
+		self.handler    = None
+		self.log_writer = None
+		self.failed     = 0
+		self.run_id     = None
+
+		## The log entries left out because the writer was behind. (EvidenceHandler.emit)
+		self.dropped = 0
+
+		## Counted by the writer thread only.
+		self.counts = {"records": 0, "log_entries": 0}
+
+	## Method Name: start
+	##
+	## Purpose: Start the writer thread, which opens the database and adds the run to it, and capture the log entries of the run.
+	##
+	## Parameters
+	## 1. host              - The name of the host the run collects from.
+	## 2. log_file          - The path to the log file of the run.
+	## 3. framework_version - The version string of the framework.
+	## 4. log_writer        - (Optional) The BatchingLogWriter of the run when logging in queue mode.
+	def start(self, host, log_file, framework_version, log_writer=None):
+		self.thread = threading.Thread(target=self.run, args=(host, log_file, framework_version, time.time()), name="EvidenceStore")
+		self.thread.daemon = True
+		self.thread.start()
+
+		if (self.store_logs == 1):
+			self.log_writer = log_writer
+
+			## In queue mode the entries are loaded from the log writer's thread, which may wait for this writer without
+			## holding up the modules. Otherwise they are loaded from the thread logging them, which must never wait.
+			if (log_writer != None):
+				self.handler = EvidenceHandler(self, block=1)
+				log_writer.addTarget(self.handler)
+
+			else:
+				self.handler = EvidenceHandler(self, block=0)
+				logging.getLogger("").addHandler(self.handler)
+
+	## Method Name: addRecords
+	##
+	## Purpose: Queue a batch of records for the writer. Blocks while the writer is behind.
+	##
+	## Parameters
+	## 1. rows - The list of (module, type, record_id, created, data) tuples, with data as the JSON of the record.
+	def addRecords(self, rows):
+		if (self.failed == 0):
+			self.row_queue.put(("records", rows))
+
+	## Method Name: addLogEntry
+	##
+	## Purpose: Queue a log entry for the writer.
+	##
+	## Parameters
+	## 1. row   - The (created, level, level_name, module, traceback, message) tuple.
+	## 2. block - (Optional) 1 to wait while the writer is behind, or 0 to drop the entry and count it.
+	def addLogEntry(self, row, block=1):
+		if (self.failed == 0):
+			try:
+				self.row_queue.put(("log_entries", [row]), block)
+
+			except Queue.Full:
+				self.dropped += 1
+
+	## Method Name: detachHandler
+	##
+	## Purpose: Stop capturing the log entries of the run.
+	def detachHandler(self):
+		if (self.log_writer != None):
+			self.log_writer.removeTarget(self.handler)
+
+		else:
+			logging.getLogger("").removeHandler(self.handler)
+
+	## Method Name: close
+	##
+	## Purpose: Stop capturing the log, wait for the writer to load the rest of the rows and end the run.
+	def close(self):
+		if (self.thread == None):
+			return
+
+		if (self.handler != None):
+			## Load the entries still queued for the log writer before letting go of it. The second sync waits out a batch
+			## the log writer started before the handler was removed, which would otherwise wait on the closed queue forever.
+			if (self.log_writer != None and self.failed == 0):
+				self.log_writer.sync()
+				self.detachHandler()
+				self.log_writer.sync()
+
+			else:
+				self.detachHandler()
+
+			self.handler = None
+
+		self.row_queue.put(self.end_marker)
+		self.thread.join()
+		self.thread = None
+
+		if (self.failed == 0):
+			self.logger.info("Loaded %d records and %d log entries of run %d into the evidence database: %s" % (self.counts["records"], self.counts["log_entries"], self.run_id, self.db_path))
+
+		if (self.dropped > 0):
+			self.logger.warning("Left %d log entries out of the evidence database because its writer was behind." % self.dropped)
+
+	## Method Name: connect
+	##
+	## Purpose: Open the database for loading and create the tables and their indexes the first time.
+	##
+	## Returns
+	## The connection.
+	def connect(self):
+		## The transactions are managed by the writer, so the connection is left in autocommit mode.
+		connection = sqlite3.connect(self.db_path, timeout=_default_timeout, isolation_level=None)
+
+		## WAL lets the web app read while the run loads. Losing the last transactions to a power cut is acceptable for a rerunnable load.
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute("PRAGMA synchronous=NORMAL")
+		connection.execute("PRAGMA temp_store=MEMORY")
+		connection.execute("PRAGMA cache_size=-65536")
+
+		for statement in _schema + _indexes:
+			connection.execute(statement)
+
+		return connection
+
+	## Method Name: run
+	##
+	## Purpose: Load the queued rows in batches until the store is closed.
+	##
+	## Parameters
+	## 1. host              - The name of the host the run collects from.
+	## 2. log_file          - The path to the log file of the run.
+	## 3. framework_version - The version string of the framework.
+	## 4. start_time        - The time the run started.
+	def run(self, host, log_file, framework_version, start_time):
+		closing = 0
+
+		try:
+			connection  = self.connect()
+			self.run_id = connection.execute("INSERT INTO runs (host, log_file, framework_version, start_time) VALUES (?, ?, ?, ?)", (host, log_file, framework_version, start_time)).lastrowid
+
+			pending     = {"records": [], "log_entries": []}
+			row_count   = 0
+			commit_time = time.time() + self.commit_interval
+
+			while (closing == 0):
+				try:
+					item = self.row_queue.get(True, max(0.0, commit_time - time.time()))
+
+					if (item is self.end_marker):
+						closing = 1
+
+					else:
+						pending[item[0]].extend(item[1])
+						row_count += len(item[1])
+
+				except Queue.Empty:
+					pass
+
+				if (closing == 1 or row_count >= self.batch_size or (row_count > 0 and time.time() >= commit_time)):
+					self.loadRows(connection, pending)
+
+					pending     = {"records": [], "log_entries": []}
+					row_count   = 0
+					commit_time = time.time() + self.commit_interval
+
+				elif (row_count == 0 and time.time() >= commit_time):
+					commit_time = time.time() + self.commit_interval
+
+			connection.execute("UPDATE runs SET end_time = ?, record_count = ?, log_entry_count = ? WHERE id = ?", (time.time(), self.counts["records"], self.counts["log_entries"], self.run_id))
+			connection.close()
+
+		except Exception:
+			self.failed = 1
+
+			## The handler has to go before the failure is logged, or the entry would be queued for this thread.
+			if (self.handler != None):
+				self.detachHandler()
+
+			self.logger.exception("Unable to load the evidence database: " + self.db_path + ". Nothing more is loaded for this run.")
+
+			## Keep taking rows off the queue so that nothing stays blocked on it, until the store is closed.
+			while (closing == 0 and self.row_queue.get() is not self.end_marker):
+				pass
+
+	## Method Name: loadRows
+	##
+	## Purpose: Load pending rows in a single transaction.
+	##
+	## Parameters
+	## 1. connection - The connection of the writer.
+	## 2. pending    - The dictionary of the pending rows of each table.
+	def loadRows(self, connection, pending):
+		connection.execute("BEGIN")
+
+		try:
+			for table, rows in pending.iteritems():
+				if (len(rows) > 0):
+					connection.executemany(_insert_statements[table], [(self.run_id,) + row for row in rows])
+					self.counts[table] += len(rows)
+
+			connection.execute("COMMIT")
+
+		except Exception:
+			connection.execute("ROLLBACK")
+			raise
+
+## Class Name: EvidenceHandler
+##
+## Purpose: A logging handler which loads every log entry of the run into the evidence database.
+class EvidenceHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler.
+	##
+	## Parameters
+	## 1. store - The EvidenceStore to load the entries into.
+	## 2. block - 1 to wait while the writer is behind, or 0 to drop the entries it has no room for.
+	def __init__(self, store, block):
+		logging.Handler.__init__(self)
+
+		self.store     = store
+		self.block     = block
+		self.formatter = logging.Formatter()
+
+	## Method Name: emit
+	##
+	## Purpose: Queue the entry in the columns of the log_entries table.
+	##
+	## Parameters
+	## 1. record - The LogRecord to load.
+	def emit(self, record):
+		## The writer thread would wait on its own queue.
+		if (threading.current_thread() is self.store.thread):
+			return
+
+		try:
+			message = record.getMessage()
+
+			## Records forwarded from worker processes only carry the formatted traceback.
+			if (record.exc_info and record.exc_text == None):
+				record.exc_text = self.formatter.formatException(record.exc_info)
+
+			if (record.exc_text):
+				message += "\n" + record.exc_text
+
+			## The handler lock is held while emitting, so the dropped entries are counted by one thread at a time.
+			self.store.addLogEntry((record.created, record.levelno, record.levelname, record.module, record.module + "." + record.name + "." + record.funcName, message), self.block)
+
+		except Exception:
+			self.handleError(record)
+
+## Classless Method Declarations
+
+## Method Name: getEvidencePath
+##
+## Purpose: Work out the path of the evidence database.
+##
+## Parameters
+## 1. log_dir   - The directory of the log files.
+## 2. file_name - (Optional) The file name of the database, or an absolute path to keep it elsewhere.
+def getEvidencePath(log_dir, file_name=_default_file_name):
+	return os.path.join(log_dir, file_name)
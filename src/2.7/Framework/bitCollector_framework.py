@@ -7,14 +7,25 @@
 ##          module-independent tasks.
 
 ## Standard imports (Static)
-import json, logging, logging.handlers, platform
-import os, re, sys, threading, time
+import errno, hashlib, json, logging, logging.handlers, platform
+import multiprocessing, os, Queue, re, socket, sys, threading, time
+
+## Framework imports (Static)
+import bitCollector_accounting, bitCollector_evidence, bitCollector_governor, bitCollector_hashing, bitCollector_logging, bitCollector_parameters, bitCollector_pipeline, bitCollector_profiling, bitCollector_registry, bitCollector_search, bitCollector_state, bitCollector_walker
 
 ## Third-party imports (Static)
 
 ## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
 _framework_version = "bitCollector_framework v0.2.1 Released 2015-03-09"
 
+## The number of seconds a module which was asked to stop is given to return before it is abandoned or its worker terminated.
+_stop_grace_seconds = 5
+
+## The host fingerprint cache kept next to the logs, and the platform details kept in it.
+_platform_cache_name     = "bitCollector_platform.json"
+_default_platform_ttl    = 86400
+_cached_platform_details = ("processor", "win_uname", "mac_ver", "linux_distribution", "win32_ver")
+
 ## Class Declarations
 
 ## Class Name: InitializeBCModuleThread - A thread which parses through and executes a command.
@@ -29,7 +40,8 @@ class InitializeBCModuleThread(threading.Thread):
 	## 1. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
 	## 2. platform           - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
 	## 3. module_dict        - The name and parameters to pass to the BitCollector module to be initialized.
-	def __init__(self, framework_settings, platform_details, module_dict):
+	## 4. completion_queue   - (Optional) A Queue the thread puts itself on once the module has returned.
+	def __init__(self, framework_settings, platform_details, module_dict, completion_queue=None):
 		## Initialize the Logger for this class.
 		self.logger = logging.getLogger(self.__class__.__name__)
 		self.logger.debug("Entering BitCollector.InitializeBCModuleThread.__init__()")
@@ -43,27 +55,182 @@ class InitializeBCModuleThread(threading.Thread):
 		self.framework_settings = framework_settings
 		self.platform_details   = platform_details
 		self.module_dict        = module_dict
+		self.completion_queue   = completion_queue
+
+		## Module threads must not keep the framework alive after they have timed out.
+		self.daemon = True
+
+		## Initialize the attributes describing the outcome of the module.
+		self.return_code = None
+		self.error       = 0
+		self.start_time  = None
+		self.end_time    = None
+		self.usage       = None
 
 		self.start()
 
 	## run - This method calls the executeCommand method of the specified feature set.
 	def run(self):
 		## Get the thread ID
-		self.thread_id = threading.current_thread()
+		self.thread_id  = threading.current_thread()
+		self.start_time = time.time()
 
 		try:
-			entry_point = getattr(__import__(self.module_dict["name"]), "main")
+			## Modules configured for process execution are run in a worker process supervised by this thread.
+			if (self.module_dict.get("execution", self.framework_settings.execution) == "process"):
+				self.runInProcess()
+
+			else:
+				self.runInThread()
+
+		finally:
+			self.end_time = time.time()
+
+			## Let the scheduler know this worker slot is free again.
+			if (self.completion_queue != None):
+				self.completion_queue.put(self)
+
+	## Method Name: runInThread
+	##
+	## Purpose: Import the BitCollector module and call its main method in this thread.
+	def runInThread(self):
+		account = self.module_dict["account"]
+		account.start("thread")
+
+		## The pipeline runs in the thread or process running the module, so it is never pickled with the module dictionary.
+		pipeline = self.framework_settings.openPipeline(self.module_dict["name"])
+		self.module_dict["output"] = pipeline
+
+		try:
+			entry_point = getattr(self.framework_settings.module_registry.load(self.module_dict["name"]), "main")
 			self.logger.info("Successfully imported BitCollector module: " + self.module_dict["name"] + ".main")
 
 			## Call the entry_point (main) method of the BitCollector module.
-			self.return_code = entry_point(self.thread_id, self.path_to_main, self.framework_settings, self.platform_details, self.module_dict)
+			if (self.framework_settings.profiler != None):
+				self.return_code = self.framework_settings.profiler.profileCall(self.module_dict["name"], entry_point, self.thread_id, self.path_to_main, self.framework_settings, self.platform_details, self.module_dict)
+
+			else:
+				self.return_code = entry_point(self.thread_id, self.path_to_main, self.framework_settings, self.platform_details, self.module_dict)
 
 		except AttributeError:
+			self.error = 1
 			self.logger.warning("Failed to import BitCollector module: " + self.module_dict["name"] + ".main")
 
 		except ImportError:
+			self.error = 1
 			self.logger.warning("Failed to import BitCollector module: " + self.module_dict["name"] + ".main")
 
+		except Exception:
+			self.error = 1
+			self.logger.exception("Unhandled exception in BitCollector module: " + self.module_dict["name"] + ".main")
+
+		finally:
+			records = pipeline.close()
+			del self.module_dict["output"]
+
+			self.usage            = account.stop()
+			self.usage["records"] = records
+
+	## Method Name: runInProcess
+	##
+	## Purpose: Run the BitCollector module in a worker process and forward its log records and return code to this process.
+	def runInProcess(self):
+		message_queue = multiprocessing.Queue()
+		process       = multiprocessing.Process(target=runModuleProcess, name=self.module_dict["name"], args=(message_queue, self.path_to_main, self.framework_settings, self.platform_details, self.module_dict))
+
+		## The state cache closes its connection around the fork. See FileStateCache.startProcess.
+		if (self.framework_settings.state_cache != None):
+			self.framework_settings.state_cache.startProcess(process)
+
+		else:
+			process.start()
+
+		self.logger.info("Started BitCollector module: " + self.module_dict["name"] + ".main in worker process " + str(process.pid))
+
+		stop_token = self.module_dict.get("stop_token")
+		stop_time  = None
+
+		while (1):
+			try:
+				message = message_queue.get(True, 1)
+
+			except Queue.Empty:
+				## The worker died without reporting a result. (Killed, crashed interpreter, etc.)
+				## Workers of cancelled modules have already been reported as timed out.
+				if (process.is_alive() == 0):
+					self.error = 1
+
+					if (stop_token != None and stop_token.isStopRequested()):
+						break
+
+					self.logger.warning("Worker process for BitCollector module: " + self.module_dict["name"] + " exited with code " + str(process.exitcode) + " before returning.")
+					break
+
+				## Give a cancelled module a grace period to stop on its own before terminating its worker.
+				if (stop_token != None and stop_token.isStopRequested()):
+					if (stop_time == None):
+						stop_time = time.time()
+
+					elif (time.time() - stop_time > _stop_grace_seconds):
+						self.error = 1
+						self.logger.warning("Terminating worker process for BitCollector module: " + self.module_dict["name"] + " which did not stop when asked.")
+						process.terminate()
+						break
+
+				continue
+
+			## Hand forwarded records to the logger they were created on so the parent's handlers write them.
+			if (message[0] == "log"):
+				logging.getLogger(message[1].name).handle(message[1])
+
+			## Batches of module records written by the worker's pipeline, for the evidence database.
+			elif (message[0] == "records"):
+				self.framework_settings.evidence_store.addRecords(message[1])
+
+			elif (message[0] == "result"):
+				self.return_code = message[1]
+				self.error       = message[2]
+				self.usage       = message[3]
+				break
+
+		process.join()
+
+## Class Name: ProcessLogForwarder
+##
+## Purpose: A logging handler used in worker processes which sends every record to the parent process.
+class ProcessLogForwarder(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler.
+	##
+	## Parameters
+	## 1. message_queue - The multiprocessing Queue read by the supervising InitializeBCModuleThread.
+	def __init__(self, message_queue):
+		logging.Handler.__init__(self)
+
+		self.message_queue = message_queue
+
+	## Method Name: emit
+	##
+	## Purpose: Reduce the record to picklable attributes and send it to the parent process.
+	##
+	## Parameters
+	## 1. record - The LogRecord to forward.
+	def emit(self, record):
+		try:
+			## Merge the arguments and traceback into the message since they may not be picklable.
+			record.msg  = record.getMessage()
+			record.args = None
+
+			if (record.exc_info):
+				record.exc_text = logging.Formatter().formatException(record.exc_info)
+				record.exc_info = None
+
+			self.message_queue.put(("log", record))
+
+		except Exception:
+			self.handleError(record)
+
 ## Class Name: FrameworkSettings
 ##
 ## Purpose: Hold information about the settings required to run the framework.
@@ -73,14 +240,25 @@ class FrameworkSettings():
 	## Purpose: Initialize the settings required to start the framework.
 	##
 	## Parameters
-	## 1. tuple - A 7-part tuple containing runtime settings.
+	## 1. tuple - A 18-part tuple containing runtime settings.
 	##    Index 0 - The path to the file to write the logs to.
-	##    Index 1 - The format to in which to save the log file (CSV or HTML)
+	##    Index 1 - The format to in which to save the log file (CSV, HTML or JSONL)
 	##    Index 2 - The default log level which may be overridden by individual modules.
 	##    Index 3 - A boolean tracking whether or not to log to the log file.
 	##    Index 4 - A boolean tracking whether or not to log to STDOUT.
 	##    Index 5 - The list of strings containing additional module paths.
 	##    Index 6 - The list of module dictionaries containing module-specific settings.
+	##    Index 7 - The maximum number of BitCollector modules to run at the same time.
+	##    Index 8 - The default execution mode of the BitCollector modules. ("thread" or "process")
+	##    Index 9 - The logging mode. ("direct" or "queue")
+	##    Index 10 - The dictionary of log compression settings (codec, mode and level) or None to leave the logs uncompressed.
+	##    Index 11 - The dictionary of hashing service settings. (algorithms, worker_count, block_size and mmap_threshold)
+	##    Index 12 - The dictionary of file walker settings. (worker_count and progress_interval)
+	##    Index 13 - The dictionary of file-state cache settings (file_name and batch_size) or None to leave the cache disabled.
+	##    Index 14 - The dictionary of keyword search settings (keywords, case_sensitive and chunk_size) or None when no keywords are configured.
+	##    Index 15 - The dictionary of resource governor settings (read_rate, burst, max_readers, nice, ionice, load_threshold and check_interval) or None to leave the reads unthrottled.
+	##    Index 16 - The dictionary of record pipeline settings. (stages and capacity)
+	##    Index 17 - The dictionary of evidence database settings (file_name, batch_size, capacity and store_logs) or None to leave the database disabled.
 	def __init__(self, tuple):
 		## Initialize the Logger for this class.
 		## Store the runtime settings so that modules will have access to them.
@@ -91,6 +269,17 @@ class FrameworkSettings():
 		self.log_to_stdout    = tuple[4]
 		self.additional_paths = tuple[5]
 		self.module_list      = tuple[6]
+		self.max_workers      = tuple[7]
+		self.execution        = tuple[8]
+		self.logging_mode     = tuple[9]
+		self.log_compression  = tuple[10]
+		self.hash_settings    = tuple[11]
+		self.walker_settings  = tuple[12]
+		self.state_settings   = tuple[13]
+		self.search_settings  = tuple[14]
+		self.governor_settings = tuple[15]
+		self.pipeline_settings = tuple[16]
+		self.evidence_settings = tuple[17]
 
 		## Initialize the absolute path to the logging directory.
 		self.abs_log_dir = os.path.dirname(self.log_file)		
@@ -98,21 +287,113 @@ class FrameworkSettings():
 		## Call the method to initialize the root logger.
 		self.initializeRootLogger()
 
+		## Initialize the shared services the BitCollector modules reach through the framework settings.
+		## The state cache is kept per host. platform.node() is the value Platform.node holds.
+		self.state_cache = None
+
+		if (self.state_settings != None):
+			state_settings = self.state_settings.copy()
+			state_path     = os.path.join(self.abs_log_dir, state_settings.pop("file_name", bitCollector_state._default_file_name))
+
+			self.state_cache = bitCollector_state.FileStateCache(state_path, platform.node(), **state_settings)
+
+		## The governor's shared state has to exist before any worker process is started.
+		self.governor = None
+
+		if (self.governor_settings != None):
+			self.governor = bitCollector_governor.ResourceGovernor(**self.governor_settings)
+
+		self.hash_service = bitCollector_hashing.HashService(state_cache=self.state_cache, governor=self.governor, **self.hash_settings)
+		self.file_walker  = bitCollector_walker.FileWalker(state_cache=self.state_cache, **self.walker_settings)
+
+		## Resolve the modules through the catalog kept next to the logs. They are only imported once scheduled.
+		## The ModuleProfiler when --profile was given on the command line.
+		self.profiler = None
+
+		self.module_registry = bitCollector_registry.ModuleRegistry(self.additional_paths + [os.path.dirname(os.path.realpath(__file__))], os.path.join(self.abs_log_dir, bitCollector_registry._default_catalog_name))
+
+		## Compile the keyword list once for every module.
+		self.keyword_searcher = None
+
+		if (self.search_settings != None):
+			self.keyword_searcher = bitCollector_search.KeywordSearcher(governor=self.governor, **self.search_settings)
+
+		## The records every module emits are appended to one file next to the log.
+		self.record_path = bitCollector_pipeline.getRecordPath(self.log_file)
+
+		## Start loading the records and log entries of the run into the evidence database as early as possible.
+		self.evidence_store = None
+
+		if (self.evidence_settings != None):
+			evidence_settings = self.evidence_settings.copy()
+			evidence_path     = bitCollector_evidence.getEvidencePath(self.abs_log_dir, evidence_settings.pop("file_name", bitCollector_evidence._default_file_name))
+
+			self.evidence_store = bitCollector_evidence.EvidenceStore(evidence_path, **evidence_settings)
+			self.evidence_store.start(platform.node(), self.log_file, _framework_version, self.log_writer)
+
+	## Method Name: openPipeline
+	##
+	## Purpose: Start the record pipeline a module emits its records through. It must be opened in the thread or process running the module.
+	##
+	## Parameters
+	## 1. module_name - The name of the module.
+	## 2. sink        - (Optional) The callable to hand the written records to. Defaults to the evidence database, if there is one.
+	##
+	## Returns
+	## The running RecordPipeline.
+	def openPipeline(self, module_name, sink=None):
+		if (sink == None and self.evidence_store != None):
+			sink = self.evidence_store.addRecords
+
+		return bitCollector_pipeline.RecordPipeline(module_name, self.record_path, hash_service=self.hash_service, keyword_searcher=self.keyword_searcher, sink=sink, **self.pipeline_settings)
+
+	## Method Name: openFile
+	##
+	## Purpose: Open a file for reading under the resource governor, if one is configured.
+	##
+	## Parameters
+	## 1. path     - The path to the file.
+	## 2. encoding - (Optional) The encoding to decode the file with, or None to read bytes.
+	## 3. errors   - (Optional) How decoding errors are handled. ("strict", "replace" or "ignore")
+	##
+	## Returns
+	## A file object reading through the governor. The caller closes it.
+	def openFile(self, path, encoding=None, errors=None):
+		return bitCollector_governor.openFile(path, self.governor, encoding, errors)
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Leave the loggers and logging handlers out when the settings are pickled for a worker process.
+	def __getstate__(self):
+		state = self.__dict__.copy()
+
+		for key in state.keys():
+			if (isinstance(state[key], (logging.Logger, logging.Handler, threading.Thread))):
+				del state[key]
+
+		## The evidence database is loaded by the framework alone. Worker processes send their records back to it.
+		state["evidence_store"] = None
+
+		return state
+
 	## Method Name: initializeRootLogger
 	##
 	## Purpose: Initialize the root logger as well as the logging formats and logging streams for the log file and STDOUT.
 	def initializeRootLogger(self):	
 		## Initialize the logging formats to be used by all modules.
 		if (self.logging_format == "csv"):
-			self.log_file_formatter = logging.Formatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S')
+			self.log_file_formatter = bitCollector_logging.TableFormatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S', "csv")
 
 		elif (self.logging_format == "html"):
-			self.log_file_formatter = logging.Formatter("<tr><td>%(asctime)s</td><td>%(module)s.%(name)s.%(funcName)s</td><td>%(levelname)s</td><td>%(message)s</td></tr>", '%Y-%m-%dT%H:%M:%S')
+			self.log_file_formatter = bitCollector_logging.TableFormatter("<tr><td>%(asctime)s</td><td>%(module)s.%(name)s.%(funcName)s</td><td>%(levelname)s</td><td>%(message)s</td></tr>", '%Y-%m-%dT%H:%M:%S', "html")
+
+		elif (self.logging_format == "jsonl"):
+			self.log_file_formatter = bitCollector_logging.JsonLinesFormatter()
 
 		else:
 			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Unknown logging format: " + self.logging_format + ". Defaulting to CSV."
 			self.logging_format  = "csv"
-			self.log_file_formatter = logging.Formatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S')
+			self.log_file_formatter = bitCollector_logging.TableFormatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S', "csv")
 
 		self.log_console_formatter  = logging.Formatter('%(asctime)s - %(module)s.%(name)s.%(funcName)s - [%(levelname)s] - %(message)s', '%Y-%m-%d %H:%M:%S')
 
@@ -143,49 +424,91 @@ class FrameworkSettings():
 		self.log_file = re.sub(r'\$\(DATE\)', time.strftime("%Y-%m-%d", time.localtime()), self.log_file, count=1)
 		self.log_file = re.sub(r'\$\(TIME\)', time.strftime("%H-%M-%S", time.localtime()), self.log_file, count=1)
 
-		## Verify that the log file directory exists.
+		## The log directory may itself contain $(DATE) or $(TIME), so work it out after the substitution.
+		self.abs_log_dir = os.path.dirname(os.path.abspath(self.log_file))
+
+		## Verify that the log file directory exists. Another run may be creating it at the same time.
 		if (os.path.isdir(self.abs_log_dir) == 0):
-			os.makedirs(self.abs_log_dir)
-			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Log directory doesn't exists. Making."			
-			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Created log directory: " + abs_log_dir
+			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Log directory doesn't exists. Making."
 
-		## Create the log file logging stream and configure it.
-		for log_count in range(1000):
 			try:
-				temp_file = self.log_file + "_" + str(log_count + 1) + "." + self.logging_format
-				if (os.path.isfile(temp_file) == 0):
-					self.log_file = temp_file
-					self.log_file_handler = logging.handlers.RotatingFileHandler(self.log_file, mode='a', maxBytes=1073741824, backupCount=99, encoding=None, delay=0)
-					break
+				os.makedirs(self.abs_log_dir)
+				print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Created log directory: " + self.abs_log_dir
 
-			except IOError:
-				print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - ERROR - Unable to open: " + self.log_file + "."
-				sys.exit()
+			except OSError:
+				if (os.path.isdir(self.abs_log_dir) == 0):
+					print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - ERROR - Unable to create log directory: " + self.abs_log_dir + "."
+					sys.exit()
+
+		## Translate the log_compression setting into the arguments of the log file handler.
+		compression_settings = {}
+		reserved_suffix      = ""
+
+		if (self.log_compression != None):
+			compression_settings = {"compression": self.log_compression["codec"], "compression_mode": self.log_compression["mode"], "compression_level": self.log_compression["level"]}
+
+			## Logs written compressed directly are opened with the codec's suffix appended.
+			if (self.log_compression["mode"] == "stream"):
+				reserved_suffix = bitCollector_logging._compression_suffixes[self.log_compression["codec"]]
+
+		## Claim a log file name which no other run is using.
+		try:
+			self.log_file = allocateLogFile(self.log_file, self.logging_format, reserved_suffix)
+
+		except OSError:
+			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - ERROR - Unable to open: " + self.log_file + "."
+			sys.exit()
+
+		## Create the log file logging stream and configure it.
+		try:
+			## The jsonl format also keeps a sidecar index of byte offsets by time bucket and module.
+			if (self.logging_format == "jsonl"):
+				self.log_file_handler = bitCollector_logging.IndexedJsonLinesFileHandler(self.log_file, mode='a', maxBytes=1073741824, backupCount=99, encoding=None, delay=0, **compression_settings)
+
+			else:
+				self.log_file_handler = bitCollector_logging.BatchRotatingFileHandler(self.log_file, mode='a', maxBytes=1073741824, backupCount=99, encoding=None, delay=0, **compression_settings)
+
+		except IOError:
+			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - ERROR - Unable to open: " + self.log_file + "."
+			sys.exit()
 
 		self.log_file_handler.setFormatter(self.log_file_formatter)
 
+		## Initialize the list of handlers the log records will be written to.
+		log_targets = []
+
 		## Only log to the file if specified.
 		if (self.log_to_file == 1):
+			## Write the header through the handler's stream since the log file may be written compressed.
 			if (self.logging_format == "html"):
 				## Write the table header to the log file.
-				temp_handler = open(self.log_file, 'a')
-				temp_handler.write("<table border=\"1\"  width=\"100%\"><tr><th>Date & Time</th><th>Traceback</th><th>Level</th><th>Message</th></tr>\n")
-				temp_handler.close()
+				self.log_file_handler.stream.write("<table border=\"1\"  width=\"100%\"><tr><th>Date & Time</th><th>Traceback</th><th>Level</th><th>Message</th></tr>\n")
+				self.log_file_handler.flush()
 
-			else:
-				temp_handler = open(self.log_file, 'a')
-				temp_handler.write("Date & Time,Traceback,Level,Message\n")
-				temp_handler.close()
+			elif (self.logging_format == "csv"):
+				self.log_file_handler.stream.write("Date & Time,Traceback,Level,Message\n")
+				self.log_file_handler.flush()
 
-			self.root_logger.addHandler(self.log_file_handler)
+			log_targets.append(self.log_file_handler)
 
 		## Create the console logging stream and configure it.
-		self.log_console_handler = logging.StreamHandler(sys.stdout)
+		self.log_console_handler = bitCollector_logging.BatchStreamHandler(sys.stdout)
 		self.log_console_handler.setFormatter(self.log_console_formatter)
 
 		## Only log to STDOUT if specified.
 		if (self.log_to_stdout == 1):
-			self.root_logger.addHandler(self.log_console_handler)
+			log_targets.append(self.log_console_handler)
+
+		## In queue mode the loggers only enqueue records and a single background thread formats and writes them.
+		if (self.logging_mode == "queue"):
+			self.log_writer = bitCollector_logging.BatchingLogWriter(log_targets)
+			self.root_logger.addHandler(self.log_writer.getHandler())
+
+		else:
+			self.log_writer = None
+
+			for handler in log_targets:
+				self.root_logger.addHandler(handler)
 
 ## Class Name: ThreadManager
 ##
@@ -209,93 +532,559 @@ class ThreadManager():
 	def removeThread(self, thread):
 		for each in self.thread_list:
 			if (each.thread_id == thread.thread_id):
-				self.logger.debug("Removing thread with ID each.thread_id" + each.thread_id)
+				self.logger.debug("Removing thread with ID " + str(each.thread_id))
 				self.thread_list.remove(each)
 				break
 
-## Class Name: Platform
+## Class Name: ModuleScheduler
 ##
-## Purpose: Hold information about the target machine.
-class Platform():
+## Purpose: Run the BitCollector modules on a bounded number of worker threads while honouring their depends_on ordering.
+class ModuleScheduler():
 	## Method Name: __init__
 	##
-	## Purpose: Initialize the platform-independent attributes as well as the correct platform-dependent object.
+	## Purpose: Initialize the scheduler and the per-module results.
 	##
 	## Parameters
-	## 1. tuple - A 6 part-tuple containing platform-independent information about the target machine.
-	##    Index 0  - The type of OS running on the target machine. (Windows, Linux, etc) 
-	##    Index 1  - The hostname of the target machine.
-	##    Index 2  - The release # of the OS running on the target machine. (2.2.0, NT, 8, etc)
-	##    Index 3  - The version of the OS running on the target machine.
-	##    Index 4  - The machine CPU architecture (i386, AMD64, etc)
-	##    Index 5  - Information about the processor in the target machine as a 3-part tuple.
-	def __init__(self, tuple):
+	## 1. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+	## 2. platform_details   - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
+	def __init__(self, framework_settings, platform_details):
 		## Initialize the Logger for this class.
 		self.logger = logging.getLogger(self.__class__.__name__)
-		self.logger.debug("Entering BitCollector.Platform.__init__()")
-
-		## Replace unknown information ('') with "Unknown"
-		for each in tuple:
-			if (each == ""):
-				each = "unknown"
-
-		## Initialize the platform-independent attributes.
-		self.system    = tuple[0]
-		self.node      = tuple[1]
-		self.release   = tuple[2]
-		self.version   = tuple[3]
-		self.machine   = tuple[4]
-		self.processor = tuple[5]
-
-		## Initialize the OS type attribute which will be populated below.
-		self.os_type   = "unknown"
-
-		## Initialize the platform OS-dependent attribute objects.
-		## Mac OS
-		if (re.search(r'mac', self.system.lower())):
-			self.os_type = "mac"
-			self.mac_platform = MacPlatform(platform.mac_ver(release='', versioninfo=('', '', ''), machine=''))
-
-		## Linux/Unix
-		elif (re.search(r'nix', self.system.lower())):
-			self.os_type = "nix"
-			self.nix_platform = NixPlatform(platform.linux_distribution(distname='', version='', id='', supported_dists=('SuSE', 'debian', 'redhat', 'mandrake'), full_distribution_name=1))
-
-		## Windows
-		elif (re.search(r'win', self.system.lower())):
-			self.os_type = "windows"
-			self.win_platform = WinPlatform(platform.win32_ver(release='', version='', csd='', ptype=''))
+		self.logger.debug("Entering BitCollector.ModuleScheduler.__init__()")
 
-		else:
-			self.logger.warning("Unknown OS type. Unable to perform OS-dependent logic!")
+		self.framework_settings = framework_settings
+		self.platform_details   = platform_details
+		self.max_workers        = framework_settings.max_workers
+
+		## Module threads put themselves on this queue when they finish.
+		self.completion_queue = Queue.Queue()
+		self.thread_manager   = ThreadManager()
+
+		## Initialize one result per configured module, kept in configuration order.
+		self.results = []
+		for module_dict in framework_settings.module_list:
+			self.results.append({"name": module_dict["name"], "status": "pending", "return_code": None, "start_time": None, "end_time": None, "usage": None})
+
+		## The threads started so far and the position of their module, so that modules which return after timing out are still accounted for.
+		self.started = {}
+
+		## The threads of the modules which timed out and have not returned yet, and the end of their grace period.
+		self.cancelled = {}
+
+		self.run_start_time = None
+		self.run_end_time   = None
+
+		## Measure the whole framework process as well. Thread-scoped module figures leave out the threads the modules start.
+		self.run_account = bitCollector_accounting.ModuleAccount("run")
+
+	## Method Name: getDependencyState
+	##
+	## Purpose: Determine whether a pending module may start.
+	##
+	## Parameters
+	## 1. index - The position of the module in the module list.
+	##
+	## Returns
+	## "ready" when every dependency completed, "waiting" when a dependency has not finished yet
+	## and "blocked" when a dependency failed, timed out or was skipped.
+	def getDependencyState(self, index):
+		state = "ready"
+
+		for dependency in self.framework_settings.module_list[index].get("depends_on", []):
+			for result in self.results:
+				if (result["name"] != dependency):
+					continue
+
+				if (result["status"] in ("failed", "skipped", "timed_out")):
+					return "blocked"
+
+				elif (result["status"] != "completed"):
+					state = "waiting"
+
+		return state
+
+	## Method Name: run
+	##
+	## Purpose: Start every module as soon as its dependencies are met and a worker slot is free, then wait for all of them.
+	def run(self):
+		self.logger.debug("Entering BitCollector.ModuleScheduler.run()")
+
+		self.run_start_time = time.time()
+		self.run_account.start("process")
+
+		pending   = range(len(self.framework_settings.module_list))
+		running   = {}
+		deadlines = {}
+
+		while (len(pending) > 0 or len(running) > 0):
+			## Start the pending modules in configuration order until the worker slots are used up.
+			for index in list(pending):
+				state = self.getDependencyState(index)
+
+				if (state == "blocked"):
+					pending.remove(index)
+					self.results[index]["status"] = "skipped"
+					self.logger.warning("Skipping BitCollector module: " + self.results[index]["name"] + ". A module it depends on did not complete.")
+
+				elif (state == "ready" and len(running) < self.max_workers):
+					pending.remove(index)
+					self.results[index]["status"] = "running"
+
+					module_dict = self.framework_settings.module_list[index]
+
+					## Give the module a stop token it can poll or wait on to support cancellation.
+					if (module_dict.get("execution", self.framework_settings.execution) == "process"):
+						module_dict["stop_token"] = StopToken(multiprocessing.Event())
+
+					else:
+						module_dict["stop_token"] = StopToken(threading.Event())
+
+					## Give the module an account to measure its resources and count the files it handles.
+					module_dict["account"] = bitCollector_accounting.ModuleAccount(module_dict["name"])
+
+					new_thread = InitializeBCModuleThread(self.framework_settings, self.platform_details, module_dict, self.completion_queue)
+					running[new_thread]      = index
+					self.started[new_thread] = index
+					self.thread_manager.addThread(new_thread)
+
+					if ("timeout_seconds" in module_dict):
+						deadlines[new_thread] = time.time() + module_dict["timeout_seconds"]
+
+			## Nothing is running and nothing can start, so the remaining modules depend on each other.
+			if (len(running) == 0):
+				for index in pending:
+					self.results[index]["status"] = "skipped"
+					self.logger.warning("Skipping BitCollector module: " + self.results[index]["name"] + ". Its dependencies can never be met.")
+
+				break
+
+			## Block until one of the running modules returns or the earliest timeout expires.
+			try:
+				if (len(deadlines) > 0):
+					finished_thread = self.completion_queue.get(True, max(min(deadlines.values()) - time.time(), 0))
+
+				else:
+					finished_thread = self.completion_queue.get()
+
+			except Queue.Empty:
+				self.cancelExpiredModules(running, deadlines)
+				continue
+
+			## Modules which already timed out no longer hold a worker slot.
+			if (finished_thread not in running):
+				self.addCancelledResult(finished_thread)
+				continue
+
+			index = running.pop(finished_thread)
+			deadlines.pop(finished_thread, None)
+
+			self.results[index]["return_code"] = finished_thread.return_code
+			self.results[index]["start_time"]  = finished_thread.start_time
+			self.results[index]["end_time"]    = finished_thread.end_time
+			self.results[index]["usage"]       = finished_thread.usage
+
+			if (finished_thread.error == 1 or finished_thread.return_code not in (0, None)):
+				self.results[index]["status"] = "failed"
+
+			else:
+				self.results[index]["status"] = "completed"
+
+			finished_thread.join()
+			self.thread_manager.removeThread(finished_thread)
+
+		## Let the modules which timed out finish what they were doing before the shared services are closed.
+		self.waitForCancelledModules()
+
+		self.run_end_time = time.time()
+		self.run_account.stop()
+		self.logRunSummary(self.run_end_time - self.run_start_time)
+
+		return self.results
+
+	## Method Name: cancelExpiredModules
+	##
+	## Purpose: Signal every module whose timeout has passed to stop and release its worker slot.
+	##
+	## Parameters
+	## 1. running   - The dictionary mapping running threads to their position in the module list.
+	## 2. deadlines - The dictionary mapping running threads to the time at which they time out.
+	def cancelExpiredModules(self, running, deadlines):
+		current_time = time.time()
+
+		for thread, deadline in deadlines.items():
+			if (deadline > current_time):
+				continue
+
+			index = running.pop(thread)
+			del deadlines[thread]
+
+			thread.module_dict["stop_token"].requestStop()
+			self.cancelled[thread] = current_time + _stop_grace_seconds
+
+			self.results[index]["status"]     = "timed_out"
+			self.results[index]["start_time"] = thread.start_time
+			self.results[index]["end_time"]   = current_time
+
+			self.logger.warning("BitCollector module: " + self.results[index]["name"] + " exceeded its timeout of " + str(thread.module_dict["timeout_seconds"]) + " seconds. Requested it to stop.")
+
+	## Method Name: addCancelledResult
+	##
+	## Purpose: Account for a module which returned after it timed out.
+	##
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread of the module.
+	def addCancelledResult(self, thread):
+		self.logger.info("Timed out BitCollector module: " + thread.module_dict["name"] + " returned after being cancelled.")
+		self.results[self.started[thread]]["usage"] = thread.usage
+
+		self.cancelled.pop(thread, None)
+		thread.join()
+		self.thread_manager.removeThread(thread)
+
+	## Method Name: waitForCancelledModules
+	##
+	## Purpose: Give the modules which timed out a bounded grace period to return, so that the records they emitted are
+	##          written and they are done with the state cache and the evidence database before the framework closes them.
+	##          The grace period starts when the module is cancelled. Threads supervising a worker process terminate it once the
+	##          same grace period has passed, so they are given two more seconds: one queue poll to notice the stop request and
+	##          one to notice the grace period is over.
+	def waitForCancelledModules(self):
+		while (len(self.cancelled) > 0):
+			try:
+				self.addCancelledResult(self.completion_queue.get(True, max(max(self.cancelled.values()) + 2 - time.time(), 0)))
+
+			except Queue.Empty:
+				break
+
+		for thread in self.cancelled:
+			self.logger.warning("BitCollector module: " + thread.module_dict["name"] + " did not stop within " + str(_stop_grace_seconds) + " seconds of being cancelled. Its results may be incomplete.")
+
+	## Method Name: logRunSummary
+	##
+	## Purpose: Log the outcome of every module as a table, as well as the totals for the run.
+	##
+	## Parameters
+	## 1. wall_time - The number of seconds the whole run took.
+	def logRunSummary(self, wall_time):
+		module_time = 0.0
+		counts      = {"completed": 0, "failed": 0, "skipped": 0, "timed_out": 0}
+		timed_out   = []
+
+		table = {"title": "Module summary", "columns": ["Module", "Status", "Return code", "Seconds", "Measured on", "CPU seconds", "Read", "Written", "Files", "Records", "Peak RSS growth (process)"], "rows": []}
+
+		for result in self.results:
+			counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+			if (result["status"] == "timed_out"):
+				timed_out.append(result["name"])
+
+			row = [result["name"], result["status"], result["return_code"]] + [""] * 8
+
+			if (result["start_time"] != None and result["end_time"] != None):
+				duration     = result["end_time"] - result["start_time"]
+				module_time += duration
+				row[3]       = "%.2f" % duration
+
+			## Modules which timed out and have not returned yet have not been measured.
+			usage = result["usage"]
+
+			if (usage != None):
+				row[4:] = [usage["cpu_scope"], "%.2f" % usage["cpu_seconds"], bitCollector_accounting.formatBytes(usage["bytes_read"]), bitCollector_accounting.formatBytes(usage["bytes_written"]), usage["file_count"], usage["records"]["written"], "+" + bitCollector_accounting.formatBytes(usage["peak_rss_delta_bytes"])]
+
+			table["rows"].append(row)
+
+		self.logger.info(bitCollector_logging.formatTable(table, "text"), extra={"table": table})
+
+		self.logger.info("Run summary: %d completed, %d failed, %d timed out, %d skipped using %d workers in %.2fs (%.2fs of module time)" % (counts["completed"], counts["failed"], counts["timed_out"], counts["skipped"], self.max_workers, wall_time, module_time))
+
+		usage = self.run_account.usage
+		self.logger.info("Run usage (whole process): CPU %.2fs - peak RSS +%s - read %s - written %s" % (usage["cpu_seconds"], bitCollector_accounting.formatBytes(usage["peak_rss_delta_bytes"]), bitCollector_accounting.formatBytes(usage["bytes_read"]), bitCollector_accounting.formatBytes(usage["bytes_written"])))
+
+		if (len(timed_out) > 0):
+			self.logger.warning("Timed out modules: " + ", ".join(timed_out))
+
+	## Method Name: getRunReport
+	##
+	## Purpose: Gather the outcome and resource usage of every module into the run report.
+	##
+	## Returns
+	## The run report as a dictionary which can be written as JSON.
+	def getRunReport(self):
+		report = {"framework_version": _framework_version, "host": self.platform_details.node, "os_type": self.platform_details.os_type, "max_workers": self.max_workers, "start_time": self.run_start_time, "end_time": self.run_end_time, "wall_seconds": None, "usage": self.run_account.usage, "modules": self.results}
+
+		if (self.run_start_time != None and self.run_end_time != None):
+			report["wall_seconds"] = self.run_end_time - self.run_start_time
+
+		return report
+
+## Class Name: StopToken
+##
+## Purpose: Let the framework ask a running BitCollector module to stop. Modules find it in module_dict["stop_token"].
+class StopToken():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the stop token.
+	##
+	## Parameters
+	## 1. event - A threading.Event, or a multiprocessing.Event for modules running in a worker process.
+	def __init__(self, event):
+		self.event = event
+
+	## Method Name: isStopRequested
+	##
+	## Purpose: Check whether the module has been asked to stop.
+	def isStopRequested(self):
+		return self.event.is_set()
+
+	## Method Name: requestStop
+	##
+	## Purpose: Ask the module to stop.
+	def requestStop(self):
+		self.event.set()
+
+	## Method Name: wait
+	##
+	## Purpose: Sleep until the module is asked to stop or the timeout passes. Use this instead of time.sleep().
+	##
+	## Parameters
+	## 1. timeout - The maximum number of seconds to wait.
+	##
+	## Returns
+	## True if the module has been asked to stop.
+	def wait(self, timeout):
+		self.event.wait(timeout)
+
+		return self.event.is_set()
+
+## Class Name: PlatformDetails
+##
+## Purpose: Give the slotted platform classes a compact pickled form for worker processes.
+class PlatformDetails(object):
+	__slots__ = ()
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Pickle the slot values which have been set.
+	def __getstate__(self):
+		state = {}
+
+		for slot in self.__slots__:
+			if (hasattr(self, slot)):
+				state[slot] = getattr(self, slot)
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the slot values in a worker process.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		for slot, value in state.iteritems():
+			setattr(self, slot, value)
+
+## Class Name: Platform
+##
+## Purpose: Hold information about the target machine.
+##          Every detail is looked up the first time it is used and then kept. The details which are
+##          costly to look up (they read files or spawn subprocesses) are also kept in an on-disk
+##          fingerprint of the host, which later runs reuse until it is older than the TTL.
+class Platform(PlatformDetails):
+	__slots__ = ("cache_path", "ttl", "values", "cache_time", "cache_loaded")
+
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the platform details. Nothing is looked up yet.
+	##
+	## Parameters
+	## 1. cache_path - (Optional) The path to the host fingerprint cache. None leaves the details uncached between runs.
+	## 2. ttl        - (Optional) The number of seconds the host fingerprint cache stays valid.
+	def __init__(self, cache_path=None, ttl=_default_platform_ttl):
+		logging.getLogger(self.__class__.__name__).debug("Entering BitCollector.Platform.__init__()")
+
+		self.cache_path   = cache_path
+		self.ttl          = ttl
+		self.values       = {}
+		self.cache_time   = None
+		self.cache_loaded = 0
+
+	## Method Name: getValue
+	##
+	## Purpose: Look a detail up once and keep it. Costly details are read from and saved to the fingerprint cache.
+	##
+	## Parameters
+	## 1. key     - The name of the detail.
+	## 2. compute - The function looking the detail up.
+	def getValue(self, key, compute):
+		if (key not in self.values):
+			if (key in _cached_platform_details):
+				self.loadCache()
+
+			if (key not in self.values):
+				self.values[key] = normalizePlatformDetail(compute())
+
+				if (key in _cached_platform_details):
+					self.saveCache()
+
+		return self.values[key]
+
+	## Method Name: loadCache
+	##
+	## Purpose: Read the fingerprint cache once. It is ignored if it belongs to another host or is older than the TTL.
+	def loadCache(self):
+		if (self.cache_loaded == 1 or self.cache_path == None):
+			return
+
+		self.cache_loaded = 1
+
+		try:
+			cache_file = open(self.cache_path, 'r')
+
+			try:
+				cache = json.load(cache_file)
+
+			finally:
+				cache_file.close()
+
+		except (IOError, ValueError):
+			return
+
+		if (cache.get("host") != socket.gethostname() or time.time() - cache.get("time", 0) > self.ttl):
+			return
+
+		self.cache_time = cache["time"]
+
+		for key, value in cache.get("values", {}).iteritems():
+			if (key in _cached_platform_details and key not in self.values):
+				self.values[str(key)] = value
+
+	## Method Name: saveCache
+	##
+	## Purpose: Write the costly details to the fingerprint cache. It is renamed into place so that concurrent runs never read half of it.
+	def saveCache(self):
+		if (self.cache_path == None):
+			return
+
+		if (self.cache_time == None):
+			self.cache_time = time.time()
+
+		values = {}
+		for key in _cached_platform_details:
+			if (key in self.values):
+				values[key] = self.values[key]
+
+		temp_path = self.cache_path + "." + str(os.getpid()) + ".tmp"
+
+		try:
+			cache_file = open(temp_path, 'w')
+			json.dump({"host": socket.gethostname(), "time": self.cache_time, "values": values}, cache_file, indent=1, sort_keys=True)
+			cache_file.close()
+
+			## os.rename does not replace an existing file on Windows.
+			if (os.name == "nt" and os.path.exists(self.cache_path)):
+				os.remove(self.cache_path)
+
+			os.rename(temp_path, self.cache_path)
+
+		except (IOError, OSError), error:
+			logging.getLogger(self.__class__.__name__).warning("Unable to write the platform fingerprint cache: " + self.cache_path + ". " + str(error))
+
+	## Method Name: getUname
+	##
+	## Purpose: Return the system, hostname, release, version and machine of the target machine.
+	##          os.uname is a single system call. platform.uname also spawns a subprocess to find the processor,
+	##          so it is only used where os.uname does not exist (Windows) and is then kept in the fingerprint cache.
+	def getUname(self):
+		if (hasattr(os, "uname")):
+			return self.getValue("uname", os.uname)
+
+		return self.getValue("win_uname", lambda: platform.uname()[:5])
+
+	## The platform-independent attributes.
+	system    = property(lambda self: self.getUname()[0])
+	node      = property(lambda self: self.getUname()[1])
+	release   = property(lambda self: self.getUname()[2])
+	version   = property(lambda self: self.getUname()[3])
+	machine   = property(lambda self: self.getUname()[4])
+	processor = property(lambda self: self.getValue("processor", platform.processor))
+
+	## Method Name: getOsType
+	##
+	## Purpose: Work out the type of OS running on the target machine. (mac, nix, windows or unknown)
+	def getOsType(self):
+		if ("os_type" not in self.values):
+			system = self.system.lower()
+
+			## Check for Mac OS first since "darwin" contains "win".
+			if (system == "darwin" or system.startswith("mac")):
+				self.values["os_type"] = "mac"
+
+			elif (system.startswith("win") or system.startswith("cygwin")):
+				self.values["os_type"] = "windows"
+
+			elif (system in ("linux", "freebsd", "openbsd", "netbsd", "sunos", "aix", "hp-ux") or re.search(r'nix|nux|bsd', system)):
+				self.values["os_type"] = "nix"
+
+			else:
+				self.values["os_type"] = "unknown"
+				logging.getLogger(self.__class__.__name__).warning("Unknown OS type. Unable to perform OS-dependent logic!")
+
+		return self.values["os_type"]
+
+	os_type = property(getOsType)
+
+	## Method Name: getMacPlatform
+	##
+	## Purpose: Return the Mac OS-dependent details, or None on other OS types.
+	def getMacPlatform(self):
+		if (self.os_type != "mac"):
+			return None
+
+		return MacPlatform(self.getValue("mac_ver", platform.mac_ver))
+
+	## Method Name: getNixPlatform
+	##
+	## Purpose: Return the Linux/Unix OS-dependent details, or None on other OS types.
+	def getNixPlatform(self):
+		if (self.os_type != "nix"):
+			return None
+
+		return NixPlatform(self.getValue("linux_distribution", lambda: platform.linux_distribution(supported_dists=('SuSE', 'debian', 'redhat', 'mandrake'), full_distribution_name=1)))
+
+	## Method Name: getWinPlatform
+	##
+	## Purpose: Return the Windows OS-dependent details, or None on other OS types.
+	def getWinPlatform(self):
+		if (self.os_type != "windows"):
+			return None
+
+		return WinPlatform(self.getValue("win32_ver", platform.win32_ver))
+
+	## The platform OS-dependent attribute objects.
+	mac_platform = property(getMacPlatform)
+	nix_platform = property(getNixPlatform)
+	win_platform = property(getWinPlatform)
 
 ## Class Name: MacPlatform
 ##
 ## Purpose: Hold Mac OS-dependent information about the target machine.
-class MacPlatform():
+class MacPlatform(PlatformDetails):
+	__slots__ = ("release", "version_info", "machine")
+
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the Mac OS-dependent attributes.
 	##
 	## Parameters
-	## 1. tuple - A 4 part-tuple containing platform-independent information about the target machine.
-	##    Index 0  - The release # of the Mac OS running on the target machine. (2.2.0, NT, 8, etc)
+	## 1. tuple - A 3-part tuple containing Mac OS-dependent information about the target machine.
+	##    Index 0  - The release # of the Mac OS running on the target machine. (10.9.5, etc)
 	##    Index 1  - Information about the running Mac OS version as a tuple.
 	##        Index[1][0] - The version of the Mac OS running on the target machine.
 	##        Index[1][1] - The dev stage of the Mac OS version running on the target machine.
 	##        Index[1][2] - Whether or not the Mac OS version running on the target machine is a non-release version.
-	##    Index 2  - The parenthesized portion of the version. (usually a codename)
+	##    Index 2  - The machine CPU architecture.
 	def __init__(self, tuple):
-		## Initialize the Logger for this class.
-		self.logger = logging.getLogger(self.__class__.__name__)
-		self.logger.debug("Entering BitCollector.MacPlatform.__init__()")
-
-		## Replace unknown information ('') with "Unknown"
-		for each in tuple:
-			if (each == ""):
-				each = "Unknown"
-
-		## Initialize the Mac OS-dependent attribute objects.
 		self.release      = tuple[0]
 		self.version_info = tuple[1]
 		self.machine      = tuple[2]
@@ -303,27 +1092,19 @@ class MacPlatform():
 ## Class Name: NixPlatform
 ##
 ## Purpose: Hold Linux/Unix OS-dependent information about the target machine.
-class NixPlatform():
+class NixPlatform(PlatformDetails):
+	__slots__ = ("distname", "version", "id")
+
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the Linux/Unix OS-dependent attributes.
 	##
 	## Parameters
-	## 1. tuple - A 4 part-tuple containing platform-independent information about the target machine.
+	## 1. tuple - A 3-part tuple containing Linux/Unix OS-dependent information about the target machine.
 	##    Index 0  - The full distribution name of the Linux/Unix OS.
 	##    Index 1  - The version of the Linux/Unix OS running on the target machine.
 	##    Index 2  - The parenthesized portion of the version. (usually a codename)
 	def __init__(self, tuple):
-		## Initialize the Logger for this class.
-		self.logger = logging.getLogger(self.__class__.__name__)
-		self.logger.debug("Entering BitCollector.NixPlatform.__init__()")
-
-		## Replace unknown information ('') with "Unknown"
-		for each in tuple:
-			if (each == ""):
-				each = "Unknown"
-
-		## Initialize the Linux/Unix OS-dependent attribute objects.
 		self.distname = tuple[0]
 		self.version  = tuple[1]
 		self.id       = tuple[2]
@@ -331,28 +1112,20 @@ class NixPlatform():
 ## Class Name: WinPlatform
 ##
 ## Purpose: Hold Windows OS-dependent information about the target machine.
-class WinPlatform():
+class WinPlatform(PlatformDetails):
+	__slots__ = ("release", "version", "csd", "ptype")
+
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the Windows OS-dependent attributes.
 	##
 	## Parameters
-	## 1. tuple - A 4 part-tuple containing platform-independent information about the target machine.
+	## 1. tuple - A 4-part tuple containing Windows OS-dependent information about the target machine.
 	##    Index 0  - The release # of the Windows OS running on the target machine.
 	##    Index 1  - The version of the Windows OS running on the target machine.
 	##    Index 2  - The service pack level of the Windows OS.
 	##    Index 3  - The processor type.
 	def __init__(self, tuple):
-		## Initialize the Logger for this class.
-		self.logger = logging.getLogger(self.__class__.__name__)
-		self.logger.debug("Entering BitCollector.WinPlatform.__init__()")
-
-		## Replace unknown information ('') with "Unknown"
-		for each in tuple:
-			if (each == ""):
-				each = "Unknown"
-
-		## Initialize the Windows OS-dependent attribute objects.
 		self.release = tuple[0]
 		self.version = tuple[1]
 		self.csd     = tuple[2]
@@ -360,58 +1133,160 @@ class WinPlatform():
 
 ## Classless Method Declarations
 
+## Method Name: allocateLogFile
+##
+## Purpose: Claim a numbered log file name (<log_file>_<n>.<extension>) with an exclusive create so that
+##          concurrent runs sharing a log directory can never pick the same name.
+##
+## Parameters
+## 1. log_file        - The path to the log file without the run number or extension.
+## 2. extension       - The extension of the log file. (The logging format)
+## 3. reserved_suffix - (Optional) A suffix appended to the file actually created, such as ".gz" for compressed logs.
+##
+## Returns
+## The path to the claimed log file, without the reserved suffix.
+def allocateLogFile(log_file, extension, reserved_suffix=""):
+	run_number = 1
+
+	while (1):
+		candidate = log_file + "_" + str(run_number) + "." + extension
+
+		try:
+			os.close(os.open(candidate + reserved_suffix, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0644))
+			return candidate
+
+		except OSError, error:
+			if (error.errno != errno.EEXIST):
+				raise
+
+		## The name is taken. Rather than probing one name at a time, find the highest run number in a single
+		## directory listing and try the one after it. Only a concurrent run claiming that name causes another pass.
+		pattern = re.compile(re.escape(os.path.basename(log_file)) + r'_(\d+)\.' + re.escape(extension))
+
+		for file_name in os.listdir(os.path.dirname(os.path.abspath(log_file))):
+			match = pattern.match(file_name)
+
+			if (match):
+				run_number = max(run_number, int(match.group(1)))
+
+		run_number += 1
+
 ## Method Name: frameworkCleanUp
 ##
 ## Purpose: Wait for child threads to exit and perform Framework clean up
 ##
 ## Parameters
-## 1. log_file       - The name of the log file to write the logging footer to.
-## 2. logging_format - The format to in which to save the log file (CSV or HTML)
-## 3. log_to_file    - A boolean tracking whether or not to log to the log file.
-def frameworkCleanUp(root_logger, log_file, logging_format, log_to_file):
+## 1. root_logger      - The logger from the main method.
+## 2. log_file         - The name of the log file to write the logging footer to.
+## 3. logging_format   - The format to in which to save the log file (CSV or HTML)
+## 4. log_to_file      - A boolean tracking whether or not to log to the log file.
+## 5. log_writer       - (Optional) The BatchingLogWriter to drain when logging in queue mode.
+## 6. log_file_handler - (Optional) The log file handler to write the footer through.
+## 7. state_cache      - (Optional) The FileStateCache to write out and close.
+## 8. evidence_store   - (Optional) The EvidenceStore to finish loading and close.
+def frameworkCleanUp(root_logger, log_file, logging_format, log_to_file, log_writer=None, log_file_handler=None, state_cache=None, evidence_store=None):
 	root_logger.debug("Entering BitCollector.frameworkCleanUp()")
 
-	while (threading.activeCount() > 1):
-		time.sleep(1)
+	## The scheduler has already waited for the module threads. Join any other non-daemon threads the modules started.
+	## Module threads which did not stop within their grace period after timing out are daemonic and are left behind.
+	for thread in threading.enumerate():
+		if (thread is not threading.current_thread() and thread.isDaemon() == 0):
+			thread.join()
+
+	## Terminate the worker processes of modules which timed out and are still running. Their supervising threads
+	## already gave them the grace period, and join the workers which did stop.
+	for process in multiprocessing.active_children():
+		root_logger.warning("Terminating worker process for BitCollector module: " + process.name + " which did not stop when asked.")
+		process.terminate()
+		process.join()
+
+	## Write out the files recorded during the run so the next run can skip them.
+	if (state_cache != None):
+		state_cache.close()
+
+	## Load the rest of the run into the evidence database and index it.
+	if (evidence_store != None):
+		evidence_store.close()
+
+	## Write out the queued log records before the footer.
+	if (log_writer != None):
+		log_writer.stop()
 
 	## Only write the footer to the log file if file logging was enabled and the format was HTML.
 	if (logging_format == "html" and log_to_file == 1):
-		log_file_handler = open(log_file, 'a')
-		log_file_handler.write("</table>")
-		log_file_handler.close()
+		## Go through the handler when there is one since it knows whether the log file is compressed.
+		if (log_file_handler != None):
+			log_file_handler.acquire()
 
-## Method Name: importBCModules
+			try:
+				log_file_handler.stream.write("</table>")
+				log_file_handler.flush()
+
+			finally:
+				log_file_handler.release()
+
+		else:
+			temp_handler = open(log_file, 'a')
+			temp_handler.write("</table>")
+			temp_handler.close()
+
+## Method Name: resolveBCModules
 ##
-## Purpose: Dynamically import the BitCollector modules specified in the configuration file.
+## Purpose: Locate the BitCollector modules specified in the configuration file without importing them,
+##          and check their parameters against the _module_parameters they declare. Each module is imported
+##          by the registry when it is scheduled.
 ##
 ## Parameters
 ## 1. root_logger      - The logger from the main method.
 ## 2. additional_paths - The list of additional module search paths.
 ## 3. module_list      - The list of modules stored as dictionaries.
-def importBCModules(root_logger, additional_paths, module_list):
-	root_logger.debug("Entering BitCollector.importBCModules()")
+## 4. module_registry  - The ModuleRegistry to resolve the modules with.
+##
+## Returns
+## The number of modules whose parameters are invalid.
+def resolveBCModules(root_logger, additional_paths, module_list, module_registry):
+	root_logger.debug("Entering BitCollector.resolveBCModules()")
 
-	## Add the additional search paths for BitCollector modules.
+	## Add the additional search paths so that the BitCollector modules can import their own helpers.
 	for each in additional_paths:
 		sys.path.append(each)
 
-	## Attempt to import each of the BitCollector modules.
+	## Attempt to resolve each of the BitCollector modules.
+	parameter_errors = 0
+
 	for module in module_list:
-		for key in module:
-			if (key == "name"):
-				try:
-					__import__(module[key])
-					root_logger.info("Successfully imported module: " + str(module[key]))
+		entry = module_registry.resolve(module["name"])
 
-				except:
-					root_logger.warning("Unable to import module: " + str(module[key]))
+		## Modules which do not declare their parameters receive no settings object and parse module_dict["parameters"] themselves.
+		module["settings"] = None
+
+		if (entry == None):
+			root_logger.warning("Unable to find module: " + module["name"])
+			continue
+
+		root_logger.info("Successfully resolved module: " + module["name"] + " (" + str(entry["version"]) + ") at " + entry["path"])
+
+		if (entry["parameters"] != None):
+			try:
+				module["settings"] = bitCollector_parameters.parseParameters(module["name"], entry["parameters"], module["parameters"])
+
+			except bitCollector_parameters.ParameterError, error:
+				parameter_errors += 1
+
+				for problem in error.problems:
+					root_logger.error("Invalid parameters for module: " + module["name"] + ". " + problem)
+
+	## Keep what was resolved for the next run.
+	module_registry.writeCatalog()
+
+	return parameter_errors
 
 ## Method Name: main
 ##
 ## Purpose: Serves as the entry point into the script.
 def main():
 	## Parse the command-line arguments to get start-up options.
-	config_path = parseCLA()
+	config_path, profile_settings = parseCLA()
 
 	## Parse the configuration file to determine runtime settings and to
 	## initialize the FrameworkSettings object to contain all of the settings required to run the modules.
@@ -421,29 +1296,89 @@ def main():
 	root_logger = logging.getLogger("")
 	root_logger.debug("Initialized root_logger")
 
-	## Create a Platform instance to check the hardware and OS configuration.
-	platform_details = Platform(platform.uname())
+	## Profile the modules when asked to on the command line. The profiles of a run are named after its log file.
+	if (profile_settings != None):
+		profile_dir = profile_settings["profile_dir"] or os.path.join(framework_settings.abs_log_dir, "profiles")
+
+		if (os.path.isdir(profile_dir) == 0):
+			try:
+				os.makedirs(profile_dir)
+
+			except OSError:
+				if (os.path.isdir(profile_dir) == 0):
+					root_logger.critical("Unable to create the profile directory: " + profile_dir + ".")
+					sys.exit(1)
 
-	## Dynamically import BitCollector modules specified in the configuration file.
-	importBCModules(root_logger, framework_settings.additional_paths, framework_settings.module_list)
+		framework_settings.profiler = bitCollector_profiling.ModuleProfiler(os.path.abspath(profile_dir), os.path.splitext(os.path.basename(framework_settings.log_file))[0], sample_interval=profile_settings["sample_interval"])
+		root_logger.info("Profiling the modules into: " + framework_settings.profiler.profile_dir)
 
-	## Loop through and call the main method within each of the dynamically loaded BitCollector modules.
-	for module_dict in framework_settings.module_list:
-		new_thread = InitializeBCModuleThread(framework_settings, platform_details, module_dict)
+	## Lower the priority of the collection before any module runs. Worker processes inherit it.
+	if (framework_settings.governor != None):
+		framework_settings.governor.applyPriority()
 
-		## Force the main thread to wait for the child thread before terminating.
-		new_thread.join()
+	## Create a Platform instance to check the hardware and OS configuration. The details are looked up when first used.
+	platform_details = Platform(os.path.join(framework_settings.abs_log_dir, _platform_cache_name))
+
+	## Resolve the BitCollector modules specified in the configuration file. Stop before any module runs if their parameters are invalid.
+	if (resolveBCModules(root_logger, framework_settings.additional_paths, framework_settings.module_list, framework_settings.module_registry) > 0):
+		root_logger.critical("Invalid module parameters. No modules were run.")
+		frameworkCleanUp(root_logger, framework_settings.log_file, framework_settings.logging_format, framework_settings.log_to_file, framework_settings.log_writer, framework_settings.log_file_handler, framework_settings.state_cache, framework_settings.evidence_store)
+		sys.exit(1)
+
+	## Run the main method within each of the dynamically loaded BitCollector modules on the bounded worker pool.
+	module_scheduler = ModuleScheduler(framework_settings, platform_details)
+
+	if (framework_settings.profiler != None):
+		sampler = framework_settings.profiler.startSampler()
+		module_scheduler.run()
+		framework_settings.profiler.stopSampler(sampler, "framework")
+		framework_settings.profiler.logSummary(root_logger)
+
+	else:
+		module_scheduler.run()
+
+	## Write the outcome and resource usage of every module next to the log file.
+	report_path = bitCollector_accounting.writeRunReport(framework_settings.log_file, module_scheduler.getRunReport())
+
+	if (report_path != None):
+		root_logger.info("Wrote the run report: " + report_path)
 
 	## Wait for child threads and perform clean up.
-	frameworkCleanUp(root_logger, framework_settings.log_file, framework_settings.logging_format, framework_settings.log_to_file)
+	frameworkCleanUp(root_logger, framework_settings.log_file, framework_settings.logging_format, framework_settings.log_to_file, framework_settings.log_writer, framework_settings.log_file_handler, framework_settings.state_cache, framework_settings.evidence_store)
+
+## Method Name: normalizePlatformDetail
+##
+## Purpose: Replace the blank values the platform module returns for unknown details with "unknown".
+##
+## Parameters
+## 1. value - The detail as returned by the platform module. Tuples are normalized element by element.
+##
+## Returns
+## The normalized detail. Tuples are returned as lists, which is also how the fingerprint cache stores them.
+def normalizePlatformDetail(value):
+	if (isinstance(value, (tuple, list))):
+		return [normalizePlatformDetail(each) for each in value]
+
+	if (value == "" or value == None):
+		return "unknown"
+
+	return value
 
 ## Method Name: parseCLA
 ##
 ## Purpose: Parse through and validate the CLA needed to start the framework.
+##
+## Returns
+## The path to the configuration file and the dictionary of profiling settings (profile_dir and sample_interval), or None when not profiling.
 def parseCLA():
 	## Initialize flow control booleans
 	bool_help = 0
 	bool_version = 0
+	bool_profile = 0
+
+	config_path     = None
+	profile_dir     = None
+	sample_interval = None
 
 	## Validate # of CLA.
 	if (len(sys.argv) < 2):
@@ -452,7 +1387,9 @@ def parseCLA():
 		sys.exit()
 
 	## Loop through each CLA and choose what to do based on the the arguments provided.
-	for arg in sys.argv:
+	index = 1
+	while (index < len(sys.argv)):
+		arg  = sys.argv[index]
 		temp = arg.lower()
 
 		if (temp == "-h" or temp == "--help"):
@@ -461,12 +1398,42 @@ def parseCLA():
 		elif (temp == "-v" or temp == "--version"):
 			bool_version = 1
 
+		elif (temp == "--profile" or temp.startswith("--profile=")):
+			bool_profile = 1
+
+			if ("=" in arg):
+				profile_dir = arg.split("=", 1)[1]
+
+			## The directory is optional. The next argument is the directory unless it is the configuration file, which comes last.
+			elif (index + 1 < len(sys.argv) and sys.argv[index + 1].startswith("-") == 0 and (config_path != None or index + 2 < len(sys.argv))):
+				index      += 1
+				profile_dir = sys.argv[index]
+
+		elif (temp == "--sample-stacks" or temp.startswith("--sample-stacks=")):
+			bool_profile    = 1
+			sample_interval = bitCollector_profiling._default_sample_interval
+
+			if ("=" in arg):
+				sample_interval = arg.split("=", 1)[1]
+
+			elif (index + 1 < len(sys.argv) and sys.argv[index + 1].isdigit()):
+				index          += 1
+				sample_interval = sys.argv[index]
+
+			if (str(sample_interval).isdigit() == 0 or int(sample_interval) == 0):
+				print "    Invalid Usage:     The stack sampling interval must be a positive number of milliseconds."
+				sys.exit()
+
+			sample_interval = int(sample_interval)
+
 		elif (re.match("--?\w+", temp)):
 			print "    Invalid Usage:     Use " + sys.argv[0] + " -h to display the help."
 			sys.exit()
 
 		else:
-			config_path = sys.argv[1]
+			config_path = arg
+
+		index += 1
 
 	## Print the help
 	if (bool_help == 1):
@@ -474,6 +1441,9 @@ def parseCLA():
 		print "\n    Options"
 		print "        -h | --help - Prints out this help."
 		print "        -v | --version - Prints out the version you are using."
+		print "        --profile [profile_dir] - Runs each module under cProfile, writes one .pstats file per module"
+		print "                                  and logs the hottest functions. Defaults to a profiles directory next to the log."
+		print "        --sample-stacks [milliseconds] - Also samples the stacks of every thread at this interval. (Default: " + str(bitCollector_profiling._default_sample_interval) + ")"
 		print "\nconfig_file - The JSON file containing the settings for the script."
 
 	## Print the version
@@ -484,7 +1454,17 @@ def parseCLA():
 	if (bool_help == 1 or bool_version == 1):
 		sys.exit()
 
-	return config_path
+	if (config_path == None):
+		print "    Invalid Usage: Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	## Profiling is off unless asked for. An empty directory means the default one next to the log.
+	profile_settings = None
+
+	if (bool_profile == 1):
+		profile_settings = {"profile_dir": profile_dir, "sample_interval": sample_interval}
+
+	return config_path, profile_settings
 
 ## Method Name: parseConfig
 ##
@@ -494,15 +1474,25 @@ def parseCLA():
 ## 1. config_path - The path to the configuration file.
 ##
 ## Returns
-## A tuple
-##   Index 0 - The path to the file to write log entries to.
-##   Index 1 - The default logging level to use when logging.
-##   Index 2 - The list of modules. Each element contains the name and settings for one module. 
+## A tuple of runtime settings laid out as described in FrameworkSettings.__init__.
 def parseConfig(config_path):
 	## Initialize blank lists to store the additional paths and module dictionaries.
 	additional_paths = []
 	module_list      = []
 
+	## Initialize the optional framework settings to their defaults.
+	max_workers       = 4
+	execution         = "thread"
+	logging_mode      = "direct"
+	log_compression   = None
+	hash_settings     = {}
+	walker_settings   = {}
+	state_settings    = None
+	search_settings   = None
+	governor_settings = None
+	pipeline_settings = {}
+	evidence_settings = None
+
 	## Initialize booleans tracking if the required framework attributes are present.
 	module_list_present      = 0
 	additional_paths_present = 0
@@ -592,6 +1582,27 @@ def parseConfig(config_path):
 						parameters_present = 1
 						current_module.update({key: value})
 
+					elif (key == "timeout_seconds"):
+						if (isinstance(value, (int, float)) and value > 0):
+							current_module.update({key: value})
+
+						else:
+							print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid module timeout_seconds: " + str(value) + ". Ignoring."
+
+					elif (key == "execution"):
+						if (value in ("thread", "process")):
+							current_module.update({key: value})
+
+						else:
+							print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown module execution mode: " + str(value) + ". Using the framework default."
+
+					elif (key == "depends_on"):
+						## Accept either a single module name or a list of module names.
+						if (isinstance(value, basestring)):
+							value = [value]
+
+						current_module.update({key: value})
+
 					else:
 						print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown module configuration attribute: " + key
 
@@ -614,6 +1625,192 @@ def parseConfig(config_path):
 					## Add the dictionary containing all the module settings to the list of modules.
 					module_list.append(current_module)
 
+		elif (key == "max_workers"):
+			if (isinstance(value, int) and value > 0):
+				max_workers = value
+
+			else:
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid max_workers: " + str(value) + ". Defaulting to " + str(max_workers) + "."
+
+		elif (key == "log_compression"):
+			log_compression = {"codec": "gzip", "mode": "background", "level": 6}
+
+			## Loop through the compression settings and override the defaults.
+			for setting, setting_value in value.iteritems():
+				if (setting == "codec" and setting_value in ("gzip", "zstd")):
+					log_compression["codec"] = setting_value
+
+				elif (setting == "mode" and setting_value in ("background", "stream")):
+					log_compression["mode"] = setting_value
+
+				elif (setting == "level" and isinstance(setting_value, int)):
+					log_compression["level"] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid log_compression setting: " + setting + ". Ignoring."
+
+			if (log_compression["codec"] == "zstd" and bitCollector_logging.zstandard == None):
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - The zstandard package is not installed. Compressing the logs with gzip instead."
+				log_compression["codec"] = "gzip"
+				log_compression["level"] = min(log_compression["level"], 9)
+
+		elif (key == "hashing"):
+			## Loop through the hashing settings and keep the valid ones.
+			for setting, setting_value in value.iteritems():
+				if (setting == "algorithms"):
+					for algorithm in setting_value:
+						try:
+							hashlib.new(algorithm)
+
+						except ValueError:
+							print "Startup - bitCollector_framework.root.parseConfig - ERROR - Unknown hashing algorithm: " + algorithm + "."
+							sys.exit()
+
+					hash_settings["algorithms"] = [str(algorithm) for algorithm in setting_value]
+
+				elif (setting in ("worker_count", "block_size", "mmap_threshold") and isinstance(setting_value, int) and setting_value > 0):
+					hash_settings[str(setting)] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid hashing setting: " + setting + ". Ignoring."
+
+		elif (key == "walker"):
+			## Loop through the file walker settings and keep the valid ones.
+			for setting, setting_value in value.iteritems():
+				if (setting in ("worker_count", "progress_interval") and isinstance(setting_value, int) and setting_value > 0):
+					walker_settings[str(setting)] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid walker setting: " + setting + ". Ignoring."
+
+		elif (key == "state_cache"):
+			## Enable the file-state cache and loop through its settings, keeping the valid ones.
+			state_settings = {}
+
+			for setting, setting_value in value.iteritems():
+				if (setting == "file_name" and isinstance(setting_value, basestring) and setting_value != ""):
+					state_settings["file_name"] = str(setting_value)
+
+				elif (setting == "batch_size" and isinstance(setting_value, int) and setting_value > 0):
+					state_settings["batch_size"] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid state_cache setting: " + setting + ". Ignoring."
+
+		elif (key == "search"):
+			## Gather the keywords from the inline list and the keyword list file, keeping the valid settings.
+			keywords        = []
+			search_settings = {}
+
+			for setting, setting_value in value.iteritems():
+				if (setting == "keywords" and isinstance(setting_value, list)):
+					keywords += setting_value
+
+				elif (setting == "keywords_file"):
+					try:
+						keywords += bitCollector_search.loadKeywords(setting_value)
+
+					except IOError, error:
+						print "Startup - bitCollector_framework.root.parseConfig - ERROR - Unable to read the keywords file: " + str(setting_value) + ". " + str(error)
+						sys.exit()
+
+				elif (setting == "case_sensitive" and setting_value in (0, 1)):
+					search_settings["case_sensitive"] = setting_value
+
+				elif (setting == "chunk_size" and isinstance(setting_value, int) and setting_value > 0):
+					search_settings["chunk_size"] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid search setting: " + setting + ". Ignoring."
+
+			keywords = [keyword for keyword in keywords if isinstance(keyword, basestring) and keyword != ""]
+
+			if (len(keywords) > 0):
+				search_settings["keywords"] = keywords
+
+			else:
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - No keywords to search for. Keyword search is disabled."
+				search_settings = None
+
+		elif (key == "governor"):
+			## Loop through the governor settings and keep the valid ones. Rates and sizes are configured in megabytes.
+			governor_settings = {}
+
+			for setting, setting_value in value.iteritems():
+				is_number = isinstance(setting_value, (int, float)) and isinstance(setting_value, bool) == 0
+
+				if (setting == "read_megabytes_per_second" and is_number and setting_value > 0):
+					governor_settings["read_rate"] = setting_value * 1048576.0
+
+				elif (setting == "burst_megabytes" and is_number and setting_value > 0):
+					governor_settings["burst"] = setting_value * 1048576.0
+
+				elif (setting in ("max_readers", "check_interval") and isinstance(setting_value, int) and setting_value > 0):
+					governor_settings[str(setting)] = setting_value
+
+				elif (setting == "nice" and isinstance(setting_value, int) and 0 < setting_value < 20):
+					governor_settings["nice"] = setting_value
+
+				elif (setting == "ionice" and isinstance(setting_value, dict) and setting_value.get("class") in bitCollector_governor._ionice_classes and setting_value.get("level", 0) in range(8)):
+					governor_settings["ionice"] = {"class": str(setting_value["class"]), "level": setting_value.get("level", 7)}
+
+				elif (setting == "load_threshold" and is_number and setting_value > 0):
+					governor_settings["load_threshold"] = float(setting_value)
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid governor setting: " + setting + ". Ignoring."
+
+			## The load average scales the read rate, so it does nothing without one.
+			if ("load_threshold" in governor_settings and "read_rate" not in governor_settings):
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - The governor load_threshold requires read_megabytes_per_second. Ignoring."
+				del governor_settings["load_threshold"]
+
+			if (len(governor_settings) == 0):
+				governor_settings = None
+
+		elif (key == "pipeline"):
+			## Loop through the record pipeline settings and keep the valid ones.
+			for setting, setting_value in value.iteritems():
+				if (setting == "stages" and isinstance(setting_value, list) and set(setting_value) <= set(bitCollector_pipeline._pipeline_stages)):
+					pipeline_settings["stages"] = [str(stage) for stage in setting_value]
+
+				elif (setting == "capacity" and isinstance(setting_value, int) and setting_value > 0):
+					pipeline_settings["capacity"] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid pipeline setting: " + setting + ". Ignoring."
+
+		elif (key == "evidence"):
+			## Loop through the evidence database settings and keep the valid ones.
+			evidence_settings = {}
+
+			for setting, setting_value in value.iteritems():
+				if (setting == "file_name" and isinstance(setting_value, basestring) and setting_value != ""):
+					evidence_settings["file_name"] = setting_value
+
+				elif (setting in ("batch_size", "capacity") and isinstance(setting_value, int) and setting_value > 0):
+					evidence_settings[str(setting)] = setting_value
+
+				elif (setting == "store_logs" and setting_value in (0, 1)):
+					evidence_settings["store_logs"] = setting_value
+
+				else:
+					print "Startup - bitCollector_framework.root.parseConfig - WARNING - Invalid evidence setting: " + setting + ". Ignoring."
+
+		elif (key == "logging_mode"):
+			if (value in ("direct", "queue")):
+				logging_mode = value
+
+			else:
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown logging mode: " + str(value) + ". Defaulting to " + logging_mode + "."
+
+		elif (key == "execution"):
+			if (value in ("thread", "process")):
+				execution = value
+
+			else:
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown execution mode: " + str(value) + ". Defaulting to " + execution + "."
+
 		else:
 			print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown framework configuration attribute: " + key
 
@@ -646,6 +1843,14 @@ def parseConfig(config_path):
 		bool_exit = 1
 		missing_framework_config_entries.append("log_to_stdout")
 	
+	## Warn about dependencies on modules which are not configured. They are ignored when scheduling.
+	module_names = [module["name"] for module in module_list]
+	for module in module_list:
+		for dependency in list(module.get("depends_on", [])):
+			if (dependency not in module_names):
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - Module " + module["name"] + " depends on unknown module: " + dependency + ". Ignoring."
+				module["depends_on"].remove(dependency)
+
 	if (bool_exit == 1):
 		for entry in missing_framework_config_entries:
 			print "Startup - bitCollector_framework.root.parseConfig - ERROR - Required framework configuration entry missing: " + entry
@@ -655,7 +1860,112 @@ def parseConfig(config_path):
 
 	else:
 		## Return the configuration file name and level as well as the list of modules as a tuple.
-		return log_file, logging_format, logging_level, log_to_file, log_to_stdout, additional_paths, module_list
+		return log_file, logging_format, logging_level, log_to_file, log_to_stdout, additional_paths, module_list, max_workers, execution, logging_mode, log_compression, hash_settings, walker_settings, state_settings, search_settings, governor_settings, pipeline_settings, evidence_settings
+
+## Method Name: runModuleProcess
+##
+## Purpose: Serve as the entry point of a worker process running a single BitCollector module.
+##
+## Parameters
+## 1. message_queue      - The multiprocessing Queue used to send log records and the return code to the parent process.
+## 2. path_to_main       - The absolute path to the running script for dynamic linking in the BitCollector modules.
+## 3. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+## 4. platform_details   - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
+## 5. module_dict        - The name and parameters to pass to the BitCollector module to be initialized.
+def runModuleProcess(message_queue, path_to_main, framework_settings, platform_details, module_dict):
+	## On POSIX the worker is forked while the other module threads keep logging, and Python 2.7 does not reset the logging
+	## locks in the child. A lock another thread held at the fork would never be released here, so replace them all before
+	## anything logs or swaps the handlers.
+	logging._lock = threading.RLock()
+
+	for handler_ref in logging._handlerList:
+		handler = handler_ref()
+
+		if (handler != None):
+			handler.createLock()
+
+	## On POSIX the worker is forked rather than spawned, so nothing is pickled and no __setstate__ runs. The state cache
+	## arrives with the lock the parent held while forking and with the parent's counters, which the parent logs itself.
+	## The parent had no connection open at that moment. (FileStateCache.startProcess) The registry's lock may have been
+	## held by another thread of the parent. Give the worker state of its own before anything uses them.
+	if (framework_settings.state_cache != None):
+		framework_settings.state_cache.initializeState()
+
+	framework_settings.module_registry.lock = threading.Lock()
+
+	## Replace any handlers inherited from the parent with one forwarding every record to the parent.
+	## The inherited handlers are not closed so that their buffers are not flushed twice.
+	root_logger = logging.getLogger("")
+
+	for handler in list(root_logger.handlers):
+		root_logger.removeHandler(handler)
+
+	root_logger.addHandler(ProcessLogForwarder(message_queue))
+	root_logger.setLevel(getattr(logging, framework_settings.logging_level.upper(), logging.DEBUG))
+
+	## Processes which were spawned rather than forked do not inherit the additional search paths.
+	for each in [path_to_main] + framework_settings.additional_paths:
+		if (each not in sys.path):
+			sys.path.append(each)
+
+	return_code = None
+	error       = 0
+
+	## The worker process runs nothing but this module, so the whole process is measured.
+	account = module_dict["account"]
+	account.start("process")
+
+	## The evidence database belongs to the framework, so the records written here are sent back to it.
+	sink = None
+	if (framework_settings.evidence_settings != None):
+		sink = lambda rows: message_queue.put(("records", rows))
+
+	pipeline = framework_settings.openPipeline(module_dict["name"], sink)
+	module_dict["output"] = pipeline
+
+	## The framework's sampler only sees its own process, so worker processes sample themselves.
+	sampler = None
+	if (framework_settings.profiler != None):
+		sampler = framework_settings.profiler.startSampler()
+
+	try:
+		entry_point = getattr(framework_settings.module_registry.load(module_dict["name"]), "main")
+		root_logger.info("Successfully imported BitCollector module: " + module_dict["name"] + ".main")
+
+		## Call the entry_point (main) method of the BitCollector module.
+		if (framework_settings.profiler != None):
+			return_code = framework_settings.profiler.profileCall(module_dict["name"], entry_point, multiprocessing.current_process(), path_to_main, framework_settings, platform_details, module_dict)
+
+		else:
+			return_code = entry_point(multiprocessing.current_process(), path_to_main, framework_settings, platform_details, module_dict)
+
+	except AttributeError:
+		error = 1
+		root_logger.warning("Failed to import BitCollector module: " + module_dict["name"] + ".main")
+
+	except ImportError:
+		error = 1
+		root_logger.warning("Failed to import BitCollector module: " + module_dict["name"] + ".main")
+
+	except Exception:
+		error = 1
+		root_logger.exception("Unhandled exception in BitCollector module: " + module_dict["name"] + ".main")
+
+	if (framework_settings.profiler != None):
+		framework_settings.profiler.stopSampler(sampler, module_dict["name"])
+
+	## Every record has to be written before the process reports back. The pipeline goes first, since its hashing
+	## stage records the digests it computes in the state cache.
+	records = pipeline.close()
+
+	## Write out what the worker recorded in the state cache, on its own connection, before reporting back.
+	if (framework_settings.state_cache != None):
+		framework_settings.state_cache.close()
+
+	usage            = account.stop()
+	usage["records"] = records
+
+	message_queue.put(("result", return_code, error, usage))
 
 ## This will prevent main() from running unless explicitly called.
 if (__name__ == "__main__"):
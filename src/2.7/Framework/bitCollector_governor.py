@@ -0,0 +1,257 @@
+## File Name: bitCollector_governor.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the resource governor which keeps a collection from degrading the host it runs on.
+##          File reads made through the framework's services are throttled by a token bucket shared by every
+##          module thread and worker process, the number of files read at the same time is capped, and the
+##          read rate is scaled down while the host's load average is above a threshold. The framework can
+##          also lower its own CPU and I/O priority, which its worker processes inherit.
+##
+## Usage: The hashing and keyword search services throttle their reads themselves. Modules reading files on
+##        their own open them with framework_settings.openFile, which returns a file object whose reads are governed.
+##        history_file = framework_settings.openFile(path, encoding="utf-8", errors="replace")
+##        Reads the framework can not see, such as those SQLite makes, can be accounted for through
+##        framework_settings.governor, which is None unless the "governor" setting is configured.
+##        framework_settings.governor.acquireReader()
+##        framework_settings.governor.throttle(len(block))
+##        framework_settings.governor.releaseReader()
+
+## Standard imports (Static)
+import io, logging, multiprocessing, os, subprocess, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_check_interval = 5
+_default_buffer_size    = 65536
+_minimum_rate_factor    = 0.1
+
+## The ionice scheduling classes the governor accepts, by their number.
+_ionice_classes = {"best-effort": "2", "idle": "3"}
+
+## Class Declarations
+
+## Class Name: ResourceGovernor
+##
+## Purpose: Throttle the file reads of every module and lower the priority of the collection.
+class ResourceGovernor():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the governor. Its state lives in shared memory, so worker processes started afterwards share the limits.
+	##
+	## Parameters
+	## 1. read_rate      - (Optional) The number of bytes per second which may be read, or None to leave the bandwidth unlimited.
+	## 2. burst          - (Optional) The number of bytes which may be read at once after a pause. Defaults to one second of reading.
+	## 3. max_readers    - (Optional) The number of files which may be read at the same time, or None for no limit.
+	## 4. nice           - (Optional) The increment to add to the niceness of the framework and its worker processes.
+	## 5. ionice         - (Optional) The dictionary of the I/O scheduling class ("idle" or "best-effort") and level (0-7) to run with.
+	## 6. load_threshold - (Optional) The one-minute load average per CPU above which the read rate is scaled down.
+	## 7. check_interval - (Optional) The number of seconds between load average checks.
+	def __init__(self, read_rate=None, burst=None, max_readers=None, nice=None, ionice=None, load_threshold=None, check_interval=_default_check_interval):
+		self.read_rate      = read_rate
+		self.burst          = burst or read_rate
+		self.max_readers    = max_readers
+		self.nice           = nice
+		self.ionice         = ionice
+		self.load_threshold = load_threshold
+		self.check_interval = check_interval
+
+		try:
+			self.cpu_count = multiprocessing.cpu_count()
+
+		except NotImplementedError:
+			self.cpu_count = 1
+
+		self.reader_slots = None
+
+		if (max_readers != None):
+			self.reader_slots = multiprocessing.BoundedSemaphore(max_readers)
+
+		## The token bucket. Tokens are bytes, and a read may take the bucket below zero. The reader then sleeps off the debt.
+		self.bucket_lock = multiprocessing.Lock()
+		self.tokens      = multiprocessing.RawValue("d", self.burst or 0)
+		self.last_time   = multiprocessing.RawValue("d", time.time())
+		self.rate_factor = multiprocessing.RawValue("d", 1.0)
+		self.next_check  = multiprocessing.RawValue("d", 0.0)
+
+	## Method Name: acquireReader
+	##
+	## Purpose: Wait for one of the reader slots. Every call must be matched by releaseReader.
+	def acquireReader(self):
+		if (self.reader_slots != None):
+			self.reader_slots.acquire()
+
+	## Method Name: releaseReader
+	##
+	## Purpose: Give a reader slot back.
+	def releaseReader(self):
+		if (self.reader_slots != None):
+			self.reader_slots.release()
+
+	## Method Name: throttle
+	##
+	## Purpose: Account for bytes read and sleep for as long as it takes the bucket to pay them back.
+	##
+	## Parameters
+	## 1. byte_count - The number of bytes read.
+	def throttle(self, byte_count):
+		if (self.read_rate == None):
+			return
+
+		with self.bucket_lock:
+			current_time = time.time()
+
+			if (self.load_threshold != None and current_time >= self.next_check.value):
+				self.next_check.value  = current_time + self.check_interval
+				self.rate_factor.value = self.getRateFactor(self.rate_factor.value)
+
+			rate = self.read_rate * self.rate_factor.value
+
+			self.tokens.value    = min(self.burst, self.tokens.value + (current_time - self.last_time.value) * rate) - byte_count
+			self.last_time.value = current_time
+
+			delay = 0
+			if (self.tokens.value < 0):
+				delay = -self.tokens.value / rate
+
+		## Sleep outside of the lock so the other readers can queue their debt behind this one.
+		if (delay > 0):
+			time.sleep(delay)
+
+	## Method Name: getRateFactor
+	##
+	## Purpose: Work out the share of the read rate to allow at the host's current load.
+	##
+	## Parameters
+	## 1. previous_factor - The factor in use so far. Changes are logged.
+	##
+	## Returns
+	## 1.0 below the load threshold, otherwise the threshold over the load per CPU, but never less than _minimum_rate_factor.
+	def getRateFactor(self, previous_factor):
+		## The load average is not available on Windows.
+		try:
+			load = os.getloadavg()[0] / self.cpu_count
+
+		except (AttributeError, OSError):
+			return 1.0
+
+		factor = 1.0
+		if (load > self.load_threshold):
+			factor = max(_minimum_rate_factor, self.load_threshold / load)
+
+		if (abs(factor - previous_factor) >= 0.05):
+			logging.getLogger(self.__class__.__name__).info("Host load is %.2f per CPU. Reading at %d%% of the configured rate." % (load, factor * 100))
+
+		return factor
+
+	## Method Name: applyPriority
+	##
+	## Purpose: Lower the CPU and I/O priority of this process. Worker processes started afterwards inherit it.
+	def applyPriority(self):
+		logger = logging.getLogger(self.__class__.__name__)
+
+		if (self.nice != None):
+			try:
+				logger.info("Running at niceness " + str(os.nice(self.nice)) + ".")
+
+			except (AttributeError, OSError), error:
+				logger.warning("Unable to lower the CPU priority. " + str(error))
+
+		if (self.ionice != None):
+			command = ["ionice", "-c", _ionice_classes[self.ionice["class"]]]
+
+			if (self.ionice["class"] == "best-effort" and "level" in self.ionice):
+				command += ["-n", str(self.ionice["level"])]
+
+			## Linux has no portable Python interface to ioprio_set, so the util-linux tool is used.
+			try:
+				if (subprocess.call(command + ["-p", str(os.getpid())]) == 0):
+					logger.info("Running in the " + self.ionice["class"] + " I/O scheduling class.")
+
+				else:
+					logger.warning("Unable to lower the I/O priority. ionice failed.")
+
+			except OSError, error:
+				logger.warning("Unable to lower the I/O priority. " + str(error))
+
+## Class Name: GovernedFile
+##
+## Purpose: Read a file in binary mode, taking a reader slot for every read and throttling the bytes read.
+##          The slot is held for a single read only, so a module may keep any number of files open.
+class GovernedFile(io.RawIOBase):
+	## Method Name: __init__
+	##
+	## Purpose: Open the file.
+	##
+	## Parameters
+	## 1. path     - The path to the file.
+	## 2. governor - (Optional) The ResourceGovernor to read under, or None to read the file unthrottled.
+	def __init__(self, path, governor=None):
+		io.RawIOBase.__init__(self)
+
+		self.name     = path
+		self.governor = governor
+		self.raw_file = io.open(path, 'rb', buffering=0)
+
+	## Method Name: readable
+	##
+	## Purpose: Tell the buffered readers wrapping this file that it can be read.
+	def readable(self):
+		return True
+
+	## Method Name: readinto
+	##
+	## Purpose: Read into a buffer under the governor.
+	##
+	## Parameters
+	## 1. buffer - The writable buffer to read into.
+	##
+	## Returns
+	## The number of bytes read. 0 at the end of the file.
+	def readinto(self, buffer):
+		if (self.governor == None):
+			return self.raw_file.readinto(buffer)
+
+		self.governor.acquireReader()
+
+		try:
+			byte_count = self.raw_file.readinto(buffer)
+
+		finally:
+			self.governor.releaseReader()
+
+		if (byte_count):
+			self.governor.throttle(byte_count)
+
+		return byte_count
+
+	## Method Name: close
+	##
+	## Purpose: Close the file.
+	def close(self):
+		if (self.closed == 0):
+			self.raw_file.close()
+
+		io.RawIOBase.close(self)
+
+## Classless Method Declarations
+
+## Method Name: openFile
+##
+## Purpose: Open a file for reading under the governor.
+##
+## Parameters
+## 1. path        - The path to the file.
+## 2. governor    - (Optional) The ResourceGovernor to read under, or None to read the file unthrottled.
+## 3. encoding    - (Optional) The encoding to decode the file with, or None to read bytes.
+## 4. errors      - (Optional) How decoding errors are handled. ("strict", "replace" or "ignore")
+## 5. buffer_size - (Optional) The number of bytes read from the file at a time.
+##
+## Returns
+## A buffered binary file object, or a text file object when an encoding is given.
+def openFile(path, governor=None, encoding=None, errors=None, buffer_size=_default_buffer_size):
+	governed_file = io.BufferedReader(GovernedFile(path, governor), buffer_size)
+
+	if (encoding == None):
+		return governed_file
+
+	return io.TextIOWrapper(governed_file, encoding=encoding, errors=errors)
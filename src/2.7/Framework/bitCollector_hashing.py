@@ -0,0 +1,237 @@
+## File Name: bitCollector_hashing.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the hashing service the framework offers to the BitCollector modules.
+##          Every configured digest is computed in a single read pass over each file, and many files
+##          are hashed at once on a pool of threads. hashlib releases the GIL while it digests large
+##          blocks, so the threads overlap both the disk reads and the hashing.
+##
+## Usage: Modules reach the service through framework_settings.hash_service.
+##        digests = framework_settings.hash_service.hashFile(path)
+##        for path, digests in framework_settings.hash_service.hashFiles(paths): ...
+##        When the state cache is enabled, files unchanged since the previous run are not read again.
+##        When the resource governor is enabled, the reads are throttled and the files read at once are capped.
+
+## Standard imports (Static)
+import hashlib, logging, mmap, os, Queue, threading
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_algorithms     = ["md5", "sha1", "sha256"]
+_default_worker_count   = 4
+_default_block_size     = 1048576
+_default_mmap_threshold = 67108864
+
+## Class Declarations
+
+## Class Name: HashService
+##
+## Purpose: Compute several digests of files in a single read pass, optionally many files at a time.
+class HashService():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the hashing service.
+	##
+	## Parameters
+	## 1. algorithms     - (Optional) The list of hashlib algorithm names to compute.
+	## 2. worker_count   - (Optional) The number of threads hashFiles uses.
+	## 3. block_size     - (Optional) The number of bytes read and hashed at a time.
+	## 4. mmap_threshold - (Optional) The file size from which files are memory mapped instead of read.
+	## 5. state_cache    - (Optional) The FileStateCache holding the digests of the previous runs.
+	## 6. governor       - (Optional) The ResourceGovernor to throttle the reads with.
+	def __init__(self, algorithms=_default_algorithms, worker_count=_default_worker_count, block_size=_default_block_size, mmap_threshold=_default_mmap_threshold, state_cache=None, governor=None):
+		self.algorithms     = list(algorithms)
+		self.worker_count   = worker_count
+		self.block_size     = block_size
+		self.mmap_threshold = mmap_threshold
+		self.state_cache    = state_cache
+		self.governor       = governor
+
+	## Method Name: hashFile
+	##
+	## Purpose: Compute every configured digest of a file in a single read pass.
+	##
+	## Parameters
+	## 1. path - The path to the file to hash.
+	##
+	## Returns
+	## A dictionary mapping each algorithm name to the hexadecimal digest.
+	def hashFile(self, path):
+		stat_info = os.stat(path)
+		file_size = stat_info.st_size
+
+		## Reuse the digests of the previous run when the file did not change since.
+		if (self.state_cache != None):
+			digests = self.state_cache.getDigests(path, stat_info, self.algorithms)
+
+			if (digests != None):
+				return digests
+
+		## The file holds a reader slot until it is hashed, so capped readers do not interleave their seeks.
+		if (self.governor != None):
+			self.governor.acquireReader()
+
+		try:
+			digests = self.readDigests(path, file_size)
+
+		finally:
+			if (self.governor != None):
+				self.governor.releaseReader()
+
+		if (self.state_cache != None):
+			self.state_cache.record(path, stat_info, digests)
+
+		return digests
+
+	## Method Name: readDigests
+	##
+	## Purpose: Read a file once and compute every configured digest of it.
+	##
+	## Parameters
+	## 1. path      - The path to the file to hash.
+	## 2. file_size - The size of the file.
+	##
+	## Returns
+	## A dictionary mapping each algorithm name to the hexadecimal digest.
+	def readDigests(self, path, file_size):
+		hashers   = [hashlib.new(algorithm) for algorithm in self.algorithms]
+		hash_file = open(path, 'rb')
+
+		try:
+			## Large files are mapped so that the blocks are handed to hashlib without being copied.
+			if (file_size >= self.mmap_threshold):
+				mapped_file = mmap.mmap(hash_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+				try:
+					for offset in xrange(0, file_size, self.block_size):
+						block = buffer(mapped_file, offset, self.block_size)
+
+						## The pages of a mapped file are read as they are hashed, so they are throttled the same way.
+						if (self.governor != None):
+							self.governor.throttle(len(block))
+
+						for hasher in hashers:
+							hasher.update(block)
+
+				finally:
+					mapped_file.close()
+
+			else:
+				while (1):
+					block = hash_file.read(self.block_size)
+
+					if (block == ""):
+						break
+
+					if (self.governor != None):
+						self.governor.throttle(len(block))
+
+					for hasher in hashers:
+						hasher.update(block)
+
+		finally:
+			hash_file.close()
+
+		digests = {}
+		for position in range(len(self.algorithms)):
+			digests[self.algorithms[position]] = hashers[position].hexdigest()
+
+		return digests
+
+	## Method Name: hashFiles
+	##
+	## Purpose: Hash many files at once on a pool of threads.
+	##
+	## Parameters
+	## 1. paths      - An iterable of paths to hash. It is consumed lazily, so a generator such as a directory walk works.
+	## 2. stop_token - (Optional) The module's stop token. No new files are started once a stop is requested.
+	##
+	## Returns
+	## A generator of (path, digests) tuples in completion order. digests is None when the file could not be read.
+	def hashFiles(self, paths, stop_token=None):
+		## Bound the queues so a huge listing does not pile up in memory ahead of the workers.
+		path_queue   = Queue.Queue(self.worker_count * 4)
+		result_queue = Queue.Queue(self.worker_count * 4)
+		stop_path    = object()
+		workers      = []
+
+		for count in range(self.worker_count):
+			worker = threading.Thread(target=self.hashWorker, args=(path_queue, result_queue, stop_path), name="HashService-" + str(count))
+			worker.daemon = True
+			worker.start()
+			workers.append(worker)
+
+		## Set when the caller stops iterating early so that the feeder stops queueing paths.
+		abandoned = threading.Event()
+
+		feeder = threading.Thread(target=self.feedPaths, args=(paths, path_queue, stop_path, stop_token, abandoned), name="HashService-feeder")
+		feeder.daemon = True
+		feeder.start()
+
+		## Each worker puts the stop sentinel on the result queue once it runs out of paths.
+		finished_workers = 0
+
+		try:
+			while (finished_workers < self.worker_count):
+				result = result_queue.get()
+
+				if (result is stop_path):
+					finished_workers += 1
+					continue
+
+				yield result
+
+		finally:
+			## Drain the few results still in flight so that no worker stays blocked on the result queue.
+			abandoned.set()
+
+			while (finished_workers < self.worker_count):
+				if (result_queue.get() is stop_path):
+					finished_workers += 1
+
+	## Method Name: feedPaths
+	##
+	## Purpose: Move the paths onto the work queue, followed by one stop sentinel per worker.
+	##
+	## Parameters
+	## 1. paths      - An iterable of paths to hash.
+	## 2. path_queue - The queue the workers take paths from.
+	## 3. stop_path  - The sentinel telling a worker there are no more paths.
+	## 4. stop_token - The module's stop token or None.
+	## 5. abandoned  - The event set when the caller stopped reading the results.
+	def feedPaths(self, paths, path_queue, stop_path, stop_token, abandoned):
+		try:
+			for path in paths:
+				if (abandoned.is_set() or (stop_token != None and stop_token.isStopRequested())):
+					break
+
+				path_queue.put(path)
+
+		finally:
+			for count in range(self.worker_count):
+				path_queue.put(stop_path)
+
+	## Method Name: hashWorker
+	##
+	## Purpose: Hash paths from the work queue until the stop sentinel is seen.
+	##
+	## Parameters
+	## 1. path_queue   - The queue to take paths from.
+	## 2. result_queue - The queue to put (path, digests) tuples on.
+	## 3. stop_path    - The sentinel telling the worker there are no more paths.
+	def hashWorker(self, path_queue, result_queue, stop_path):
+		logger = logging.getLogger(self.__class__.__name__)
+
+		while (1):
+			path = path_queue.get()
+
+			if (path is stop_path):
+				result_queue.put(stop_path)
+				break
+
+			try:
+				result_queue.put((path, self.hashFile(path)))
+
+			except (IOError, OSError, mmap.error), error:
+				logger.warning("Unable to hash file: " + path + ". " + str(error))
+				result_queue.put((path, None))
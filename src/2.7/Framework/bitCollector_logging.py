@@ -0,0 +1,962 @@
+## File Name: bitCollector_logging.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the logging handlers and formatters used by the framework, including
+##          the queue-backed logging mode in which module threads only enqueue their records and
+##          a single background writer formats and writes them in batches, the indexed
+##          JSON-lines log format and compressed log rotation. Tables logged with extra={"table": ...}
+##          are written as real tables in the CSV and HTML log files.
+
+## Standard imports (Static)
+import cgi, csv, gzip, io, json, logging, logging.handlers, os, Queue, re, StringIO, threading, time
+
+## Third-party imports (Optional)
+try:
+	import zstandard
+
+except ImportError:
+	zstandard = None
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_batch_size        = 512
+_default_flush_interval    = 0.5
+_default_bucket_seconds    = 60
+_default_compression_level = 6
+_compression_chunk_size    = 1048576
+
+## The file name suffix of each compression codec.
+_compression_suffixes = {"gzip": ".gz", "zstd": ".zst"}
+
+## The attributes every LogRecord has. Anything else on a record was passed with extra={...}.
+_standard_record_attributes = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__.keys() + ["message", "asctime"])
+
+## Class Declarations
+
+## Class Name: BatchRotatingFileHandler
+##
+## Purpose: A RotatingFileHandler which can also write a batch of records under a single lock without flushing.
+##          Rolled over segments can be compressed in the background (<log file>.N.gz) or every segment
+##          can be written compressed directly (<log file>.gz, <log file>.N.gz).
+class BatchRotatingFileHandler(logging.handlers.RotatingFileHandler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler.
+	##
+	## Parameters
+	## 1. filename          - The path to the log file.
+	## 2. mode              - The mode to open the log file with.
+	## 3. maxBytes          - The size at which the log file is rolled over. Measured before compression.
+	## 4. backupCount       - The number of rolled over log files to keep.
+	## 5. encoding          - (Optional) The encoding of the log file.
+	## 6. delay             - (Optional) Whether to delay opening the log file until the first record.
+	## 7. compression       - (Optional) The compression codec. ("gzip", "zstd" or None)
+	## 8. compression_mode  - (Optional) "background" to compress closed segments or "stream" to write compressed frames directly.
+	## 9. compression_level - (Optional) The compression level passed to the codec.
+	def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding=None, delay=0, compression=None, compression_mode="background", compression_level=_default_compression_level):
+		self.compression        = compression
+		self.compression_mode   = compression_mode
+		self.compression_level  = compression_level
+		self.compression_suffix = _compression_suffixes.get(compression, "")
+		self.segment_compressor = None
+
+		if (compression != None and compression_mode == "background"):
+			self.segment_compressor = SegmentCompressor(compression, compression_level)
+
+		logging.handlers.RotatingFileHandler.__init__(self, filename, mode, maxBytes, backupCount, encoding, delay)
+
+	## Method Name: _open
+	##
+	## Purpose: Open the log file positioned at its end so that tell() reports real offsets in append mode.
+	def _open(self):
+		if (self.compression != None and self.compression_mode == "stream"):
+			return CompressedLogStream(self.baseFilename + self.compression_suffix, self.compression, self.compression_level)
+
+		stream = logging.handlers.RotatingFileHandler._open(self)
+		stream.seek(0, 2)
+
+		return stream
+
+	## Method Name: doRollover
+	##
+	## Purpose: Roll the log file over, keeping the rolled over segments compressed when compression is enabled.
+	def doRollover(self):
+		if (self.compression == None):
+			logging.handlers.RotatingFileHandler.doRollover(self)
+			return
+
+		if (self.stream != None):
+			self.stream.close()
+			self.stream = None
+
+		## The previous segment must be compressed before the segments are renamed underneath the compressor.
+		if (self.segment_compressor != None):
+			self.segment_compressor.waitIdle()
+
+		if (self.backupCount > 0):
+			for count in range(self.backupCount - 1, 0, -1):
+				source      = "%s.%d%s" % (self.baseFilename, count, self.compression_suffix)
+				destination = "%s.%d%s" % (self.baseFilename, count + 1, self.compression_suffix)
+
+				if (os.path.exists(source)):
+					if (os.path.exists(destination)):
+						os.remove(destination)
+
+					os.rename(source, destination)
+
+			destination = "%s.1%s" % (self.baseFilename, self.compression_suffix)
+
+			if (os.path.exists(destination)):
+				os.remove(destination)
+
+			if (self.compression_mode == "stream"):
+				os.rename(self.baseFilename + self.compression_suffix, destination)
+
+			else:
+				os.rename(self.baseFilename, self.baseFilename + ".1")
+				self.segment_compressor.compress(self.baseFilename + ".1", destination)
+
+		else:
+			os.remove(self.baseFilename + (self.compression_mode == "stream" and self.compression_suffix or ""))
+
+		if (self.delay == 0):
+			self.stream = self._open()
+
+	## Method Name: close
+	##
+	## Purpose: Close the log file and wait for the last rolled over segment to be compressed.
+	def close(self):
+		logging.handlers.RotatingFileHandler.close(self)
+
+		if (self.segment_compressor != None):
+			self.segment_compressor.waitIdle()
+
+	## Method Name: emit
+	##
+	## Purpose: Write a single record and flush it.
+	##
+	## Parameters
+	## 1. record - The LogRecord to write.
+	def emit(self, record):
+		self.emitBatch([record])
+		self.flush()
+
+	## Method Name: emitBatch
+	##
+	## Purpose: Format and write a batch of records, rolling the file over as needed. The caller flushes.
+	##
+	## Parameters
+	## 1. records - The list of LogRecords to write.
+	def emitBatch(self, records):
+		self.acquire()
+
+		try:
+			if (self.stream == None):
+				self.stream = self._open()
+
+			for record in records:
+				if (record.levelno < self.level):
+					continue
+
+				try:
+					message = self.format(record) + "\n"
+
+					if (isinstance(message, unicode)):
+						message = message.encode("utf-8")
+
+					## Format once and check the size here rather than in shouldRollover, which formats again.
+					if (self.maxBytes > 0 and self.stream.tell() + len(message) >= self.maxBytes):
+						self.doRollover()
+
+					self.writeMessage(record, message)
+
+				except Exception:
+					self.handleError(record)
+
+		finally:
+			self.release()
+
+	## Method Name: writeMessage
+	##
+	## Purpose: Write one formatted record to the log file. Subclasses extend this to track offsets.
+	##
+	## Parameters
+	## 1. record  - The LogRecord being written.
+	## 2. message - The formatted record.
+	def writeMessage(self, record, message):
+		self.stream.write(message)
+
+## Class Name: BatchStreamHandler
+##
+## Purpose: A StreamHandler which can also write a batch of records under a single lock without flushing.
+class BatchStreamHandler(logging.StreamHandler):
+	## Method Name: emitBatch
+	##
+	## Purpose: Format and write a batch of records. The caller flushes.
+	##
+	## Parameters
+	## 1. records - The list of LogRecords to write.
+	def emitBatch(self, records):
+		self.acquire()
+
+		try:
+			for record in records:
+				if (record.levelno < self.level):
+					continue
+
+				try:
+					message = self.format(record) + "\n"
+
+					if (isinstance(message, unicode)):
+						message = message.encode("utf-8")
+
+					self.stream.write(message)
+
+				except Exception:
+					self.handleError(record)
+
+		finally:
+			self.release()
+
+## Class Name: IndexedJsonLinesFileHandler
+##
+## Purpose: A BatchRotatingFileHandler for the jsonl format which also writes a sidecar index (<log file>.idx)
+##          holding the byte offset of the first record of every module in every time bucket.
+class IndexedJsonLinesFileHandler(BatchRotatingFileHandler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler and open the sidecar index.
+	##
+	## Parameters
+	## 1. filename       - The path to the log file.
+	## 2. mode           - The mode to open the log file with.
+	## 3. maxBytes       - The size at which the log file is rolled over.
+	## 4. backupCount    - The number of rolled over log files to keep.
+	## 5. encoding       - (Optional) The encoding of the log file.
+	## 6. delay          - (Optional) Whether to delay opening the log file until the first record.
+	## 7. bucket_seconds - (Optional) The width of the time buckets in the index.
+	## 8. **kwargs       - (Optional) The compression settings passed on to BatchRotatingFileHandler.
+	def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding=None, delay=0, bucket_seconds=_default_bucket_seconds, **kwargs):
+		BatchRotatingFileHandler.__init__(self, filename, mode, maxBytes, backupCount, encoding, delay, **kwargs)
+
+		self.bucket_seconds = bucket_seconds
+		self.openIndex()
+
+	## Method Name: openIndex
+	##
+	## Purpose: Open the sidecar index of the current log file and reset the bucket tracking.
+	def openIndex(self):
+		self.index_stream   = open(self.baseFilename + ".idx", 'a')
+		self.current_bucket = None
+		self.indexed        = set()
+
+		if (os.path.getsize(self.baseFilename + ".idx") == 0):
+			self.index_stream.write(json.dumps({"bucket_seconds": self.bucket_seconds}) + "\n")
+
+	## Method Name: writeMessage
+	##
+	## Purpose: Record the offset of the first record of each module in the current bucket, then write the record.
+	##
+	## Parameters
+	## 1. record  - The LogRecord being written.
+	## 2. message - The formatted record.
+	def writeMessage(self, record, message):
+		## Buckets only move forward so that records which arrive late still fall between the bucket's offsets.
+		bucket = int(record.created // self.bucket_seconds * self.bucket_seconds)
+
+		if (self.current_bucket == None or bucket > self.current_bucket):
+			self.current_bucket = bucket
+			self.indexed        = set()
+
+		if (record.module not in self.indexed):
+			self.indexed.add(record.module)
+			self.index_stream.write(json.dumps({"bucket": self.current_bucket, "module": record.module, "offset": self.stream.tell()}) + "\n")
+
+		self.stream.write(message)
+
+	## Method Name: flush
+	##
+	## Purpose: Flush the log file and the sidecar index.
+	def flush(self):
+		BatchRotatingFileHandler.flush(self)
+
+		if (self.index_stream != None):
+			self.index_stream.flush()
+
+	## Method Name: doRollover
+	##
+	## Purpose: Roll the sidecar index over together with the log file.
+	def doRollover(self):
+		self.index_stream.close()
+
+		for count in range(self.backupCount - 1, 0, -1):
+			source      = "%s.%d.idx" % (self.baseFilename, count)
+			destination = "%s.%d.idx" % (self.baseFilename, count + 1)
+
+			if (os.path.exists(source)):
+				if (os.path.exists(destination)):
+					os.remove(destination)
+
+				os.rename(source, destination)
+
+		if (self.backupCount > 0):
+			if (os.path.exists(self.baseFilename + ".1.idx")):
+				os.remove(self.baseFilename + ".1.idx")
+
+			os.rename(self.baseFilename + ".idx", self.baseFilename + ".1.idx")
+
+		BatchRotatingFileHandler.doRollover(self)
+		self.openIndex()
+
+	## Method Name: close
+	##
+	## Purpose: Close the sidecar index and the log file.
+	def close(self):
+		self.acquire()
+
+		try:
+			if (self.index_stream != None):
+				self.index_stream.close()
+				self.index_stream = None
+
+		finally:
+			self.release()
+
+		BatchRotatingFileHandler.close(self)
+
+## Class Name: CompressedLogStream
+##
+## Purpose: A writable file object which compresses everything written to it. tell() reports the uncompressed position.
+class CompressedLogStream():
+	## Method Name: __init__
+	##
+	## Purpose: Open the compressed log file for appending.
+	##
+	## Parameters
+	## 1. path              - The path to the compressed log file.
+	## 2. compression       - The compression codec. ("gzip" or "zstd")
+	## 3. compression_level - The compression level passed to the codec.
+	def __init__(self, path, compression, compression_level):
+		self.compression = compression
+		self.position    = 0
+
+		## Appending starts a new gzip member or zstd frame, which readers see as one continuous stream.
+		if (compression == "zstd"):
+			self.raw_file = open(path, 'ab')
+			self.writer   = zstandard.ZstdCompressor(level=compression_level).stream_writer(self.raw_file)
+
+		else:
+			self.raw_file = None
+			self.writer   = gzip.GzipFile(path, 'ab', compression_level)
+
+	## Method Name: write
+	##
+	## Purpose: Compress and write data.
+	##
+	## Parameters
+	## 1. data - The string to write.
+	def write(self, data):
+		self.writer.write(data)
+		self.position += len(data)
+
+	## Method Name: tell
+	##
+	## Purpose: Return the number of uncompressed bytes written so far.
+	def tell(self):
+		return self.position
+
+	## Method Name: flush
+	##
+	## Purpose: Flush a complete compressed block to the disk so the data written so far can be read back.
+	def flush(self):
+		if (self.compression == "zstd"):
+			self.writer.flush(zstandard.FLUSH_BLOCK)
+			self.raw_file.flush()
+
+		else:
+			self.writer.flush()
+
+	## Method Name: close
+	##
+	## Purpose: Finish the compressed stream and close the file.
+	def close(self):
+		self.writer.close()
+
+		if (self.raw_file != None and self.raw_file.closed == 0):
+			self.raw_file.close()
+
+## Class Name: SegmentCompressor
+##
+## Purpose: A background thread which compresses rolled over log segments and removes the uncompressed copies.
+class SegmentCompressor(threading.Thread):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize and start the compressor thread.
+	##
+	## Parameters
+	## 1. compression       - The compression codec. ("gzip" or "zstd")
+	## 2. compression_level - The compression level passed to the codec.
+	def __init__(self, compression, compression_level):
+		threading.Thread.__init__(self, name="SegmentCompressor")
+
+		self.compression       = compression
+		self.compression_level = compression_level
+		self.segment_queue     = Queue.Queue()
+
+		self.daemon = True
+		self.start()
+
+	## Method Name: compress
+	##
+	## Purpose: Queue a closed segment for compression.
+	##
+	## Parameters
+	## 1. source      - The path to the uncompressed segment.
+	## 2. destination - The path to write the compressed segment to.
+	def compress(self, source, destination):
+		self.segment_queue.put((source, destination))
+
+	## Method Name: waitIdle
+	##
+	## Purpose: Block until every queued segment has been compressed.
+	def waitIdle(self):
+		self.segment_queue.join()
+
+	## run - Compress the queued segments one at a time.
+	def run(self):
+		while (1):
+			source, destination = self.segment_queue.get()
+
+			try:
+				self.compressSegment(source, destination)
+
+			except (IOError, OSError), error:
+				logging.getLogger(self.__class__.__name__).error("Unable to compress log segment: " + source + ". " + str(error))
+
+			finally:
+				self.segment_queue.task_done()
+
+	## Method Name: compressSegment
+	##
+	## Purpose: Compress one segment into a temporary file, move it into place and remove the uncompressed segment.
+	##
+	## Parameters
+	## 1. source      - The path to the uncompressed segment.
+	## 2. destination - The path to write the compressed segment to.
+	def compressSegment(self, source, destination):
+		source_file      = open(source, 'rb')
+		compressed_file  = CompressedLogStream(destination + ".tmp", self.compression, self.compression_level)
+
+		try:
+			while (1):
+				chunk = source_file.read(_compression_chunk_size)
+
+				if (chunk == ""):
+					break
+
+				compressed_file.write(chunk)
+
+		finally:
+			compressed_file.close()
+			source_file.close()
+
+		os.rename(destination + ".tmp", destination)
+		os.remove(source)
+
+## Class Name: JsonLinesFormatter
+##
+## Purpose: Format records as one JSON object per line with the module, thread, level, timestamp and extra key/values.
+class JsonLinesFormatter(logging.Formatter):
+	## Method Name: format
+	##
+	## Purpose: Format a record as a JSON object.
+	##
+	## Parameters
+	## 1. record - The LogRecord to format.
+	def format(self, record):
+		entry = {
+			"time":     time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + ".%03d" % record.msecs,
+			"created":  record.created,
+			"level":    record.levelname,
+			"module":   record.module,
+			"logger":   record.name,
+			"function": record.funcName,
+			"thread":   record.threadName,
+			"process":  record.processName,
+			"message":  record.getMessage()
+		}
+
+		if (record.exc_info and record.exc_text == None):
+			record.exc_text = self.formatException(record.exc_info)
+
+		if (record.exc_text):
+			entry["traceback"] = record.exc_text
+
+		extra = {}
+		for key, value in record.__dict__.iteritems():
+			if (key not in _standard_record_attributes):
+				extra[key] = value
+
+		if (len(extra) > 0):
+			entry["extra"] = extra
+
+		return json.dumps(entry, default=str)
+
+## Class Name: TableFormatter
+##
+## Purpose: Format records like logging.Formatter, but write the table a record carries (extra={"table": table})
+##          in the format of the log file in place of its message, which holds the table as plain text.
+class TableFormatter(logging.Formatter):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the formatter.
+	##
+	## Parameters
+	## 1. fmt          - The format string of a record.
+	## 2. datefmt      - The format string of the time of a record.
+	## 3. table_format - The format to write tables in. ("csv" or "html")
+	def __init__(self, fmt, datefmt, table_format):
+		logging.Formatter.__init__(self, fmt, datefmt)
+
+		self.table_format = table_format
+
+	## Method Name: format
+	##
+	## Purpose: Format a record, writing its table if it has one.
+	##
+	## Parameters
+	## 1. record - The LogRecord to format.
+	def format(self, record):
+		table = getattr(record, "table", None)
+
+		if (table == None):
+			return logging.Formatter.format(self, record)
+
+		## The same record is formatted by the other handlers, so the message is only replaced while this one formats it.
+		message = record.msg
+		args    = record.args
+
+		record.msg  = formatTable(table, self.table_format)
+		record.args = None
+
+		try:
+			return logging.Formatter.format(self, record)
+
+		finally:
+			record.msg  = message
+			record.args = args
+
+## Class Name: QueueLogHandler
+##
+## Purpose: A logging handler which only puts records on a queue. It never formats or touches a file.
+class QueueLogHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler.
+	##
+	## Parameters
+	## 1. record_queue - The Queue read by the BatchingLogWriter.
+	def __init__(self, record_queue):
+		logging.Handler.__init__(self)
+
+		self.record_queue = record_queue
+
+	## Method Name: emit
+	##
+	## Purpose: Merge the message arguments into the record and enqueue it.
+	##
+	## Parameters
+	## 1. record - The LogRecord to enqueue.
+	def emit(self, record):
+		try:
+			## The arguments may be changed by the caller before the writer formats the record.
+			record.msg  = record.getMessage()
+			record.args = None
+
+			self.record_queue.put_nowait(record)
+
+		except Exception:
+			self.handleError(record)
+
+## Class Name: BatchingLogWriter
+##
+## Purpose: A background thread which drains the record queue and writes the records to the target handlers in batches.
+class BatchingLogWriter(threading.Thread):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize and start the writer thread.
+	##
+	## Parameters
+	## 1. targets        - The list of handlers to write the records to.
+	## 2. batch_size     - (Optional) The maximum number of records to take off the queue at a time.
+	## 3. flush_interval - (Optional) The number of seconds between flushes of the target handlers.
+	def __init__(self, targets, batch_size=_default_batch_size, flush_interval=_default_flush_interval):
+		threading.Thread.__init__(self, name="BatchingLogWriter")
+
+		self.targets        = targets
+		self.batch_size     = batch_size
+		self.flush_interval = flush_interval
+		self.record_queue   = Queue.Queue()
+
+		## The sentinel put on the queue by stop().
+		self.stop_record = object()
+
+		self.daemon = True
+		self.start()
+
+	## Method Name: getHandler
+	##
+	## Purpose: Create a QueueLogHandler feeding this writer.
+	def getHandler(self):
+		return QueueLogHandler(self.record_queue)
+
+	## Method Name: addTarget
+	##
+	## Purpose: Start writing the records to another handler.
+	##
+	## Parameters
+	## 1. handler - The handler to add.
+	def addTarget(self, handler):
+		## The list is replaced rather than changed, so a batch being written keeps the targets it started with.
+		self.targets = self.targets + [handler]
+
+	## Method Name: removeTarget
+	##
+	## Purpose: Stop writing the records to a handler.
+	##
+	## Parameters
+	## 1. handler - The handler to remove.
+	def removeTarget(self, handler):
+		self.targets = [target for target in self.targets if target is not handler]
+
+	## Method Name: sync
+	##
+	## Purpose: Wait until every record queued so far has been written to the target handlers.
+	def sync(self):
+		written = threading.Event()
+		self.record_queue.put(written)
+		written.wait()
+
+	## run - Write the queued records until the stop sentinel is seen.
+	def run(self):
+		last_flush = time.time()
+		dirty      = 0
+		stopping   = 0
+
+		while (stopping == 0):
+			batch = []
+
+			## Wait for the first record, but no longer than the next flush is due.
+			try:
+				if (dirty == 1):
+					batch.append(self.record_queue.get(True, max(last_flush + self.flush_interval - time.time(), 0.001)))
+
+				else:
+					batch.append(self.record_queue.get())
+
+			except Queue.Empty:
+				pass
+
+			## Take whatever else is already queued without waiting.
+			while (len(batch) < self.batch_size):
+				try:
+					batch.append(self.record_queue.get_nowait())
+
+				except Queue.Empty:
+					break
+
+			if (self.stop_record in batch):
+				stopping = 1
+				batch.remove(self.stop_record)
+
+			## The events put on the queue by sync().
+			synced = [item for item in batch if isinstance(item, logging.LogRecord) == 0]
+			batch  = [item for item in batch if isinstance(item, logging.LogRecord)]
+
+			if (len(batch) > 0):
+				self.writeBatch(batch)
+				dirty = 1
+
+			for written in synced:
+				written.set()
+
+			if (dirty == 1 and (stopping == 1 or time.time() - last_flush >= self.flush_interval)):
+				self.flushTargets()
+				last_flush = time.time()
+				dirty      = 0
+
+	## Method Name: writeBatch
+	##
+	## Purpose: Write a batch of records to every target handler.
+	##
+	## Parameters
+	## 1. batch - The list of LogRecords to write.
+	def writeBatch(self, batch):
+		for handler in self.targets:
+			if (hasattr(handler, "emitBatch")):
+				handler.emitBatch(batch)
+
+			else:
+				for record in batch:
+					handler.handle(record)
+
+	## Method Name: flushTargets
+	##
+	## Purpose: Flush every target handler.
+	def flushTargets(self):
+		for handler in self.targets:
+			try:
+				handler.flush()
+
+			except Exception:
+				pass
+
+	## Method Name: stop
+	##
+	## Purpose: Write every record queued so far, flush the target handlers and stop the writer thread.
+	def stop(self):
+		self.record_queue.put(self.stop_record)
+		self.join()
+
+## Classless Method Declarations
+
+## Method Name: formatTable
+##
+## Purpose: Format a table for the log.
+##
+## Parameters
+## 1. table        - The dictionary of the table's title, its list of column names and its list of rows.
+## 2. table_format - "text" for fixed-width columns, "csv" for CSV lines or "html" for an HTML table on one line.
+##
+## Returns
+## The title followed by the table.
+def formatTable(table, table_format):
+	rows = [[str(value) for value in row] for row in [table["columns"]] + table["rows"]]
+
+	if (table_format == "html"):
+		lines = []
+
+		for index, row in enumerate(rows):
+			cell_tag = "td"
+			if (index == 0):
+				cell_tag = "th"
+
+			lines.append("<tr>" + "".join("<%s>%s</%s>" % (cell_tag, cgi.escape(value), cell_tag) for value in row) + "</tr>")
+
+		return cgi.escape(table["title"]) + "<table>" + "".join(lines) + "</table>"
+
+	if (table_format == "csv"):
+		## The rows follow the entry's first line, like the lines of a traceback do.
+		output = StringIO.StringIO()
+		csv.writer(output, lineterminator="\n").writerows(rows)
+
+		return table["title"] + "\n" + output.getvalue().rstrip("\n")
+
+	widths = [max(len(row[index]) for row in rows) for index in range(len(rows[0]))]
+	lines  = [table["title"]]
+
+	for row in rows:
+		lines.append("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+	return "\n".join(lines)
+
+## Method Name: getLogSegments
+##
+## Purpose: List the segments of a rotated log file from the oldest to the newest, compressed or not.
+##
+## Parameters
+## 1. log_file - The path to the log file, with or without its compression suffix.
+##
+## Returns
+## A list of paths to the existing segments.
+def getLogSegments(log_file):
+	base_file = stripCompressionSuffix(log_file)
+	pattern   = re.compile(re.escape(os.path.basename(base_file)) + r'\.(\d+)(\.gz|\.zst)?$')
+	segments  = []
+
+	for file_name in os.listdir(os.path.dirname(os.path.abspath(base_file))):
+		match = pattern.match(file_name)
+
+		if (match):
+			segments.append((int(match.group(1)), os.path.join(os.path.dirname(base_file), file_name)))
+
+	## Higher segment numbers are older. Sorting on the path as well puts a finished .gz after a leftover uncompressed copy.
+	segments.sort(key=lambda segment: (-segment[0], segment[1]))
+	segments = [segment[1] for segment in segments]
+
+	for suffix in [""] + _compression_suffixes.values():
+		if (os.path.isfile(base_file + suffix)):
+			segments.append(base_file + suffix)
+
+	return segments
+
+## Method Name: openLogSegment
+##
+## Purpose: Open a log segment for reading, decompressing it according to its suffix.
+##
+## Parameters
+## 1. segment_path - The path to the segment.
+##
+## Returns
+## A readable file object.
+def openLogSegment(segment_path):
+	if (segment_path.endswith(".gz")):
+		return gzip.open(segment_path, 'rb')
+
+	elif (segment_path.endswith(".zst")):
+		if (zstandard == None):
+			raise IOError("The zstandard package is required to read: " + segment_path)
+
+		return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(segment_path, 'rb'), read_across_frames=True))
+
+	return open(segment_path, 'rb')
+
+## Method Name: readLogStream
+##
+## Purpose: Read every segment of a rotated, possibly compressed, log file as one stream of lines.
+##
+## Parameters
+## 1. log_file - The path to the log file, with or without its compression suffix.
+##
+## Returns
+## A generator of the lines of the log, oldest first.
+def readLogStream(log_file):
+	for segment_path in getLogSegments(log_file):
+		segment_file = openLogSegment(segment_path)
+		remainder    = ""
+
+		try:
+			while (1):
+				chunk = segment_file.read(_compression_chunk_size)
+
+				if (chunk == ""):
+					break
+
+				lines     = (remainder + chunk).split("\n")
+				remainder = lines.pop()
+
+				for line in lines:
+					yield line + "\n"
+
+			if (remainder != ""):
+				yield remainder
+
+		finally:
+			segment_file.close()
+
+## Method Name: stripCompressionSuffix
+##
+## Purpose: Remove the compression suffix from the path to a log segment.
+##
+## Parameters
+## 1. segment_path - The path to the segment.
+def stripCompressionSuffix(segment_path):
+	for suffix in _compression_suffixes.values():
+		if (segment_path.endswith(suffix)):
+			return segment_path[:-len(suffix)]
+
+	return segment_path
+
+## Method Name: readJsonLinesLog
+##
+## Purpose: Read the entries of a jsonl log file, using its sidecar index to seek straight to the requested module and time range.
+##
+## Parameters
+## 1. log_path   - The path to the jsonl log file, with or without its compression suffix. (Or one of its rolled over segments.)
+## 2. module     - (Optional) Only return the entries logged from this module.
+## 3. start_time - (Optional) Only return the entries created at or after this UNIX time.
+## 4. end_time   - (Optional) Only return the entries created at or before this UNIX time.
+##
+## Returns
+## A generator of the matching entries as dictionaries.
+def readJsonLinesLog(log_path, module=None, start_time=None, end_time=None):
+	## In stream mode the live segment is only ever written compressed, so run_1.jsonl may exist as run_1.jsonl.gz alone.
+	if (os.path.isfile(log_path) == 0):
+		base_path = stripCompressionSuffix(log_path)
+
+		for segment_path in getLogSegments(log_path):
+			if (stripCompressionSuffix(segment_path) == base_path):
+				log_path = segment_path
+
+	index_path = stripCompressionSuffix(log_path) + ".idx"
+	indexed    = os.path.isfile(index_path)
+
+	## Without an index the whole file has to be read.
+	if (indexed == 0):
+		ranges = [(0, None)]
+
+	else:
+		bucket_seconds = _default_bucket_seconds
+		bucket_offsets = {}
+		module_offsets = {}
+
+		index_file = open(index_path, 'r')
+
+		for line in index_file:
+			entry = json.loads(line)
+
+			if ("bucket_seconds" in entry):
+				bucket_seconds = entry["bucket_seconds"]
+				continue
+
+			bucket_offsets[entry["bucket"]] = min(bucket_offsets.get(entry["bucket"], entry["offset"]), entry["offset"])
+			module_offsets[(entry["bucket"], entry["module"])] = entry["offset"]
+
+		index_file.close()
+
+		## Work out the byte ranges worth reading. Each bucket ends where the next one starts.
+		buckets = sorted(bucket_offsets.keys())
+		ranges  = []
+
+		for position in range(len(buckets)):
+			bucket = buckets[position]
+
+			if (start_time != None and bucket + bucket_seconds <= start_time):
+				continue
+
+			if (end_time != None and bucket > end_time + bucket_seconds):
+				break
+
+			if (module != None):
+				if ((bucket, module) not in module_offsets):
+					continue
+
+				range_start = module_offsets[(bucket, module)]
+
+			else:
+				range_start = bucket_offsets[bucket]
+
+			if (position + 1 < len(buckets)):
+				ranges.append((range_start, bucket_offsets[buckets[position + 1]]))
+
+			else:
+				ranges.append((range_start, None))
+
+	## Compressed segments are decompressed while seeking forward.
+	log_file = openLogSegment(log_path)
+
+	try:
+		for range_start, range_end in ranges:
+			log_file.seek(range_start)
+
+			while (range_end == None or log_file.tell() < range_end):
+				line = log_file.readline()
+
+				if (line == ""):
+					break
+
+				entry = json.loads(line)
+
+				if (module != None and entry["module"] != module):
+					continue
+
+				if (start_time != None and entry["created"] < start_time):
+					continue
+
+				if (end_time != None and entry["created"] > end_time):
+					continue
+
+				yield entry
+
+	finally:
+		log_file.close()
@@ -0,0 +1,694 @@
+## File Name: bitCollector_logindex.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script imports existing HTML and CSV BitCollector logs into a compact on-disk index and queries it.
+##          The segments of a log (<log>, <log>.1 through <log>.99, compressed or not) are read as a stream, one
+##          chunk at a time, and every entry is indexed by its time, level, traceback and message tokens. The
+##          messages themselves are not copied. The index keeps the byte offset and length of every entry and
+##          the query reads the matching entries straight out of the log. Logs which are still being written
+##          can be imported again later, and only what was added since is read.
+##
+## Usage: python bitCollector_logindex.py import <index_path> <log_file> [<log_file> ...]
+##        python bitCollector_logindex.py query <index_path> [--level <level>] [--module <module>] [--traceback <text>]
+##                                          [--start <time>] [--end <time>] [--text <words>] [--limit <count>]
+##        Times are local, as written in the logs. (YYYY-MM-DDTHH:MM:SS, or a prefix of it such as YYYY-MM-DD)
+##        --level returns the entries of that level and above. --text returns the entries whose message holds every word.
+
+## Standard imports (Static)
+import array, hashlib, logging, os, re, sqlite3, sys, time, zlib
+
+## Framework imports (Static)
+import bitCollector_logging
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_batch_size = 50000
+_default_limit      = 100
+_default_timeout    = 30.0
+_read_size          = 1048576
+_compress_size      = 32
+_scan_size          = 5000
+
+_level_numbers = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+## The formats the parts of an entry are written in. CSV entries run on until the next one starts.
+_csv_start_pattern  = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d,')
+_html_row_pattern   = re.compile(r'^<tr><td>(?P<time>[^<]*)</td><td>(?P<traceback>[^<]*)</td><td>(?P<level>[A-Z]+)</td><td>(?P<message>.*)</td></tr>\s*$', re.S)
+_csv_row_pattern    = re.compile(r'^(?P<time>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d),(?P<traceback>[^,]*),(?P<level>[A-Z]+),(?P<message>.*?)\s*$', re.S)
+_time_format        = "%Y-%m-%dT%H:%M:%S"
+_token_pattern      = re.compile(r'[a-z0-9_]{1,64}')
+_segment_pattern    = re.compile(r'\.\d+$')
+
+_schema = (
+	"CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, fingerprint TEXT UNIQUE NOT NULL, path TEXT, inode INTEGER, log_format TEXT, imported_bytes INTEGER DEFAULT 0, complete INTEGER DEFAULT 0)",
+	"CREATE TABLE IF NOT EXISTS tracebacks (id INTEGER PRIMARY KEY, traceback TEXT UNIQUE NOT NULL, module TEXT)",
+	"CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, segment_id INTEGER NOT NULL, offset INTEGER, length INTEGER, created INTEGER, level INTEGER, traceback_id INTEGER)",
+	"CREATE TABLE IF NOT EXISTS postings (token TEXT NOT NULL, first_entry_id INTEGER NOT NULL, entry_ids BLOB, PRIMARY KEY (token, first_entry_id)) WITHOUT ROWID"
+)
+
+## Created once an import is done, so that a fresh index is loaded without updating them row by row.
+_indexes = (
+	"CREATE INDEX IF NOT EXISTS entries_created ON entries (created)",
+	"CREATE INDEX IF NOT EXISTS entries_level ON entries (level, created)",
+	"CREATE INDEX IF NOT EXISTS entries_traceback ON entries (traceback_id, created)",
+	"CREATE INDEX IF NOT EXISTS tracebacks_module ON tracebacks (module)"
+)
+
+## Class Declarations
+
+## Class Name: LogIndex
+##
+## Purpose: Index the entries of BitCollector logs and look them up again.
+class LogIndex():
+	## Method Name: __init__
+	##
+	## Purpose: Open the index, creating it if it does not exist yet.
+	##
+	## Parameters
+	## 1. index_path - The path to the SQLite index.
+	## 2. batch_size - (Optional) The number of entries loaded in a single transaction.
+	def __init__(self, index_path, batch_size=_default_batch_size):
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+		self.index_path = index_path
+		self.batch_size = batch_size
+
+		## The transactions are managed here, so the connection is left in autocommit mode.
+		self.connection = sqlite3.connect(index_path, timeout=_default_timeout, isolation_level=None)
+		self.connection.text_factory = str
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute("PRAGMA cache_size=-65536")
+
+		for statement in _schema:
+			self.connection.execute(statement)
+
+		## Times are parsed once a minute. The seconds are added on.
+		self.last_minute = (None, None)
+
+	## Method Name: close
+	##
+	## Purpose: Close the index.
+	def close(self):
+		self.connection.close()
+
+	## Method Name: importLog
+	##
+	## Purpose: Import every segment of a log, the oldest first.
+	##
+	## Parameters
+	## 1. log_file - The path to the log file, or to any of its segments.
+	##
+	## Returns
+	## The number of entries imported.
+	def importLog(self, log_file):
+		## Point at the newest segment whatever segment was given.
+		log_file = _segment_pattern.sub("", bitCollector_logging.stripCompressionSuffix(log_file))
+		segments = bitCollector_logging.getLogSegments(log_file)
+
+		if (len(segments) == 0):
+			raise IOError("No such log file: " + log_file)
+
+		## The ids are handed out here so that the entries and their postings can be loaded together in batches.
+		self.tracebacks = dict(self.connection.execute("SELECT traceback, id FROM tracebacks"))
+		self.next_entry = (self.connection.execute("SELECT MAX(id) FROM entries").fetchone()[0] or 0) + 1
+
+		entry_count = 0
+
+		try:
+			for segment_path in segments:
+				entry_count += self.importSegment(segment_path, int(segment_path != segments[-1]))
+
+		finally:
+			for statement in _indexes:
+				self.connection.execute(statement)
+
+		return entry_count
+
+	## Method Name: importSegment
+	##
+	## Purpose: Import the entries of a segment which were not imported before.
+	##
+	## Parameters
+	## 1. segment_path - The path to the segment.
+	## 2. rotated      - 1 if the segment has been rotated out and is no longer written to, otherwise 0.
+	##
+	## Returns
+	## The number of entries imported.
+	def importSegment(self, segment_path, rotated):
+		log_format  = os.path.splitext(_segment_pattern.sub("", bitCollector_logging.stripCompressionSuffix(segment_path)))[1].lstrip(".").lower()
+		fingerprint = getFingerprint(segment_path)
+
+		if (log_format not in ("html", "csv")):
+			raise ValueError("Unsupported log format: " + segment_path + ". Only HTML and CSV logs can be imported.")
+
+		## Segments without a complete entry yet are left for the next import.
+		if (fingerprint == None):
+			return 0
+
+		inode   = os.stat(segment_path).st_ino
+		segment = self.connection.execute("SELECT id, imported_bytes, complete FROM segments WHERE fingerprint = ?", (fingerprint,)).fetchone()
+
+		complete = 0
+
+		if (segment == None):
+			segment_id     = self.connection.execute("INSERT INTO segments (fingerprint, path, inode, log_format) VALUES (?, ?, ?, ?)", (fingerprint, segment_path, inode, log_format)).lastrowid
+			imported_bytes = 0
+
+		else:
+			segment_id, imported_bytes, complete = segment
+
+			## Rotation renames and compresses the segments, so remember where each one is now.
+			self.connection.execute("UPDATE segments SET path = ?, inode = ? WHERE id = ?", (segment_path, inode, segment_id))
+
+			if (complete == 1):
+				return 0
+
+		entry_count = 0
+		entries     = []
+
+		for entry in parseEntries(segment_path, log_format, imported_bytes, rotated):
+			if (entry == None):
+				complete = 1
+				continue
+
+			entries.append(entry)
+
+			if (len(entries) >= self.batch_size):
+				entry_count    += self.loadEntries(segment_id, entries)
+				imported_bytes  = entries[-1][0] + entries[-1][1]
+				entries         = []
+
+		if (len(entries) > 0):
+			entry_count    += self.loadEntries(segment_id, entries)
+			imported_bytes  = entries[-1][0] + entries[-1][1]
+
+		## A rotated segment, or an HTML log with its footer, gets no more entries.
+		if (rotated == 1):
+			complete = 1
+
+		self.connection.execute("UPDATE segments SET imported_bytes = ?, complete = ? WHERE id = ?", (imported_bytes, complete, segment_id))
+
+		self.logger.info("Imported %d entries from %s" % (entry_count, segment_path))
+
+		return entry_count
+
+	## Method Name: loadEntries
+	##
+	## Purpose: Load a batch of parsed entries and their message tokens in a single transaction, along with how far the
+	##          segment has been imported, so an interrupted import picks up after the last batch loaded.
+	##
+	## Parameters
+	## 1. segment_id - The id of the segment the entries belong to.
+	## 2. entries    - The list of (offset, length, time, level, traceback, message) tuples.
+	##
+	## Returns
+	## The number of entries loaded.
+	def loadEntries(self, segment_id, entries):
+		entry_rows     = []
+		postings       = {}
+		new_tracebacks = []
+
+		for offset, length, entry_time, level, traceback, message in entries:
+			if (traceback not in self.tracebacks):
+				self.tracebacks[traceback] = len(self.tracebacks) + 1
+				new_tracebacks.append((self.tracebacks[traceback], traceback, traceback.split(".", 1)[0]))
+
+			entry_rows.append((self.next_entry, segment_id, offset, length, self.parseTime(entry_time), _level_numbers.get(level, 0), self.tracebacks[traceback]))
+
+			for token in set(_token_pattern.findall(message.lower())):
+				if (token not in postings):
+					postings[token] = array.array("I")
+
+				postings[token].append(self.next_entry)
+
+			self.next_entry += 1
+
+		## Each token gets a single row per batch holding the ids of its entries, which keeps the index a fraction of the size of a row per entry.
+		posting_rows = [(token, entry_ids[0], packEntryIds(entry_ids)) for token, entry_ids in postings.iteritems()]
+
+		self.connection.execute("BEGIN")
+
+		try:
+			self.connection.executemany("INSERT INTO tracebacks (id, traceback, module) VALUES (?, ?, ?)", new_tracebacks)
+			self.connection.executemany("INSERT INTO entries (id, segment_id, offset, length, created, level, traceback_id) VALUES (?, ?, ?, ?, ?, ?, ?)", entry_rows)
+			self.connection.executemany("INSERT INTO postings (token, first_entry_id, entry_ids) VALUES (?, ?, ?)", posting_rows)
+			self.connection.execute("UPDATE segments SET imported_bytes = ? WHERE id = ?", (entries[-1][0] + entries[-1][1], segment_id))
+			self.connection.execute("COMMIT")
+
+		except Exception:
+			self.connection.execute("ROLLBACK")
+			raise
+
+		return len(entry_rows)
+
+	## Method Name: parseTime
+	##
+	## Purpose: Turn the local time of an entry into a UNIX time.
+	##
+	## Parameters
+	## 1. entry_time - The time as written in the log.
+	def parseTime(self, entry_time):
+		if (self.last_minute[0] != entry_time[:16]):
+			try:
+				self.last_minute = (entry_time[:16], int(time.mktime(time.strptime(entry_time[:16], "%Y-%m-%dT%H:%M"))))
+
+			except ValueError:
+				self.last_minute = (entry_time[:16], None)
+
+		if (self.last_minute[1] == None):
+			return None
+
+		return self.last_minute[1] + int(entry_time[17:19])
+
+	## Method Name: query
+	##
+	## Purpose: Find the entries matching every given filter, the oldest first.
+	##
+	## Parameters
+	## 1. level      - (Optional) The lowest level to return.
+	## 2. module     - (Optional) The module the entries were logged from.
+	## 3. traceback  - (Optional) Text the traceback column has to contain.
+	## 4. start_time - (Optional) The UNIX time the entries have to be logged at or after.
+	## 5. end_time   - (Optional) The UNIX time the entries have to be logged before.
+	## 6. text       - (Optional) The words every message has to contain.
+	## 7. limit      - (Optional) The most entries to return.
+	##
+	## Returns
+	## A list of (created, level, traceback, message) tuples.
+	def query(self, level=None, module=None, traceback=None, start_time=None, end_time=None, text=None, limit=_default_limit):
+		clauses   = []
+		arguments = []
+
+		if (level != None):
+			clauses.append("entries.level >= ?")
+			arguments.append(_level_numbers[level.upper()])
+
+		if (module != None):
+			clauses.append("entries.traceback_id IN (SELECT id FROM tracebacks WHERE module = ?)")
+			arguments.append(module)
+
+		if (traceback != None):
+			clauses.append("entries.traceback_id IN (SELECT id FROM tracebacks WHERE traceback LIKE ?)")
+			arguments.append("%" + traceback + "%")
+
+		if (start_time != None):
+			clauses.append("entries.created >= ?")
+			arguments.append(start_time)
+
+		if (end_time != None):
+			clauses.append("entries.created < ?")
+			arguments.append(end_time)
+
+		statement = "SELECT entries.segment_id, entries.offset, entries.length, entries.created, entries.level, tracebacks.traceback, entries.id FROM entries JOIN tracebacks ON tracebacks.id = entries.traceback_id"
+		entry_ids = None
+
+		## The entries holding every word are looked up first.
+		if (text != None):
+			entry_ids = self.findText(text)
+
+			if (len(entry_ids) == 0):
+				return []
+
+			## A few matches are joined in and sorted by time. Without the CROSS JOIN the planner walks every entry in
+			## time order and looks each one up in the matches instead.
+			if (len(entry_ids) <= _scan_size):
+				statement  = statement.replace("FROM entries", "FROM json_each(?) AS matches CROSS JOIN entries ON entries.id = matches.value")
+				arguments  = ["[" + ",".join(str(entry_id) for entry_id in entry_ids) + "]"] + arguments
+				entry_ids  = None
+
+		if (len(clauses) > 0):
+			statement += " WHERE " + " AND ".join(clauses)
+
+		statement += " ORDER BY entries.created, entries.id"
+
+		if (entry_ids == None):
+			rows = self.connection.execute(statement + " LIMIT ?", arguments + [limit]).fetchall()
+
+		## Sorting a lot of matches by time takes longer than walking the entries in time order until enough of them match.
+		else:
+			rows = []
+
+			for row in self.connection.execute(statement, arguments):
+				if (row[6] in entry_ids):
+					rows.append(row)
+
+					if (len(rows) == limit):
+						break
+
+		return self.readMessages(rows)
+
+	## Method Name: findText
+	##
+	## Purpose: Find the entries whose messages contain every word of a text.
+	##
+	## Parameters
+	## 1. text - The words to look for.
+	##
+	## Returns
+	## A set of entry ids.
+	def findText(self, text):
+		postings = []
+
+		for token in set(_token_pattern.findall(text.lower())):
+			postings.append(self.connection.execute("SELECT entry_ids FROM postings WHERE token = ?", (token,)).fetchall())
+
+		if (len(postings) == 0):
+			return set()
+
+		## Starting with the rarest word keeps the set being narrowed down small.
+		postings.sort(key=lambda rows: sum(len(row[0]) for row in rows))
+		entry_ids = None
+
+		for rows in postings:
+			token_ids = array.array("I")
+
+			for row in rows:
+				token_ids.extend(unpackEntryIds(row[0]))
+
+			if (entry_ids == None):
+				entry_ids = set(token_ids)
+
+			else:
+				entry_ids.intersection_update(token_ids)
+
+			if (len(entry_ids) == 0):
+				break
+
+		return entry_ids
+
+	## Method Name: readMessages
+	##
+	## Purpose: Read the messages of the matching entries out of the logs.
+	##
+	## Parameters
+	## 1. rows - The (segment_id, offset, length, created, level, traceback, id) rows of the entries.
+	##
+	## Returns
+	## A list of (created, level, traceback, message) tuples in the order of the rows.
+	def readMessages(self, rows):
+		messages = {}
+
+		## Each segment is opened once and read forward, which is what compressed segments need.
+		for segment_id in set(row[0] for row in rows):
+			offsets = sorted(set((row[1], row[2]) for row in rows if row[0] == segment_id))
+			path    = self.locateSegment(segment_id)
+
+			if (path == None):
+				for offset, length in offsets:
+					messages[(segment_id, offset)] = "(The segment was rotated since it was imported. Import the log again to read this entry.)"
+
+				continue
+
+			segment_file = bitCollector_logging.openLogSegment(path)
+			log_format   = self.connection.execute("SELECT log_format FROM segments WHERE id = ?", (segment_id,)).fetchone()[0]
+
+			try:
+				for offset, length in offsets:
+					segment_file.seek(offset)
+					match = getRowPattern(log_format).match(segment_file.read(length))
+
+					if (match):
+						messages[(segment_id, offset)] = match.group("message")
+
+					else:
+						messages[(segment_id, offset)] = "(The entry could not be read back from " + path + ".)"
+
+			finally:
+				segment_file.close()
+
+		return [(row[3], row[4], row[5], messages[(row[0], row[1])]) for row in rows]
+
+	## Method Name: locateSegment
+	##
+	## Purpose: Find the file a segment is in now. The log may have been rotated since the import.
+	##
+	## Parameters
+	## 1. segment_id - The id of the segment.
+	##
+	## Returns
+	## The path to the segment, or None if it can not be found without importing the log again.
+	def locateSegment(self, segment_id):
+		path, inode = self.connection.execute("SELECT path, inode FROM segments WHERE id = ?", (segment_id,)).fetchone()
+
+		try:
+			if (os.stat(path).st_ino == inode):
+				return path
+
+		except OSError:
+			pass
+
+		log_file = _segment_pattern.sub("", bitCollector_logging.stripCompressionSuffix(path))
+
+		for segment_path in bitCollector_logging.getLogSegments(log_file):
+			if (os.stat(segment_path).st_ino == inode):
+				return segment_path
+
+		return None
+
+## Classless Method Declarations
+
+## Method Name: getFingerprint
+##
+## Purpose: Identify a segment by its log's name and its first entry, which stay the same as it grows, rotates and is compressed.
+##
+## Parameters
+## 1. segment_path - The path to the segment.
+##
+## Returns
+## The fingerprint, or None if the segment does not have a complete line after its header yet.
+def getFingerprint(segment_path):
+	segment_file = bitCollector_logging.openLogSegment(segment_path)
+
+	try:
+		head = segment_file.read(65536)
+
+	finally:
+		segment_file.close()
+
+	lines = head.split("\n")
+
+	if (len(lines) < 3):
+		return None
+
+	log_name = os.path.basename(_segment_pattern.sub("", bitCollector_logging.stripCompressionSuffix(segment_path)))
+
+	return hashlib.sha1(log_name + "\n" + lines[0] + "\n" + lines[1]).hexdigest()
+
+## Method Name: getRowPattern
+##
+## Purpose: Return the pattern matching a whole entry of a log format.
+##
+## Parameters
+## 1. log_format - "html" or "csv".
+def getRowPattern(log_format):
+	if (log_format == "html"):
+		return _html_row_pattern
+
+	return _csv_row_pattern
+
+## Method Name: packEntryIds
+##
+## Purpose: Store the ids of the entries holding a token. Long lists are compressed, short ones are not worth it.
+##
+## Parameters
+## 1. entry_ids - The array of entry ids.
+def packEntryIds(entry_ids):
+	if (len(entry_ids) < _compress_size):
+		return sqlite3.Binary("a" + entry_ids.tostring())
+
+	return sqlite3.Binary("z" + zlib.compress(entry_ids.tostring(), 1))
+
+## Method Name: unpackEntryIds
+##
+## Purpose: Read back the ids stored by packEntryIds.
+##
+## Parameters
+## 1. packed - The stored ids.
+def unpackEntryIds(packed):
+	packed = str(packed)
+
+	if (packed[0] == "z"):
+		return array.array("I", zlib.decompress(packed[1:]))
+
+	return array.array("I", packed[1:])
+
+## Method Name: parseEntries
+##
+## Purpose: Read the entries of a segment as a stream, starting at a byte offset.
+##
+## Parameters
+## 1. segment_path - The path to the segment.
+## 2. log_format   - "html" or "csv".
+## 3. start_offset - The offset of the first byte not imported yet. Always the start of an entry.
+## 4. rotated      - 1 if nothing more is written to the segment. The last entry of a CSV log is only complete then.
+##
+## Returns
+## A generator of (offset, length, time, level, traceback, message) tuples. None is yielded once an HTML footer is read.
+def parseEntries(segment_path, log_format, start_offset, rotated):
+	row_pattern  = getRowPattern(log_format)
+	segment_file = bitCollector_logging.openLogSegment(segment_path)
+
+	## The lines of the entry being read and the offset it starts at.
+	pending       = None
+	pending_start = 0
+
+	try:
+		## Compressed segments are decompressed up to the offset.
+		segment_file.seek(start_offset)
+
+		offset    = start_offset
+		remainder = ""
+
+		while (1):
+			chunk = segment_file.read(_read_size)
+
+			if (chunk == ""):
+				break
+
+			lines     = (remainder + chunk).split("\n")
+			remainder = lines.pop()
+
+			for line in lines:
+				line_start  = offset
+				offset     += len(line) + 1
+
+				if (log_format == "html"):
+					if (pending == None):
+						if (line.startswith("<tr><td>") == 0):
+							continue
+
+						pending       = ""
+						pending_start = line_start
+
+					pending += line + "\n"
+
+					if (line.rstrip().endswith("</td></tr>")):
+						match = row_pattern.match(pending)
+
+						if (match):
+							yield (pending_start, offset - pending_start, match.group("time"), match.group("level"), match.group("traceback"), match.group("message"))
+
+						pending = None
+
+				elif (_csv_start_pattern.match(line)):
+					if (pending != None):
+						match = row_pattern.match(pending)
+
+						if (match):
+							yield (pending_start, line_start - pending_start, match.group("time"), match.group("level"), match.group("traceback"), match.group("message"))
+
+					pending       = line + "\n"
+					pending_start = line_start
+
+				elif (pending != None):
+					pending += line + "\n"
+
+		## The footer of an HTML log is written without a newline.
+		if (log_format == "html" and remainder.startswith("</table>")):
+			yield None
+
+		## The entry at the end of a log still being written may go on.
+		if (log_format == "csv" and pending != None and rotated == 1):
+			if (remainder != ""):
+				pending += remainder
+				offset  += len(remainder)
+
+			match = row_pattern.match(pending)
+
+			if (match):
+				yield (pending_start, offset - pending_start, match.group("time"), match.group("level"), match.group("traceback"), match.group("message"))
+
+	finally:
+		segment_file.close()
+
+## Method Name: parseQueryTime
+##
+## Purpose: Turn a local time from the command line into a UNIX time. Any prefix of YYYY-MM-DDTHH:MM:SS may be given.
+##
+## Parameters
+## 1. value - The time from the command line.
+def parseQueryTime(value):
+	value = value.replace(" ", "T")
+
+	for length, time_format in ((19, "%Y-%m-%dT%H:%M:%S"), (16, "%Y-%m-%dT%H:%M"), (13, "%Y-%m-%dT%H"), (10, "%Y-%m-%d")):
+		if (len(value) == length):
+			return int(time.mktime(time.strptime(value, time_format)))
+
+	raise ValueError("Invalid time: " + value)
+
+## Method Name: main
+##
+## Purpose: Serves as the entry point into the script.
+def main():
+	logging.basicConfig(format="%(asctime)s - %(name)s - [%(levelname)s] - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+
+	if (len(sys.argv) < 3 or sys.argv[1] not in ("import", "query") or (sys.argv[1] == "import" and len(sys.argv) < 4)):
+		print "Usage: python bitCollector_logindex.py import <index_path> <log_file> [<log_file> ...]"
+		print "       python bitCollector_logindex.py query <index_path> [--level <level>] [--module <module>] [--traceback <text>] [--start <time>] [--end <time>] [--text <words>] [--limit <count>]"
+		sys.exit(1)
+
+	log_index = LogIndex(sys.argv[2])
+
+	try:
+		if (sys.argv[1] == "import"):
+			start_time  = time.time()
+			entry_count = 0
+
+			for log_file in sys.argv[3:]:
+				try:
+					entry_count += log_index.importLog(log_file)
+
+				except (IOError, ValueError), error:
+					logging.getLogger("LogIndex").error(str(error))
+
+			logging.getLogger("LogIndex").info("Imported %d entries in %.2fs" % (entry_count, time.time() - start_time))
+			return
+
+		## Parse the query options.
+		options  = {}
+		names    = {"--level": "level", "--module": "module", "--traceback": "traceback", "--start": "start_time", "--end": "end_time", "--text": "text", "--limit": "limit"}
+		position = 3
+
+		while (position < len(sys.argv)):
+			if (sys.argv[position] not in names or position + 1 == len(sys.argv)):
+				print "Invalid query option: " + sys.argv[position]
+				sys.exit(1)
+
+			options[names[sys.argv[position]]] = sys.argv[position + 1]
+			position += 2
+
+		try:
+			for name in ("start_time", "end_time"):
+				if (name in options):
+					options[name] = parseQueryTime(options[name])
+
+			if ("limit" in options):
+				options["limit"] = int(options["limit"])
+
+			if ("level" in options and options["level"].upper() not in _level_numbers):
+				raise ValueError("Invalid level: " + options["level"])
+
+		except ValueError, error:
+			print str(error)
+			sys.exit(1)
+
+		start_time = time.time()
+		entries    = log_index.query(**options)
+
+		for created, level, traceback, message in entries:
+			level_name = "UNKNOWN"
+			for name, number in _level_numbers.iteritems():
+				if (number == level):
+					level_name = name
+
+			print time.strftime(_time_format, time.localtime(created)) + "," + traceback + "," + level_name + "," + message
+
+		sys.stderr.write("%d entries in %.1f ms\n" % (len(entries), (time.time() - start_time) * 1000))
+
+	finally:
+		log_index.close()
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
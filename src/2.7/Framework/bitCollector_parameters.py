@@ -0,0 +1,258 @@
+## File Name: bitCollector_parameters.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script parses and validates the parameters of the BitCollector modules for them.
+##          A module declares its parameters as a literal dictionary named _module_parameters, which the
+##          framework reads from the source without importing the module. The configured parameters are
+##          checked against it once at startup, and each module receives a compact settings object in
+##          module_dict["settings"] instead of walking the parameter list itself.
+##
+## Usage: Declare the parameters at the top of the module. Every entry takes a type and optionally a
+##        default, required, choices, min, max and description.
+##        _module_parameters = {
+##            "par1"          : {"type" : "string", "required" : 1},
+##            "par2"          : {"type" : "int", "default" : 0, "min" : 0},
+##            "logging_level" : {"type" : "string", "default" : "info", "choices" : ["debug", "info", "warning", "error", "critical"]}
+##        }
+##        Then read them in main() as module_dict["settings"].par1
+
+## Standard imports (Static)
+import re
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_parameter_types  = ("string", "int", "float", "bool", "list", "dict", "any")
+_parameter_fields = ("type", "default", "required", "choices", "min", "max", "description")
+_parameter_name   = re.compile(r'^[A-Za-z][A-Za-z0-9_]*$')
+
+## The settings classes built so far, one per module and parameter layout.
+_settings_classes = {}
+
+## Class Declarations
+
+## Class Name: ParameterError
+##
+## Purpose: Report every problem found in a module's parameter schema or configured parameters at once.
+class ParameterError(Exception):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the error.
+	##
+	## Parameters
+	## 1. module_name - The name of the module.
+	## 2. problems    - The list of problems found.
+	def __init__(self, module_name, problems):
+		Exception.__init__(self, module_name + ": " + "; ".join(problems))
+
+		self.module_name = module_name
+		self.problems    = problems
+
+## Class Name: ModuleParameters
+##
+## Purpose: The base of the settings classes. Each subclass has one slot per declared parameter.
+class ModuleParameters(object):
+	__slots__ = ()
+
+	## The name of the module the settings belong to. Set on every subclass.
+	module_name = None
+
+	## Method Name: __reduce__
+	##
+	## Purpose: Pickle the settings by value. The subclasses are built at runtime and cannot be pickled by reference.
+	def __reduce__(self):
+		return restoreParameters, (self.module_name, self.__slots__, tuple([getattr(self, name) for name in self.__slots__]))
+
+	## Method Name: asDict
+	##
+	## Purpose: Return the settings as a dictionary, for logging or reporting.
+	def asDict(self):
+		values = {}
+
+		for name in self.__slots__:
+			values[name] = getattr(self, name)
+
+		return values
+
+## Classless Method Declarations
+
+## Method Name: checkValue
+##
+## Purpose: Check a value against a parameter's declaration and convert it to the declared type.
+##
+## Parameters
+## 1. name        - The name of the parameter.
+## 2. declaration - The dictionary declaring the parameter.
+## 3. value       - The value to check.
+## 4. problems    - The list to append any problem to.
+##
+## Returns
+## The converted value.
+def checkValue(name, declaration, value, problems):
+	parameter_type = declaration["type"]
+
+	if (parameter_type == "string" and isinstance(value, basestring) == 0):
+		problems.append(name + " must be a string")
+
+	elif (parameter_type == "int" and (isinstance(value, (int, long)) == 0 or isinstance(value, bool))):
+		problems.append(name + " must be an integer")
+
+	elif (parameter_type == "float"):
+		if (isinstance(value, (int, long, float)) == 0 or isinstance(value, bool)):
+			problems.append(name + " must be a number")
+
+		else:
+			value = float(value)
+
+	elif (parameter_type == "bool"):
+		if (value not in (0, 1)):
+			problems.append(name + " must be 0, 1, true or false")
+
+		else:
+			value = bool(value)
+
+	elif (parameter_type == "list" and isinstance(value, list) == 0):
+		problems.append(name + " must be a list")
+
+	elif (parameter_type == "dict" and isinstance(value, dict) == 0):
+		problems.append(name + " must be a dictionary")
+
+	## Choices restrict the value, or every item of a list.
+	if ("choices" in declaration):
+		items = [value]
+		if (parameter_type == "list" and isinstance(value, list)):
+			items = value
+
+		for item in items:
+			if (item not in declaration["choices"]):
+				problems.append(name + " must be one of " + ", ".join([str(choice) for choice in declaration["choices"]]) + ", not " + str(item))
+
+	if (isinstance(value, (int, long, float)) and isinstance(value, bool) == 0):
+		if ("min" in declaration and value < declaration["min"]):
+			problems.append(name + " must be at least " + str(declaration["min"]))
+
+		if ("max" in declaration and value > declaration["max"]):
+			problems.append(name + " must be at most " + str(declaration["max"]))
+
+	return value
+
+## Method Name: getSettingsClass
+##
+## Purpose: Build, or reuse, the settings class with one slot per parameter of a module.
+##
+## Parameters
+## 1. module_name - The name of the module.
+## 2. names       - The names of the parameters.
+def getSettingsClass(module_name, names):
+	key = (module_name, tuple(names))
+
+	if (key not in _settings_classes):
+		_settings_classes[key] = type(str(module_name) + "Settings", (ModuleParameters,), {"__slots__" : tuple(names), "module_name" : module_name})
+
+	return _settings_classes[key]
+
+## Method Name: parseParameters
+##
+## Purpose: Check the configured parameters of a module against its schema and build its settings object.
+##
+## Parameters
+## 1. module_name - The name of the module.
+## 2. schema      - The module's _module_parameters dictionary.
+## 3. parameters  - The configured parameters, as the list of single-key dictionaries from the configuration file.
+##
+## Returns
+## An instance of the module's settings class. ParameterError is raised listing every problem found.
+def parseParameters(module_name, schema, parameters):
+	problems = validateSchema(schema)
+
+	if (len(problems) > 0):
+		raise ParameterError(module_name, ["invalid _module_parameters: " + problem for problem in problems])
+
+	## Flatten the list of single-key dictionaries.
+	configured = {}
+	for param_pair in parameters:
+		if (isinstance(param_pair, dict) == 0):
+			problems.append("parameters must be single-key dictionaries, not " + str(param_pair))
+			continue
+
+		for param, value in param_pair.iteritems():
+			if (param in configured):
+				problems.append(param + " is set more than once")
+
+			configured[param] = value
+
+	for param in sorted(configured):
+		if (param not in schema):
+			problems.append("unknown parameter " + param)
+
+	names  = sorted(schema)
+	values = []
+
+	for name in names:
+		declaration = schema[name]
+
+		if (name in configured):
+			values.append(checkValue(name, declaration, configured[name], problems))
+
+		elif (declaration.get("required", 0)):
+			problems.append(name + " is required")
+			values.append(None)
+
+		else:
+			values.append(declaration.get("default"))
+
+	if (len(problems) > 0):
+		raise ParameterError(module_name, problems)
+
+	return restoreParameters(module_name, names, values)
+
+## Method Name: restoreParameters
+##
+## Purpose: Build a settings object from its values. Also used to unpickle the settings in a worker process.
+##
+## Parameters
+## 1. module_name - The name of the module.
+## 2. names       - The names of the parameters.
+## 3. values      - The values of the parameters, in the same order.
+def restoreParameters(module_name, names, values):
+	settings = getSettingsClass(module_name, names)()
+
+	for position in range(len(names)):
+		setattr(settings, names[position], values[position])
+
+	return settings
+
+## Method Name: validateSchema
+##
+## Purpose: Check that a module's _module_parameters dictionary is well formed.
+##
+## Parameters
+## 1. schema - The module's _module_parameters dictionary.
+##
+## Returns
+## The list of problems found.
+def validateSchema(schema):
+	problems = []
+
+	if (isinstance(schema, dict) == 0):
+		return ["_module_parameters must be a dictionary"]
+
+	for name in sorted(schema):
+		declaration = schema[name]
+
+		if (isinstance(name, basestring) == 0 or _parameter_name.match(name) == None):
+			problems.append("parameter names must be identifiers, not " + str(name))
+			continue
+
+		if (isinstance(declaration, dict) == 0 or declaration.get("type") not in _parameter_types):
+			problems.append(name + " must declare a type out of " + ", ".join(_parameter_types))
+			continue
+
+		for field in declaration:
+			if (field not in _parameter_fields):
+				problems.append(name + " declares an unknown field " + str(field))
+
+		## The default has to pass the declaration too, unless the parameter is left unset.
+		if (declaration.get("default") != None):
+			checkValue(name, declaration, declaration["default"], problems)
+
+	return problems
@@ -0,0 +1,283 @@
+## File Name: bitCollector_pipeline.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the record pipeline the framework gives each BitCollector module as its output channel.
+##          Modules emit structured records into a bounded queue, and a single thread pulls them through a chain
+##          of generator stages (dedup, hash and search) into the run's record file, kept as JSON lines next to
+##          the log. A module emitting faster than the stages and the disk can take blocks on the full queue, so a
+##          slow sink throttles its producers instead of growing memory.
+##
+## Usage: Modules emit dictionaries of JSON-serializable values from any of their threads.
+##        module_dict["output"].emit({"type" : "chat_message", "sender" : sender, "text" : text})
+##        Records with a "path" field naming a file are given its digests by the hash stage, and records with
+##        keyword hits are given a "keyword_hits" list by the search stage.
+
+## Standard imports (Static)
+import hashlib, json, logging, os, Queue, threading, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_capacity = 1000
+_default_stages   = ["dedup", "hash", "search"]
+_pipeline_stages  = ("dedup", "hash", "search")
+_records_suffix   = "_records.jsonl"
+
+## Records are written in batches of about this many bytes, or after this many seconds.
+_write_batch_size     = 65536
+_write_batch_interval = 1.0
+
+## Class Declarations
+
+## Class Name: RecordPipeline
+##
+## Purpose: Carry the records of one module through the configured stages into the record file.
+class RecordPipeline():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the pipeline and start its thread.
+	##
+	## Parameters
+	## 1. module_name      - The name of the module. Every record is tagged with it.
+	## 2. record_path      - The path to the JSON lines file to append the records to.
+	## 3. stages           - (Optional) The list of stages to run, in order, out of _pipeline_stages.
+	## 4. capacity         - (Optional) The number of records which may wait in the queue before emit blocks.
+	## 5. hash_service     - (Optional) The HashService the hash stage uses.
+	## 6. keyword_searcher - (Optional) The KeywordSearcher the search stage uses. The stage is skipped without one.
+	## 7. sink             - (Optional) A callable given every written batch as a list of (module, type, record_id, created, data) rows.
+	def __init__(self, module_name, record_path, stages=_default_stages, capacity=_default_capacity, hash_service=None, keyword_searcher=None, sink=None):
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+		self.module_name      = module_name
+		self.record_path      = record_path
+		self.hash_service     = hash_service
+		self.keyword_searcher = keyword_searcher
+		self.sink             = sink
+
+		self.stages = []
+		for stage in stages:
+			if (stage == "search" and keyword_searcher == None):
+				self.logger.debug("No keywords are configured. Skipping the search stage.")
+
+			elif (stage == "hash" and hash_service == None):
+				self.logger.debug("No hashing service. Skipping the hash stage.")
+
+			else:
+				self.stages.append(stage)
+
+		self.record_queue = Queue.Queue(capacity)
+		self.end_marker   = object()
+		self.failed       = 0
+
+		## Set by the pipeline thread once the end marker is taken off the queue.
+		self.ended = 0
+
+		## Counted by the pipeline thread only.
+		self.counts = {"emitted": 0, "duplicates": 0, "hashed": 0, "keyword_hits": 0, "written": 0}
+
+		self.thread = threading.Thread(target=self.run, name="RecordPipeline-" + module_name)
+		self.thread.daemon = True
+		self.thread.start()
+
+	## Method Name: emit
+	##
+	## Purpose: Hand a record to the pipeline. Blocks while the queue is full.
+	##
+	## Parameters
+	## 1. record - The dictionary to emit. The pipeline owns it from here on and may add fields to it.
+	def emit(self, record):
+		if (self.failed == 1):
+			raise IOError("The record pipeline of module " + self.module_name + " has failed. See the log for the reason.")
+
+		self.record_queue.put(record)
+
+	## Method Name: close
+	##
+	## Purpose: Wait for every emitted record to be written and log the counts.
+	##
+	## Returns
+	## The dictionary of counts.
+	def close(self):
+		self.record_queue.put(self.end_marker)
+		self.thread.join()
+
+		if (self.counts["emitted"] > 0):
+			self.logger.info("Records of module %s: %d emitted - %d duplicates dropped - %d hashed - %d with keyword hits - %d written to %s" % (self.module_name, self.counts["emitted"], self.counts["duplicates"], self.counts["hashed"], self.counts["keyword_hits"], self.counts["written"], self.record_path))
+
+		return self.counts
+
+	## Method Name: run
+	##
+	## Purpose: Chain the stages and write their output until the module is done.
+	def run(self):
+		records = self.readQueue()
+
+		for stage in self.stages:
+			records = getattr(self, stage + "Stage")(records)
+
+		try:
+			self.writeRecords(records)
+
+		except Exception:
+			self.failed = 1
+			self.logger.exception("The record pipeline of module " + self.module_name + " failed. Further records are rejected.")
+
+			## Keep taking records off the queue so that no producer stays blocked on it, until the module is done.
+			while (self.ended == 0 and self.record_queue.get() is not self.end_marker):
+				pass
+
+	## Method Name: readQueue
+	##
+	## Purpose: The first stage. Yield the records as they are emitted until the module is done.
+	def readQueue(self):
+		while (1):
+			record = self.record_queue.get()
+
+			if (record is self.end_marker):
+				self.ended = 1
+				break
+
+			self.counts["emitted"] += 1
+			yield record
+
+	## Method Name: dedupStage
+	##
+	## Purpose: Give every record a record_id from its content and drop the records already seen.
+	##
+	## Parameters
+	## 1. records - The iterator of records from the previous stage.
+	def dedupStage(self, records):
+		## Only the 20-byte digests are kept, so the set stays small next to the records themselves.
+		seen = set()
+
+		for record in records:
+			record_id = hashlib.sha1(json.dumps(record, sort_keys=True, default=str)).digest()
+
+			if (record_id in seen):
+				self.counts["duplicates"] += 1
+				continue
+
+			seen.add(record_id)
+			record["record_id"] = record_id.encode("hex")
+
+			yield record
+
+	## Method Name: hashStage
+	##
+	## Purpose: Add the digests of the file named by the "path" field of a record.
+	##
+	## Parameters
+	## 1. records - The iterator of records from the previous stage.
+	def hashStage(self, records):
+		for record in records:
+			path = record.get("path")
+
+			if (isinstance(path, basestring) and os.path.isfile(path)):
+				try:
+					record["digests"] = self.hash_service.hashFile(path)
+					self.counts["hashed"] += 1
+
+				except (IOError, OSError), error:
+					self.logger.warning("Unable to hash the file of a record: " + path + ". " + str(error))
+					record["digests"] = None
+
+			yield record
+
+	## Method Name: searchStage
+	##
+	## Purpose: Add the keyword hits found in the string fields of a record.
+	##
+	## Parameters
+	## 1. records - The iterator of records from the previous stage.
+	def searchStage(self, records):
+		for record in records:
+			hits = self.keyword_searcher.searchRecord(record)
+
+			if (len(hits) > 0):
+				record["keyword_hits"] = [{"field" : field, "offset" : offset, "keyword" : keyword} for field, offset, keyword in hits]
+				self.counts["keyword_hits"] += 1
+
+			yield record
+
+	## Method Name: writeRecords
+	##
+	## Purpose: The last stage. Append the records to the record file as JSON lines, in batches.
+	##          The file is opened for appending and every batch is a single write of whole lines, so
+	##          pipelines in worker processes can share the file. It is only created once there is a record.
+	##
+	## Parameters
+	## 1. records - The iterator of records from the previous stage.
+	def writeRecords(self, records):
+		record_fd  = None
+		batch      = []
+		batch_size = 0
+		batch_time = time.time()
+
+		## The rows handed to the sink, built from the same JSON as the lines.
+		rows = []
+
+		try:
+			for record in records:
+				record["module"] = self.module_name
+
+				data        = json.dumps(record, sort_keys=True, default=str)
+				batch_size += len(data) + 1
+				batch.append(data + "\n")
+
+				if (self.sink != None):
+					record_type = record.get("type")
+
+					if (isinstance(record_type, basestring) == 0):
+						record_type = None
+
+					rows.append((self.module_name, record_type, record.get("record_id"), time.time(), data))
+
+				if (batch_size >= _write_batch_size or time.time() - batch_time >= _write_batch_interval):
+					if (record_fd == None):
+						record_fd = os.open(self.record_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0644)
+
+					self.writeBatch(record_fd, batch, rows)
+
+					batch      = []
+					batch_size = 0
+					batch_time = time.time()
+					rows       = []
+
+			if (len(batch) > 0):
+				if (record_fd == None):
+					record_fd = os.open(self.record_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0644)
+
+				self.writeBatch(record_fd, batch, rows)
+
+		finally:
+			if (record_fd != None):
+				os.close(record_fd)
+
+	## Method Name: writeBatch
+	##
+	## Purpose: Write a batch of lines with as few write calls as the OS allows, and hand its rows to the sink.
+	##
+	## Parameters
+	## 1. record_fd - The file descriptor of the record file.
+	## 2. batch     - The list of lines to write.
+	## 3. rows      - The list of rows for the sink. Empty without a sink.
+	def writeBatch(self, record_fd, batch, rows):
+		data = "".join(batch)
+
+		while (len(data) > 0):
+			data = data[os.write(record_fd, data):]
+
+		if (self.sink != None):
+			self.sink(rows)
+
+		self.counts["written"] += len(batch)
+
+## Classless Method Declarations
+
+## Method Name: getRecordPath
+##
+## Purpose: Work out the path of the record file kept next to a log file.
+##
+## Parameters
+## 1. log_file - The path to the log file of the run.
+def getRecordPath(log_file):
+	return os.path.splitext(log_file)[0] + _records_suffix
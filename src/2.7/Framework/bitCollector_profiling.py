@@ -0,0 +1,280 @@
+## File Name: bitCollector_profiling.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the profiler behind the framework's --profile option.
+##          The main method of every module runs under cProfile, and its statistics are written to one
+##          .pstats file per module in the profile directory. At the end of the run the statistics of
+##          every module are merged and the hottest functions are logged. cProfile only sees the thread
+##          the module runs on, so a sampler can also record the stacks of every thread at an interval
+##          and write them in the collapsed format flame graph tools read.
+##
+## Usage: python bitCollector_framework.py --profile [profile_dir] [--sample-stacks [milliseconds]] <config_path>
+##        python -m pstats <profile_dir>/<run>_<module>_1.pstats
+
+## Standard imports (Static)
+import cProfile, errno, glob, logging, os, pstats, sys, threading
+
+## Framework imports (Static)
+import bitCollector_logging
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_top_count       = 25
+_default_sample_interval = 10
+
+## Class Declarations
+
+## Class Name: ModuleProfiler
+##
+## Purpose: Profile the BitCollector modules of a run and summarize where their time went.
+class ModuleProfiler():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the profiler.
+	##
+	## Parameters
+	## 1. profile_dir     - The directory to write the profiles to.
+	## 2. run_name        - The name the files of this run start with, so that runs can share the directory.
+	## 3. top_count       - (Optional) The number of functions to log in the summary.
+	## 4. sample_interval - (Optional) The number of milliseconds between stack samples, or None to leave the sampler off.
+	def __init__(self, profile_dir, run_name, top_count=_default_top_count, sample_interval=None):
+		self.profile_dir     = profile_dir
+		self.run_name        = run_name
+		self.top_count       = top_count
+		self.sample_interval = sample_interval
+
+	## Method Name: allocatePath
+	##
+	## Purpose: Claim a file name in the profile directory which no other module of the run is using.
+	##          Modules run in worker processes claim their names too, so the name is taken by creating the file.
+	##
+	## Parameters
+	## 1. name      - The name of the module.
+	## 2. extension - The extension of the file.
+	def allocatePath(self, name, extension):
+		number = 1
+
+		while (1):
+			path = os.path.join(self.profile_dir, self.run_name + "_" + name + "_" + str(number) + "." + extension)
+
+			try:
+				os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0644))
+				return path
+
+			except OSError, error:
+				if (error.errno != errno.EEXIST):
+					raise
+
+			number += 1
+
+	## Method Name: profileCall
+	##
+	## Purpose: Call the main method of a module under cProfile and write its statistics, even when the module raises.
+	##
+	## Parameters
+	## 1. name        - The name of the module.
+	## 2. entry_point - The main method of the module.
+	## 3. args        - The arguments to call it with.
+	##
+	## Returns
+	## The return value of the main method.
+	def profileCall(self, name, entry_point, *args):
+		profiler = cProfile.Profile()
+
+		try:
+			return profiler.runcall(entry_point, *args)
+
+		finally:
+			try:
+				path = self.allocatePath(name, "pstats")
+				profiler.dump_stats(path)
+				logging.getLogger(self.__class__.__name__).info("Wrote the profile of module: " + name + " to " + path)
+
+			except (IOError, OSError), error:
+				logging.getLogger(self.__class__.__name__).warning("Unable to write the profile of module: " + name + ". " + str(error))
+
+	## Method Name: startSampler
+	##
+	## Purpose: Start sampling the stacks of every thread of this process, if sampling is enabled.
+	##
+	## Returns
+	## The running StackSampler, or None.
+	def startSampler(self):
+		if (self.sample_interval == None):
+			return None
+
+		sampler = StackSampler(self.sample_interval / 1000.0)
+		sampler.start()
+
+		return sampler
+
+	## Method Name: stopSampler
+	##
+	## Purpose: Stop a sampler and write its stacks.
+	##
+	## Parameters
+	## 1. sampler - The StackSampler returned by startSampler, or None.
+	## 2. name    - The name to write the stacks under. ("framework" or the name of the module run in a worker process)
+	def stopSampler(self, sampler, name):
+		if (sampler == None):
+			return
+
+		sampler.stop()
+
+		try:
+			path = self.allocatePath(name, "stacks")
+			sampler.writeStacks(path)
+			logging.getLogger(self.__class__.__name__).info("Wrote %d stack samples of %s to %s" % (sampler.sample_count, name, path))
+
+		except (IOError, OSError), error:
+			logging.getLogger(self.__class__.__name__).warning("Unable to write the stack samples of " + name + ". " + str(error))
+
+	## Method Name: logSummary
+	##
+	## Purpose: Merge the profiles and stack samples of the run and log the hottest functions, each summary as one table.
+	##
+	## Parameters
+	## 1. root_logger - The logger to write the summary to.
+	def logSummary(self, root_logger):
+		profile_paths = sorted(glob.glob(os.path.join(self.profile_dir, self.run_name + "_*.pstats")))
+
+		## Profiles left empty by a worker process which died are skipped.
+		profile_paths = [path for path in profile_paths if os.path.getsize(path) > 0]
+
+		if (len(profile_paths) > 0):
+			stats = pstats.Stats(*profile_paths)
+
+			## Each entry maps (file, line, function) to (primitive calls, calls, own time, cumulative time, callers).
+			functions = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top_count]
+
+			table = {"title": "Profile summary: the %d functions with the most own time across %d profiles (%.2fs in total)" % (len(functions), len(profile_paths), stats.total_tt), "columns": ["Rank", "Own seconds", "Cumulative seconds", "Calls", "Function"], "rows": []}
+
+			for position in range(len(functions)):
+				function, timing = functions[position]
+				table["rows"].append([position + 1, "%.3f" % timing[2], "%.3f" % timing[3], timing[1], formatFunction(function)])
+
+			root_logger.info(bitCollector_logging.formatTable(table, "text"), extra={"table": table})
+
+		stack_paths = sorted(glob.glob(os.path.join(self.profile_dir, self.run_name + "_*.stacks")))
+
+		if (len(stack_paths) > 0):
+			frame_counts = {}
+			sample_count = 0
+
+			## Count how often each function was on top of a sampled stack.
+			for path in stack_paths:
+				stack_file = open(path, 'r')
+
+				try:
+					for line in stack_file:
+						stack, separator, count = line.rstrip("\n").rpartition(" ")
+
+						if (stack != ""):
+							frame                = stack.rsplit(";", 1)[-1]
+							frame_counts[frame]  = frame_counts.get(frame, 0) + int(count)
+							sample_count        += int(count)
+
+				finally:
+					stack_file.close()
+
+			if (sample_count > 0):
+				table = {"title": "Stack summary: the %d frames most often on top across %d thread samples" % (min(self.top_count, len(frame_counts)), sample_count), "columns": ["Share", "Samples", "Frame"], "rows": []}
+
+				for frame, count in sorted(frame_counts.items(), key=lambda item: item[1], reverse=True)[:self.top_count]:
+					table["rows"].append(["%.1f%%" % (100.0 * count / sample_count), count, frame])
+
+				root_logger.info(bitCollector_logging.formatTable(table, "text"), extra={"table": table})
+
+## Class Name: StackSampler
+##
+## Purpose: Sample the stacks of every thread of the process at an interval.
+class StackSampler(threading.Thread):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the sampler thread.
+	##
+	## Parameters
+	## 1. interval - The number of seconds between samples.
+	def __init__(self, interval):
+		threading.Thread.__init__(self, name="StackSampler")
+
+		## The sampler must never keep the process alive.
+		self.daemon = True
+
+		self.interval     = interval
+		self.stacks       = {}
+		self.sample_count = 0
+		self.stop_event   = threading.Event()
+
+	## Method Name: run
+	##
+	## Purpose: Take a sample every interval until stopped.
+	def run(self):
+		while (self.stop_event.wait(self.interval) == 0):
+			self.sample()
+
+	## Method Name: sample
+	##
+	## Purpose: Record the current stack of every thread but the sampler itself.
+	def sample(self):
+		thread_names = {}
+		for thread in threading.enumerate():
+			thread_names[thread.ident] = thread.name
+
+		## A forked worker process still lists the frames of the threads it did not inherit, so only the live threads are sampled.
+		for ident, frame in sys._current_frames().items():
+			if (ident == self.ident or ident not in thread_names):
+				continue
+
+			## The collapsed format separates the frames with ";" and the count with a space.
+			stack = []
+			while (frame != None):
+				stack.append(formatFunction((frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name)).replace(";", ",").replace(" ", "_"))
+				frame = frame.f_back
+
+			stack.append(thread_names[ident].replace(";", ",").replace(" ", "_"))
+			stack.reverse()
+
+			key = ";".join(stack)
+			self.stacks[key]   = self.stacks.get(key, 0) + 1
+			self.sample_count += 1
+
+	## Method Name: stop
+	##
+	## Purpose: Stop sampling and wait for the sampler to finish.
+	def stop(self):
+		self.stop_event.set()
+		self.join()
+
+	## Method Name: writeStacks
+	##
+	## Purpose: Write the sampled stacks in the collapsed format, one "thread;outer;...;inner count" line per distinct stack.
+	##
+	## Parameters
+	## 1. path - The path to write the stacks to.
+	def writeStacks(self, path):
+		stack_file = open(path, 'w')
+
+		try:
+			for stack in sorted(self.stacks):
+				stack_file.write(stack + " " + str(self.stacks[stack]) + "\n")
+
+		finally:
+			stack_file.close()
+
+## Classless Method Declarations
+
+## Method Name: formatFunction
+##
+## Purpose: Format a function the way pstats prints it, as file:line(function).
+##
+## Parameters
+## 1. function - The (file, line, function) tuple as used by pstats.
+def formatFunction(function):
+	file_name, line, name = function
+
+	## Built-in functions have no file. pstats names them "~".
+	if (file_name == "~"):
+		return name
+
+	return os.path.basename(file_name) + ":" + str(line) + "(" + name + ")"
@@ -0,0 +1,246 @@
+## File Name: bitCollector_registry.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the registry the framework resolves and loads the BitCollector modules through.
+##          Each module is located once, and its path, _module_version and _module_parameters are kept
+##          in a catalog next to the logs. The catalog stays valid as long as neither the modules nor the
+##          search directories change, so a warm start costs a few stat calls instead of a sys.path scan
+##          per module. Modules are only imported when they are scheduled, straight from their resolved path.
+
+## Standard imports (Static)
+import ast, imp, json, logging, os, sys, threading
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_catalog_name = "bitCollector_modules.json"
+_catalog_version      = 2
+
+## Class Declarations
+
+## Class Name: ModuleRegistry
+##
+## Purpose: Resolve BitCollector modules to their files once and import them on demand.
+class ModuleRegistry():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the registry and read the catalog of the previous run.
+	##
+	## Parameters
+	## 1. search_paths - The list of directories to look for modules in, in order.
+	## 2. catalog_path - The path to the JSON catalog of resolved modules.
+	def __init__(self, search_paths, catalog_path):
+		self.search_paths = [os.path.abspath(path) for path in search_paths]
+		self.catalog_path = catalog_path
+		self.entries      = {}
+		self.dirty        = 0
+
+		self.lock = threading.Lock()
+		self.readCatalog()
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Leave the lock out when the registry is pickled for a worker process.
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		del state["lock"]
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the registry in a worker process.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = threading.Lock()
+
+	## Method Name: getSearchPathTimes
+	##
+	## Purpose: Take the modification times of the search directories. They change whenever a module is added or removed.
+	def getSearchPathTimes(self):
+		search_path_times = []
+
+		for path in self.search_paths:
+			try:
+				search_path_times.append(os.stat(path).st_mtime)
+
+			except OSError:
+				search_path_times.append(None)
+
+		return search_path_times
+
+	## Method Name: readCatalog
+	##
+	## Purpose: Read the catalog of the previous run. It is ignored when the search directories differ or have changed since.
+	def readCatalog(self):
+		logger = logging.getLogger(self.__class__.__name__)
+
+		try:
+			catalog_file = open(self.catalog_path, 'r')
+
+			try:
+				catalog = json.load(catalog_file)
+
+			finally:
+				catalog_file.close()
+
+		except (IOError, ValueError):
+			logger.debug("No usable module catalog at: " + self.catalog_path)
+			return
+
+		if (catalog.get("version") != _catalog_version or catalog.get("search_paths") != self.search_paths or catalog.get("search_path_times") != self.getSearchPathTimes()):
+			logger.debug("The module catalog is out of date. Resolving every module again.")
+			return
+
+		self.entries = catalog.get("modules", {})
+
+	## Method Name: writeCatalog
+	##
+	## Purpose: Write the catalog if any module was resolved again. It is renamed into place so that concurrent runs never read half of it.
+	def writeCatalog(self):
+		with self.lock:
+			if (self.dirty == 0):
+				return
+
+			catalog   = {"version": _catalog_version, "search_paths": self.search_paths, "search_path_times": self.getSearchPathTimes(), "modules": self.entries}
+			temp_path = self.catalog_path + "." + str(os.getpid()) + ".tmp"
+
+			try:
+				catalog_file = open(temp_path, 'w')
+				json.dump(catalog, catalog_file, indent=1, sort_keys=True)
+				catalog_file.close()
+
+				## os.rename does not replace an existing file on Windows.
+				if (os.name == "nt" and os.path.exists(self.catalog_path)):
+					os.remove(self.catalog_path)
+
+				os.rename(temp_path, self.catalog_path)
+				self.dirty = 0
+
+			except (IOError, OSError), error:
+				logging.getLogger(self.__class__.__name__).warning("Unable to write the module catalog: " + self.catalog_path + ". " + str(error))
+
+	## Method Name: resolve
+	##
+	## Purpose: Find the file of a module, using the catalog when the file did not change since it was resolved.
+	##
+	## Parameters
+	## 1. name - The name of the module.
+	##
+	## Returns
+	## The catalog entry of the module (path, mtime, version and parameters), or None if the module cannot be found.
+	def resolve(self, name):
+		with self.lock:
+			entry = self.entries.get(name)
+
+			if (entry != None):
+				try:
+					if (os.stat(entry["path"]).st_mtime == entry["mtime"]):
+						return entry
+
+				except OSError:
+					pass
+
+			entry = self.findModule(name)
+
+			if (entry == None):
+				if (name in self.entries):
+					del self.entries[name]
+					self.dirty = 1
+
+				return None
+
+			self.entries[name] = entry
+			self.dirty         = 1
+
+			return entry
+
+	## Method Name: findModule
+	##
+	## Purpose: Search the directories for a module and read its declarations without importing it.
+	##
+	## Parameters
+	## 1. name - The name of the module.
+	def findModule(self, name):
+		path = None
+
+		## Look in the search directories first, then fall back to the rest of sys.path like __import__ would.
+		for search_path in self.search_paths + [each for each in sys.path if os.path.abspath(each or ".") not in self.search_paths]:
+			for candidate in (os.path.join(search_path, name + ".py"), os.path.join(search_path, name, "__init__.py")):
+				if (os.path.isfile(candidate)):
+					path = os.path.abspath(candidate)
+					break
+
+			if (path != None):
+				break
+
+		if (path == None):
+			return None
+
+		entry = {"path": path, "mtime": os.stat(path).st_mtime, "version": None, "parameters": None}
+
+		## Only module-level assignments of literals are read, so resolving a module runs none of its code.
+		try:
+			source_file = open(path, 'r')
+
+			try:
+				module_tree = ast.parse(source_file.read(), path)
+
+			finally:
+				source_file.close()
+
+			for node in module_tree.body:
+				if (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)):
+					if (node.targets[0].id == "_module_version"):
+						entry["version"] = ast.literal_eval(node.value)
+
+					elif (node.targets[0].id == "_module_parameters"):
+						entry["parameters"] = ast.literal_eval(node.value)
+
+		except (IOError, SyntaxError, ValueError), error:
+			logging.getLogger(self.__class__.__name__).warning("Unable to read the declarations of module: " + path + ". " + str(error))
+
+		return entry
+
+	## Method Name: load
+	##
+	## Purpose: Import a module from its resolved file. A module which is already imported is returned as it is.
+	##
+	## Parameters
+	## 1. name - The name of the module.
+	##
+	## Returns
+	## The module object. ImportError is raised when the module cannot be found.
+	def load(self, name):
+		if (name in sys.modules):
+			return sys.modules[name]
+
+		entry = self.resolve(name)
+
+		if (entry == None):
+			raise ImportError("No BitCollector module named " + name)
+
+		## imp holds the import lock while loading, so two threads scheduling the same module do not import it twice.
+		imp.acquire_lock()
+
+		try:
+			if (name in sys.modules):
+				return sys.modules[name]
+
+			if (os.path.basename(entry["path"]) == "__init__.py"):
+				module_info = imp.find_module(name, [os.path.dirname(os.path.dirname(entry["path"]))])
+
+			else:
+				module_info = imp.find_module(name, [os.path.dirname(entry["path"])])
+
+			try:
+				return imp.load_module(name, *module_info)
+
+			finally:
+				if (module_info[0] != None):
+					module_info[0].close()
+
+		finally:
+			imp.release_lock()
@@ -0,0 +1,371 @@
+## File Name: bitCollector_search.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the keyword search service the framework offers to the BitCollector modules.
+##          The keyword list is compiled once into a single trie-shaped regular expression, so a file or
+##          record is scanned for every keyword in one pass instead of once per keyword. Files are read in
+##          chunks which overlap by the length of the longest keyword, so hits crossing a chunk boundary
+##          are still found, and every hit is reported exactly once with its offset.
+##
+## Usage: Modules reach the service through framework_settings.keyword_searcher, which is None unless
+##        keywords are configured in the "search" setting.
+##        for offset, keyword in framework_settings.keyword_searcher.searchFile(path): ...
+##        for field, offset, keyword in framework_settings.keyword_searcher.searchRecord(record): ...
+
+## Standard imports (Static)
+import logging, re
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_chunk_size = 1048576
+
+## Class Declarations
+
+## Class Name: KeywordSearcher
+##
+## Purpose: Find every occurrence of every keyword in files and records in a single pass.
+class KeywordSearcher():
+	## Method Name: __init__
+	##
+	## Purpose: Compile the keywords into the search pattern.
+	##
+	## Parameters
+	## 1. keywords       - The list of keywords to search for. Unicode keywords are searched for as UTF-8.
+	## 2. case_sensitive - (Optional) A boolean tracking whether the case of the keywords must match.
+	## 3. chunk_size     - (Optional) The number of bytes of a file scanned at a time.
+	## 4. governor       - (Optional) The ResourceGovernor to throttle the reads with.
+	def __init__(self, keywords, case_sensitive=0, chunk_size=_default_chunk_size, governor=None):
+		self.case_sensitive = case_sensitive
+		self.chunk_size     = chunk_size
+		self.governor       = governor
+
+		## Keep the keywords as given for reporting, and search for their normalized form.
+		self.keywords = {}
+		for keyword in keywords:
+			if (isinstance(keyword, unicode)):
+				keyword = keyword.encode("utf-8")
+
+			if (keyword != ""):
+				self.keywords[self.normalize(keyword)] = keyword
+
+		if (len(self.keywords) == 0):
+			raise ValueError("No keywords to search for.")
+
+		self.max_length = max([len(keyword) for keyword in self.keywords])
+
+		## Build a trie of the keywords. The key "" marks the end of a keyword.
+		self.trie = {}
+		for keyword in self.keywords:
+			node = self.trie
+
+			for character in keyword:
+				node = node.setdefault(character, {})
+
+			node[""] = 1
+
+		self.compilePattern()
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Leave the compiled pattern out when the searcher is pickled for a worker process.
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		del state["pattern"]
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the searcher in a worker process and compile the pattern again.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.compilePattern()
+
+	## Method Name: compilePattern
+	##
+	## Purpose: Compile the trie into the search pattern.
+	##          The top-level alternatives are left ungrouped so that the engine can skip ahead to their first bytes.
+	##          The pattern is always case-sensitive. Case-insensitive searches lower the text instead, which is much faster than re.IGNORECASE.
+	def compilePattern(self):
+		self.pattern = re.compile("|".join(self.buildAlternatives(self.trie)))
+
+	## Method Name: normalize
+	##
+	## Purpose: Fold the case of a string when the search is case-insensitive.
+	##
+	## Parameters
+	## 1. text - The byte string to normalize.
+	def normalize(self, text):
+		if (self.case_sensitive == 0):
+			return text.lower()
+
+		return text
+
+	## Method Name: buildAlternatives
+	##
+	## Purpose: Turn the branches of a trie node into regular expressions which share the common prefixes of the keywords.
+	##          Sibling branches start with different bytes, so the engine never backtracks between them.
+	##
+	## Parameters
+	## 1. node - The trie node to turn into alternatives.
+	def buildAlternatives(self, node):
+		alternatives = []
+		single_bytes = []
+
+		for character in sorted(node.keys()):
+			if (character == ""):
+				continue
+
+			child = node[character]
+
+			## A leaf is a single escaped byte. Gather them into one character class.
+			if (child.keys() == [""]):
+				single_bytes.append(re.escape(character))
+
+			else:
+				alternatives.append(re.escape(character) + self.buildPattern(child))
+
+		if (len(single_bytes) == 1):
+			alternatives.append(single_bytes[0])
+
+		elif (len(single_bytes) > 1):
+			alternatives.append("[" + "".join(single_bytes) + "]")
+
+		return alternatives
+
+	## Method Name: buildPattern
+	##
+	## Purpose: Turn a trie node into a single regular expression.
+	##
+	## Parameters
+	## 1. node - The trie node to turn into a pattern.
+	def buildPattern(self, node):
+		alternatives = self.buildAlternatives(node)
+
+		if (len(alternatives) == 1):
+			pattern = alternatives[0]
+
+		else:
+			pattern = "(?:" + "|".join(alternatives) + ")"
+
+		## A keyword ending here makes the rest optional. The greedy ? still prefers the longer keywords.
+		if ("" in node):
+			pattern = "(?:" + pattern + ")?"
+
+		return pattern
+
+	## Method Name: matchKeywords
+	##
+	## Purpose: List every keyword which is a prefix of the longest match at a position.
+	##
+	## Parameters
+	## 1. text - The normalized longest match at the position.
+	##
+	## Returns
+	## The list of keywords as they were given.
+	def matchKeywords(self, text):
+		matched = []
+		node    = self.trie
+		prefix  = ""
+
+		for character in text:
+			node = node.get(character)
+
+			if (node == None):
+				break
+
+			prefix += character
+
+			if ("" in node):
+				matched.append(self.keywords[prefix])
+
+		return matched
+
+	## Method Name: searchBuffer
+	##
+	## Purpose: Find every hit in a buffer.
+	##
+	## Parameters
+	## 1. buffer   - The byte string to search.
+	## 2. min_end  - (Optional) Only report hits ending after this position. Hits ending earlier were reported with the previous chunk.
+	##
+	## Returns
+	## A generator of (offset, keyword) tuples in the order of the offsets.
+	def searchBuffer(self, buffer, min_end=0):
+		## Lowering ASCII text keeps every byte in place, so the offsets still point into the original buffer.
+		buffer = self.normalize(buffer)
+		match  = self.pattern.search(buffer)
+
+		while (match != None):
+			start = match.start()
+
+			for keyword in self.matchKeywords(match.group(0)):
+				if (start + len(keyword) > min_end):
+					yield start, keyword
+
+			## Resume one byte further rather than after the match so that overlapping hits are not skipped.
+			match = self.pattern.search(buffer, start + 1)
+
+	## Method Name: searchStream
+	##
+	## Purpose: Find every hit in a file object, reading it in overlapping chunks.
+	##
+	## Parameters
+	## 1. stream     - The file object opened in binary mode.
+	## 2. stop_token - (Optional) The module's stop token. The search ends early once a stop is requested.
+	##
+	## Returns
+	## A generator of (offset, keyword) tuples. The offsets are counted from the start of the stream.
+	def searchStream(self, stream, stop_token=None):
+		## Keep the last max_length - 1 bytes of every chunk so that a hit crossing into the next chunk is seen whole.
+		overlap     = self.max_length - 1
+		carry       = ""
+		base_offset = 0
+
+		while (stop_token == None or stop_token.isStopRequested() == 0):
+			chunk = self.readChunk(stream)
+
+			if (chunk == ""):
+				break
+
+			buffer = carry + chunk
+
+			## A hit which ends inside the carried bytes was fully inside the previous chunk and is already reported.
+			for offset, keyword in self.searchBuffer(buffer, len(carry)):
+				yield base_offset + offset, keyword
+
+			if (overlap > 0):
+				carry = buffer[-overlap:]
+
+			base_offset += len(buffer) - len(carry)
+
+	## Method Name: readChunk
+	##
+	## Purpose: Read the next chunk of a stream through the resource governor.
+	##          The reader slot is only held for the read itself, since the caller may do anything between two hits.
+	##
+	## Parameters
+	## 1. stream - The file object opened in binary mode.
+	def readChunk(self, stream):
+		if (self.governor == None):
+			return stream.read(self.chunk_size)
+
+		self.governor.acquireReader()
+
+		try:
+			chunk = stream.read(self.chunk_size)
+
+		finally:
+			self.governor.releaseReader()
+
+		self.governor.throttle(len(chunk))
+
+		return chunk
+
+	## Method Name: searchFile
+	##
+	## Purpose: Find every hit in a file.
+	##
+	## Parameters
+	## 1. path       - The path to the file to search.
+	## 2. stop_token - (Optional) The module's stop token.
+	##
+	## Returns
+	## A generator of (offset, keyword) tuples.
+	def searchFile(self, path, stop_token=None):
+		search_file = open(path, 'rb')
+
+		try:
+			for hit in self.searchStream(search_file, stop_token):
+				yield hit
+
+		finally:
+			search_file.close()
+
+	## Method Name: searchFiles
+	##
+	## Purpose: Find every hit in many files, logging the files which cannot be read.
+	##
+	## Parameters
+	## 1. paths      - An iterable of paths to search. It is consumed lazily, so a generator such as a directory walk works.
+	## 2. stop_token - (Optional) The module's stop token.
+	##
+	## Returns
+	## A generator of (path, offset, keyword) tuples.
+	def searchFiles(self, paths, stop_token=None):
+		logger = logging.getLogger(self.__class__.__name__)
+
+		for path in paths:
+			if (stop_token != None and stop_token.isStopRequested()):
+				break
+
+			try:
+				for offset, keyword in self.searchFile(path, stop_token):
+					yield path, offset, keyword
+
+			except (IOError, OSError), error:
+				logger.warning("Unable to search file: " + path + ". " + str(error))
+
+	## Method Name: searchText
+	##
+	## Purpose: Find every hit in a string held in memory.
+	##
+	## Parameters
+	## 1. text - The byte or unicode string to search. Unicode is searched as UTF-8, so the offsets are byte offsets.
+	##
+	## Returns
+	## A list of (offset, keyword) tuples.
+	def searchText(self, text):
+		if (isinstance(text, unicode)):
+			text = text.encode("utf-8")
+
+		return list(self.searchBuffer(text))
+
+	## Method Name: searchRecord
+	##
+	## Purpose: Find every hit in the string fields of a record produced by a module.
+	##
+	## Parameters
+	## 1. record - The dictionary to search.
+	##
+	## Returns
+	## A list of (field, offset, keyword) tuples.
+	def searchRecord(self, record):
+		hits = []
+
+		for field, value in record.iteritems():
+			if (isinstance(value, basestring)):
+				for offset, keyword in self.searchText(value):
+					hits.append((field, offset, keyword))
+
+		return hits
+
+## Classless Method Declarations
+
+## Method Name: loadKeywords
+##
+## Purpose: Read a keyword list file with one keyword per line. Blank lines and lines starting with # are skipped.
+##
+## Parameters
+## 1. path - The path to the keyword list.
+##
+## Returns
+## The list of keywords.
+def loadKeywords(path):
+	keywords     = []
+	keyword_file = open(path, 'rb')
+
+	try:
+		for line in keyword_file:
+			line = line.rstrip("\r\n")
+
+			if (line != "" and line.startswith("#") == 0):
+				keywords.append(line)
+
+	finally:
+		keyword_file.close()
+
+	return keywords
@@ -0,0 +1,255 @@
+## File Name: bitCollector_state.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the file-state cache the framework offers to the BitCollector modules.
+##          The size, modification time, inode and digests of every processed file are kept per host
+##          in a SQLite database next to the logs, so that a repeat run can skip the files which did
+##          not change since the previous run and only collect the deltas.
+##
+## Usage: Modules reach the cache through framework_settings.state_cache, which is None unless the
+##        "state_cache" setting is present in the configuration file.
+##        if (state_cache.isUnchanged(path, os.lstat(path)) == 0): ... state_cache.record(path, stat_info)
+
+## Standard imports (Static)
+import json, logging, sqlite3, threading
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_file_name  = "bitCollector_state.sqlite"
+_default_batch_size = 1000
+_default_timeout    = 30.0
+
+## SQLite supports upserts from 3.24.0 on. Python 2.7 is often linked against an older one.
+_upsert_supported = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+## Class Declarations
+
+## Class Name: FileStateCache
+##
+## Purpose: Remember what every file of a host looked like when it was last processed.
+class FileStateCache():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the cache. The database is opened on first use.
+	##
+	## Parameters
+	## 1. db_path    - The path to the SQLite database.
+	## 2. host       - The name of the host the files belong to. (Platform.node)
+	## 3. batch_size - (Optional) The number of recorded files buffered before they are written out together.
+	def __init__(self, db_path, host, batch_size=_default_batch_size):
+		self.db_path    = db_path
+		self.host       = host
+		self.batch_size = batch_size
+
+		self.initializeState()
+
+	## Method Name: initializeState
+	##
+	## Purpose: Initialize the connection, the write buffer and the counters.
+	def initializeState(self):
+		## A single connection is shared by the module threads, so every use of it is locked.
+		self.lock       = threading.RLock()
+		self.connection = None
+		self.pending    = {}
+
+		self.lookups   = 0
+		self.unchanged = 0
+		self.recorded  = 0
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Leave the connection, the lock and the write buffer out when the cache is pickled for a worker process.
+	##          That only happens where worker processes are spawned (Windows). Forked workers inherit the parent's
+	##          state as it is, and runModuleProcess calls initializeState to replace it.
+	def __getstate__(self):
+		self.flush()
+
+		return {"db_path": self.db_path, "host": self.host, "batch_size": self.batch_size}
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the cache in a worker process, which opens its own connection on first use.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.initializeState()
+
+	## Method Name: startProcess
+	##
+	## Purpose: Start a worker process while the cache has no connection open. SQLite connections must not be carried
+	##          across a fork, and SQLite keeps the lock state of every open database file in memory the worker inherits,
+	##          so even a connection the worker opens itself finds the database locked. The parent reconnects on next use.
+	##
+	## Parameters
+	## 1. process - The multiprocessing Process to start.
+	def startProcess(self, process):
+		with self.lock:
+			self.flush()
+
+			if (self.connection != None):
+				self.connection.close()
+				self.connection = None
+
+			process.start()
+
+	## Method Name: connect
+	##
+	## Purpose: Open the database and create the table the first time the cache is used.
+	def connect(self):
+		if (self.connection == None):
+			self.connection = sqlite3.connect(self.db_path, timeout=_default_timeout, check_same_thread=False)
+
+			## WAL lets the worker processes of a run read while another one writes.
+			self.connection.execute("PRAGMA journal_mode=WAL")
+			self.connection.execute("PRAGMA synchronous=NORMAL")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS file_state (host TEXT NOT NULL, path TEXT NOT NULL, size INTEGER, mtime REAL, inode INTEGER, digests TEXT, PRIMARY KEY (host, path))")
+			self.connection.commit()
+
+		return self.connection
+
+	## Method Name: getState
+	##
+	## Purpose: Look up what a file looked like when it was last recorded.
+	##
+	## Parameters
+	## 1. path - The path to the file.
+	##
+	## Returns
+	## A (size, mtime, inode, digests) tuple, or None if the file was never recorded for this host.
+	def getState(self, path):
+		with self.lock:
+			self.lookups += 1
+
+			if (path in self.pending):
+				return self.pending[path]
+
+			row = self.connect().execute("SELECT size, mtime, inode, digests FROM file_state WHERE host = ? AND path = ?", (self.host, path)).fetchone()
+
+		if (row == None):
+			return None
+
+		digests = None
+		if (row[3] != None):
+			digests = json.loads(row[3])
+
+		return row[0], row[1], row[2], digests
+
+	## Method Name: isUnchanged
+	##
+	## Purpose: Check whether a file still has the size, modification time and inode it had when it was recorded.
+	##
+	## Parameters
+	## 1. path      - The path to the file.
+	## 2. stat_info - The current stat result of the file.
+	def isUnchanged(self, path, stat_info):
+		state = self.getState(path)
+
+		if (state == None or state[0] != stat_info.st_size or state[1] != stat_info.st_mtime or state[2] != stat_info.st_ino):
+			return 0
+
+		with self.lock:
+			self.unchanged += 1
+
+		return 1
+
+	## Method Name: getDigests
+	##
+	## Purpose: Return the recorded digests of a file if it is unchanged and every requested digest is known.
+	##
+	## Parameters
+	## 1. path       - The path to the file.
+	## 2. stat_info  - The current stat result of the file.
+	## 3. algorithms - The list of hashlib algorithm names required.
+	##
+	## Returns
+	## A dictionary mapping each algorithm name to the hexadecimal digest, or None if the file has to be hashed again.
+	def getDigests(self, path, stat_info, algorithms):
+		state = self.getState(path)
+
+		if (state == None or state[3] == None or state[0] != stat_info.st_size or state[1] != stat_info.st_mtime or state[2] != stat_info.st_ino):
+			return None
+
+		digests = {}
+		for algorithm in algorithms:
+			if (algorithm not in state[3]):
+				return None
+
+			digests[algorithm] = str(state[3][algorithm])
+
+		with self.lock:
+			self.unchanged += 1
+
+		return digests
+
+	## Method Name: record
+	##
+	## Purpose: Record a file once it has been processed. Records are buffered and written out in batches.
+	##          Recording a file without digests keeps the digests stored for it, as long as it is unchanged.
+	##
+	## Parameters
+	## 1. path      - The path to the file.
+	## 2. stat_info - The stat result of the file taken before it was processed.
+	## 3. digests   - (Optional) The dictionary of digests of the file.
+	def record(self, path, stat_info, digests=None):
+		with self.lock:
+			self.recorded += 1
+			state          = (stat_info.st_size, stat_info.st_mtime, stat_info.st_ino)
+
+			if (digests == None and path in self.pending and self.pending[path][:3] == state):
+				digests = self.pending[path][3]
+
+			self.pending[path] = state + (digests,)
+
+			if (len(self.pending) >= self.batch_size):
+				self.flush()
+
+	## Method Name: flush
+	##
+	## Purpose: Write the buffered records to the database in a single transaction.
+	def flush(self):
+		with self.lock:
+			if (len(self.pending) == 0):
+				return
+
+			rows = []
+			for path, state in self.pending.iteritems():
+				digests = None
+				if (state[3] != None):
+					digests = json.dumps(state[3], sort_keys=True)
+
+				rows.append((self.host, path, state[0], state[1], state[2], digests))
+
+			connection = self.connect()
+
+			if (_upsert_supported):
+				connection.executemany("INSERT INTO file_state (host, path, size, mtime, inode, digests) VALUES (?, ?, ?, ?, ?, ?) "
+				                       "ON CONFLICT (host, path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, inode = excluded.inode, "
+				                       "digests = COALESCE(excluded.digests, CASE WHEN size = excluded.size AND mtime = excluded.mtime AND inode = excluded.inode THEN digests END)", rows)
+
+			else:
+				## Carry the stored digests of unchanged files over by hand.
+				for index in range(len(rows)):
+					if (rows[index][5] == None):
+						stored = connection.execute("SELECT digests FROM file_state WHERE host = ? AND path = ? AND size = ? AND mtime = ? AND inode = ?", rows[index][:5]).fetchone()
+
+						if (stored != None):
+							rows[index] = rows[index][:5] + stored
+
+				connection.executemany("INSERT OR REPLACE INTO file_state (host, path, size, mtime, inode, digests) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+			connection.commit()
+
+			self.pending = {}
+
+	## Method Name: close
+	##
+	## Purpose: Write out the buffered records, log what the cache saved and close the database.
+	def close(self):
+		with self.lock:
+			self.flush()
+
+			if (self.lookups > 0 or self.recorded > 0):
+				logging.getLogger(self.__class__.__name__).info("State cache: %d lookups, %d unchanged files skipped, %d files recorded" % (self.lookups, self.unchanged, self.recorded))
+
+			if (self.connection != None):
+				self.connection.close()
+				self.connection = None
@@ -0,0 +1,365 @@
+## File Name: bitCollector_walker.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script holds the filesystem walker the framework offers to the BitCollector modules.
+##          Subtrees are listed in parallel with scandir, include/exclude globs and size/mtime
+##          predicates are applied during the walk and every file is stat'ed at most once.
+##
+## Usage: Modules reach the walker through framework_settings.file_walker.
+##        for entry in framework_settings.file_walker.walk([home_dir], include=["*.db"]): ...
+##        With changed_only=1 and the state cache enabled, only files changed since the previous run are streamed.
+
+## Standard imports (Static)
+import fnmatch, logging, os, Queue, stat, threading, time
+
+## Third-party imports (Optional)
+## os.scandir only exists from Python 3.5. The scandir package backports it, otherwise fall back to listdir and lstat.
+try:
+	from os import scandir
+
+except ImportError:
+	try:
+		from scandir import scandir
+
+	except ImportError:
+		scandir = None
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_default_worker_count      = 4
+_default_progress_interval = 10000
+
+## Class Declarations
+
+## Class Name: WalkEntry
+##
+## Purpose: Describe one file found by the walker.
+class WalkEntry(object):
+	__slots__ = ("path", "size", "mtime", "inode")
+
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the entry from the file's single stat result.
+	##
+	## Parameters
+	## 1. path      - The path to the file.
+	## 2. stat_info - The lstat result of the file.
+	def __init__(self, path, stat_info):
+		self.path  = path
+		self.size  = stat_info.st_size
+		self.mtime = stat_info.st_mtime
+		self.inode = stat_info.st_ino
+
+## Class Name: WalkProgress
+##
+## Purpose: Count what the walker has seen so far.
+class WalkProgress():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the counters.
+	def __init__(self):
+		self.directories = 0
+		self.files       = 0
+		self.matched     = 0
+		self.errors      = 0
+		self.start_time  = time.time()
+		self.lock        = threading.Lock()
+
+	## Method Name: add
+	##
+	## Purpose: Add the counts of one listed directory. The workers call this at the same time, so it is locked.
+	##
+	## Parameters
+	## 1. files   - The number of files in the directory.
+	## 2. matched - The number of files which passed every filter.
+	## 3. errors  - The number of entries which could not be read.
+	def add(self, files, matched, errors):
+		with self.lock:
+			self.directories += 1
+			self.files       += files
+			self.matched     += matched
+			self.errors      += errors
+
+	## Method Name: describe
+	##
+	## Purpose: Summarize the counters for the log.
+	def describe(self):
+		return "%d directories, %d files, %d matched, %d errors in %.2fs" % (self.directories, self.files, self.matched, self.errors, time.time() - self.start_time)
+
+## Class Name: FileWalker
+##
+## Purpose: Walk directory trees in parallel and stream the files matching the given filters.
+class FileWalker():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the walker.
+	##
+	## Parameters
+	## 1. worker_count      - (Optional) The number of threads listing directories at the same time.
+	## 2. progress_interval - (Optional) The number of files between progress reports.
+	## 3. state_cache       - (Optional) The FileStateCache used to leave out the files unchanged since the previous run.
+	def __init__(self, worker_count=_default_worker_count, progress_interval=_default_progress_interval, state_cache=None):
+		self.worker_count      = worker_count
+		self.progress_interval = progress_interval
+		self.state_cache       = state_cache
+
+	## Method Name: walk
+	##
+	## Purpose: Walk the given roots and stream the files which pass every filter.
+	##
+	## Parameters
+	## 1. roots             - The list of directories to walk.
+	## 2. include           - (Optional) Glob patterns a file must match. Patterns containing a path separator are matched against the full path, others against the name.
+	## 3. exclude           - (Optional) Glob patterns of files and directories to skip. Excluded directories are not descended into.
+	## 4. min_size          - (Optional) The minimum file size in bytes.
+	## 5. max_size          - (Optional) The maximum file size in bytes.
+	## 6. newer_than        - (Optional) Only files modified after this UNIX time.
+	## 7. older_than        - (Optional) Only files modified before this UNIX time.
+	## 8. stop_token        - (Optional) The module's stop token. The walk ends early once a stop is requested.
+	## 9. progress_callback - (Optional) Called with a WalkProgress every progress_interval files. Progress is logged otherwise.
+	## 10. changed_only     - (Optional) Leave out the files the state cache reports as unchanged. The caller records the files it processed.
+	##
+	## Returns
+	## A generator of WalkEntry objects, in no particular order.
+	def walk(self, roots, include=None, exclude=None, min_size=None, max_size=None, newer_than=None, older_than=None, stop_token=None, progress_callback=None, changed_only=0):
+		logger = logging.getLogger(self.__class__.__name__)
+
+		walk_filter = {"include": include or [], "exclude": exclude or [], "min_size": min_size, "max_size": max_size, "newer_than": newer_than, "older_than": older_than, "changed_only": changed_only and self.state_cache != None}
+		progress    = WalkProgress()
+
+		## Directories still to be listed. The count includes directories being listed right now.
+		directory_queue = Queue.Queue()
+		pending         = [0]
+		pending_lock    = threading.Lock()
+
+		## Bound the output so that a slow consumer holds the workers back instead of filling memory.
+		entry_queue = Queue.Queue(self.worker_count * 1024)
+		stop_entry  = object()
+		abandoned   = threading.Event()
+
+		for root in roots:
+			if (os.path.isdir(root)):
+				pending[0] += 1
+				directory_queue.put(root)
+
+			else:
+				logger.warning("Unable to walk: " + root + ". Not a directory.")
+
+		if (pending[0] == 0):
+			return
+
+		for count in range(self.worker_count):
+			worker = threading.Thread(target=self.walkWorker, args=(directory_queue, entry_queue, stop_entry, pending, pending_lock, walk_filter, progress, stop_token, abandoned), name="FileWalker-" + str(count))
+			worker.daemon = True
+			worker.start()
+
+		finished_workers = 0
+		next_report      = self.progress_interval
+
+		try:
+			while (finished_workers < self.worker_count):
+				entry = entry_queue.get()
+
+				if (entry is stop_entry):
+					finished_workers += 1
+					continue
+
+				if (progress.files >= next_report):
+					next_report = progress.files + self.progress_interval
+
+					if (progress_callback != None):
+						progress_callback(progress)
+
+					else:
+						logger.info("Walk progress: " + progress.describe())
+
+				yield entry
+
+		finally:
+			## Drain the entries still in flight so that no worker stays blocked on the output queue.
+			abandoned.set()
+
+			while (finished_workers < self.worker_count):
+				if (entry_queue.get() is stop_entry):
+					finished_workers += 1
+
+			logger.info("Walk finished: " + progress.describe())
+
+	## Method Name: walkWorker
+	##
+	## Purpose: List directories from the queue until every directory has been listed.
+	##
+	## Parameters
+	## 1. directory_queue - The queue of directories to list.
+	## 2. entry_queue     - The queue to put matching WalkEntry objects on.
+	## 3. stop_entry      - The sentinel put on the entry queue when the worker exits.
+	## 4. pending         - A one-element list holding the number of directories queued or being listed.
+	## 5. pending_lock    - The lock protecting pending.
+	## 6. walk_filter     - The dictionary of filters passed to walk.
+	## 7. progress        - The WalkProgress to update.
+	## 8. stop_token      - The module's stop token or None.
+	## 9. abandoned       - The event set when the caller stopped reading the entries.
+	def walkWorker(self, directory_queue, entry_queue, stop_entry, pending, pending_lock, walk_filter, progress, stop_token, abandoned):
+		while (1):
+			directory = directory_queue.get()
+
+			## The last directory was listed. Wake up the other workers and exit.
+			if (directory == None):
+				directory_queue.put(None)
+				entry_queue.put(stop_entry)
+				break
+
+			subdirectories = []
+
+			if (abandoned.is_set() == 0 and (stop_token == None or stop_token.isStopRequested() == 0)):
+				subdirectories = self.listDirectory(directory, entry_queue, walk_filter, progress)
+
+			with pending_lock:
+				pending[0] += len(subdirectories) - 1
+				finished    = (pending[0] == 0)
+
+			for subdirectory in subdirectories:
+				directory_queue.put(subdirectory)
+
+			if (finished):
+				directory_queue.put(None)
+
+	## Method Name: listDirectory
+	##
+	## Purpose: List one directory, queue the matching files and return the subdirectories to descend into.
+	##
+	## Parameters
+	## 1. directory   - The directory to list.
+	## 2. entry_queue - The queue to put matching WalkEntry objects on.
+	## 3. walk_filter - The dictionary of filters passed to walk.
+	## 4. progress    - The WalkProgress to update.
+	##
+	## Returns
+	## The list of subdirectories which are not excluded.
+	def listDirectory(self, directory, entry_queue, walk_filter, progress):
+		subdirectories = []
+		files          = 0
+		matched        = 0
+		errors         = 0
+
+		try:
+			## scandir knows from the directory listing whether an entry is a directory, so only files are stat'ed.
+			if (scandir != None):
+				names = []
+
+				for directory_entry in scandir(directory):
+					if (directory_entry.is_dir(follow_symlinks=False)):
+						if (self.isExcluded(directory_entry.path, directory_entry.name, walk_filter) == 0):
+							subdirectories.append(directory_entry.path)
+
+					elif (directory_entry.is_file(follow_symlinks=False)):
+						names.append((directory_entry.path, directory_entry.name, directory_entry))
+
+			else:
+				names = [(os.path.join(directory, name), name, None) for name in os.listdir(directory)]
+
+		except OSError, error:
+			progress.add(0, 0, 1)
+			logging.getLogger(self.__class__.__name__).debug("Unable to list directory: " + directory + ". " + str(error))
+
+			return subdirectories
+
+		for path, name, directory_entry in names:
+			## Apply the exclude patterns before paying for a stat.
+			if (self.isExcluded(path, name, walk_filter) == 1):
+				continue
+
+			## Without scandir the type of the entry is only known once it has been stat'ed.
+			if (directory_entry == None):
+				try:
+					stat_info = os.lstat(path)
+
+				except OSError:
+					errors += 1
+					continue
+
+				if (stat.S_ISDIR(stat_info.st_mode)):
+					subdirectories.append(path)
+					continue
+
+				elif (stat.S_ISREG(stat_info.st_mode) == 0):
+					continue
+
+			files += 1
+
+			if (len(walk_filter["include"]) > 0 and self.matchesAny(path, name, walk_filter["include"]) == 0):
+				continue
+
+			if (directory_entry != None):
+				try:
+					stat_info = directory_entry.stat(follow_symlinks=False)
+
+				except OSError:
+					errors += 1
+					continue
+
+			if (self.passesPredicates(stat_info, walk_filter) == 1):
+				if (walk_filter["changed_only"] and self.state_cache.isUnchanged(path, stat_info) == 1):
+					continue
+
+				matched += 1
+				entry_queue.put(WalkEntry(path, stat_info))
+
+		progress.add(files, matched, errors)
+
+		return subdirectories
+
+	## Method Name: isExcluded
+	##
+	## Purpose: Check a file or directory against the exclude patterns.
+	##
+	## Parameters
+	## 1. path        - The path to the file or directory.
+	## 2. name        - The name of the file or directory.
+	## 3. walk_filter - The dictionary of filters passed to walk.
+	def isExcluded(self, path, name, walk_filter):
+		if (len(walk_filter["exclude"]) > 0 and self.matchesAny(path, name, walk_filter["exclude"]) == 1):
+			return 1
+
+		return 0
+
+	## Method Name: matchesAny
+	##
+	## Purpose: Check whether a path matches any of the glob patterns.
+	##
+	## Parameters
+	## 1. path     - The path to the file or directory.
+	## 2. name     - The name of the file or directory.
+	## 3. patterns - The list of glob patterns.
+	def matchesAny(self, path, name, patterns):
+		for pattern in patterns:
+			if ("/" in pattern or os.sep in pattern):
+				if (fnmatch.fnmatch(path, pattern)):
+					return 1
+
+			elif (fnmatch.fnmatch(name, pattern)):
+				return 1
+
+		return 0
+
+	## Method Name: passesPredicates
+	##
+	## Purpose: Check a file's size and modification time against the predicates.
+	##
+	## Parameters
+	## 1. stat_info   - The lstat result of the file.
+	## 2. walk_filter - The dictionary of filters passed to walk.
+	def passesPredicates(self, stat_info, walk_filter):
+		if (walk_filter["min_size"] != None and stat_info.st_size < walk_filter["min_size"]):
+			return 0
+
+		if (walk_filter["max_size"] != None and stat_info.st_size > walk_filter["max_size"]):
+			return 0
+
+		if (walk_filter["newer_than"] != None and stat_info.st_mtime <= walk_filter["newer_than"]):
+			return 0
+
+		if (walk_filter["older_than"] != None and stat_info.st_mtime >= walk_filter["older_than"]):
+			return 0
+
+		return 1
@@ -0,0 +1,71 @@
+## File Name: __init__.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This package holds the unit tests of the BitCollector framework.
+##
+## Usage: cd src/2.7/Framework && python -m unittest discover tests
+
+## Standard imports (Static)
+import json, logging, os, subprocess, sys
+
+## The framework scripts import each other as top-level modules.
+framework_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if (framework_dir not in sys.path):
+	sys.path.insert(0, framework_dir)
+
+## Class Name: RecordingHandler
+##
+## Purpose: A logging handler which keeps the records it is given, for checking what was logged.
+class RecordingHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler with an empty list of records.
+	def __init__(self):
+		logging.Handler.__init__(self)
+
+		self.records = []
+
+	## Method Name: emit
+	##
+	## Purpose: Keep the record.
+	##
+	## Parameters
+	## 1. record - The LogRecord to keep.
+	def emit(self, record):
+		self.records.append(record)
+
+## Method Name: runFramework
+##
+## Purpose: Run the framework as a separate process, the way it is run from the command line.
+##
+## Parameters
+## 1. temp_dir - The directory to write the modules, the configuration file and the logs to.
+## 2. modules  - A dictionary mapping module names to their source code.
+## 3. settings - The dictionary of configuration settings. The module path and the logging settings are filled in.
+## 4. options  - (Optional) The list of command-line options to pass before the configuration file.
+##
+## Returns
+## The path to the log directory.
+def runFramework(temp_dir, modules, settings, options=()):
+	module_dir = os.path.join(temp_dir, "modules")
+	log_dir    = os.path.join(temp_dir, "logs")
+
+	os.mkdir(module_dir)
+	os.mkdir(log_dir)
+
+	for name, source in modules.items():
+		with open(os.path.join(module_dir, name + ".py"), "w") as module_fd:
+			module_fd.write(source)
+
+	config = {"additional_paths": [{"path": module_dir}], "log_file": os.path.join(log_dir, "run"), "logging_format": "csv", "logging_level": "info", "log_to_file": 1, "log_to_stdout": 0}
+	config.update(settings)
+
+	config_path = os.path.join(temp_dir, "config.json")
+	with open(config_path, "w") as config_fd:
+		json.dump(config, config_fd)
+
+	subprocess.check_call([sys.executable, os.path.join(framework_dir, "bitCollector_framework.py")] + list(options) + [config_path])
+
+	return log_dir
@@ -0,0 +1,90 @@
+## File Name: test_accounting.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests measuring the resources of a module and writing the run report.
+
+## Standard imports (Static)
+import json, logging, os, pickle, shutil, tempfile, threading, unittest
+
+## Framework imports
+import tests
+import bitCollector_accounting
+
+class ModuleAccountTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def writeBytes(self, name, count):
+		file_fd = os.open(os.path.join(self.temp_dir, name), os.O_WRONLY | os.O_CREAT)
+
+		try:
+			os.write(file_fd, "x" * count)
+
+		finally:
+			os.close(file_fd)
+
+	def test_measures_the_calling_thread(self):
+		account = bitCollector_accounting.ModuleAccount("TestModule")
+		account.start("thread")
+
+		self.writeBytes("module", 1000)
+
+		## Another module writing at the same time is not counted, where the OS keeps per-thread counters.
+		other_module = threading.Thread(target=self.writeBytes, args=("other", 1000000))
+		other_module.start()
+		other_module.join()
+
+		account.addFiles()
+		account.addFiles(2)
+		usage = account.stop()
+
+		self.assertEqual((usage["file_count"], usage["cpu_scope"]), (3, account.scope))
+		self.assertTrue(usage["wall_seconds"] >= 0 and usage["cpu_seconds"] >= 0 and usage["peak_rss_delta_bytes"] >= 0)
+
+		if (usage["bytes_written"] != None):
+			self.assertTrue(usage["bytes_written"] >= 1000)
+
+			if (account.scope == "thread"):
+				self.assertTrue(usage["bytes_written"] < 1000000)
+
+	def test_pickles_without_the_lock(self):
+		account = bitCollector_accounting.ModuleAccount("TestModule")
+		account.addFiles(4)
+
+		account = pickle.loads(pickle.dumps(account, pickle.HIGHEST_PROTOCOL))
+		account.addFiles()
+
+		self.assertEqual((account.name, account.file_count), ("TestModule", 5))
+
+	def test_formats_bytes(self):
+		self.assertEqual([bitCollector_accounting.formatBytes(count) for count in (None, 0, 1023, 1536, 5 * 1024 ** 2, 3 * 1024 ** 4)], ["n/a", "0 B", "1023 B", "1.5 KB", "5.0 MB", "3072.0 GB"])
+
+	def test_writes_the_report_next_to_the_log(self):
+		log_file = os.path.join(self.temp_dir, "run_1.csv")
+
+		self.assertEqual(bitCollector_accounting.writeRunReport(log_file, {"modules": []}), os.path.join(self.temp_dir, "run_1_report.json"))
+		self.assertEqual(bitCollector_accounting.writeRunReport(log_file, {"modules": [{"name": "TestModule"}]}), os.path.join(self.temp_dir, "run_1_report.json"))
+
+		with open(os.path.join(self.temp_dir, "run_1_report.json"), "r") as report_fd:
+			self.assertEqual(json.load(report_fd), {"modules": [{"name": "TestModule"}]})
+
+		self.assertEqual(os.listdir(self.temp_dir), ["run_1_report.json"])
+
+	def test_warns_when_the_report_cannot_be_written(self):
+		handler = tests.RecordingHandler()
+		logging.getLogger("ModuleAccount").addHandler(handler)
+
+		try:
+			self.assertEqual(bitCollector_accounting.writeRunReport(os.path.join(self.temp_dir, "missing", "run_1.csv"), {}), None)
+
+		finally:
+			logging.getLogger("ModuleAccount").removeHandler(handler)
+
+		self.assertEqual([record.levelname for record in handler.records], ["WARNING"])
+
+if (__name__ == "__main__"):
+	unittest.main()
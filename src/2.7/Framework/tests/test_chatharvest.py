@@ -0,0 +1,251 @@
+## File Name: test_chatharvest.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the chat history parsers of the ChatHarvest module on small fixtures, and how it finds
+##          the profiles of every user.
+
+## Standard imports (Static)
+import glob, json, logging, os, Queue, shutil, sqlite3, sys, tempfile, threading, time, unittest
+
+## Framework imports
+import tests
+import bitCollector_accounting, bitCollector_framework, bitCollector_governor, bitCollector_parameters, bitCollector_pipeline, bitCollector_search, bitCollector_walker
+
+## The modules are imported by name, the way the framework imports them.
+modules_dir = os.path.join(os.path.dirname(tests.framework_dir), "Modules")
+
+if (modules_dir not in sys.path):
+	sys.path.insert(0, modules_dir)
+
+import ChatHarvest
+
+_msn_history = """<?xml version="1.0"?>
+<Log FirstSessionID="1" LastSessionID="2">
+<Message DateTime="2009-01-01T10:00:00.000Z" SessionID="1"><From><User FriendlyName="Alice"/></From><To><User FriendlyName="Bob"/></To><Text Style="font-family:Segoe UI;">Hello Bob</Text></Message>
+<Invitation DateTime="2009-01-01T10:01:00.000Z" SessionID="1"><From><User FriendlyName="Bob"/></From><File>notes.txt</File><Text>Bob sends notes.txt</Text></Invitation>
+<Message DateTime="2009-01-02T09:00:00.000Z" SessionID="2"><From><User FriendlyName="Bob"/></From><To><User FriendlyName="Alice"/><User FriendlyName="Carol"/></To><Text>Hi both</Text></Message>
+</Log>
+"""
+
+_aim_log = """Session Start (Alice:Bob): Thu Jan 01 10:00:00 2009
+[10:00] Alice: Hello Bob
+how are you?
+(10:01) Bob: Fine
+Session Close (Alice:Bob): Thu Jan 01 10:05:00 2009
+
+Session Start (Alice:Carol): Thu Jan 01 11:00:00 2009
+[11:00] Carol: Hi
+"""
+
+## Class Name: HarvestSettings
+##
+## Purpose: Stand in for the FrameworkSettings, offering the services ChatHarvest reads the histories with.
+class HarvestSettings():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the services.
+	##
+	## Parameters
+	## 1. governor - (Optional) The ResourceGovernor to read the histories under.
+	def __init__(self, governor=None):
+		self.governor    = governor
+		self.file_walker = bitCollector_walker.FileWalker()
+
+	## Method Name: openFile
+	##
+	## Purpose: Open a history under the governor, as FrameworkSettings.openFile does.
+	def openFile(self, path, encoding=None, errors=None):
+		return bitCollector_governor.openFile(path, self.governor, encoding, errors)
+
+class ChatHarvestTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+		self.msn_path   = self.writeFixture("history.xml", _msn_history)
+		self.aim_path   = self.writeFixture("Bob.txt", _aim_log)
+		self.skype_path = os.path.join(self.temp_dir, "main.db")
+
+		connection = sqlite3.connect(self.skype_path)
+		connection.execute("CREATE TABLE Conversations (id INTEGER PRIMARY KEY, displayname TEXT)")
+		connection.execute("CREATE TABLE Messages (id INTEGER PRIMARY KEY, convo_id INTEGER, timestamp INTEGER, author TEXT, from_dispname TEXT, dialog_partner TEXT, body_xml TEXT)")
+		connection.execute("INSERT INTO Conversations VALUES (1, 'Alice and Bob')")
+		connection.executemany("INSERT INTO Messages VALUES (?, ?, ?, ?, ?, ?, ?)", [(1, 1, 1230804000, "alice", "Alice", "bob", "Hello Bob"), (2, 1, 1230804060, "bob", None, "alice", "Fine"), (3, 2, None, "carol", "Carol", None, "Hi")])
+		connection.commit()
+		connection.close()
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def writeFixture(self, name, content):
+		path = os.path.join(self.temp_dir, name)
+
+		with open(path, "w") as fixture_fd:
+			fixture_fd.write(content)
+
+		return path
+
+	def test_parses_msn_histories(self):
+		self.assertEqual(list(ChatHarvest.parseMsnHistory(self.msn_path, bitCollector_governor.openFile)), [
+			ChatHarvest.makeRecord("msn", self.msn_path, "2009-01-01T10:00:00.000Z", "Alice", "Bob", "1", "Hello Bob"),
+			ChatHarvest.makeRecord("msn", self.msn_path, "2009-01-01T10:01:00.000Z", "Bob", "", "1", "Bob sends notes.txt"),
+			ChatHarvest.makeRecord("msn", self.msn_path, "2009-01-02T09:00:00.000Z", "Bob", "Alice, Carol", "2", "Hi both")])
+
+	def test_parses_aim_logs(self):
+		self.assertEqual(list(ChatHarvest.parseAimLog(self.aim_path, bitCollector_governor.openFile)), [
+			ChatHarvest.makeRecord("aim", self.aim_path, "10:00", "Alice", None, "Alice:Bob", "Hello Bob\nhow are you?"),
+			ChatHarvest.makeRecord("aim", self.aim_path, "10:01", "Bob", None, "Alice:Bob", "Fine"),
+			ChatHarvest.makeRecord("aim", self.aim_path, "11:00", "Carol", None, "Alice:Carol", "Hi")])
+
+	def test_parses_skype_databases_in_batches(self):
+		governor = bitCollector_governor.ResourceGovernor(read_rate=1000000, max_readers=1)
+
+		self.assertEqual(list(ChatHarvest.parseSkypeDatabase(self.skype_path, 2, HarvestSettings(governor).openFile)), [
+			ChatHarvest.makeRecord("skype", self.skype_path, "2009-01-01T10:00:00Z", "Alice", "bob", "Alice and Bob", "Hello Bob"),
+			ChatHarvest.makeRecord("skype", self.skype_path, "2009-01-01T10:01:00Z", "bob", "alice", "Alice and Bob", "Fine"),
+			ChatHarvest.makeRecord("skype", self.skype_path, None, "Carol", None, None, "Hi")])
+
+		## The copy gives its reader slot back.
+		self.assertTrue(governor.reader_slots.acquire(False))
+
+	def test_reads_a_copy_of_a_database_skype_has_open(self):
+		## Skype keeps its recent messages in the write-ahead log.
+		skype = sqlite3.connect(self.skype_path)
+		skype.execute("PRAGMA journal_mode=WAL")
+		skype.execute("PRAGMA wal_autocheckpoint=0")
+		skype.execute("INSERT INTO Messages VALUES (4, 1, 1230804120, 'alice', 'Alice', 'bob', 'Bye')")
+		skype.commit()
+
+		temp_dir         = tempfile.tempdir
+		tempfile.tempdir = self.temp_dir
+
+		try:
+			self.assertEqual([record["text"] for record in ChatHarvest.parseSkypeDatabase(self.skype_path, 2, bitCollector_governor.openFile)], ["Hello Bob", "Fine", "Hi", "Bye"])
+
+			## Skype holding the database locked does not block the copy, which leaves out the write Skype has not committed.
+			skype.execute("PRAGMA journal_mode=DELETE")
+			skype.execute("BEGIN EXCLUSIVE")
+			skype.execute("INSERT INTO Messages VALUES (5, 1, 1230804180, 'bob', 'Bob', 'alice', 'Unsent')")
+
+			self.assertEqual([record["text"] for record in ChatHarvest.parseSkypeDatabase(self.skype_path, 2, bitCollector_governor.openFile)], ["Hello Bob", "Fine", "Hi", "Bye"])
+
+		finally:
+			tempfile.tempdir = temp_dir
+			skype.close()
+
+		## The copies are removed once read.
+		self.assertEqual(glob.glob(os.path.join(self.temp_dir, "ChatHarvest_*")), [])
+
+	def test_reads_the_histories_under_the_governor(self):
+		governor   = bitCollector_governor.ResourceGovernor(read_rate=1000, burst=100)
+		start_time = time.time()
+
+		self.assertEqual(len(list(ChatHarvest.parseHistory("msn", self.msn_path, HarvestSettings(governor), None))), 3)
+		self.assertTrue(time.time() - start_time >= (len(_msn_history) - 100) / 1000.0 - 0.05)
+
+	def test_keeps_the_messages_before_a_malformed_history_ends(self):
+		path            = self.writeFixture("truncated.xml", _msn_history[:_msn_history.index("<Invitation")])
+		module_settings = bitCollector_parameters.parseParameters("ChatHarvest", ChatHarvest._module_parameters, [])
+		output_path     = os.path.join(self.temp_dir, "records.jsonl")
+		logger          = logging.getLogger("ChatHarvestTest")
+		handler         = tests.RecordingHandler()
+		record_writer   = ChatHarvest.RecordWriter(logger, output_path, None, None)
+
+		logger.addHandler(handler)
+		logger.propagate = 0
+
+		try:
+			record_count = ChatHarvest.harvestHistory(logger, ("alice", "msn", self.temp_dir), path, HarvestSettings(), module_settings, record_writer, bitCollector_framework.StopToken(threading.Event()))
+
+		finally:
+			logger.removeHandler(handler)
+
+		record_writer.close()
+
+		self.assertEqual(record_count, 1)
+		self.assertEqual([record.levelname for record in handler.records], ["WARNING"])
+
+		with open(output_path, "r") as output_fd:
+			self.assertEqual(len(output_fd.readlines()), 1)
+
+class ProfileDiscoveryTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir       = tempfile.mkdtemp()
+		self.home_locations = ChatHarvest._home_locations
+		self.logger         = logging.getLogger("ChatHarvestTest")
+		self.handler        = tests.RecordingHandler()
+
+		self.logger.addHandler(self.handler)
+		self.logger.propagate = 0
+
+		ChatHarvest._home_locations = {"nix": [os.path.join(self.temp_dir, "home", "*")]}
+
+		for user in ("alice", "bob", "Public"):
+			os.makedirs(os.path.join(self.temp_dir, "home", user))
+
+		open(os.path.join(self.temp_dir, "home", "notes.txt"), "w").close()
+
+		self.alice = os.path.join(self.temp_dir, "home", "alice")
+
+		for directory in (os.path.join(".Skype", "alice.skype"), os.path.join(".Skype", "shared"), os.path.join("Documents", "AIM Logs", "alicebob"), os.path.join("Documents", "My Received Files", "alice@example.com", "History")):
+			os.makedirs(os.path.join(self.alice, directory))
+
+		open(os.path.join(self.alice, ".Skype", "alice.skype", "main.db"), "w").close()
+
+		with open(os.path.join(self.alice, "Documents", "AIM Logs", "alicebob", "Bob.txt"), "w") as aim_fd:
+			aim_fd.write(_aim_log)
+
+		with open(os.path.join(self.alice, "Documents", "My Received Files", "alice@example.com", "History", "Bob.xml"), "w") as msn_fd:
+			msn_fd.write(_msn_history)
+
+	def tearDown(self):
+		ChatHarvest._home_locations = self.home_locations
+		self.logger.removeHandler(self.handler)
+		shutil.rmtree(self.temp_dir)
+
+	def test_finds_the_homes_of_every_user(self):
+		self.assertEqual(ChatHarvest.discoverUserHomes(self.logger, "nix"), [("alice", self.alice), ("bob", os.path.join(self.temp_dir, "home", "bob"))])
+		self.assertEqual(self.handler.records, [])
+
+	def test_falls_back_to_the_current_home(self):
+		home_dir = os.path.expanduser("~")
+
+		self.assertEqual(ChatHarvest.discoverUserHomes(self.logger, "unknown"), [(os.path.basename(home_dir), home_dir)])
+		self.assertEqual([record.levelname for record in self.handler.records], ["WARNING"])
+
+	def test_finds_one_profile_per_account(self):
+		user_homes = ChatHarvest.discoverUserHomes(self.logger, "nix")
+
+		self.assertEqual(ChatHarvest.discoverProfiles(user_homes, ["skype", "aim", "msn"]), [
+			("alice", "skype", os.path.join(self.alice, ".Skype", "alice.skype")),
+			("alice", "aim", os.path.join(self.alice, "Documents", "AIM Logs", "alicebob")),
+			("alice", "msn", os.path.join(self.alice, "Documents", "My Received Files", "alice@example.com"))])
+
+		self.assertEqual(ChatHarvest.discoverProfiles(user_homes, ["aim"]), [("alice", "aim", os.path.join(self.alice, "Documents", "AIM Logs", "alicebob"))])
+
+	def test_tags_the_records_with_their_user_profile_and_keyword_hits(self):
+		module_settings = bitCollector_parameters.parseParameters("ChatHarvest", ChatHarvest._module_parameters, [{"clients": ["aim", "msn"]}])
+		output_path     = os.path.join(self.temp_dir, "records.jsonl")
+		pipeline        = bitCollector_pipeline.RecordPipeline("ChatHarvest", output_path, keyword_searcher=bitCollector_search.KeywordSearcher(["How are you"]))
+		record_writer   = ChatHarvest.RecordWriter(self.logger, None, None, pipeline)
+		profile_queue   = Queue.Queue()
+		account         = bitCollector_accounting.ModuleAccount("ChatHarvest")
+
+		for profile in ChatHarvest.discoverProfiles(ChatHarvest.discoverUserHomes(self.logger, "nix"), module_settings.clients):
+			profile_queue.put(profile)
+
+		ChatHarvest.profileWorker(self.logger, profile_queue, HarvestSettings(), module_settings, record_writer, bitCollector_framework.StopToken(threading.Event()), account)
+		record_writer.close()
+		pipeline.close()
+
+		with open(output_path, "r") as output_fd:
+			records = [json.loads(line) for line in output_fd]
+
+		self.assertEqual(record_writer.user_counts, {"alice": 6})
+		self.assertEqual(account.file_count, 2)
+		self.assertEqual(set(record["type"] for record in records), set(["chat_message"]))
+		self.assertEqual(sorted((record["client"], record["user"], record["profile"]) for record in records), [("aim", "alice", "alicebob")] * 3 + [("msn", "alice", "alice@example.com")] * 3)
+		self.assertEqual([record["keyword_hits"] for record in records if "keyword_hits" in record], [[{"field": "text", "offset": 10, "keyword": "How are you"}]])
+
+if (__name__ == "__main__"):
+	unittest.main()
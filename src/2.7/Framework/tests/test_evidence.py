@@ -0,0 +1,253 @@
+## File Name: test_evidence.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests loading the records and log entries of a run into the evidence database.
+
+## Standard imports (Static)
+import json, logging, os, shutil, sqlite3, tempfile, threading, unittest
+
+## Framework imports
+import tests
+import bitCollector_evidence, bitCollector_hashing, bitCollector_logging, bitCollector_pipeline
+
+## A module emitting one record from the thread or process running it.
+_emitting_module = """
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	module_dict["output"].emit({"type": "note", "text": "note of " + module_dict["name"]})
+
+	return 0
+"""
+
+class EvidenceStoreTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir    = tempfile.mkdtemp()
+		self.db_path     = os.path.join(self.temp_dir, "evidence.sqlite")
+		self.record_path = os.path.join(self.temp_dir, "run_1_records.jsonl")
+		self.file_path   = os.path.join(self.temp_dir, "evidence.bin")
+		self.handler     = tests.RecordingHandler()
+
+		with open(self.file_path, "wb") as evidence_fd:
+			evidence_fd.write("evidence" * 1000)
+
+		logging.getLogger("EvidenceStore").addHandler(self.handler)
+
+	def tearDown(self):
+		logging.getLogger("EvidenceStore").removeHandler(self.handler)
+		shutil.rmtree(self.temp_dir)
+
+	def query(self, statement):
+		connection = sqlite3.connect(self.db_path)
+
+		try:
+			return connection.execute(statement).fetchall()
+
+		finally:
+			connection.close()
+
+	def readRecords(self):
+		with open(self.record_path, "r") as record_fd:
+			return [json.loads(line) for line in record_fd]
+
+	def test_loads_the_records_and_log_entries_of_a_run(self):
+		store = bitCollector_evidence.EvidenceStore(self.db_path, batch_size=2, commit_interval=0.1)
+		store.start("host1", os.path.join(self.temp_dir, "run_1.csv"), "test")
+
+		pipeline = bitCollector_pipeline.RecordPipeline("Test1", self.record_path, hash_service=bitCollector_hashing.HashService(algorithms=["md5"], worker_count=1), sink=store.addRecords)
+		pipeline.emit({"type": "file", "path": self.file_path})
+
+		for count in range(4):
+			pipeline.emit({"type": "note", "text": "note %d" % count})
+
+		pipeline.close()
+
+		logging.getLogger("Test1").warning("Loaded into the evidence store")
+		store.close()
+
+		self.assertEqual(self.query("SELECT host, log_file, framework_version, record_count, log_entry_count FROM runs"), [("host1", os.path.join(self.temp_dir, "run_1.csv"), "test", 5, store.counts["log_entries"])])
+		self.assertEqual(store.counts["records"], 5)
+		self.assertEqual(self.query("SELECT COUNT(*) FROM log_entries")[0][0], store.counts["log_entries"])
+
+		rows = self.query("SELECT module, type, record_id, data FROM records ORDER BY id")
+		self.assertEqual([(row[0], row[1]) for row in rows], [("Test1", "file")] + [("Test1", "note")] * 4)
+		self.assertEqual([row[2] for row in rows], [record["record_id"] for record in self.readRecords()])
+		self.assertEqual([json.loads(row[3]) for row in rows], self.readRecords())
+
+		self.assertTrue(("WARNING", "Loaded into the evidence store") in self.query("SELECT level_name, message FROM log_entries"))
+
+		## The log entries stop with the store.
+		self.assertFalse(any(isinstance(handler, bitCollector_evidence.EvidenceHandler) for handler in logging.getLogger("").handlers))
+
+	def test_ends_the_run_on_close(self):
+		store = bitCollector_evidence.EvidenceStore(self.db_path, store_logs=0, commit_interval=0.05)
+		store.start("host1", "run_1.csv", "test")
+		store.addRecords([("Test1", "note", "1", 1.0, "{}")])
+
+		## Loaded rows are readable while the run goes on, but the run has not ended.
+		while (store.counts["records"] == 0):
+			threading.Event().wait(0.05)
+
+		self.assertEqual(self.query("SELECT end_time, record_count FROM runs"), [(None, 0)])
+		self.assertEqual(self.query("SELECT COUNT(*) FROM records"), [(1,)])
+
+		## The web app can use the indexes while the run loads.
+		self.assertEqual(self.query("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'"), [(len(bitCollector_evidence._indexes),)])
+
+		store.close()
+
+		self.assertNotEqual(self.query("SELECT end_time FROM runs")[0][0], None)
+		self.assertEqual(self.query("SELECT COUNT(*) FROM log_entries"), [(0,)])
+
+	def test_loads_the_log_entries_through_the_log_writer_in_queue_mode(self):
+		target        = tests.RecordingHandler()
+		log_writer    = bitCollector_logging.BatchingLogWriter([target])
+		queue_handler = log_writer.getHandler()
+		logger        = logging.getLogger("EvidenceQueueTest")
+
+		logger.addHandler(queue_handler)
+		logger.propagate = 0
+
+		store = bitCollector_evidence.EvidenceStore(self.db_path, capacity=1)
+		store.start("host1", "run_1.csv", "test", log_writer)
+
+		try:
+			for count in range(50):
+				logger.warning("Entry %d", count)
+
+			## The entries still queued for the log writer are loaded before the store lets go of it.
+			store.close()
+
+		finally:
+			logger.removeHandler(queue_handler)
+			log_writer.stop()
+
+		self.assertEqual(self.query("SELECT message FROM log_entries WHERE module = 'test_evidence' ORDER BY id"), [("Entry %d" % count,) for count in range(50)])
+		self.assertEqual(log_writer.targets, [target])
+		self.assertEqual(len(target.records), 50)
+		self.assertFalse(any(isinstance(handler, bitCollector_evidence.EvidenceHandler) for handler in logging.getLogger("").handlers))
+
+	def test_lets_go_of_the_log_writer_while_entries_keep_coming(self):
+		log_writer    = bitCollector_logging.BatchingLogWriter([])
+		queue_handler = log_writer.getHandler()
+		logger        = logging.getLogger("EvidenceQueueTest")
+		stop_event    = threading.Event()
+
+		logger.addHandler(queue_handler)
+		logger.propagate = 0
+
+		store = bitCollector_evidence.EvidenceStore(self.db_path, capacity=1)
+		store.start("host1", "run_1.csv", "test", log_writer)
+
+		def logEntries():
+			while (stop_event.is_set() == 0):
+				logger.warning("Entry")
+
+		chatter = threading.Thread(target=logEntries)
+		chatter.start()
+
+		try:
+			threading.Event().wait(0.2)
+			store.close()
+
+		finally:
+			stop_event.set()
+			chatter.join()
+			logger.removeHandler(queue_handler)
+
+		## The log writer never waits on the queue of the closed store.
+		stopper = threading.Thread(target=log_writer.stop)
+		stopper.daemon = True
+		stopper.start()
+		stopper.join(10)
+
+		self.assertFalse(stopper.is_alive())
+
+	def test_drops_the_log_entries_the_writer_has_no_room_for(self):
+		## Keep the writer from opening the database until the queue is full.
+		locker = sqlite3.connect(self.db_path)
+		locker.execute("BEGIN EXCLUSIVE")
+
+		logger = logging.getLogger("EvidenceDropTest")
+		store  = bitCollector_evidence.EvidenceStore(self.db_path, capacity=2)
+		store.start("host1", "run_1.csv", "test")
+
+		try:
+			for count in range(5):
+				logger.warning("Entry %d", count)
+
+		finally:
+			locker.rollback()
+			locker.close()
+
+		store.close()
+
+		self.assertEqual(store.dropped, 3)
+		self.assertEqual(self.query("SELECT message FROM log_entries WHERE module = 'test_evidence'"), [("Entry 0",), ("Entry 1",)])
+		self.assertEqual([record.getMessage() for record in self.handler.records if record.levelname == "WARNING"], ["Left 3 log entries out of the evidence database because its writer was behind."])
+
+	def test_drains_the_queue_when_the_database_cannot_be_opened(self):
+		self.db_path = os.path.join(self.temp_dir, "missing", "evidence.sqlite")
+
+		store = bitCollector_evidence.EvidenceStore(self.db_path, capacity=1)
+		store.start("host1", "run_1.csv", "test")
+
+		## Nothing blocks on the full queue once the writer has failed.
+		for count in range(10):
+			store.addRecords([("Test1", "note", str(count), 1.0, "{}")])
+
+		store.close()
+
+		self.assertEqual(store.failed, 1)
+		self.assertEqual([record.levelname for record in self.handler.records], ["ERROR"])
+		self.assertFalse(any(isinstance(handler, bitCollector_evidence.EvidenceHandler) for handler in logging.getLogger("").handlers))
+
+	def test_closes_when_the_last_load_fails(self):
+		store = bitCollector_evidence.EvidenceStore(self.db_path, store_logs=0)
+		store.start("host1", "run_1.csv", "test")
+
+		## A row missing a column fails the load started by close.
+		store.addRecords([("Test1", "note", "1", 1.0)])
+		store.close()
+
+		self.assertEqual(store.failed, 1)
+		self.assertEqual(self.query("SELECT end_time, record_count FROM runs"), [(None, 0)])
+		self.assertEqual(self.query("SELECT COUNT(*) FROM records"), [(0,)])
+
+class EvidenceOptionTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def test_loads_the_records_of_thread_and_process_modules(self):
+		module_list = [{"name": "ThreadModule", "parameters": []}, {"name": "ProcessModule", "parameters": [], "execution": "process"}]
+		log_dir     = tests.runFramework(self.temp_dir, {"ThreadModule": _emitting_module, "ProcessModule": _emitting_module}, {"module_list": module_list, "evidence": {"batch_size": 10}})
+
+		connection = sqlite3.connect(os.path.join(log_dir, bitCollector_evidence._default_file_name))
+
+		try:
+			self.assertEqual(sorted(connection.execute("SELECT module, type FROM records").fetchall()), [("ProcessModule", "note"), ("ThreadModule", "note")])
+			self.assertEqual(connection.execute("SELECT record_count, log_entry_count > 0 FROM runs").fetchall(), [(2, 1)])
+
+			## The log entries forwarded from the worker process are loaded too.
+			self.assertTrue(connection.execute("SELECT COUNT(*) FROM log_entries WHERE message LIKE 'Successfully imported BitCollector module: ProcessModule%'").fetchone()[0] > 0)
+
+		finally:
+			connection.close()
+
+	def test_loads_the_whole_log_in_queue_mode(self):
+		module_list = [{"name": "ThreadModule", "parameters": []}]
+		log_dir     = tests.runFramework(self.temp_dir, {"ThreadModule": _emitting_module}, {"module_list": module_list, "logging_mode": "queue", "evidence": {}})
+
+		connection = sqlite3.connect(os.path.join(log_dir, bitCollector_evidence._default_file_name))
+
+		try:
+			## The run summary is logged right before the store is closed.
+			self.assertEqual(connection.execute("SELECT COUNT(*) FROM log_entries WHERE message LIKE 'Run summary: %'").fetchone()[0], 1)
+
+		finally:
+			connection.close()
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,99 @@
+## File Name: test_execution.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests running the modules in worker processes.
+
+## Standard imports (Static)
+import glob, os, re, shutil, tempfile, unittest
+
+## Framework imports
+from tests import runFramework
+
+## A module logging the process it runs in and returning the return code given.
+_worker_module = """
+import logging, os
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	parameters = dict(list(each.items())[0] for each in module_dict["parameters"])
+
+	logging.getLogger(module_dict["name"]).warning("Running in process " + str(os.getpid()))
+
+	return parameters["return_code"]
+"""
+
+## A module logging through freshly looked up loggers until it is asked to stop, so that the logging locks are taken
+## all the time.
+_chatter_module = """
+import logging
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	parameters = dict(list(each.items())[0] for each in module_dict["parameters"])
+	count      = 0
+
+	while (module_dict["stop_token"].isStopRequested() == 0 and count < parameters["count"]):
+		logging.getLogger(module_dict["name"] + "." + str(count % 50)).debug("Chatter " + str(count))
+		count += 1
+
+	return 0
+"""
+
+class ProcessExecutionTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def runModules(self, module_list, **settings):
+		settings["module_list"] = module_list
+		log_dir = runFramework(self.temp_dir, dict((module["name"], _worker_module) for module in module_list), settings)
+
+		with open(glob.glob(os.path.join(log_dir, "*.csv"))[0], "r") as log_fd:
+			return log_fd.read()
+
+	def test_forwards_logs_and_return_code(self):
+		log = self.runModules([{"name": "Worker", "parameters": [{"return_code": 3}], "execution": "process"}])
+
+		started = re.findall(r"Started BitCollector module: Worker.main in worker process (\d+)", log)
+		running = re.findall(r"Running in process (\d+)", log)
+
+		self.assertEqual(len(started), 1)
+		self.assertEqual(running, started)
+		self.assertTrue(int(started[0]) != os.getpid())
+		self.assertTrue("\nWorker,failed,3," in log)
+
+	def test_runs_in_the_framework_process_by_default(self):
+		log = self.runModules([{"name": "Worker", "parameters": [{"return_code": 0}]}, {"name": "Forked", "parameters": [{"return_code": 0}], "execution": "process"}])
+
+		running = re.findall(r"Running in process (\d+)", log)
+
+		self.assertEqual(len(running), 2)
+		self.assertTrue(running[0] != running[1])
+		self.assertEqual(len(re.findall(r"Started BitCollector module: \w+.main in worker process", log)), 1)
+		self.assertTrue("\nWorker,completed,0," in log)
+		self.assertTrue("\nForked,completed,0," in log)
+
+		## Every row names what it was measured on, and the table is followed by the run summary straight away.
+		self.assertTrue(re.search(r"\nForked,completed,0,[\d.]+,process,", log) != None)
+		self.assertTrue(re.search(r"\nWorker,completed,0,[\d.]+," + (os.path.exists("/proc/thread-self/stat") and "thread" or "process") + ",", log) != None)
+		self.assertTrue(re.search(r"\nForked,[^\n]*\n[^\n]*,INFO,Run summary: ", log) != None)
+
+	def test_forks_while_thread_modules_are_logging(self):
+		module_list = [{"name": "Chatter" + str(count), "parameters": [{"count": 200000}], "timeout_seconds": 20} for count in range(2)]
+
+		for count in range(24):
+			module_list.append({"name": "Forked" + str(count), "parameters": [{"return_code": 0}], "execution": "process", "timeout_seconds": 10})
+
+		modules = dict((module["name"], module["name"].startswith("Chatter") and _chatter_module or _worker_module) for module in module_list)
+		log_dir = runFramework(self.temp_dir, modules, {"module_list": module_list, "max_workers": len(module_list)})
+
+		with open(glob.glob(os.path.join(log_dir, "*.csv"))[0], "r") as log_fd:
+			log = log_fd.read()
+
+		## A worker forked while another thread held a logging lock would hang until its timeout.
+		self.assertEqual(len(re.findall(r"\nForked\d+,completed,0,", log)), 24)
+		self.assertTrue("exceeded its timeout" not in log)
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,135 @@
+## File Name: test_framework.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the classless helpers of the framework script and the platform fingerprint cache.
+
+## Standard imports (Static)
+import json, multiprocessing, os, pickle, platform, shutil, socket, tempfile, time, unittest
+
+## Framework imports
+import tests
+import bitCollector_framework
+
+## Method Name: allocateLogFiles
+##
+## Purpose: Claim log file names as soon as the start event is set, the way concurrent runs would.
+##
+## Parameters
+## 1. log_file     - The path to the log file without the run number or extension.
+## 2. count        - The number of names to claim.
+## 3. start_event  - The multiprocessing Event every process waits on before claiming.
+## 4. result_queue - The multiprocessing Queue to put the claimed names on.
+def allocateLogFiles(log_file, count, start_event, result_queue):
+	start_event.wait()
+
+	for each in range(count):
+		result_queue.put(bitCollector_framework.allocateLogFile(log_file, "csv"))
+
+class AllocateLogFileTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.log_file = os.path.join(self.temp_dir, "run")
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def test_numbers_runs_after_the_highest_in_use(self):
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file, "csv"), self.log_file + "_1.csv")
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file, "csv"), self.log_file + "_2.csv")
+
+		open(self.log_file + "_7.csv", "w").close()
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file, "csv"), self.log_file + "_8.csv")
+
+		## Other formats and other log names are numbered separately.
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file, "html"), self.log_file + "_1.html")
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file + "_other", "csv"), self.log_file + "_other_1.csv")
+
+	def test_claims_the_compressed_file(self):
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file, "jsonl", ".gz"), self.log_file + "_1.jsonl")
+		self.assertTrue(os.path.isfile(self.log_file + "_1.jsonl.gz"))
+		self.assertEqual(bitCollector_framework.allocateLogFile(self.log_file, "jsonl", ".gz"), self.log_file + "_2.jsonl")
+
+	def test_concurrent_runs_never_share_a_name(self):
+		start_event  = multiprocessing.Event()
+		result_queue = multiprocessing.Queue()
+		processes    = [multiprocessing.Process(target=allocateLogFiles, args=(self.log_file, 5, start_event, result_queue)) for each in range(8)]
+
+		for process in processes:
+			process.start()
+
+		start_event.set()
+		names = [result_queue.get(True, 30) for each in range(40)]
+
+		for process in processes:
+			process.join()
+
+		self.assertEqual(sorted(names), sorted(self.log_file + "_" + str(run_number) + ".csv" for run_number in range(1, 41)))
+
+class PlatformCacheTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir   = tempfile.mkdtemp()
+		self.cache_path = os.path.join(self.temp_dir, "bitCollector_platform.json")
+		self.processor  = platform.processor
+		self.lookups    = []
+
+		platform.processor = self.lookUpProcessor
+
+	def tearDown(self):
+		platform.processor = self.processor
+		shutil.rmtree(self.temp_dir)
+
+	def lookUpProcessor(self):
+		self.lookups.append(1)
+
+		return "cpu " + str(len(self.lookups))
+
+	def readCache(self):
+		with open(self.cache_path, "r") as cache_fd:
+			return json.load(cache_fd)
+
+	def writeCache(self, cache):
+		with open(self.cache_path, "w") as cache_fd:
+			json.dump(cache, cache_fd)
+
+	def test_looks_details_up_once_per_host(self):
+		self.assertEqual(bitCollector_framework.Platform(self.cache_path).processor, "cpu 1")
+
+		cache = self.readCache()
+		self.assertEqual((cache["host"], cache["values"]), (socket.gethostname(), {"processor": "cpu 1"}))
+		self.assertTrue(time.time() - cache["time"] < 60)
+
+		## A later run reuses the cached detail.
+		platform_details = bitCollector_framework.Platform(self.cache_path)
+		self.assertEqual((platform_details.processor, platform_details.processor), ("cpu 1", "cpu 1"))
+		self.assertEqual(len(self.lookups), 1)
+
+		## Cheap details are never cached.
+		self.assertEqual(platform_details.node, os.uname()[1])
+		self.assertTrue("uname" not in self.readCache()["values"])
+
+	def test_ignores_an_expired_cache(self):
+		self.writeCache({"host": socket.gethostname(), "time": time.time() - 120, "values": {"processor": "old cpu"}})
+
+		self.assertEqual(bitCollector_framework.Platform(self.cache_path, ttl=60).processor, "cpu 1")
+		self.assertEqual(bitCollector_framework.Platform(self.cache_path, ttl=60).processor, "cpu 1")
+		self.assertEqual(len(self.lookups), 1)
+
+	def test_ignores_the_cache_of_another_host(self):
+		self.writeCache({"host": socket.gethostname() + ".other", "time": time.time(), "values": {"processor": "other cpu"}})
+
+		self.assertEqual(bitCollector_framework.Platform(self.cache_path).processor, "cpu 1")
+		self.assertEqual(self.readCache()["host"], socket.gethostname())
+
+	def test_pickles_the_details_looked_up(self):
+		platform_details = bitCollector_framework.Platform(self.cache_path)
+		os_type          = platform_details.os_type
+
+		platform_details = pickle.loads(pickle.dumps(platform_details, pickle.HIGHEST_PROTOCOL))
+
+		self.assertEqual(platform_details.os_type, os_type)
+		self.assertEqual(platform_details.processor, "cpu 1")
+		self.assertEqual(len(self.lookups), 1)
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,159 @@
+## File Name: test_governor.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the resource governor and the services reading files under it.
+
+## Standard imports (Static)
+import logging, multiprocessing, os, shutil, StringIO, tempfile, time, unittest
+
+## Framework imports
+import tests
+import bitCollector_governor, bitCollector_hashing, bitCollector_search
+
+## Method Name: throttleReads
+##
+## Purpose: Account for reads in a worker process, the way a process-mode module would.
+##
+## Parameters
+## 1. governor   - The ResourceGovernor shared with the framework.
+## 2. byte_count - The number of bytes to account for.
+def throttleReads(governor, byte_count):
+	governor.throttle(byte_count)
+
+class ResourceGovernorTestCase(unittest.TestCase):
+	def setUp(self):
+		self.load_average = os.getloadavg
+
+	def tearDown(self):
+		os.getloadavg = self.load_average
+
+	def timeThrottle(self, governor, *byte_counts):
+		start_time = time.time()
+
+		for byte_count in byte_counts:
+			governor.throttle(byte_count)
+
+		return time.time() - start_time
+
+	def test_leaves_the_reads_unlimited_by_default(self):
+		self.assertTrue(self.timeThrottle(bitCollector_governor.ResourceGovernor(), 10 ** 9) < 0.1)
+
+	def test_sleeps_off_the_bytes_over_the_burst(self):
+		governor = bitCollector_governor.ResourceGovernor(read_rate=4000, burst=1000)
+
+		self.assertTrue(self.timeThrottle(governor, 1000) < 0.1)
+		self.assertTrue(0.45 <= self.timeThrottle(governor, 2000) < 1.0)
+
+	def test_worker_processes_share_the_budget(self):
+		governor  = bitCollector_governor.ResourceGovernor(read_rate=10000, burst=1)
+		processes = [multiprocessing.Process(target=throttleReads, args=(governor, 2500)) for each in range(2)]
+
+		start_time = time.time()
+
+		for process in processes:
+			process.start()
+
+		for process in processes:
+			process.join()
+
+		## Either process alone would take a quarter of a second.
+		self.assertTrue(time.time() - start_time >= 0.45)
+
+	def test_caps_the_readers(self):
+		governor = bitCollector_governor.ResourceGovernor(max_readers=1)
+
+		governor.acquireReader()
+		self.assertFalse(governor.reader_slots.acquire(False))
+		governor.releaseReader()
+		self.assertTrue(governor.reader_slots.acquire(False))
+
+	def test_scales_the_rate_down_with_the_load(self):
+		governor           = bitCollector_governor.ResourceGovernor(read_rate=1000, load_threshold=2)
+		governor.cpu_count = 2
+		handler            = tests.RecordingHandler()
+
+		logging.getLogger("ResourceGovernor").addHandler(handler)
+		logging.getLogger("ResourceGovernor").setLevel(logging.INFO)
+
+		try:
+			factors = []
+
+			for load in (2.0, 8.0, 400.0):
+				os.getloadavg = lambda: (load, 0.0, 0.0)
+				factors.append(governor.getRateFactor(1.0))
+
+		finally:
+			logging.getLogger("ResourceGovernor").setLevel(logging.NOTSET)
+			logging.getLogger("ResourceGovernor").removeHandler(handler)
+
+		self.assertEqual(factors, [1.0, 0.5, bitCollector_governor._minimum_rate_factor])
+		self.assertEqual([record.getMessage() for record in handler.records], ["Host load is 4.00 per CPU. Reading at 50% of the configured rate.", "Host load is 200.00 per CPU. Reading at 10% of the configured rate."])
+
+class GovernedServicesTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.path     = os.path.join(self.temp_dir, "evidence.bin")
+
+		with open(self.path, "wb") as evidence_fd:
+			evidence_fd.write("x" * 3000 + "secret")
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def test_hash_service_reads_under_the_governor(self):
+		governor   = bitCollector_governor.ResourceGovernor(read_rate=4000, burst=1000, max_readers=1)
+		expected   = bitCollector_hashing.HashService(algorithms=["md5"]).hashFile(self.path)
+		start_time = time.time()
+
+		for mmap_threshold in (10 ** 9, 1):
+			self.assertEqual(bitCollector_hashing.HashService(algorithms=["md5"], block_size=512, mmap_threshold=mmap_threshold, governor=governor).hashFile(self.path), expected)
+
+		## 2 * 3006 bytes, less the burst, at 4000 bytes per second.
+		self.assertTrue(time.time() - start_time >= 1.2)
+		self.assertTrue(governor.reader_slots.acquire(False))
+
+	def test_keyword_search_reads_under_the_governor(self):
+		governor = bitCollector_governor.ResourceGovernor(read_rate=4000, burst=1000, max_readers=1)
+		searcher = bitCollector_search.KeywordSearcher(["secret"], chunk_size=512, governor=governor)
+
+		start_time = time.time()
+		self.assertEqual(list(searcher.searchFile(self.path)), [(3000, "secret")])
+		self.assertTrue(time.time() - start_time >= 0.45)
+
+		self.assertEqual(list(searcher.searchStream(StringIO.StringIO("a secret"))), [(2, "secret")])
+		self.assertTrue(governor.reader_slots.acquire(False))
+class GovernedFileTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.path     = os.path.join(self.temp_dir, "history.txt")
+
+		with open(self.path, "wb") as history_fd:
+			history_fd.write("caf\xc3\xa9\n\xff\n" + "x" * 4000)
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def test_reads_bytes_and_text(self):
+		history_file = bitCollector_governor.openFile(self.path)
+		self.assertEqual(history_file.read(6), "caf\xc3\xa9\n")
+		history_file.close()
+
+		history_file = bitCollector_governor.openFile(self.path, encoding="utf-8", errors="replace")
+		self.assertEqual([history_file.readline(), history_file.readline()], [u"caf\xe9\n", u"\ufffd\n"])
+		history_file.close()
+
+	def test_reads_are_throttled_and_release_their_slot(self):
+		governor     = bitCollector_governor.ResourceGovernor(read_rate=4000, burst=1000, max_readers=1)
+		start_time   = time.time()
+		history_file = bitCollector_governor.openFile(self.path, governor, buffer_size=512)
+
+		self.assertEqual(len(history_file.read()), 4008)
+		history_file.close()
+
+		## 3008 bytes over the burst at 4000 bytes per second.
+		self.assertTrue(time.time() - start_time >= 0.6)
+		self.assertTrue(governor.reader_slots.acquire(False))
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,89 @@
+## File Name: test_hashing.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the digests of the hashing service against hashlib, and hashing many files at once.
+
+## Standard imports (Static)
+import hashlib, logging, os, shutil, tempfile, threading, unittest
+
+## Framework imports
+import tests
+import bitCollector_framework, bitCollector_hashing
+
+class HashServiceTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.contents = {"empty": "", "small": "BitCollector\n", "blocks": os.urandom(10000), "unaligned": os.urandom(4097)}
+		self.paths    = []
+
+		for name, content in sorted(self.contents.items()):
+			path = os.path.join(self.temp_dir, name)
+			self.paths.append(path)
+
+			with open(path, "wb") as hash_fd:
+				hash_fd.write(content)
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def getExpected(self, path):
+		content = self.contents[os.path.basename(path)]
+
+		return {"md5": hashlib.md5(content).hexdigest(), "sha1": hashlib.sha1(content).hexdigest(), "sha256": hashlib.sha256(content).hexdigest()}
+
+	def test_matches_hashlib_when_reading(self):
+		hash_service = bitCollector_hashing.HashService(block_size=1024)
+
+		for path in self.paths:
+			self.assertEqual(hash_service.hashFile(path), self.getExpected(path))
+
+	def test_matches_hashlib_when_memory_mapping(self):
+		hash_service = bitCollector_hashing.HashService(block_size=1024, mmap_threshold=1)
+
+		for path in self.paths:
+			if (os.path.getsize(path) > 0):
+				self.assertEqual(hash_service.hashFile(path), self.getExpected(path))
+
+	def test_computes_the_configured_algorithms(self):
+		hash_service = bitCollector_hashing.HashService(algorithms=["sha512"])
+		path         = os.path.join(self.temp_dir, "small")
+
+		self.assertEqual(hash_service.hashFile(path), {"sha512": hashlib.sha512("BitCollector\n").hexdigest()})
+
+	def test_hashes_many_files(self):
+		hash_service = bitCollector_hashing.HashService(worker_count=3, block_size=1024)
+		missing_path = os.path.join(self.temp_dir, "missing")
+		handler      = tests.RecordingHandler()
+
+		logging.getLogger("HashService").addHandler(handler)
+
+		try:
+			results = dict(hash_service.hashFiles(iter(self.paths + [missing_path])))
+
+		finally:
+			logging.getLogger("HashService").removeHandler(handler)
+
+		self.assertEqual(sorted(results.keys()), sorted(self.paths + [missing_path]))
+		self.assertEqual(results.pop(missing_path), None)
+		self.assertEqual([record.getMessage().split(". ")[0] for record in handler.records], ["Unable to hash file: " + missing_path])
+
+		for path, digests in results.items():
+			self.assertEqual(digests, self.getExpected(path))
+
+	def test_stops_feeding_paths_when_asked(self):
+		hash_service = bitCollector_hashing.HashService(worker_count=2)
+		stop_token   = bitCollector_framework.StopToken(threading.Event())
+		stop_token.requestStop()
+
+		self.assertEqual(list(hash_service.hashFiles(self.paths * 100, stop_token)), [])
+
+	def test_stops_when_the_caller_stops_reading(self):
+		hash_service = bitCollector_hashing.HashService(worker_count=2)
+		results      = hash_service.hashFiles(self.paths * 100)
+
+		self.assertTrue(results.next()[0] in self.paths)
+		results.close()
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,177 @@
+## File Name: test_logging.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the indexed JSON-lines log format, compressed log rotation and the table formatters.
+
+## Standard imports (Static)
+import json, logging, os, shutil, tempfile, unittest
+
+## Framework imports
+import tests
+import bitCollector_logging
+
+## Method Name: makeRecord
+##
+## Purpose: Create a record logged from the given module at the given time.
+##
+## Parameters
+## 1. module  - The name of the module the record is logged from.
+## 2. created - The UNIX time the record was created at.
+##
+## Returns
+## The LogRecord.
+def makeRecord(module, created):
+	record = logging.LogRecord("test", logging.INFO, os.path.join("modules", module + ".py"), 1, module + " at " + str(created), None, None)
+	record.created = created
+	record.msecs   = 0
+
+	return record
+
+class IndexedJsonLinesTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.log_path = os.path.join(self.temp_dir, "run_1.jsonl")
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	## Write two modules interleaved over three 10 second buckets.
+	def writeLog(self, first_time=1000, **settings):
+		handler = bitCollector_logging.IndexedJsonLinesFileHandler(self.log_path, bucket_seconds=10, **settings)
+		handler.setFormatter(bitCollector_logging.JsonLinesFormatter())
+
+		for created in range(first_time, first_time + 30, 2):
+			handler.handle(makeRecord("alpha", created))
+			handler.handle(makeRecord("beta", created + 1))
+
+		handler.close()
+
+	def readTimes(self, **query):
+		return [entry["created"] for entry in bitCollector_logging.readJsonLinesLog(self.log_path, **query)]
+
+	def test_writes_one_index_entry_per_module_and_bucket(self):
+		self.writeLog()
+
+		with open(self.log_path + ".idx", "r") as index_fd:
+			index = [json.loads(line) for line in index_fd]
+
+		self.assertEqual(index[0], {"bucket_seconds": 10})
+		self.assertEqual([(entry["bucket"], entry["module"]) for entry in index[1:]], [(1000, "alpha"), (1000, "beta"), (1010, "alpha"), (1010, "beta"), (1020, "alpha"), (1020, "beta")])
+
+		## Every offset points at the start of the first record of its module in its bucket.
+		with open(self.log_path, "rb") as log_fd:
+			for entry in index[1:]:
+				log_fd.seek(entry["offset"])
+				record = json.loads(log_fd.readline())
+
+				self.assertEqual((record["module"], record["created"] // 10 * 10), (entry["module"], entry["bucket"]))
+
+	def test_filters_by_module_and_time(self):
+		self.writeLog()
+
+		self.assertEqual(len(self.readTimes()), 30)
+		self.assertEqual(self.readTimes(module="beta", start_time=1012, end_time=1021), [1013, 1015, 1017, 1019, 1021])
+		self.assertEqual(self.readTimes(start_time=1027), [1027, 1028, 1029])
+
+	def test_seeks_past_the_buckets_outside_the_range(self):
+		self.writeLog()
+
+		## Overwrite the first bucket. Reading it would fail to parse.
+		with open(self.log_path + ".idx", "r") as index_fd:
+			second_bucket = [json.loads(line) for line in index_fd][3]["offset"]
+
+		with open(self.log_path, "r+b") as log_fd:
+			log_fd.write("x" * second_bucket)
+
+		self.assertEqual(self.readTimes(module="alpha", start_time=1010, end_time=1014), [1010, 1012, 1014])
+		self.assertRaises(ValueError, self.readTimes, module="alpha")
+
+	def test_seeks_past_the_first_bucket_of_the_epoch(self):
+		self.writeLog(first_time=0)
+
+		## Bucket 0 is a bucket like any other, not the mark of a missing index.
+		with open(self.log_path + ".idx", "r") as index_fd:
+			second_bucket = [json.loads(line) for line in index_fd][3]["offset"]
+
+		with open(self.log_path, "r+b") as log_fd:
+			log_fd.write("x" * second_bucket)
+
+		self.assertEqual(self.readTimes(module="alpha", start_time=10, end_time=14), [10, 12, 14])
+
+	def test_reads_the_whole_file_without_an_index(self):
+		self.writeLog()
+		os.remove(self.log_path + ".idx")
+
+		self.assertEqual(self.readTimes(module="alpha", start_time=1026), [1026, 1028])
+
+	def test_reads_a_live_segment_written_compressed(self):
+		self.writeLog(compression="gzip", compression_mode="stream")
+
+		self.assertEqual((os.path.isfile(self.log_path), os.path.isfile(self.log_path + ".gz")), (0, 1))
+		self.assertEqual(self.readTimes(module="beta", start_time=1020), [1021, 1023, 1025, 1027, 1029])
+		self.assertEqual(len([entry for entry in bitCollector_logging.readJsonLinesLog(self.log_path + ".gz")]), 30)
+
+	## Roll the log over every few records and check every segment can be read back, together and on its own.
+	def checkCompressedRotation(self, compression, compression_mode):
+		os.mkdir(os.path.join(self.temp_dir, compression_mode))
+		self.log_path = os.path.join(self.temp_dir, compression_mode, "run_1.jsonl")
+
+		self.writeLog(maxBytes=2000, backupCount=99, compression=compression, compression_mode=compression_mode)
+
+		suffix   = bitCollector_logging._compression_suffixes[compression]
+		segments = bitCollector_logging.getLogSegments(self.log_path)
+
+		self.assertTrue(len(segments) > 2)
+		self.assertEqual(segments[:-1], ["%s.%d%s" % (self.log_path, count, suffix) for count in range(len(segments) - 1, 0, -1)])
+
+		if (compression_mode == "stream"):
+			self.assertEqual(segments[-1], self.log_path + suffix)
+
+		else:
+			self.assertEqual(segments[-1], self.log_path)
+
+		lines = list(bitCollector_logging.readLogStream(self.log_path))
+		self.assertEqual([json.loads(line)["created"] for line in lines], range(1000, 1030))
+
+		## Each segment has its own index.
+		beta = []
+		for segment in segments:
+			beta.extend(entry["created"] for entry in bitCollector_logging.readJsonLinesLog(segment, module="beta"))
+
+		self.assertEqual(beta, range(1001, 1030, 2))
+
+	def test_compresses_rolled_over_segments_with_gzip(self):
+		self.checkCompressedRotation("gzip", "background")
+		self.checkCompressedRotation("gzip", "stream")
+
+	@unittest.skipIf(bitCollector_logging.zstandard == None, "The zstandard package is not installed.")
+	def test_compresses_rolled_over_segments_with_zstd(self):
+		self.checkCompressedRotation("zstd", "background")
+		self.checkCompressedRotation("zstd", "stream")
+
+class TableFormatterTestCase(unittest.TestCase):
+	def setUp(self):
+		self.table  = {"title": "Module summary", "columns": ["Module", "Read"], "rows": [["Test1", "1.0 KB"], ["Chat, Harvest", "<n/a>"]]}
+		self.record = logging.LogRecord("ModuleScheduler", logging.INFO, __file__, 1, bitCollector_logging.formatTable(self.table, "text"), None, None)
+		self.record.table = self.table
+
+	def test_text_table_is_the_message(self):
+		self.assertEqual(self.record.getMessage(), "Module summary\nModule         Read\nTest1          1.0 KB\nChat, Harvest  <n/a>")
+
+	def test_csv_and_html_tables(self):
+		csv_formatter  = bitCollector_logging.TableFormatter("%(levelname)s,%(message)s", None, "csv")
+		html_formatter = bitCollector_logging.TableFormatter("<tr><td>%(levelname)s</td><td>%(message)s</td></tr>", None, "html")
+
+		self.assertEqual(csv_formatter.format(self.record), "INFO,Module summary\nModule,Read\nTest1,1.0 KB\n\"Chat, Harvest\",<n/a>")
+		self.assertEqual(html_formatter.format(self.record), "<tr><td>INFO</td><td>Module summary<table><tr><th>Module</th><th>Read</th></tr><tr><td>Test1</td><td>1.0 KB</td></tr><tr><td>Chat, Harvest</td><td>&lt;n/a&gt;</td></tr></table></td></tr>")
+
+		## The other handlers still see the plain-text table.
+		self.assertTrue(self.record.getMessage().startswith("Module summary\nModule "))
+
+	def test_json_lines_keep_the_table(self):
+		entry = json.loads(bitCollector_logging.JsonLinesFormatter().format(self.record))
+		self.assertEqual(entry["extra"]["table"], self.table)
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,87 @@
+## File Name: test_logindex.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests importing BitCollector logs into the log index and querying them.
+
+## Standard imports (Static)
+import gzip, os, shutil, tempfile, unittest
+
+## Framework imports
+import tests
+import bitCollector_logindex
+
+_csv_entries = """Date & Time,Traceback,Level,Message
+2015-03-09T17:41:05,Test1.module_root.main,INFO,Collected the browser history
+2015-03-09T17:41:06,ChatHarvest.ChatHarvest.harvestHistory,WARNING,Unable to finish parsing msn history
+2015-03-09T17:41:07,Test1.module_root.main,ERROR,Unhandled exception in the browser module
+Traceback (most recent call last):
+  File "Test1.py", line 3, in main
+2015-03-09T17:41:08,bitCollector_framework.root.main,INFO,Run complete
+"""
+
+_html_entries = """<table><tr><th>Date & Time</th><th>Traceback</th><th>Level</th><th>Message</th></tr>
+<tr><td>2015-03-10T09:00:00</td><td>Test1.module_root.main</td><td>INFO</td><td>Collected the browser cache</td></tr>
+<tr><td>2015-03-10T09:00:01</td><td>Test1.module_root.main</td><td>ERROR</td><td>Browser cache locked</td></tr>
+</table>"""
+
+class LogIndexTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir  = tempfile.mkdtemp()
+		self.csv_path  = os.path.join(self.temp_dir, "run_1.csv")
+		self.html_path = os.path.join(self.temp_dir, "run_2.html")
+
+		with open(self.csv_path, "w") as log_fd:
+			log_fd.write(_csv_entries)
+
+		with open(self.html_path, "w") as log_fd:
+			log_fd.write(_html_entries)
+
+		self.log_index = bitCollector_logindex.LogIndex(os.path.join(self.temp_dir, "index.sqlite"))
+
+	def tearDown(self):
+		self.log_index.close()
+		shutil.rmtree(self.temp_dir)
+
+	def getMessages(self, **query):
+		return [entry[3] for entry in self.log_index.query(**query)]
+
+	def test_queries_by_level_module_and_text(self):
+		self.assertEqual(self.log_index.importLog(self.csv_path) + self.log_index.importLog(self.html_path), 5)
+
+		self.assertEqual(self.getMessages(level="error"), ["Unhandled exception in the browser module\nTraceback (most recent call last):\n  File \"Test1.py\", line 3, in main", "Browser cache locked"])
+		self.assertEqual(self.getMessages(module="ChatHarvest"), ["Unable to finish parsing msn history"])
+		self.assertEqual(self.getMessages(traceback="harvestHistory"), ["Unable to finish parsing msn history"])
+		self.assertEqual(self.getMessages(text="browser"), ["Collected the browser history", "Unhandled exception in the browser module\nTraceback (most recent call last):\n  File \"Test1.py\", line 3, in main", "Collected the browser cache", "Browser cache locked"])
+		self.assertEqual(self.getMessages(text="browser cache", level="info", limit=1), ["Collected the browser cache"])
+		self.assertEqual(self.getMessages(text="firefox"), [])
+
+	def test_imports_only_what_was_appended(self):
+		## The last entry of a CSV log still being written may go on, so it is left for the next import.
+		self.assertEqual(self.log_index.importLog(self.csv_path), 3)
+		self.assertEqual(self.getMessages(text="complete"), [])
+
+		with open(self.csv_path, "a") as log_fd:
+			log_fd.write("2015-03-09T17:42:00,Test1.module_root.main,INFO,Appended later\n")
+
+		self.assertEqual(self.log_index.importLog(self.csv_path), 1)
+		self.assertEqual(self.getMessages(text="complete"), ["Run complete"])
+		self.assertEqual(len(self.getMessages()), 4)
+	def test_recognises_rotated_and_compressed_segments(self):
+		self.assertEqual(self.log_index.importLog(self.csv_path), 3)
+
+		## The rotated segment is complete, so only its last entry is imported. The new log is imported whole.
+		with open(self.csv_path, "rb") as log_fd:
+			rotated_fd = gzip.open(self.csv_path + ".1.gz", "wb")
+			rotated_fd.write(log_fd.read())
+			rotated_fd.close()
+
+		with open(self.csv_path, "w") as log_fd:
+			log_fd.write("Date & Time,Traceback,Level,Message\n2015-03-09T18:00:00,Test1.module_root.main,INFO,After the rotation\n2015-03-09T18:00:01,Test1.module_root.main,INFO,Still being written\n")
+
+		self.assertEqual(self.log_index.importLog(self.csv_path), 2)
+		self.assertEqual(self.getMessages(start_time=bitCollector_logindex.parseQueryTime("2015-03-09T17:41:08"), end_time=bitCollector_logindex.parseQueryTime("2015-03-09T18:00:01")), ["Run complete", "After the rotation"])
+		self.assertEqual(self.log_index.importLog(self.csv_path), 0)
+
+if (__name__ == "__main__"):
+	unittest.main()
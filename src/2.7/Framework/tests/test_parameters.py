@@ -0,0 +1,74 @@
+## File Name: test_parameters.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests checking the configured parameters of a module against the parameters it declares.
+
+## Standard imports (Static)
+import pickle, unittest
+
+## Framework imports
+import tests
+import bitCollector_parameters
+
+_schema = {
+	"path"          : {"type" : "string", "required" : 1},
+	"count"         : {"type" : "int", "default" : 4, "min" : 1, "max" : 8},
+	"ratio"         : {"type" : "float", "default" : 0.5},
+	"verbose"       : {"type" : "bool", "default" : 0},
+	"clients"       : {"type" : "list", "default" : ["aim"], "choices" : ["aim", "msn"]},
+	"logging_level" : {"type" : "string", "default" : "info", "choices" : ["debug", "info"]}
+}
+
+class ParseParametersTestCase(unittest.TestCase):
+	def parseProblems(self, parameters, schema=_schema):
+		try:
+			bitCollector_parameters.parseParameters("TestModule", schema, parameters)
+
+		except bitCollector_parameters.ParameterError, error:
+			self.assertEqual(error.module_name, "TestModule")
+			return error.problems
+
+		self.fail("No ParameterError for " + str(parameters))
+
+	def test_fills_in_the_defaults(self):
+		settings = bitCollector_parameters.parseParameters("TestModule", _schema, [{"path": "/tmp"}, {"ratio": 2}, {"verbose": True}])
+
+		self.assertEqual(settings.asDict(), {"path": "/tmp", "count": 4, "ratio": 2.0, "verbose": True, "clients": ["aim"], "logging_level": "info"})
+		self.assertTrue(isinstance(settings.ratio, float))
+		self.assertRaises(AttributeError, setattr, settings, "other", 1)
+
+	def test_reports_missing_and_unknown_parameters(self):
+		self.assertEqual(self.parseProblems([]), ["path is required"])
+		self.assertEqual(self.parseProblems([{"path": "/tmp"}, {"other": 1}, {"path": "/var"}]), ["path is set more than once", "unknown parameter other"])
+		self.assertEqual(self.parseProblems(["path"]), ["parameters must be single-key dictionaries, not path", "path is required"])
+
+	def test_reports_every_value_of_the_wrong_type(self):
+		self.assertEqual(self.parseProblems([{"path": 1}, {"count": "4"}, {"ratio": True}, {"verbose": 2}, {"clients": "aim"}]), [
+			"clients must be a list",
+			"count must be an integer",
+			"path must be a string",
+			"ratio must be a number",
+			"verbose must be 0, 1, true or false"])
+
+	def test_reports_values_out_of_range(self):
+		self.assertEqual(self.parseProblems([{"path": "/tmp"}, {"count": 0}]), ["count must be at least 1"])
+		self.assertEqual(self.parseProblems([{"path": "/tmp"}, {"count": 9}]), ["count must be at most 8"])
+		self.assertEqual(self.parseProblems([{"path": "/tmp"}, {"clients": ["aim", "icq"]}, {"logging_level": "trace"}]), [
+			"clients must be one of aim, msn, not icq",
+			"logging_level must be one of debug, info, not trace"])
+
+	def test_reports_an_invalid_schema(self):
+		self.assertEqual(self.parseProblems([], {"count": {"type": "long", "default": 1}, "2nd": {"type": "int"}, "ratio": {"type": "float", "default": "half", "step": 1}}), [
+			"invalid _module_parameters: parameter names must be identifiers, not 2nd",
+			"invalid _module_parameters: count must declare a type out of string, int, float, bool, list, dict, any",
+			"invalid _module_parameters: ratio declares an unknown field step",
+			"invalid _module_parameters: ratio must be a number"])
+
+	def test_pickles_the_settings(self):
+		settings = bitCollector_parameters.parseParameters("TestModule", _schema, [{"path": "/tmp"}, {"count": 2}])
+
+		self.assertEqual(pickle.loads(pickle.dumps(settings, pickle.HIGHEST_PROTOCOL)).asDict(), settings.asDict())
+
+if (__name__ == "__main__"):
+	unittest.main()
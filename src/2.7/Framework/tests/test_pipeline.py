@@ -0,0 +1,103 @@
+## File Name: test_pipeline.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the record pipeline the modules emit their records through.
+
+## Standard imports (Static)
+import glob, hashlib, json, logging, os, shutil, tempfile, unittest
+
+## Framework imports
+import tests
+import bitCollector_hashing, bitCollector_pipeline, bitCollector_search
+
+## A module emitting a note and the same note again, which the dedup stage drops.
+_emitting_module = """
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	for count in range(2):
+		module_dict["output"].emit({"type": "note", "text": "note of " + module_dict["name"]})
+
+	return 0
+"""
+
+class RecordPipelineTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir    = tempfile.mkdtemp()
+		self.record_path = os.path.join(self.temp_dir, "run_1_records.jsonl")
+		self.file_path   = os.path.join(self.temp_dir, "evidence.bin")
+
+		with open(self.file_path, "wb") as evidence_fd:
+			evidence_fd.write("evidence" * 1000)
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def openPipeline(self, **settings):
+		return bitCollector_pipeline.RecordPipeline("Test1", self.record_path, hash_service=bitCollector_hashing.HashService(algorithms=["md5"], worker_count=1), keyword_searcher=bitCollector_search.KeywordSearcher(["secret"]), **settings)
+
+	def readRecords(self):
+		with open(self.record_path, "r") as record_fd:
+			return [json.loads(line) for line in record_fd]
+
+	def test_stages_dedup_hash_and_search(self):
+		pipeline = self.openPipeline()
+		pipeline.emit({"type": "file", "path": self.file_path})
+		pipeline.emit({"type": "note", "text": "a secret"})
+		pipeline.emit({"type": "note", "text": "a secret"})
+
+		self.assertEqual(pipeline.close(), {"emitted": 3, "duplicates": 1, "hashed": 1, "keyword_hits": 1, "written": 2})
+
+		records = self.readRecords()
+		self.assertEqual([record["module"] for record in records], ["Test1", "Test1"])
+		self.assertEqual(records[0]["digests"], {"md5": hashlib.md5("evidence" * 1000).hexdigest()})
+		self.assertEqual(records[1]["keyword_hits"], [{"field": "text", "offset": 2, "keyword": "secret"}])
+		self.assertNotEqual(records[0]["record_id"], records[1]["record_id"])
+
+	def test_runs_only_the_configured_stages(self):
+		pipeline = bitCollector_pipeline.RecordPipeline("Test1", self.record_path, stages=["hash", "search"], capacity=1)
+
+		for count in range(3):
+			pipeline.emit({"type": "file", "path": self.file_path})
+
+		self.assertEqual(pipeline.close(), {"emitted": 3, "duplicates": 0, "hashed": 0, "keyword_hits": 0, "written": 3})
+		self.assertEqual(self.readRecords(), [{"type": "file", "path": self.file_path, "module": "Test1"}] * 3)
+
+	def test_rejects_records_once_the_file_cannot_be_written(self):
+		handler  = tests.RecordingHandler()
+		pipeline = bitCollector_pipeline.RecordPipeline("Test1", os.path.join(self.temp_dir, "missing", "records.jsonl"), capacity=1)
+
+		logging.getLogger("RecordPipeline").addHandler(handler)
+
+		try:
+			pipeline.emit({"type": "note", "text": "lost"})
+			self.assertEqual(pipeline.close()["written"], 0)
+
+		finally:
+			logging.getLogger("RecordPipeline").removeHandler(handler)
+
+		self.assertEqual([record.levelname for record in handler.records], ["ERROR"])
+		self.assertRaises(IOError, pipeline.emit, {"type": "note", "text": "rejected"})
+
+class ModuleOutputTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def test_thread_and_process_modules_share_the_record_file(self):
+		module_list = [{"name": "ThreadModule", "parameters": []}, {"name": "ProcessModule", "parameters": [], "execution": "process"}]
+		log_dir     = tests.runFramework(self.temp_dir, {"ThreadModule": _emitting_module, "ProcessModule": _emitting_module}, {"module_list": module_list})
+
+		with open(os.path.join(log_dir, "run_1_records.jsonl"), "r") as record_fd:
+			records = [json.loads(line) for line in record_fd]
+
+		self.assertEqual(sorted((record["module"], record["text"]) for record in records), [("ProcessModule", "note of ProcessModule"), ("ThreadModule", "note of ThreadModule")])
+
+		with open(glob.glob(os.path.join(log_dir, "*_report.json"))[0], "r") as report_fd:
+			counts = [module["usage"]["records"] for module in json.load(report_fd)["modules"]]
+
+		self.assertEqual(counts, [{"emitted": 2, "duplicates": 1, "hashed": 0, "keyword_hits": 0, "written": 1}] * 2)
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,148 @@
+## File Name: test_profiling.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests profiling the modules and sampling their stacks.
+
+## Standard imports (Static)
+import glob, logging, os, pstats, re, shutil, tempfile, threading, time, unittest
+
+## Framework imports
+import tests
+import bitCollector_logging, bitCollector_profiling
+
+## A module keeping the CPU busy for a moment, so that the profiler and the sampler see it.
+_busy_module = """
+import time
+
+def spin(seconds):
+	end_time = time.time() + seconds
+
+	while (time.time() < end_time):
+		pass
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	spin(0.3)
+
+	return 0
+"""
+
+## Method Name: spin
+##
+## Purpose: Keep the CPU busy until the event is set.
+##
+## Parameters
+## 1. stop_event - The threading Event to wait for.
+def spin(stop_event):
+	while (stop_event.is_set() == 0):
+		pass
+
+## Method Name: failingModule
+##
+## Purpose: Stand in for the main method of a module which raises.
+def failingModule():
+	raise ValueError("failing module")
+
+class ModuleProfilerTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.profiler = bitCollector_profiling.ModuleProfiler(self.temp_dir, "run_1", top_count=3, sample_interval=5)
+		self.logger   = logging.getLogger("ModuleProfilerTest")
+		self.handler  = tests.RecordingHandler()
+
+		self.logger.addHandler(self.handler)
+		self.logger.setLevel(logging.INFO)
+		self.logger.propagate = 0
+
+		logging.getLogger("ModuleProfiler").addHandler(self.handler)
+
+	def tearDown(self):
+		logging.getLogger("ModuleProfiler").removeHandler(self.handler)
+		self.logger.removeHandler(self.handler)
+		shutil.rmtree(self.temp_dir)
+
+	def test_writes_one_profile_per_call(self):
+		self.assertEqual(self.profiler.profileCall("TestModule", sorted, [3, 1, 2]), [1, 2, 3])
+		self.assertRaises(ValueError, self.profiler.profileCall, "TestModule", failingModule)
+
+		paths = sorted(glob.glob(os.path.join(self.temp_dir, "*")))
+		self.assertEqual(paths, [os.path.join(self.temp_dir, "run_1_TestModule_" + str(number) + ".pstats") for number in (1, 2)])
+
+		## The profile of the module which raised still holds its call.
+		self.assertTrue(any(function[2] == "failingModule" for function in pstats.Stats(paths[1]).stats))
+
+	def test_samples_the_stacks_of_every_thread(self):
+		stop_event = threading.Event()
+		worker     = threading.Thread(target=spin, args=(stop_event,), name="Busy worker")
+		sampler    = self.profiler.startSampler()
+
+		worker.start()
+		time.sleep(0.2)
+		stop_event.set()
+		worker.join()
+
+		self.profiler.stopSampler(sampler, "framework")
+
+		with open(os.path.join(self.temp_dir, "run_1_framework_1.stacks"), "r") as stack_fd:
+			stacks = [line.rsplit(" ", 1)[0] for line in stack_fd]
+
+		self.assertTrue(sampler.sample_count > 0)
+		self.assertTrue(any(stack.startswith("Busy_worker;") and stack.endswith("(spin)") for stack in stacks))
+		self.assertFalse(any(stack.startswith("StackSampler;") for stack in stacks))
+
+	def test_leaves_the_sampler_off_unless_asked(self):
+		profiler = bitCollector_profiling.ModuleProfiler(self.temp_dir, "run_1")
+
+		self.assertEqual(profiler.startSampler(), None)
+		profiler.stopSampler(None, "framework")
+		self.assertEqual(os.listdir(self.temp_dir), [])
+
+	def test_logs_the_hottest_functions(self):
+		self.profiler.profileCall("TestModule", sorted, range(1000))
+
+		## Empty profiles left by worker processes which died are skipped.
+		open(os.path.join(self.temp_dir, "run_1_Dead_1.pstats"), "w").close()
+
+		with open(os.path.join(self.temp_dir, "run_1_framework_1.stacks"), "w") as stack_fd:
+			stack_fd.write("MainThread;a.py:1(main);a.py:5(spin) 3\nMainThread;a.py:1(main) 1\n")
+
+		self.profiler.logSummary(self.logger)
+
+		## Each summary is a single entry carrying its table.
+		profile_record, stack_record = self.handler.records
+
+		self.assertTrue(re.match(r"Profile summary: the \d functions with the most own time across 1 profiles", profile_record.table["title"]))
+		self.assertEqual(profile_record.table["columns"], ["Rank", "Own seconds", "Cumulative seconds", "Calls", "Function"])
+		self.assertTrue(0 < len(profile_record.table["rows"]) <= 3)
+		self.assertEqual(profile_record.getMessage(), bitCollector_logging.formatTable(profile_record.table, "text"))
+
+		self.assertEqual(stack_record.table, {"title": "Stack summary: the 2 frames most often on top across 4 thread samples", "columns": ["Share", "Samples", "Frame"], "rows": [["75.0%", 3, "a.py:5(spin)"], ["25.0%", 1, "a.py:1(main)"]]})
+		self.assertEqual(stack_record.getMessage().split("\n")[1:], ["Share  Samples  Frame", "75.0%  3        a.py:5(spin)", "25.0%  1        a.py:1(main)"])
+
+class ProfileOptionTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def test_profiles_thread_and_process_modules(self):
+		module_list = [{"name": "ThreadModule", "parameters": []}, {"name": "ProcessModule", "parameters": [], "execution": "process"}]
+		log_dir     = tests.runFramework(self.temp_dir, {"ThreadModule": _busy_module, "ProcessModule": _busy_module}, {"module_list": module_list}, ["--profile", "--sample-stacks", "5"])
+
+		profile_dir = os.path.join(log_dir, "profiles")
+		names       = sorted(os.listdir(profile_dir))
+
+		self.assertEqual(names, ["run_1_ProcessModule_1.pstats", "run_1_ProcessModule_1.stacks", "run_1_ThreadModule_1.pstats", "run_1_framework_1.stacks"])
+
+		for name in ("run_1_ProcessModule_1.pstats", "run_1_ThreadModule_1.pstats"):
+			self.assertTrue(any(function[2] == "spin" for function in pstats.Stats(os.path.join(profile_dir, name)).stats))
+
+		with open(os.path.join(log_dir, "run_1.csv"), "r") as log_fd:
+			log = log_fd.read()
+
+		self.assertTrue("Profile summary: " in log and "Stack summary: " in log)
+		self.assertTrue("\nRank,Own seconds,Cumulative seconds,Calls,Function\n" in log and "\nShare,Samples,Frame\n" in log)
+
+if (__name__ == "__main__"):
+	unittest.main()
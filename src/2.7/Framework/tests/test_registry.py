@@ -0,0 +1,100 @@
+## File Name: test_registry.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests resolving the modules through the registry and reusing its catalog.
+
+## Standard imports (Static)
+import os, shutil, sys, tempfile, unittest
+
+## Framework imports
+import tests
+import bitCollector_registry
+
+class ModuleRegistryTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir     = tempfile.mkdtemp()
+		self.module_dir   = os.path.join(self.temp_dir, "modules")
+		self.catalog_path = os.path.join(self.temp_dir, "bitCollector_modules.json")
+
+		os.mkdir(self.module_dir)
+		self.module_path = self.writeModule("RegistryTestModule", "v1", 1000000000)
+
+	def tearDown(self):
+		sys.modules.pop("RegistryTestModule", None)
+		shutil.rmtree(self.temp_dir)
+
+	def writeModule(self, name, version, mtime):
+		path = os.path.join(self.module_dir, name + ".py")
+
+		with open(path, "w") as module_fd:
+			module_fd.write('_module_version = "' + name + ' ' + version + '"\n\ndef main(*args):\n\treturn 0\n')
+
+		os.utime(path, (mtime, mtime))
+
+		## Keep the directory time fixed as well so that only the changes a test makes are seen.
+		os.utime(self.module_dir, (1000000000, 1000000000))
+
+		return path
+
+	def getRegistry(self):
+		return bitCollector_registry.ModuleRegistry([self.module_dir], self.catalog_path)
+
+	def failToFind(self, name):
+		self.fail("Searched for " + name + " although the catalog was valid.")
+
+	def test_resolves_without_importing(self):
+		registry = self.getRegistry()
+
+		self.assertEqual(registry.resolve("RegistryTestModule"), {"path": self.module_path, "mtime": 1000000000, "version": "RegistryTestModule v1", "parameters": None})
+		self.assertEqual(registry.resolve("MissingModule"), None)
+		self.assertTrue("RegistryTestModule" not in sys.modules)
+
+		self.assertRaises(ImportError, registry.load, "MissingModule")
+		self.assertEqual(registry.load("RegistryTestModule").main(), 0)
+
+	def test_reads_the_declared_parameters(self):
+		with open(self.module_path, "a") as module_fd:
+			module_fd.write('\n_module_parameters = {\n\t"count" : {"type" : "int", "default" : 1}\n}\n')
+
+		self.assertEqual(self.getRegistry().resolve("RegistryTestModule")["parameters"], {"count": {"type": "int", "default": 1}})
+		self.assertTrue("RegistryTestModule" not in sys.modules)
+
+	def test_reuses_the_catalog(self):
+		registry = self.getRegistry()
+		registry.resolve("RegistryTestModule")
+		registry.writeCatalog()
+
+		registry = self.getRegistry()
+		registry.findModule = self.failToFind
+
+		self.assertEqual(registry.resolve("RegistryTestModule")["version"], "RegistryTestModule v1")
+		self.assertEqual(registry.dirty, 0)
+
+	def test_resolves_a_changed_module_again(self):
+		registry = self.getRegistry()
+		registry.resolve("RegistryTestModule")
+		registry.writeCatalog()
+
+		self.writeModule("RegistryTestModule", "v2", 1000000100)
+
+		registry = self.getRegistry()
+		self.assertEqual(registry.resolve("RegistryTestModule")["version"], "RegistryTestModule v2")
+		self.assertEqual(registry.dirty, 1)
+
+	def test_drops_the_catalog_when_the_search_directories_change(self):
+		registry = self.getRegistry()
+		registry.resolve("RegistryTestModule")
+		registry.writeCatalog()
+
+		## Adding a module changes the time of its directory.
+		self.writeModule("OtherModule", "v1", 1000000000)
+		os.utime(self.module_dir, (1000000100, 1000000100))
+
+		self.assertEqual(self.getRegistry().entries, {})
+
+		## So does searching other directories.
+		self.assertEqual(bitCollector_registry.ModuleRegistry([self.module_dir, self.temp_dir], self.catalog_path).entries, {})
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,97 @@
+## File Name: test_scheduler.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the order the module scheduler runs the modules in, and how it handles
+##          modules which fail or time out.
+
+## Standard imports (Static)
+import glob, json, os, shutil, tempfile, time, unittest
+
+## Framework imports
+from tests import runFramework
+
+## A module noting when it starts and ends. It runs for the number of seconds given unless it is asked to stop.
+_scheduled_module = """
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	parameters = dict(list(each.items())[0] for each in module_dict["parameters"])
+
+	with open(parameters["trace"], "a") as trace_fd:
+		trace_fd.write(module_dict["name"] + " start\\n")
+
+	module_dict["stop_token"].wait(parameters["seconds"])
+
+	with open(parameters["trace"], "a") as trace_fd:
+		trace_fd.write(module_dict["name"] + " end\\n")
+
+	return parameters["return_code"]
+"""
+
+class ModuleSchedulerTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir   = tempfile.mkdtemp()
+		self.trace_path = os.path.join(self.temp_dir, "trace.txt")
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def getModule(self, name, seconds=0, return_code=0, **settings):
+		module = {"name": name, "parameters": [{"trace": self.trace_path}, {"seconds": seconds}, {"return_code": return_code}]}
+		module.update(settings)
+
+		return module
+
+	def runModules(self, module_list, run_name="run", **settings):
+		run_dir = os.path.join(self.temp_dir, run_name)
+		os.mkdir(run_dir)
+
+		settings["module_list"] = module_list
+		log_dir = runFramework(run_dir, dict((module["name"], _scheduled_module) for module in module_list), settings)
+
+		with open(glob.glob(os.path.join(log_dir, "*_report.json"))[0], "r") as report_fd:
+			return dict((module["name"], module["status"]) for module in json.load(report_fd)["modules"])
+
+	def readTrace(self):
+		if (os.path.exists(self.trace_path) == 0):
+			return []
+
+		with open(self.trace_path, "r") as trace_fd:
+			return trace_fd.read().splitlines()
+
+	def test_runs_in_configuration_order_on_one_worker(self):
+		statuses = self.runModules([self.getModule("First", 0.05), self.getModule("Second"), self.getModule("Third")], max_workers=1)
+
+		self.assertEqual(statuses, {"First": "completed", "Second": "completed", "Third": "completed"})
+		self.assertEqual(self.readTrace(), ["First start", "First end", "Second start", "Second end", "Third start", "Third end"])
+
+	def test_waits_for_dependencies(self):
+		statuses = self.runModules([self.getModule("Second", depends_on="First"), self.getModule("First", 0.3)])
+
+		self.assertEqual(statuses, {"First": "completed", "Second": "completed"})
+		self.assertEqual(self.readTrace(), ["First start", "First end", "Second start", "Second end"])
+
+	def test_skips_modules_whose_dependency_failed(self):
+		statuses = self.runModules([self.getModule("Failing", return_code=1), self.getModule("Dependent", depends_on=["Failing"]), self.getModule("Independent")])
+
+		self.assertEqual(statuses, {"Failing": "failed", "Dependent": "skipped", "Independent": "completed"})
+		self.assertTrue("Dependent start" not in self.readTrace())
+
+	def test_skips_modules_which_depend_on_each_other(self):
+		statuses = self.runModules([self.getModule("First", depends_on="Second"), self.getModule("Second", depends_on="First"), self.getModule("Independent")])
+
+		self.assertEqual(statuses, {"First": "skipped", "Second": "skipped", "Independent": "completed"})
+		self.assertEqual(self.readTrace(), ["Independent start", "Independent end"])
+
+	def test_cancels_modules_which_time_out(self):
+		for execution in ("thread", "process"):
+			start_time = time.time()
+			statuses   = self.runModules([self.getModule("Hanging", 30, timeout_seconds=1, execution=execution), self.getModule("Dependent", depends_on="Hanging")], execution)
+
+			self.assertEqual(statuses, {"Hanging": "timed_out", "Dependent": "skipped"})
+			self.assertTrue(time.time() - start_time < 15)
+
+		## The modules stopped when asked, within their grace period.
+		self.assertEqual(self.readTrace(), ["Hanging start", "Hanging end"] * 2)
+
+if (__name__ == "__main__"):
+	unittest.main()
@@ -0,0 +1,60 @@
+## File Name: test_search.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the keyword search service.
+
+## Standard imports (Static)
+import logging, os, shutil, StringIO, tempfile, unittest
+
+## Framework imports
+import tests
+import bitCollector_search
+
+class KeywordSearcherTestCase(unittest.TestCase):
+	def setUp(self):
+		self.data     = "a secret..SECRETARY and secrets, et cetera"
+		self.keywords = ["secret", "cret", "et"]
+
+	def test_finds_every_hit_once(self):
+		hits = bitCollector_search.KeywordSearcher(self.keywords).searchText(self.data)
+
+		self.assertEqual(hits, [(2, "secret"), (4, "cret"), (6, "et"), (10, "secret"), (12, "cret"), (14, "et"), (24, "secret"), (26, "cret"), (28, "et"), (33, "et"), (37, "et")])
+		self.assertEqual(bitCollector_search.KeywordSearcher(self.keywords, case_sensitive=1).searchText(self.data), [hit for hit in hits if hit[0] not in (10, 12, 14)])
+
+	def test_chunks_overlap_so_hits_across_a_boundary_are_found_once(self):
+		expected = bitCollector_search.KeywordSearcher(self.keywords).searchText(self.data)
+
+		for chunk_size in range(1, len(self.data) + 1):
+			searcher = bitCollector_search.KeywordSearcher(self.keywords, chunk_size=chunk_size)
+			self.assertEqual(list(searcher.searchStream(StringIO.StringIO(self.data))), expected, "chunk size %d" % chunk_size)
+
+	def test_searches_files_and_records(self):
+		temp_dir = tempfile.mkdtemp()
+
+		try:
+			path = os.path.join(temp_dir, "notes.txt")
+
+			with open(path, "wb") as notes_fd:
+				notes_fd.write(self.data)
+
+			searcher     = bitCollector_search.KeywordSearcher(["secret"], chunk_size=4)
+			missing_path = os.path.join(temp_dir, "missing.txt")
+			handler      = tests.RecordingHandler()
+
+			logging.getLogger("KeywordSearcher").addHandler(handler)
+
+			try:
+				self.assertEqual(list(searcher.searchFiles([path, missing_path])), [(path, 2, "secret"), (path, 10, "secret"), (path, 24, "secret")])
+
+			finally:
+				logging.getLogger("KeywordSearcher").removeHandler(handler)
+
+			self.assertEqual([record.getMessage().split(". ")[0] for record in handler.records], ["Unable to search file: " + missing_path])
+			self.assertEqual(searcher.searchRecord({"text": u"top secret", "size": 1}), [("text", 4, "secret")])
+
+		finally:
+			shutil.rmtree(temp_dir)
+
+if (__name__ == "__main__"):
+	unittest.main()
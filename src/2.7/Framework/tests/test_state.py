@@ -0,0 +1,164 @@
+## File Name: test_state.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the file-state cache, alone and as shared by the services and the modules of a run.
+
+## Standard imports (Static)
+import os, shutil, sqlite3, tempfile, unittest
+
+## Framework imports
+import tests
+import bitCollector_hashing, bitCollector_state, bitCollector_walker
+
+## A module recording every file of a directory in the state cache, or emitting it to the pipeline to be hashed.
+_state_module = """import os
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	parameters = dict(list(each.items())[0] for each in module_dict["parameters"])
+
+	for name in sorted(os.listdir(parameters["root"])):
+		path = os.path.join(parameters["root"], name)
+
+		if (parameters.get("emit")):
+			module_dict["output"].emit({"type" : "file", "path" : path})
+
+		else:
+			framework_settings.state_cache.record(path, os.lstat(path))
+
+	return 0
+"""
+
+class FileStateCacheTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+		for directory in ("thread", "process"):
+			os.mkdir(os.path.join(self.temp_dir, directory))
+
+			for index in range(20):
+				with open(os.path.join(self.temp_dir, directory, "file_%d" % index), "w") as file_fd:
+					file_fd.write(directory * (index + 1))
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def readStates(self, log_dir):
+		connection = sqlite3.connect(os.path.join(log_dir, bitCollector_state._default_file_name))
+
+		try:
+			return connection.execute("SELECT path, digests FROM file_state").fetchall()
+
+		finally:
+			connection.close()
+
+	def test_batches_and_lookups(self):
+		cache     = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "host", batch_size=3)
+		path      = os.path.join(self.temp_dir, "thread", "file_0")
+		stat_info = os.lstat(path)
+
+		self.assertEqual(cache.isUnchanged(path, stat_info), 0)
+		cache.record(path, stat_info, {"md5": "0" * 32})
+		self.assertEqual(cache.isUnchanged(path, stat_info), 1)
+		self.assertEqual(cache.getDigests(path, stat_info, ["md5"]), {"md5": "0" * 32})
+		self.assertEqual(cache.getDigests(path, stat_info, ["md5", "sha1"]), None)
+		cache.close()
+
+		cache = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "host")
+		self.assertEqual(cache.getDigests(path, stat_info, ["md5"]), {"md5": "0" * 32})
+		self.assertEqual(cache.getState(path + "_missing"), None)
+		cache.close()
+
+		## Every host keeps its own states.
+		cache = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "other host")
+		self.assertEqual(cache.isUnchanged(path, stat_info), 0)
+		cache.close()
+
+	def checkDigestsAreKept(self):
+		cache     = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "host")
+		paths     = [os.path.join(self.temp_dir, "thread", "file_" + str(index)) for index in range(3)]
+		stat_info = [os.lstat(path) for path in paths]
+
+		for index in range(3):
+			cache.record(paths[index], stat_info[index], {"md5": str(index) * 32})
+
+		## The same batch, then a later one, recording the unchanged files without digests.
+		cache.record(paths[0], stat_info[0])
+		cache.flush()
+		cache.record(paths[1], stat_info[1])
+
+		## A changed file loses its digests.
+		with open(paths[2], "a") as file_fd:
+			file_fd.write("changed")
+
+		cache.record(paths[2], os.lstat(paths[2]))
+		cache.close()
+
+		cache = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "host")
+		self.assertEqual([cache.getDigests(paths[index], stat_info[index], ["md5"]) for index in range(2)], [{"md5": "0" * 32}, {"md5": "1" * 32}])
+		self.assertEqual(cache.getDigests(paths[2], os.lstat(paths[2]), ["md5"]), None)
+		self.assertEqual(cache.isUnchanged(paths[2], os.lstat(paths[2])), 1)
+		cache.close()
+
+	def test_keeps_the_digests_of_unchanged_files(self):
+		self.checkDigestsAreKept()
+
+	def test_keeps_the_digests_of_unchanged_files_without_upserts(self):
+		upsert_supported = bitCollector_state._upsert_supported
+		bitCollector_state._upsert_supported = 0
+
+		try:
+			self.checkDigestsAreKept()
+
+		finally:
+			bitCollector_state._upsert_supported = upsert_supported
+
+	def test_hash_service_reuses_the_digests_of_unchanged_files(self):
+		cache        = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "host")
+		hash_service = bitCollector_hashing.HashService(algorithms=["md5"], state_cache=cache)
+		path         = os.path.join(self.temp_dir, "thread", "file_0")
+
+		self.assertEqual(hash_service.hashFile(path), bitCollector_hashing.HashService(algorithms=["md5"]).hashFile(path))
+
+		## The stored digests are returned as long as the file looks unchanged.
+		cache.record(path, os.stat(path), {"md5": "0" * 32})
+		self.assertEqual(hash_service.hashFile(path), {"md5": "0" * 32})
+
+		with open(path, "a") as file_fd:
+			file_fd.write("changed")
+
+		self.assertNotEqual(hash_service.hashFile(path), {"md5": "0" * 32})
+		cache.close()
+
+	def test_walker_leaves_out_unchanged_files(self):
+		cache  = bitCollector_state.FileStateCache(os.path.join(self.temp_dir, "state.sqlite"), "host")
+		walker = bitCollector_walker.FileWalker(state_cache=cache)
+		root   = os.path.join(self.temp_dir, "thread")
+
+		for entry in walker.walk([root], changed_only=1):
+			if (entry.path.endswith("_1") == 0):
+				cache.record(entry.path, os.lstat(entry.path))
+
+		self.assertEqual([os.path.basename(entry.path) for entry in walker.walk([root], changed_only=1)], ["file_1"])
+		self.assertEqual(len(list(walker.walk([root]))), 20)
+		cache.close()
+
+	def test_thread_and_process_modules_share_the_cache(self):
+		module_list = [{"name": "StateModule", "parameters": [{"root": os.path.join(self.temp_dir, "thread")}]},
+		               {"name": "StateModule", "execution": "process", "parameters": [{"root": os.path.join(self.temp_dir, "process")}]}]
+
+		log_dir = tests.runFramework(self.temp_dir, {"StateModule": _state_module}, {"module_list": module_list, "state_cache": {"batch_size": 7}})
+
+		self.assertEqual(len(self.readStates(log_dir)), 40)
+
+	def test_process_module_keeps_the_digests_hashed_at_close(self):
+		module_list = [{"name": "StateModule", "execution": "process", "parameters": [{"root": os.path.join(self.temp_dir, "process")}, {"emit": 1}]}]
+
+		log_dir = tests.runFramework(self.temp_dir, {"StateModule": _state_module}, {"module_list": module_list, "state_cache": {"batch_size": 7}})
+		states  = self.readStates(log_dir)
+
+		self.assertEqual(len(states), 20)
+		self.assertTrue(all(digests != None for path, digests in states))
+
+if (__name__ == "__main__"):
+	unittest.main()
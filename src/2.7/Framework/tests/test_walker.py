@@ -0,0 +1,106 @@
+## File Name: test_walker.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This script tests the filters of the file walker and stopping a walk early.
+
+## Standard imports (Static)
+import logging, os, shutil, tempfile, threading, unittest
+
+## Framework imports
+import tests
+import bitCollector_framework, bitCollector_walker
+
+class FileWalkerTestCase(unittest.TestCase):
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+		self.walker   = bitCollector_walker.FileWalker(worker_count=3)
+
+		self.sizes = {"a.txt": 10, "b.log": 100, os.path.join("cache", "c.txt"): 1000, os.path.join("docs", "d.txt"): 0, os.path.join("docs", "e.log"): 10, os.path.join("docs", "deep", "f.txt"): 100}
+
+		for name, size in self.sizes.items():
+			self.writeFile(name, size)
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+	def writeFile(self, name, size):
+		path = os.path.join(self.temp_dir, name)
+
+		if (os.path.isdir(os.path.dirname(path)) == 0):
+			os.makedirs(os.path.dirname(path))
+
+		with open(path, "wb") as walk_fd:
+			walk_fd.write("x" * size)
+
+	def walkNames(self, **walk_filter):
+		return sorted(os.path.relpath(entry.path, self.temp_dir) for entry in self.walker.walk([self.temp_dir], **walk_filter))
+
+	def test_finds_every_file_with_its_stat(self):
+		entries = list(self.walker.walk([self.temp_dir]))
+
+		self.assertEqual(sorted(os.path.relpath(entry.path, self.temp_dir) for entry in entries), sorted(self.sizes.keys()))
+
+		for entry in entries:
+			stat_info = os.lstat(entry.path)
+			self.assertEqual((entry.size, entry.mtime, entry.inode), (stat_info.st_size, stat_info.st_mtime, stat_info.st_ino))
+
+	def test_matches_names_and_paths(self):
+		self.assertEqual(self.walkNames(include=["*.txt"]), ["a.txt", os.path.join("cache", "c.txt"), os.path.join("docs", "d.txt"), os.path.join("docs", "deep", "f.txt")])
+		self.assertEqual(self.walkNames(include=["*.txt"], exclude=["deep"]), ["a.txt", os.path.join("cache", "c.txt"), os.path.join("docs", "d.txt")])
+		self.assertEqual(self.walkNames(exclude=["*.log", "cache", "docs"]), ["a.txt"])
+
+		## Patterns with a path separator are matched against the full path.
+		self.assertEqual(self.walkNames(include=[os.path.join(self.temp_dir, "docs", "*.log")]), [os.path.join("docs", "e.log")])
+		self.assertEqual(self.walkNames(exclude=[os.path.join(self.temp_dir, "docs")]), ["a.txt", "b.log", os.path.join("cache", "c.txt")])
+
+	def test_applies_size_and_time_predicates(self):
+		self.assertEqual(self.walkNames(min_size=100), ["b.log", os.path.join("cache", "c.txt"), os.path.join("docs", "deep", "f.txt")])
+		self.assertEqual(self.walkNames(min_size=1, max_size=10), ["a.txt", os.path.join("docs", "e.log")])
+
+		os.utime(os.path.join(self.temp_dir, "a.txt"), (1000000000, 1000000000))
+		self.assertEqual(self.walkNames(older_than=1000000001), ["a.txt"])
+		self.assertEqual(len(self.walkNames(newer_than=1000000000)), 5)
+
+	def test_skips_roots_which_are_not_directories(self):
+		handler = tests.RecordingHandler()
+		roots   = [os.path.join(self.temp_dir, "a.txt"), os.path.join(self.temp_dir, "missing")]
+
+		logging.getLogger("FileWalker").addHandler(handler)
+
+		try:
+			self.assertEqual(list(self.walker.walk(roots)), [])
+
+		finally:
+			logging.getLogger("FileWalker").removeHandler(handler)
+
+		self.assertEqual([record.getMessage() for record in handler.records], ["Unable to walk: " + root + ". Not a directory." for root in roots])
+
+	def test_stops_when_asked(self):
+		stop_token = bitCollector_framework.StopToken(threading.Event())
+		stop_token.requestStop()
+
+		self.assertEqual(list(self.walker.walk([self.temp_dir], stop_token=stop_token)), [])
+
+		## With a single worker, at most the output queue and the directory being listed are walked after the stop.
+		for directory in range(30):
+			for count in range(100):
+				self.writeFile(os.path.join("many", str(directory), str(count)), 0)
+
+		walker     = bitCollector_walker.FileWalker(worker_count=1)
+		stop_token = bitCollector_framework.StopToken(threading.Event())
+		entries    = walker.walk([os.path.join(self.temp_dir, "many")], stop_token=stop_token)
+
+		entries.next()
+		stop_token.requestStop()
+
+		self.assertTrue(len(list(entries)) < 1024 + 100)
+
+	def test_stops_when_the_caller_stops_reading(self):
+		entries = self.walker.walk([self.temp_dir])
+
+		self.assertTrue(os.path.relpath(entries.next().path, self.temp_dir) in self.sizes)
+		entries.close()
+
+if (__name__ == "__main__"):
+	unittest.main()
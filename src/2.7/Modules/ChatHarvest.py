@@ -1,17 +1,513 @@
-####
-## This module is for harvesting logs from Skype, AIM, MSN Messenger,
-## and other chat apps
-####
-import os, sys, time, json, loggin
-
-_module_version = "ChatHarvest v0.0.1"
-
-class ModuleSettings():
-	def __init__(self, module):
-		for key in module:
-			if (key == "name"):
-				self.name == module[key]
-			elif (key == "parameters"):
-					for param, value in param_pair.iteritems():
-						if (param == "Lucases"):
-							print "Lucases detected! => " + value
+## File Name: ChatHarvest.py
+##
+## Author(s): BitCollector Team
+##
+## Purpose: This BitCollector module harvests the message histories of Skype, AIM and MSN Messenger.
+##          Every history is parsed incrementally and each message is yielded as a record, so memory
+##          use stays flat no matter how large the history is.
+##          1. MSN Messenger XML histories are read with iterparse and every message element is cleared once parsed.
+##          2. Plain-text AIM logs are read line by line.
+##          3. Skype main.db databases are copied, together with their journals, and the copy is read in fetchmany batches.
+##          The histories, logs and databases are read through the framework's resource governor.
+##          The homes of every local user are searched for client profiles, and the profiles are harvested
+##          concurrently, one profile per worker thread. Every record is tagged with its user and profile,
+##          and with its keyword hits when the framework keyword search is configured.
+##
+## Parameters (All Optional)
+## 1. clients       - The list of clients to harvest. ("skype", "aim" and "msn") Defaults to all of them.
+## 2. batch_size    - The number of Skype messages fetched from the database at a time.
+## 3. output_file   - The path to the file to append the records to as JSON lines. Records are emitted to the framework's record pipeline otherwise.
+## 4. worker_count  - The number of profiles harvested at the same time.
+## 5. logging_level - Overrides the root logging level for this module.
+
+## Standard Imports
+import glob, json, logging, os, Queue, re, shutil, sqlite3, tempfile, threading, time
+
+## cElementTree is much faster and is available on every CPython 2.7 build, but fall back just in case.
+try:
+	import xml.etree.cElementTree as ElementTree
+
+except ImportError:
+	import xml.etree.ElementTree as ElementTree
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_module_version = "ChatHarvest Module v0.1.0"
+
+## The parameters of this module. The framework checks them at startup and passes them in module_dict["settings"].
+## They are read from the source without importing the module, so they must be literals.
+_module_parameters = {
+	"clients"       : {"type" : "list", "default" : ["skype", "aim", "msn"], "choices" : ["skype", "aim", "msn"]},
+	"batch_size"    : {"type" : "int", "default" : 1000, "min" : 1},
+	"output_file"   : {"type" : "string", "default" : None},
+	"worker_count"  : {"type" : "int", "default" : 4, "min" : 1},
+	"logging_level" : {"type" : "string", "default" : "info", "choices" : ["debug", "info", "warning", "error", "critical"]}
+}
+
+## The directories holding the user homes on each OS type.
+_home_locations = {
+	"nix"     : ["/home/*", "/root"],
+	"mac"     : ["/Users/*"],
+	"windows" : [os.environ.get("SystemDrive", "C:") + "\\Users\\*", os.environ.get("SystemDrive", "C:") + "\\Documents and Settings\\*"]
+}
+
+## Directories below the home locations which are not user homes.
+_ignored_homes = ["Shared", "Public", "Default", "Default User", "All Users", "Guest"]
+
+## The directories relative to a home directory which hold each client's profiles, and the files to harvest in them.
+_client_locations = {
+	"skype" : {"roots" : ["AppData/Roaming/Skype", "Application Data/Skype", ".Skype", "Library/Application Support/Skype"], "include" : ["main.db"]},
+	"aim"   : {"roots" : ["Documents/AIM Logs", "My Documents/AIM Logs"], "include" : ["*.txt", "*.log"]},
+	"msn"   : {"roots" : ["Documents/My Received Files", "My Documents/My Received Files"], "include" : ["*/History/*.xml"]}
+}
+
+## The top-level elements of a Messenger history which describe a single event.
+_msn_record_tags = ("Message", "Invitation", "InvitationResponse", "Join", "Leave")
+
+## Plain-text AIM logs start a message with "[timestamp] sender: text" or "(timestamp) sender: text".
+## Lines which do not match continue the previous message.
+_aim_message_pattern = re.compile(r'^[\[\(](?P<timestamp>[^\]\)]+)[\]\)]\s*(?P<sender>[^:]+?):\s?(?P<text>.*)$')
+_aim_session_pattern = re.compile(r'^Session (?P<event>Start|Close) \((?P<conversation>[^)]*)\)')
+
+## Class Declarations
+
+## Class Name: RecordWriter
+##
+## Purpose: Write out the records of every profile worker, one record at a time.
+class RecordWriter():
+	## Method Name: __init__
+	##
+	## Purpose: Open the output file if there is one.
+	##
+	## Parameters
+	## 1. root_logger      - The logger from the main method.
+	## 2. output_file      - The path to the file to append the records to, or None to emit them to the record pipeline.
+	## 3. keyword_searcher - The KeywordSearcher offered by the framework, or None.
+	## 4. output           - The record pipeline offered by the framework in module_dict["output"].
+	def __init__(self, root_logger, output_file, keyword_searcher, output):
+		self.root_logger      = root_logger
+		self.keyword_searcher = keyword_searcher
+		self.output           = output
+		self.output_handle    = None
+		self.user_counts      = {}
+		self.lock             = threading.Lock()
+
+		if (output_file != None):
+			self.output_handle = open(output_file, 'a')
+
+	## Method Name: write
+	##
+	## Purpose: Write out a single record. The profile workers call this at the same time, so it is locked.
+	##          Records emitted to the pipeline are searched by it, and emit blocks while the pipeline is behind.
+	##
+	## Parameters
+	## 1. record - The record to write out.
+	def write(self, record):
+		if (self.output_handle == None):
+			self.output.emit(record)
+			return
+
+		if (self.keyword_searcher != None):
+			hits = self.keyword_searcher.searchRecord(record)
+
+			if (len(hits) > 0):
+				record["keyword_hits"] = [{"field" : field, "offset" : offset, "keyword" : keyword} for field, offset, keyword in hits]
+
+		line = json.dumps(record)
+
+		with self.lock:
+			self.output_handle.write(line + "\n")
+
+	## Method Name: addCount
+	##
+	## Purpose: Add the number of records harvested from one of a user's profiles.
+	##
+	## Parameters
+	## 1. user         - The user the profile belongs to.
+	## 2. record_count - The number of records harvested.
+	def addCount(self, user, record_count):
+		with self.lock:
+			self.user_counts[user] = self.user_counts.get(user, 0) + record_count
+
+	## Method Name: close
+	##
+	## Purpose: Close the output file.
+	def close(self):
+		if (self.output_handle != None):
+			self.output_handle.close()
+
+## Classless Method Declarations
+
+## Method Name: makeRecord
+##
+## Purpose: Build the record describing a single chat message.
+##
+## Parameters
+## 1. client       - The chat client the message was harvested from.
+## 2. source       - The path to the history the message was read from.
+## 3. timestamp    - The time the message was sent as the client stored it.
+## 4. sender       - The name of the sender.
+## 5. recipients   - The names of the recipients, comma-separated.
+## 6. conversation - The conversation or session the message belongs to.
+## 7. text         - The text of the message.
+def makeRecord(client, source, timestamp, sender, recipients, conversation, text):
+	return {"type" : "chat_message", "client" : client, "source" : source, "timestamp" : timestamp, "sender" : sender, "recipients" : recipients, "conversation" : conversation, "text" : text}
+
+## Method Name: parseMsnHistory
+##
+## Purpose: Yield the messages of an MSN Messenger XML history.
+##          Each top-level element is cleared from the tree once it has been turned into a record.
+##
+## Parameters
+## 1. path      - The path to the XML history.
+## 2. open_file - The framework's openFile, which reads the history through the resource governor.
+def parseMsnHistory(path, open_file):
+	root  = None
+	depth = 0
+
+	history_file = open_file(path)
+
+	try:
+		for event, element in ElementTree.iterparse(history_file, events=("start", "end")):
+			if (event == "start"):
+				if (root == None):
+					root = element
+
+				depth += 1
+				continue
+
+			depth -= 1
+
+			## Only the direct children of <Log> describe events. Their children are read through them.
+			if (depth != 1):
+				continue
+
+			if (element.tag in _msn_record_tags):
+				sender     = element.find("From/User")
+				recipients = [user.get("FriendlyName", "") for user in element.findall("To/User")]
+
+				if (sender != None):
+					sender = sender.get("FriendlyName", "")
+
+				yield makeRecord("msn", path, element.get("DateTime"), sender, ", ".join(recipients), element.get("SessionID"), element.findtext("Text"))
+
+			## Drop the parsed element and everything the root still references.
+			element.clear()
+			root.clear()
+
+	finally:
+		history_file.close()
+
+## Method Name: parseAimLog
+##
+## Purpose: Yield the messages of a plain-text AIM log, reading it line by line.
+##
+## Parameters
+## 1. path      - The path to the log.
+## 2. open_file - The framework's openFile, which reads the log through the resource governor.
+def parseAimLog(path, open_file):
+	conversation = os.path.splitext(os.path.basename(path))[0]
+	message      = None
+
+	log_file = open_file(path, encoding='utf-8', errors='replace')
+
+	try:
+		for line in log_file:
+			line = line.rstrip(u"\r\n")
+
+			## Session lines end the message before them and name the conversation of the messages after them.
+			session_match = _aim_session_pattern.match(line)
+			if (session_match):
+				if (message != None):
+					yield message
+					message = None
+
+				if (session_match.group("event") == "Start"):
+					conversation = session_match.group("conversation")
+
+				continue
+
+			message_match = _aim_message_pattern.match(line)
+			if (message_match):
+				if (message != None):
+					yield message
+
+				message = makeRecord("aim", path, message_match.group("timestamp"), message_match.group("sender"), None, conversation, message_match.group("text"))
+
+			## Lines which do not start a message continue the previous one.
+			elif (message != None and line != u""):
+				message["text"] += u"\n" + line
+
+		if (message != None):
+			yield message
+
+	finally:
+		log_file.close()
+
+## Method Name: parseSkypeDatabase
+##
+## Purpose: Yield the messages of a Skype main.db in batches of rows. A running Skype keeps the database locked and part
+##          of it in its journal, so the database and its journals are copied to a temporary directory and the copy is read.
+##          SQLite also never writes to the evidence this way, not even to recover a journal.
+##
+## Parameters
+## 1. path       - The path to main.db.
+## 2. batch_size - The number of rows fetched at a time.
+## 3. open_file  - The framework's openFile, which copies the database through the resource governor.
+def parseSkypeDatabase(path, batch_size, open_file):
+	copy_dir  = tempfile.mkdtemp(prefix="ChatHarvest_")
+	copy_path = os.path.join(copy_dir, os.path.basename(path))
+
+	try:
+		## The copy is the only read of the evidence, so it is the read the resource governor sees.
+		for suffix in ["", "-wal", "-journal"]:
+			if (suffix == "" or os.path.isfile(path + suffix)):
+				source_file = open_file(path + suffix)
+
+				try:
+					with open(copy_path + suffix, 'wb') as copy_file:
+						shutil.copyfileobj(source_file, copy_file)
+
+				finally:
+					source_file.close()
+
+		connection = sqlite3.connect(copy_path)
+
+		try:
+			## Walk the messages in rowid order so SQLite does not have to sort them.
+			cursor = connection.cursor()
+			cursor.execute("SELECT Messages.timestamp, Messages.author, Messages.from_dispname, Messages.dialog_partner, Conversations.displayname, Messages.body_xml FROM Messages LEFT JOIN Conversations ON Conversations.id = Messages.convo_id ORDER BY Messages.id")
+
+			while (1):
+				rows = cursor.fetchmany(batch_size)
+
+				if (len(rows) == 0):
+					break
+
+				for timestamp, author, from_dispname, dialog_partner, conversation, body in rows:
+					if (timestamp != None):
+						timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+					yield makeRecord("skype", path, timestamp, from_dispname or author, dialog_partner, conversation, body)
+
+		finally:
+			connection.close()
+
+	finally:
+		shutil.rmtree(copy_dir, ignore_errors=True)
+
+## Method Name: discoverUserHomes
+##
+## Purpose: Find the home directory of every local user.
+##
+## Parameters
+## 1. root_logger - The logger from the main method.
+## 2. os_type     - The OS type of the target machine (mac, nix or windows)
+##
+## Returns
+## A list of (user, home_dir) tuples.
+def discoverUserHomes(root_logger, os_type):
+	root_logger.debug("Entering ChatHarvest.discoverUserHomes()")
+
+	user_homes = []
+
+	if (os_type in _home_locations):
+		for pattern in _home_locations[os_type]:
+			for home_dir in sorted(glob.glob(pattern)):
+				user = os.path.basename(home_dir)
+
+				if (os.path.isdir(home_dir) and user not in _ignored_homes):
+					user_homes.append((user, home_dir))
+
+	## Fall back to the home of the user running the framework.
+	if (len(user_homes) == 0):
+		root_logger.warning("Unable to enumerate the user homes for OS type: " + os_type + ". Searching the current user's home only.")
+		home_dir = os.path.expanduser("~")
+		user_homes.append((os.path.basename(home_dir), home_dir))
+
+	return user_homes
+
+## Method Name: discoverProfiles
+##
+## Purpose: Find the client profiles in every user home.
+##          A profile is a directory directly below a client's location, i.e. a Skype account, AIM screen name or Messenger account.
+##
+## Parameters
+## 1. user_homes - The list of (user, home_dir) tuples.
+## 2. clients    - The list of clients to search for.
+##
+## Returns
+## A list of (user, client, profile_dir) tuples.
+def discoverProfiles(user_homes, clients):
+	profiles = []
+
+	for user, home_dir in user_homes:
+		for client in clients:
+			for location in _client_locations[client]["roots"]:
+				location = os.path.join(home_dir, location)
+
+				try:
+					names = sorted(os.listdir(location))
+
+				except OSError:
+					continue
+
+				for name in names:
+					profile_dir = os.path.join(location, name)
+
+					## Skype keeps shared data next to the profiles. Only directories holding a main.db are profiles.
+					if (os.path.isdir(profile_dir) and (client != "skype" or os.path.isfile(os.path.join(profile_dir, "main.db")))):
+						profiles.append((user, client, profile_dir))
+
+	return profiles
+
+## Method Name: parseHistory
+##
+## Purpose: Yield the messages of a history with the parser of its client.
+##
+## Parameters
+## 1. client             - The client the history belongs to.
+## 2. path               - The path to the history.
+## 3. framework_settings - The FrameworkSettings whose resource governor the history is read under.
+## 4. module_settings    - The settings object of this module.
+def parseHistory(client, path, framework_settings, module_settings):
+	if (client == "msn"):
+		return parseMsnHistory(path, framework_settings.openFile)
+
+	elif (client == "aim"):
+		return parseAimLog(path, framework_settings.openFile)
+
+	return parseSkypeDatabase(path, module_settings.batch_size, framework_settings.openFile)
+
+## Method Name: harvestHistory
+##
+## Purpose: Parse a single history and write out its records one at a time, tagged with their user and profile.
+##
+## Parameters
+## 1. root_logger        - The logger from the main method.
+## 2. profile            - The (user, client, profile_dir) tuple the history belongs to.
+## 3. path               - The path to the history.
+## 4. framework_settings - The FrameworkSettings passed to the main method.
+## 5. module_settings    - The settings object of this module.
+## 6. record_writer      - The RecordWriter to write the records with.
+## 7. stop_token         - The stop token passed in module_dict by the framework.
+##
+## Returns
+## The number of records harvested.
+def harvestHistory(root_logger, profile, path, framework_settings, module_settings, record_writer, stop_token):
+	root_logger.debug("Entering ChatHarvest.harvestHistory() for " + path)
+
+	user, client, profile_dir = profile
+	record_count = 0
+
+	try:
+		for record in parseHistory(client, path, framework_settings, module_settings):
+			record["user"]    = user
+			record["profile"] = os.path.basename(profile_dir)
+			record_writer.write(record)
+
+			record_count += 1
+
+			if (stop_token.isStopRequested()):
+				root_logger.warning("Asked to stop by the framework. Stopping in " + path + ".")
+				break
+
+	except (IOError, OSError, sqlite3.Error, SyntaxError), error:
+		## cElementTree raises a SyntaxError subclass when a history is malformed or truncated.
+		root_logger.warning("Unable to finish parsing " + client + " history: " + path + ". " + str(error))
+
+	root_logger.info("Harvested %d %s messages of user %s from %s" % (record_count, client, user, path))
+	return record_count
+
+## Method Name: profileWorker
+##
+## Purpose: Harvest profiles from the queue until it is empty.
+##
+## Parameters
+## 1. root_logger        - The logger from the main method.
+## 2. profile_queue      - The queue of (user, client, profile_dir) tuples.
+## 3. framework_settings - The FrameworkSettings passed to the main method. Its FileWalker finds the histories.
+## 4. module_settings    - The settings object of this module.
+## 5. record_writer      - The RecordWriter to write and count the records with.
+## 6. stop_token         - The stop token passed in module_dict by the framework.
+## 7. account            - The account passed in module_dict by the framework to count the histories with.
+def profileWorker(root_logger, profile_queue, framework_settings, module_settings, record_writer, stop_token, account):
+	while (stop_token.isStopRequested() == 0):
+		try:
+			profile = profile_queue.get_nowait()
+
+		except Queue.Empty:
+			break
+
+		user, client, profile_dir = profile
+		root_logger.debug("Harvesting " + client + " profile of user " + user + ": " + profile_dir)
+
+		record_count = 0
+		for entry in framework_settings.file_walker.walk([profile_dir], include=_client_locations[client]["include"], stop_token=stop_token):
+			record_count += harvestHistory(root_logger, profile, entry.path, framework_settings, module_settings, record_writer, stop_token)
+			account.addFiles()
+
+		record_writer.addCount(user, record_count)
+
+## Method Name: main (Required)
+##
+## Purpose: Serves as the entry point into the script.
+##
+## Parameters (All Required)
+## 1. thread_id          - The ID of the thread containing this BitCollector module.
+## 2. path_to_main       - The absolute path to the framework which initialized this BitCollector module.
+## 3. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+## 4. platform_details   - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
+## 5. module_dict        - The name and parameters to pass to the BitCollector module to be initialized as a dictionary.
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	## The parameters were checked by the framework at startup.
+	module_settings = module_dict["settings"]
+	stop_token      = module_dict["stop_token"]
+
+	## Override the root logging level for this module.
+	root_logger = logging.getLogger("ChatHarvest")
+	root_logger.setLevel(getattr(logging, module_settings.logging_level.upper()))
+
+	## Find every client profile of every local user.
+	user_homes = discoverUserHomes(root_logger, platform_details.os_type)
+	profiles   = discoverProfiles(user_homes, module_settings.clients)
+	root_logger.info("Found %d chat profiles in %d user homes." % (len(profiles), len(user_homes)))
+
+	profile_queue = Queue.Queue()
+	for profile in profiles:
+		profile_queue.put(profile)
+
+	record_writer = RecordWriter(root_logger, module_settings.output_file, framework_settings.keyword_searcher, module_dict["output"])
+	workers       = []
+
+	try:
+		## Harvest one profile per worker so that the profiles are read at the same time.
+		for count in range(min(module_settings.worker_count, len(profiles))):
+			worker = threading.Thread(target=profileWorker, args=(root_logger, profile_queue, framework_settings, module_settings, record_writer, stop_token, module_dict["account"]), name="ChatHarvest-" + str(count))
+			worker.start()
+			workers.append(worker)
+
+		for worker in workers:
+			worker.join()
+
+	finally:
+		moduleCleanUp(root_logger, record_writer)
+
+	for user in sorted(record_writer.user_counts):
+		root_logger.info("Harvested %d chat messages of user %s." % (record_writer.user_counts[user], user))
+
+	root_logger.info("Harvested %d chat messages in total." % sum(record_writer.user_counts.values()))
+
+	## All is well, return 0 to the framework.
+	return 0
+
+## Method Name: moduleCleanUp
+##
+## Purpose: Close the output file.
+##
+## Parameters
+## 1. root_logger   - The logger from the main method.
+## 2. record_writer - The RecordWriter of the module.
+def moduleCleanUp(root_logger, record_writer):
+	root_logger.debug("Entering ChatHarvest.moduleCleanUp()")
+
+	record_writer.close()
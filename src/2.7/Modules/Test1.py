@@ -12,85 +12,20 @@
 ##                    Make your code legible, though. :)
 
 ## Standard Imports
-import json, logging, os, sys, time
+import json, logging, os, sys
 
 ## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
 _module_version = "Test1 Module v0.2.1 Released 2015-03-09"
 
-## Class Declarations
-
-## Class Name: ModuleSettings
-##
-## Purpose: Hold information about the settings required to run this BitCollector module.
-class ModuleSettings():
-	## Method Name: __init__
-	##
-	## Purpose: Initialize the settings required to start the framework.
-	##
-	## Parameters
-	## 1. module - The name and parameters to pass to the BitCollector module to be initialized.
-	def __init__(self, module):
-		## Loop through the dictionary containing this module's name and settings.
-		for key in module:
-			## Grab the name of this module as known by bitCollector_main
-			if (key == "name"):
-				self.name = module[key]
-
-			## Grab the dictionary containing the list of settings dictionaries (head spinning yet? Mine was)
-			elif (key == "parameters"):
-				## Loop through the list of dictionaries containing setting names and values.
-				for param_pair in module[key]:
-					## Finally loop through each dictionary containing a single settings' name and value.
-					for param, value in param_pair.iteritems():
-						## Use an if-elif block to extract the settings and store them in named variables.
-						if (param == "par1"):
-							self.par1 = str(value)
-
-						elif (param == "par2"):
-							self.par2 = value
-
-						elif (param == "logging_level"):
-							self.logging_level = value
-
-						else:
-							print "Startup - Test1.RuntimeSettings.__init__ - ERROR - Unexpected parameter: " + str(param) + ". Ignoring."
-
-		## Call the method to initialize the module-level logger.
-		self.initializeLogger()
-
-	## Method Name: initializeLogger
-	##
-	## Purpose: Initializes the logger for this BitCollector module.
-	##
-	def initializeLogger(self):
-		## Initialize the logger for this BitCollector module.
-		self.logger = logging.getLogger(self.__class__.__name__)
-
-		## Override the logging level from the root logger. (Optional)
-		## This is meant to give access to debug-level logging without
-		## needing to see the debug output form the framework.
-
-		## Set the logging level for the root logger. (Can be overridden for each module.)
-		if (self.logging_level.upper() == "DEBUG"):
-			self.logger.setLevel(logging.DEBUG)
-
-		elif (self.logging_level.upper() == "INFO"):
-			self.logger.setLevel(logging.INFO)
-
-		elif (self.logging_level.upper() == "WARNING"):
-			self.logger.setLevel(logging.WARNING)
-
-		elif (self.logging_level.upper() == "ERROR"):
-			self.logger.setLevel(logging.ERROR)
-
-		elif (self.logging_level.upper() == "CRITICAL"):
-			self.logger.setLevel(logging.CRITICAL)
-
-		else:
-			print "Startup - bitCollector_main.RuntimeSettings.initializeRootLogger - WARNING - Unknown logging level: " + self.logging_level + ". Defaulting to DEBUG."
-			self.logger.setLevel(logging.DEBUG)
-
-		self.logger.debug("Successfully started Test1 logger!")
+## The parameters of this module. (Optional)
+## The framework checks the configured parameters against them at startup, fills in the defaults
+## and passes them in module_dict["settings"]. They must be literals.
+## Leave them out to parse module_dict["parameters"] yourself.
+_module_parameters = {
+	"par1"          : {"type" : "string", "required" : 1, "description" : "Printed to show the parameters reached the module."},
+	"par2"          : {"type" : "int", "default" : 0},
+	"logging_level" : {"type" : "string", "default" : "info", "choices" : ["debug", "info", "warning", "error", "critical"]}
+}
 
 ## Classless Method Declarations
 
@@ -101,14 +36,18 @@ class ModuleSettings():
 ##
 ## Parameters
 ## 1. root_logger - The logger from the main method.
-def createTempFile(root_logger):
+## 2. stop_token  - The stop token passed in module_dict by the framework.
+def createTempFile(root_logger, stop_token):
 	root_logger.debug("Entering Test1.createTempFile()")
 
 	root_logger.info("Now you see me.")
 	temp_handle = open('temp.txt', 'w+')
 	temp_handle.write('Now you see me...')
 	temp_handle.close()
-	time.sleep(10.0)
+
+	## Wait on the stop token rather than sleeping so the framework can cancel the module. (Optional)
+	if (stop_token.wait(10.0)):
+		root_logger.warning("Asked to stop by the framework. Cleaning up early.")
 
 ## Method Name: getHomeDirectory
 ##
@@ -150,16 +89,8 @@ def getHomeDirectory(root_logger, os_type):
 ## 4. platform_details - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
 ## 5. module_dict      - The name and parameters to pass to the BitCollector module to be initialized as a dictionary.
 def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
-	## Add the additional search path for bitCollector_main.
-	## Might not be needed, but good practice for now.
-	sys.path.append(path_to_main)
-
-	## Import bitCollector_main.
-	## Might not be needed, but good practice for now.
-	import bitCollector_main
-
-	## Initialize an instance of the ModuleSettings class to store the settings required to start the module.
-	module_settings = ModuleSettings(module_dict)
+	## Grab the settings object the framework built from _module_parameters.
+	module_settings = module_dict["settings"]
 
 	## Create a logger for methods called by main()
 	## Set it's logging level. (Optional)
@@ -178,10 +109,18 @@ def main(thread_id, path_to_main, framework_settings, platform_details, module_d
 
 	print "Operating System Type: " + platform_details.os_type
 	## Call the method to get the logged-in user's home directory.
-	print "Home directory: " + getHomeDirectory(root_logger, platform_details.os_type)
+	home_dir = getHomeDirectory(root_logger, platform_details.os_type)
+	print "Home directory: " + home_dir
+
+	## Emit the collected data as a record rather than mixing it into the log. (Optional)
+	## The framework writes it to the run's record file next to the log.
+	module_dict["output"].emit({"type" : "home_directory", "os_type" : platform_details.os_type, "path" : home_dir, "par1" : module_settings.par1, "par2" : module_settings.par2})
 
 	## Call the method to create a temp file.
-	createTempFile(root_logger)
+	createTempFile(root_logger, module_dict["stop_token"])
+
+	## Let the framework count the file in the run report.
+	module_dict["account"].addFiles(1)
 
 	## Call the module cleanup method.
 	moduleCleanUp(root_logger)
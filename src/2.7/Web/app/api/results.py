@@ -0,0 +1,53 @@
+from flask import jsonify, request, abort
+from . import api
+from .. import evidence
+
+
+def bad_request(message):
+    response = jsonify({'error': 'bad request', 'message': message})
+    response.status_code = 400
+    return response
+
+
+def get_cursors():
+    per_page = request.args.get('per_page', type=int)
+    if per_page is not None:
+        per_page = max(1, min(per_page, 1000))
+    return {'before': request.args.get('before', type=int),
+            'after': request.args.get('after', type=int),
+            'per_page': per_page}
+
+
+@api.route('/runs')
+def get_runs():
+    page = evidence.get_runs(host=request.args.get('host'), **get_cursors())
+    return jsonify(page.to_json())
+
+
+@api.route('/runs/<int:run_id>')
+def get_run(run_id):
+    return jsonify(evidence.get_run(run_id) or abort(404))
+
+
+@api.route('/runs/<int:run_id>/logs')
+def get_log_entries(run_id):
+    run = evidence.get_run(run_id) or abort(404)
+    try:
+        start = evidence.parse_time(request.args.get('start'))
+        end = evidence.parse_time(request.args.get('end'))
+    except ValueError as e:
+        return bad_request(str(e))
+    page = evidence.get_log_entries(
+        run, module=request.args.get('module'),
+        level=request.args.get('level'), start=start, end=end,
+        **get_cursors())
+    return jsonify(page.to_json())
+
+
+@api.route('/runs/<int:run_id>/records')
+def get_records(run_id):
+    run = evidence.get_run(run_id) or abort(404)
+    page = evidence.get_records(
+        run, module=request.args.get('module'),
+        record_type=request.args.get('type'), **get_cursors())
+    return jsonify(page.to_json())
@@ -0,0 +1,65 @@
+import json
+import os
+import time
+from flask import Response, abort, current_app, request, stream_with_context
+from . import api
+from .. import evidence, logtail
+
+
+@api.route('/runs/<int:run_id>/tail')
+def tail_log(run_id):
+    """Stream the entries of a run's log as server-sent events as they are
+    written. Browsers reconnect with the Last-Event-ID header and resume
+    where they left off."""
+    run = evidence.get_run(run_id) or abort(404)
+    # Logs written compressed can not be followed.
+    if not os.path.isfile(run['log_file']):
+        abort(404)
+    level = evidence.LEVEL_NUMBERS.get(request.args.get('level', '').upper(),
+                                       0)
+    module = request.args.get('module')
+    position = logtail.parse_event_id(request.headers.get('Last-Event-ID'))
+    interval = current_app.config['LOG_TAIL_INTERVAL']
+    keepalive = current_app.config['LOG_TAIL_KEEPALIVE']
+
+    def stream():
+        tail = logtail.LogTail(run['log_file'], position)
+        try:
+            yield 'retry: 2000\n\n'
+            idle = 0
+            ended = False
+            while not tail.finished:
+                entries = tail.poll()
+                for event_id, entry in entries:
+                    if evidence.LEVEL_NUMBERS.get(entry['level'], 0) < level:
+                        continue
+                    if module and entry['module'] != module:
+                        continue
+                    idle = 0
+                    yield 'id: %s\nevent: entry\ndata: %s\n\n' % (
+                        event_id, json.dumps(entry))
+                if entries:
+                    continue
+                if ended:
+                    break
+                time.sleep(interval)
+                idle += interval
+                # Only HTML logs have a footer. The framework flushes the
+                # last entries right after it ends the run, so the stream
+                # ends once a poll after that finds nothing more.
+                ended = evidence.get_run(run_id)['end_time'] is not None
+                if ended:
+                    continue
+                # Writing is the only way to notice a client has gone. The id
+                # also moves the resume point past entries filtered out.
+                if idle >= keepalive:
+                    idle = 0
+                    yield 'id: %s\n\n' % tail.position()
+            yield 'event: end\ndata: {}\n\n'
+        finally:
+            tail.close()
+
+    return Response(stream_with_context(stream()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
@@ -0,0 +1,213 @@
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, g
+
+# Read access to the evidence database the framework loads its runs into.
+# Pages are fetched with keyset pagination: every table is append-only, so
+# a page is the rows below (or above) a cursor id, which the indexes serve
+# without skipping over the earlier pages the way OFFSET would.
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# The numeric levels are what the (run_id, level, id) index is built on.
+LEVEL_NUMBERS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40,
+                 'CRITICAL': 50}
+
+TIME_FORMATS = ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M:%S',
+                '%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+_count_cache = {}
+_count_cache_size = 1000
+_count_lock = threading.Lock()
+
+
+class EvidenceUnavailable(Exception):
+    pass
+
+
+class Page(object):
+    def __init__(self, items, next_cursor, prev_cursor, count):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.count = count
+
+    def to_json(self):
+        return {'items': self.items, 'next': self.next_cursor,
+                'prev': self.prev_cursor, 'count': self.count}
+
+
+def get_db():
+    db = getattr(g, '_evidence_db', None)
+    if db is None:
+        path = current_app.config['EVIDENCE_DATABASE']
+        if not os.path.exists(path):
+            raise EvidenceUnavailable('No evidence database at ' + path)
+        db = sqlite3.connect(path, timeout=5)
+        db.row_factory = sqlite3.Row
+        # The framework is the only writer. WAL lets it keep loading a run
+        # while it is browsed.
+        db.execute('PRAGMA query_only = ON')
+        g._evidence_db = db
+    return db
+
+
+def close_db(exception=None):
+    db = getattr(g, '_evidence_db', None)
+    if db is not None:
+        db.close()
+        g._evidence_db = None
+
+
+def parse_time(value):
+    """Parse a local time from a filter, or return None when left blank."""
+    if not value:
+        return None
+    for time_format in TIME_FORMATS:
+        try:
+            return time.mktime(time.strptime(value, time_format))
+        except ValueError:
+            pass
+    raise ValueError('Invalid time: ' + value)
+
+
+def get_run(run_id):
+    row = get_db().execute('SELECT * FROM runs WHERE id = ?',
+                           (run_id,)).fetchone()
+    if row is None:
+        return None
+    return dict(row)
+
+
+def get_hosts():
+    return [row[0] for row in get_db().execute(
+        'SELECT DISTINCT host FROM runs ORDER BY host')]
+
+
+def get_runs(host=None, before=None, after=None, per_page=None):
+    clauses, args = [], []
+    if host:
+        clauses.append('host = ?')
+        args.append(host)
+    return _get_page('runs', '*', clauses, args, before, after, per_page,
+                     _count('runs', clauses, args))
+
+
+def get_log_entries(run, module=None, level=None, start=None, end=None,
+                    before=None, after=None, per_page=None):
+    clauses, args = ['run_id = ?'], [run['id']]
+    if module:
+        clauses.append('module = ?')
+        args.append(module)
+    if level:
+        clauses.append('level = ?')
+        args.append(LEVEL_NUMBERS.get(level.upper(), -1))
+    # A time range is turned into the range of ids logged in it through
+    # the (run_id, created) index, so the page is still read by id. Entries
+    # from worker processes can be loaded a little out of order, so the ids
+    # in between are filtered by time too. The unary plus keeps SQLite from
+    # reading the page through the created index and sorting it by id.
+    if start is not None:
+        first = get_db().execute('SELECT MIN(id) FROM log_entries '
+                                 'WHERE run_id = ? AND created >= ?',
+                                 (run['id'], start)).fetchone()[0]
+        if first is None:
+            return Page([], None, None, 0)
+        clauses.extend(['id >= ?', '+created >= ?'])
+        args.extend([first, start])
+    if end is not None:
+        last = get_db().execute('SELECT MAX(id) FROM log_entries '
+                                'WHERE run_id = ? AND created < ?',
+                                (run['id'], end)).fetchone()[0]
+        if last is None:
+            return Page([], None, None, 0)
+        clauses.extend(['id <= ?', '+created < ?'])
+        args.extend([last, end])
+    if len(clauses) == 1 and run['end_time'] is not None:
+        count = run['log_entry_count']
+    else:
+        count = _count('log_entries', clauses, args, run['end_time'])
+    return _get_page('log_entries',
+                     'id, created, level, level_name, module, traceback, '
+                     'message', clauses, args, before, after, per_page, count)
+
+
+def get_records(run, module=None, record_type=None, before=None, after=None,
+                per_page=None):
+    clauses, args = ['run_id = ?'], [run['id']]
+    if module:
+        clauses.append('module = ?')
+        args.append(module)
+    if record_type:
+        clauses.append('type = ?')
+        args.append(record_type)
+    if len(clauses) == 1 and run['end_time'] is not None:
+        count = run['record_count']
+    else:
+        count = _count('records', clauses, args, run['end_time'])
+    return _get_page('records', 'id, module, type, record_id, created, data',
+                     clauses, args, before, after, per_page, count)
+
+
+def _get_page(table, columns, clauses, args, before, after, per_page, count):
+    """Fetch the page of rows below the before cursor, above the after
+    cursor or, without either, the newest page. Newest rows come first."""
+    per_page = per_page or current_app.config['EVIDENCE_PER_PAGE']
+    clauses, args = list(clauses), list(args)
+    if after is not None:
+        clauses.append('id > ?')
+        args.append(after)
+        order = 'ASC'
+    else:
+        if before is not None:
+            clauses.append('id < ?')
+            args.append(before)
+        order = 'DESC'
+    query = 'SELECT ' + columns + ' FROM ' + table
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += ' ORDER BY id ' + order + ' LIMIT ?'
+
+    rows = [dict(row) for row in
+            get_db().execute(query, args + [per_page + 1])]
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if after is not None:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or after is not None:
+            next_cursor = rows[-1]['id']
+        if before is not None or (after is not None and has_more):
+            prev_cursor = rows[0]['id']
+    return Page(rows, next_cursor, prev_cursor, count)
+
+
+def _count(table, clauses, args, end_time=None):
+    """Count the rows matching a filter. Counts are cached, for good once
+    the run has finished loading and for a short while until then."""
+    key = (current_app.config['EVIDENCE_DATABASE'], table, tuple(clauses),
+           tuple(args))
+    now = time.time()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+    query = 'SELECT COUNT(*) FROM ' + table
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    count = get_db().execute(query, args).fetchone()[0]
+
+    if end_time is not None:
+        expires = float('inf')
+    else:
+        expires = now + current_app.config['EVIDENCE_COUNT_TTL']
+    with _count_lock:
+        if len(_count_cache) >= _count_cache_size:
+            _count_cache.clear()
+        _count_cache[key] = (expires, count)
+    return count
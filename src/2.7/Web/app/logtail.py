@@ -0,0 +1,214 @@
+import json
+import os
+import re
+
+# Incremental reading of the log file a run is writing. The tail keeps its
+# file open and remembers the inode and offset it has read up to, so every
+# poll costs one stat and one read of whatever was appended since. When the
+# framework rotates the log (<log>.1, <log>.2, ...) the open file is read to
+# its end before moving on to the new one.
+
+ROTATED_SEGMENTS = 99
+
+_read_size = 65536
+_poll_budget = 1048576
+
+_html_row = re.compile(r'^<tr><td>(?P<time>[^<]*)</td><td>(?P<traceback>[^<]*)'
+                       r'</td><td>(?P<level>[A-Z]+)</td><td>(?P<message>.*)'
+                       r'</td></tr>\s*$', re.S)
+_csv_row = re.compile(r'^(?P<time>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d),'
+                      r'(?P<traceback>[^,]*),(?P<level>[A-Z]+),'
+                      r'(?P<message>.*?)\s*$', re.S)
+
+
+def parse_event_id(event_id):
+    """Turn a Last-Event-ID header back into an (inode, offset) position."""
+    try:
+        inode, offset = event_id.split(':')
+        return int(inode), int(offset)
+    except (AttributeError, ValueError):
+        return None
+
+
+class LogTail(object):
+    def __init__(self, path, position=None):
+        self.path = path
+        self.log_format = os.path.splitext(path)[1].lstrip('.').lower()
+        self.handle = None
+        self.inode = None
+        self.offset = 0
+        self.buffer = ''
+        self.pending = None
+        self.pending_start = 0
+        self.pending_end = 0
+        self.newer = []
+        self.finished = False
+        self.open(position)
+
+    def open(self, position):
+        """Open the segment holding a resumed position, or the end of the
+        current log file to follow it from now on."""
+        if position is not None:
+            segments = self.list_segments()
+            inodes = [inode for inode, segment_path in segments]
+            if position[0] in inodes:
+                index = inodes.index(position[0])
+                self.switch(segments[index][1], position[1])
+                self.newer = inodes[index + 1:]
+                return
+        self.switch(self.path)
+        self.handle.seek(0, os.SEEK_END)
+        self.offset = self.handle.tell()
+
+    def list_segments(self):
+        """List the uncompressed segments from the oldest to the newest as
+        (inode, path) pairs. Compressed segments can not be resumed in."""
+        segments = []
+        for number in range(ROTATED_SEGMENTS, -1, -1):
+            segment_path = self.path
+            if number:
+                segment_path += '.%d' % number
+            try:
+                segments.append((os.stat(segment_path).st_ino, segment_path))
+            except OSError:
+                pass
+        return segments
+
+    def switch(self, path, offset=0):
+        if self.handle is not None:
+            self.handle.close()
+        self.handle = open(path, 'rb')
+        self.handle.seek(offset)
+        self.inode = os.fstat(self.handle.fileno()).st_ino
+        self.offset = offset
+        self.buffer = ''
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def position(self):
+        """The event id of everything read so far."""
+        if self.pending is not None:
+            return '%d:%d' % (self.inode, self.pending_start)
+        return '%d:%d' % (self.inode, self.offset)
+
+    def next_segment(self):
+        """Find the file written after the open one, if it was rotated."""
+        while self.newer:
+            inode = self.newer.pop(0)
+            for segment_inode, segment_path in self.list_segments():
+                if segment_inode == inode:
+                    return segment_path
+        try:
+            if os.stat(self.path).st_ino != self.inode:
+                return self.path
+        except OSError:
+            pass
+        return None
+
+    def poll(self):
+        """Return the entries written since the last poll as a list of
+        (event_id, entry) pairs."""
+        entries = []
+        read = 0
+        while read < _poll_budget:
+            data = self.handle.read(_read_size)
+            if data:
+                read += len(data)
+                entries.extend(self.feed(data))
+                continue
+            next_path = self.next_segment()
+            if next_path is None:
+                break
+            # The framework closes a segment before it creates the next one,
+            # so this read is sure to reach the real end of the old segment.
+            entries.extend(self.feed(self.handle.read()))
+            entries.extend(self.flush())
+            self.switch(next_path)
+        if read == 0:
+            # Nothing more was written, so an entry waiting for the lines
+            # that may continue it is complete.
+            entries.extend(self.flush())
+        return entries
+
+    def feed(self, data):
+        entries = []
+        lines = (self.buffer + data).split('\n')
+        self.buffer = lines.pop()
+        for line in lines:
+            start = self.offset
+            self.offset += len(line) + 1
+            entry = self.parse_line(line + '\n', start)
+            if entry is not None:
+                entries.append(entry)
+        # The HTML footer is written without a newline.
+        if self.log_format == 'html' and self.buffer.startswith('</table>'):
+            self.finished = True
+        return entries
+
+    def parse_line(self, line, start):
+        if self.log_format == 'jsonl':
+            return self.parse_json(line)
+
+        if self.log_format == 'html':
+            if self.pending is None:
+                if not line.startswith('<tr><td>'):
+                    return None
+                self.pending, self.pending_start = '', start
+            self.pending += line
+            if not line.rstrip().endswith('</td></tr>'):
+                return None
+            return self.flush_pending(_html_row)
+
+        # In CSV logs an entry is complete once the next one starts.
+        entry = None
+        if _csv_row.match(line):
+            if self.pending is not None:
+                entry = self.flush_pending(_csv_row)
+            self.pending, self.pending_start = line, start
+            self.pending_end = self.offset
+        elif self.pending is not None:
+            self.pending += line
+            self.pending_end = self.offset
+        return entry
+
+    def parse_json(self, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        message = record.get('message', '')
+        if record.get('traceback'):
+            message += '\n' + record['traceback']
+        return ('%d:%d' % (self.inode, self.offset), {
+            'time': record.get('time'),
+            'module': record.get('module'),
+            'traceback': '%s.%s.%s' % (record.get('module'),
+                                       record.get('logger'),
+                                       record.get('function')),
+            'level': record.get('level'),
+            'message': message})
+
+    def flush(self):
+        if self.pending is None or self.log_format != 'csv':
+            return []
+        entry = self.flush_pending(_csv_row)
+        if entry is None:
+            return []
+        return [entry]
+
+    def flush_pending(self, pattern):
+        if self.log_format == 'csv':
+            end = self.pending_end
+        else:
+            end = self.offset
+        match = pattern.match(self.pending)
+        self.pending = None
+        if match is None:
+            return None
+        entry = match.groupdict()
+        entry['module'] = entry['traceback'].split('.', 1)[0]
+        entry['message'] = entry['message'].rstrip()
+        return '%d:%d' % (self.inode, end), entry
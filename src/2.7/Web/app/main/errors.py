@@ -1,5 +1,6 @@
 from flask import render_template, request, jsonify
 from . import main
+from ..evidence import EvidenceUnavailable
 
 
 @main.app_errorhandler(403)
@@ -30,3 +31,16 @@ def internal_server_error(e):
         response.status_code = 500
         return response
     return render_template('500.html'), 500
+
+
+@main.app_errorhandler(EvidenceUnavailable)
+def evidence_unavailable(e):
+    if request.accept_mimetypes.accept_json and \
+            not request.accept_mimetypes.accept_html:
+        response = jsonify({'error': 'service unavailable',
+                            'message': str(e)})
+        response.status_code = 503
+        return response
+    return render_template('error_page.html', code=503,
+                           name='Service Unavailable',
+                           description=str(e)), 503
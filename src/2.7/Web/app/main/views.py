@@ -1,7 +1,9 @@
+import time
 from flask import render_template, redirect, url_for, abort, flash, request,\
     current_app, make_response
 from . import main
 from .forms import GenerateConfiguration
+from .. import evidence
 
 @main.route('/', methods=['GET', 'POST'])
 def index():
@@ -9,3 +11,65 @@ def index():
     if form.validate_on_submit():
         print("Hey look at that!")
     return render_template('index.html', form=form)
+
+
+@main.app_template_filter('timestamp')
+def timestamp(value):
+    # The same local time format the framework writes its logs in.
+    if value is None:
+        return ''
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(value))
+
+
+@main.route('/runs')
+def runs():
+    host = request.args.get('host', '')
+    page = evidence.get_runs(host=host,
+                             before=request.args.get('before', type=int),
+                             after=request.args.get('after', type=int))
+    return render_template('runs.html', page=page, hosts=evidence.get_hosts(),
+                           host=host)
+
+
+@main.route('/runs/<int:run_id>/logs')
+def log_entries(run_id):
+    run = evidence.get_run(run_id) or abort(404)
+    filters = {'module': request.args.get('module', ''),
+               'level': request.args.get('level', ''),
+               'start': request.args.get('start', ''),
+               'end': request.args.get('end', '')}
+    try:
+        start = evidence.parse_time(filters['start'])
+        end = evidence.parse_time(filters['end'])
+    except ValueError as e:
+        flash(str(e) + '. Showing every time instead.')
+        start = end = None
+        filters['start'] = filters['end'] = ''
+    page = evidence.get_log_entries(
+        run, module=filters['module'], level=filters['level'], start=start,
+        end=end, before=request.args.get('before', type=int),
+        after=request.args.get('after', type=int))
+    return render_template('log_entries.html', run=run, page=page,
+                           filters=filters, levels=evidence.LEVELS)
+
+
+@main.route('/runs/<int:run_id>/records')
+def records(run_id):
+    run = evidence.get_run(run_id) or abort(404)
+    filters = {'module': request.args.get('module', ''),
+               'type': request.args.get('type', '')}
+    page = evidence.get_records(
+        run, module=filters['module'], record_type=filters['type'],
+        before=request.args.get('before', type=int),
+        after=request.args.get('after', type=int))
+    return render_template('records.html', run=run, page=page,
+                           filters=filters)
+
+
+@main.route('/runs/<int:run_id>/live')
+def live_log(run_id):
+    run = evidence.get_run(run_id) or abort(404)
+    filters = {'module': request.args.get('module', ''),
+               'level': request.args.get('level', '')}
+    return render_template('live_log.html', run=run, filters=filters,
+                           levels=evidence.LEVELS)
@@ -11,6 +11,12 @@ class Config:
     APP_NAME = "BitCollector"
     SECRET_KEY = "SOME_SECRET_STRING!_THAT_ISNT_REALLY_USED!"
     SSL_DISABLE = False
+    EVIDENCE_DATABASE = os.environ.get('EVIDENCE_DATABASE') or \
+        os.path.join(basedir, 'bitCollector_evidence.sqlite')
+    EVIDENCE_PER_PAGE = 50
+    EVIDENCE_COUNT_TTL = 30
+    LOG_TAIL_INTERVAL = 0.5
+    LOG_TAIL_KEEPALIVE = 15
 
     @staticmethod
     def init_app(app):
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import logtail
+
+
+class LogTailTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'run_1.csv')
+        self.log = open(self.path, 'w')
+        self.write('Date & Time,Traceback,Level,Message\n')
+
+    def tearDown(self):
+        self.log.close()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, data):
+        self.log.write(data)
+        self.log.flush()
+
+    def messages(self, tail):
+        return [entry['message'] for event_id, entry in tail.poll()]
+
+    def test_follows_new_entries_only(self):
+        self.write('2015-03-09T17:41:05,Test1.module_root.main,INFO,old\n')
+        tail = logtail.LogTail(self.path)
+        self.assertEqual(self.messages(tail), [])
+        self.write('2015-03-09T17:41:06,Test1.module_root.main,ERROR,boom\n'
+                   'Traceback (most recent call last):\n')
+        # The entry may go on until the next one starts or writing pauses.
+        self.assertEqual(self.messages(tail) + self.messages(tail),
+                         ['boom\nTraceback (most recent call last):'])
+
+    def test_follows_rotation_and_resumes(self):
+        tail = logtail.LogTail(self.path)
+        self.write('2015-03-09T17:41:05,Test1.module_root.main,INFO,one\n')
+        position = logtail.parse_event_id(tail.position())
+        self.write('2015-03-09T17:41:06,Test1.module_root.main,INFO,two\n')
+        self.log.close()
+        os.rename(self.path, self.path + '.1')
+        self.log = open(self.path, 'w')
+        self.write('2015-03-09T17:41:07,Test1.module_root.main,INFO,three\n')
+        self.assertEqual(self.messages(tail) + self.messages(tail),
+                         ['one', 'two', 'three'])
+
+        resumed = logtail.LogTail(self.path, position)
+        self.assertEqual(self.messages(resumed) + self.messages(resumed),
+                         ['one', 'two', 'three'])
@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from app import create_app
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'Framework'))
+import bitCollector_evidence
+
+
+class ResultsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'evidence.sqlite')
+
+        store = bitCollector_evidence.EvidenceStore(self.db_path,
+                                                    store_logs=0)
+        store.start('host1', '/logs/run.html', 'test')
+        store.addRecords([('ChatHarvest', 'chat_message', None, 100.0 + i,
+                           json.dumps({'text': 'message %d' % i}))
+                          for i in range(5)])
+        for i in range(10):
+            if i % 2:
+                level = (40, 'ERROR')
+            else:
+                level = (20, 'INFO')
+            store.addLogEntry((1000.0 + i,) + level +
+                              ('Test1', 'Test1.module_root.main',
+                               'entry %d' % i))
+        store.close()
+
+        self.app = create_app('testing')
+        self.app.config['EVIDENCE_DATABASE'] = self.db_path
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.app_context.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def get_json(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.get_data(as_text=True))
+
+    def test_keyset_pages(self):
+        page = self.get_json('/api/v1.0/runs/1/logs?per_page=4')
+        self.assertEqual(page['count'], 10)
+        self.assertEqual([entry['message'] for entry in page['items']],
+                         ['entry 9', 'entry 8', 'entry 7', 'entry 6'])
+        self.assertIsNone(page['prev'])
+
+        older = self.get_json('/api/v1.0/runs/1/logs?per_page=4&before=%d'
+                              % page['next'])
+        self.assertEqual([entry['message'] for entry in older['items']],
+                         ['entry 5', 'entry 4', 'entry 3', 'entry 2'])
+
+        newer = self.get_json('/api/v1.0/runs/1/logs?per_page=4&after=%d'
+                              % older['prev'])
+        self.assertEqual(newer['items'], page['items'])
+        self.assertIsNone(newer['prev'])
+
+        last = self.get_json('/api/v1.0/runs/1/logs?per_page=4&before=%d'
+                             % older['next'])
+        self.assertEqual(len(last['items']), 2)
+        self.assertIsNone(last['next'])
+
+    def test_per_page_is_clamped(self):
+        page = self.get_json('/api/v1.0/runs/1/logs?per_page=-5')
+        self.assertEqual(len(page['items']), 1)
+        page = self.get_json('/api/v1.0/runs/1/logs?per_page=5000')
+        self.assertEqual(len(page['items']), 10)
+
+    def test_tail_ends_with_the_run(self):
+        log_path = os.path.join(self.temp_dir, 'run.csv')
+        with open(log_path, 'w') as log:
+            log.write('2015-03-09T17:41:05,Test1.module_root.main,INFO,one\n')
+        store = bitCollector_evidence.EvidenceStore(self.db_path,
+                                                    store_logs=0)
+        store.start('host1', log_path, 'test')
+        store.close()
+
+        self.app.config['LOG_TAIL_INTERVAL'] = 0.01
+        response = self.client.get('/api/v1.0/runs/2/tail')
+        self.assertTrue(response.get_data(as_text=True).endswith(
+            'event: end\ndata: {}\n\n'))
+
+    def test_filters(self):
+        page = self.get_json('/api/v1.0/runs/1/logs?level=ERROR')
+        self.assertEqual(page['count'], 5)
+        self.assertTrue(all(entry['level_name'] == 'ERROR'
+                            for entry in page['items']))
+
+        page = self.get_json('/api/v1.0/runs/1/records?type=chat_message')
+        self.assertEqual(page['count'], 5)
+
+        page = self.get_json('/api/v1.0/runs?host=host2')
+        self.assertEqual(page['items'], [])
+
+        response = self.client.get('/api/v1.0/runs/1/logs?start=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_time_filters(self):
+        def local_time(seconds):
+            return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(seconds))
+
+        url = '/api/v1.0/runs/1/logs?start=%s&end=%s' % (local_time(1003),
+                                                         local_time(1007))
+        page = self.get_json(url)
+        self.assertEqual(page['count'], 4)
+        self.assertEqual([entry['message'] for entry in page['items']],
+                         ['entry 6', 'entry 5', 'entry 4', 'entry 3'])
+
+        page = self.get_json(url + '&level=ERROR&module=Test1')
+        self.assertEqual([entry['message'] for entry in page['items']],
+                         ['entry 5', 'entry 3'])
+
+        page = self.get_json('/api/v1.0/runs/1/logs?per_page=2&start=%s'
+                             % local_time(1006))
+        self.assertEqual([entry['message'] for entry in page['items']],
+                         ['entry 9', 'entry 8'])
+        older = self.get_json('/api/v1.0/runs/1/logs?per_page=2&start=%s'
+                              '&before=%d' % (local_time(1006), page['next']))
+        self.assertEqual([entry['message'] for entry in older['items']],
+                         ['entry 7', 'entry 6'])
+        self.assertIsNone(older['next'])
+
+        page = self.get_json('/api/v1.0/runs/1/logs?start=%s'
+                             % local_time(2000))
+        self.assertEqual((page['items'], page['count']), ([], 0))
+
+    def test_pages_render(self):
+        for url in ('/runs', '/runs/1/logs?level=ERROR', '/runs/1/records'):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get('/runs/2/logs').status_code, 404)
+
+    def test_missing_database(self):
+        self.app.config['EVIDENCE_DATABASE'] = os.path.join(self.temp_dir,
+                                                            'missing.sqlite')
+        self.assertEqual(self.client.get('/runs').status_code, 503)